@@ -7,14 +7,15 @@ import uuid
 from typing import List, Optional
 from pathlib import Path
 
-import boto3
-from botocore.client import Config
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+import httpx
+from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from supabase import Client, create_client
 from dotenv import load_dotenv
 
+from aws_clients import get_client
+
 
 LOGGER = logging.getLogger("canvas_service")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -77,7 +78,7 @@ def get_env(name: str, default: Optional[str] = None) -> str:
 
 
 def create_s3_client():
-    return boto3.client("s3", config=Config(signature_version="s3v4"))
+    return get_client("s3", signature_version="s3v4")
 
 
 def create_supabase() -> Client:
@@ -89,6 +90,9 @@ def create_supabase() -> Client:
 S3_BUCKET = get_env("S3_BUCKET", default=os.getenv("AWS_S3_BUCKET"))
 PRESIGN_EXPIRY = int(os.getenv("PRESIGN_EXPIRY_SECONDS", "3600"))
 CLOUDFRONT_DOMAIN = os.getenv("CLOUDFRONT_DOMAIN", "https://d3bg7alr1qwred.cloudfront.net")
+# Orchestrator base URL for GPU warm-up signals (unset: no signals)
+ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "").rstrip("/")
+WARM_TIMEOUT_SECONDS = float(os.getenv("WARM_TIMEOUT_SECONDS", "2"))
 
 s3 = create_s3_client()
 sb = create_supabase()
@@ -117,6 +121,25 @@ def health_check():
     return {"status": "healthy", "service": "canvas-service"}
 
 
+def warm_gpu(reason: str) -> None:
+    """Tell the orchestrator a GPU edit is likely soon so it can start the GPU early.
+
+    Runs as a background task after the response is sent; failures are logged
+    and never affect the request.
+    """
+    if not ORCHESTRATOR_URL:
+        return
+    try:
+        res = httpx.post(
+            f"{ORCHESTRATOR_URL}/api/v1/gpu/warm",
+            json={"reason": reason},
+            timeout=WARM_TIMEOUT_SECONDS,
+        )
+        LOGGER.info("GPU warm signal (%s): %s", reason, res.json().get("action"))
+    except Exception as exc:  # noqa: BLE001
+        LOGGER.warning("GPU warm signal failed: %s", exc)
+
+
 def ensure_session_exists(session_id: str) -> None:
     try:
         res = sb.table("sessions").select("id").eq("id", session_id).single().execute()
@@ -128,12 +151,16 @@ def ensure_session_exists(session_id: str) -> None:
 
 
 @app.post("/session", response_model=CreateSessionResponse)
-def create_session() -> CreateSessionResponse:
-    """Create a new canvas session in Supabase and return its ID."""
+def create_session(background_tasks: BackgroundTasks) -> CreateSessionResponse:
+    """Create a new canvas session in Supabase and return its ID.
+
+    Also signals the orchestrator to warm up the GPU for the first edit.
+    """
     session_id = str(uuid.uuid4())
     try:
         sb.table("sessions").insert({"id": session_id}).execute()
         LOGGER.info("Created session %s", session_id)
+        background_tasks.add_task(warm_gpu, "session")
         return CreateSessionResponse(session_id=session_id)
     except Exception as exc:  # noqa: BLE001
         LOGGER.exception("Create session failed: %s", exc)
@@ -142,12 +169,14 @@ def create_session() -> CreateSessionResponse:
 
 @app.post("/upload")
 async def upload_image(
+    background_tasks: BackgroundTasks,
     session_id: str = Form(...),
     file: UploadFile = File(...),
 ):
     """Upload an image to S3 under the session prefix and return a presigned URL.
 
-    Also records image metadata in Supabase Postgres.
+    Also records image metadata in Supabase Postgres and signals the
+    orchestrator to warm up the GPU (an edit usually follows an upload).
     """
     # Validate session through Supabase
     ensure_session_exists(session_id)
@@ -193,6 +222,7 @@ async def upload_image(
         # Return CloudFront URL instead of S3 presigned URL for better performance
         url = f"{CLOUDFRONT_DOMAIN}/{key}"
         LOGGER.info("Uploaded %s to s3://%s/%s (CloudFront: %s)", filename, S3_BUCKET, key, url)
+        background_tasks.add_task(warm_gpu, "upload")
         return {"key": key, "url": url, "x": 0.0, "y": 0.0}
     except HTTPException:
         raise
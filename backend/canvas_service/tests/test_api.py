@@ -28,6 +28,10 @@ class _Res:
     def __init__(self, data: Any) -> None:
         self.data = data
 
+    def execute(self) -> "_Res":
+        # insert() returns a builder in supabase-py; callers always .execute() it
+        return self
+
 
 class FakeQuery:
     def __init__(self, table: str, db: "FakeSupabase") -> None:
@@ -192,3 +196,34 @@ def test_upload_and_list_images(app_with_fakes):
     items = lr.json()["items"]
     assert len(items) == 1
     assert items[0]["key"] == up["key"]
+
+
+def test_session_and_upload_send_warm_signals(app_with_fakes, monkeypatch: pytest.MonkeyPatch):
+    server, client = app_with_fakes
+    reasons: List[str] = []
+    monkeypatch.setattr(server, "warm_gpu", reasons.append)
+
+    sid = client.post("/session").json()["session_id"]
+    files = {"file": ("test.png", io.BytesIO(b"\x89PNG\r\n\x1a\n"), "image/png")}
+    assert client.post("/upload", files=files, data={"session_id": sid}).status_code == 200
+
+    assert reasons == ["session", "upload"]
+
+
+def test_warm_gpu_never_raises(app_with_fakes, monkeypatch: pytest.MonkeyPatch):
+    server, _ = app_with_fakes
+    calls: List[str] = []
+
+    def failing_post(url: str, **_kwargs: Any) -> None:
+        calls.append(url)
+        raise server.httpx.ConnectError("orchestrator down")
+
+    monkeypatch.setattr(server.httpx, "post", failing_post)
+
+    monkeypatch.setattr(server, "ORCHESTRATOR_URL", "")
+    server.warm_gpu("session")
+    assert calls == []
+
+    monkeypatch.setattr(server, "ORCHESTRATOR_URL", "http://orchestrator.test")
+    server.warm_gpu("session")
+    assert calls == ["http://orchestrator.test/api/v1/gpu/warm"]
@@ -32,6 +32,26 @@ if [ ! -f "$SERVICE_DIR/sqs_to_comfy_adapter.py" ]; then
     echo "   Please copy the script to $SERVICE_DIR first"
     exit 1
 fi
+if [ ! -f "$SERVICE_DIR/aws_clients.py" ]; then
+    echo "   ERROR: aws_clients.py not found in $SERVICE_DIR"
+    echo "   Please copy aws_clients.py next to the adapter script first"
+    exit 1
+fi
+if [ ! -f "$SERVICE_DIR/pipeline_stages.py" ]; then
+    echo "   ERROR: pipeline_stages.py not found in $SERVICE_DIR"
+    echo "   Please copy pipeline_stages.py next to the adapter script first"
+    exit 1
+fi
+if [ ! -f "$SERVICE_DIR/sqs_consumer.py" ]; then
+    echo "   ERROR: sqs_consumer.py not found in $SERVICE_DIR"
+    echo "   Please copy sqs_consumer.py next to the adapter script first"
+    exit 1
+fi
+if [ ! -f "$SERVICE_DIR/task_claims.py" ]; then
+    echo "   ERROR: task_claims.py not found in $SERVICE_DIR"
+    echo "   Please copy task_claims.py next to the adapter script first"
+    exit 1
+fi
 chmod +x "$SERVICE_DIR/sqs_to_comfy_adapter.py"
 
 # Step 3: Install Python dependencies
@@ -66,6 +86,12 @@ fi
 # Update service file with SQS Queue URL
 sed -i "s|Environment=\"SQS_QUEUE_URL=.*\"|Environment=\"SQS_QUEUE_URL=$SQS_QUEUE_URL\"|" "$SERVICE_FILE"
 
+# Optional priority lanes (interactive / deferred queues)
+read -p "   Enter interactive lane queue URL (optional): " SQS_INTERACTIVE_QUEUE_URL
+read -p "   Enter deferred lane queue URL (optional): " SQS_DEFERRED_QUEUE_URL
+sed -i "s|Environment=\"SQS_INTERACTIVE_QUEUE_URL=.*\"|Environment=\"SQS_INTERACTIVE_QUEUE_URL=$SQS_INTERACTIVE_QUEUE_URL\"|" "$SERVICE_FILE"
+sed -i "s|Environment=\"SQS_DEFERRED_QUEUE_URL=.*\"|Environment=\"SQS_DEFERRED_QUEUE_URL=$SQS_DEFERRED_QUEUE_URL\"|" "$SERVICE_FILE"
+
 # Step 7: Reload systemd
 echo ""
 echo "7. Reloading systemd..."
@@ -6,12 +6,23 @@ This script runs on the GPU EC2 instance and acts as a bridge between
 SQS task queue and the local ComfyUI Unified API.
 
 Responsibilities:
-1. Poll SQS queue for new tasks (long polling)
-2. Update DynamoDB status to 'processing'
+1. Poll the SQS priority lanes for new tasks (weighted, see LaneScheduler)
+2. Claim the task in DynamoDB: conditional pending -> 'processing' with this
+   worker's ID and a lease (skipped if cancelled, finished or claimed)
 3. Call local ComfyUI API with task parameters
-4. Poll ComfyUI for completion
+4. Wait for ComfyUI completion (long polling), interrupting the job if the
+   task is cancelled
 5. Update DynamoDB with final status and results
-6. Delete SQS message
+6. Delete SQS messages in batches (see sqs_consumer.BatchConsumer); while
+   a task runs, a heartbeat keeps its message invisible and renews the lease
+
+Pipelining: COMFY_PIPELINE_DEPTH tasks run at once, so while ComfyUI
+renders one prompt the next ones are already submitted. The Unified API
+downloads their inputs and queues their prompts meanwhile, and the
+previous job's upload and DynamoDB/SQS bookkeeping run after ComfyUI has
+moved on, so the GPU does not idle between jobs under sustained load.
+Interactive tasks are queued at the front of the ComfyUI queue, so they
+wait for the prompt being rendered but not for the ones queued behind it.
 
 Note: This script does NOT handle shutdown logic - that's handled by
 CloudWatch Alarm + Lambda based on queue metrics.
@@ -23,27 +34,51 @@ import json
 import time
 import signal
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 
+from aws_clients import get_client, get_table
+from pipeline_stages import finish_stage
+from sqs_consumer import BatchConsumer
+import task_claims
+from task_claims import TaskCancelled, claim_task, renew_leases
+
 # Configuration from environment variables
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', '')
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'task_store')
 COMFYUI_API_URL = os.getenv('COMFYUI_API_URL', 'http://localhost:8000')
 POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '20'))  # Long polling wait time
+# Tasks submitted to ComfyUI at once: 1 renders + (depth - 1) queued (1 = no pipelining)
+COMFY_PIPELINE_DEPTH = int(os.getenv('COMFY_PIPELINE_DEPTH', '2'))
+# Long-poll wait of a Unified API job status request; bounds how late a
+# cancellation is noticed while a job renders (seconds)
+COMFY_WAIT_SECONDS = int(os.getenv('COMFY_WAIT_SECONDS', '10'))
+# Min seconds between job status requests when the API answers without waiting
+COMFY_POLL_INTERVAL = float(os.getenv('COMFY_POLL_INTERVAL', '1'))
+
+# Priority lanes (the orchestrator routes jobs by priority); unset lanes are skipped
+SQS_INTERACTIVE_QUEUE_URL = os.getenv('SQS_INTERACTIVE_QUEUE_URL', '')
+SQS_DEFERRED_QUEUE_URL = os.getenv('SQS_DEFERRED_QUEUE_URL', '')
+# Relative share of receives per lane when all lanes have work
+LANE_WEIGHTS = os.getenv('LANE_WEIGHTS', 'interactive=6,normal=3,deferred=1')
+# Long-poll wait on the interactive lane when every lane is empty (seconds)
+LANE_IDLE_WAIT = int(os.getenv('LANE_IDLE_WAIT', '5'))
+VISIBILITY_TIMEOUT = 300  # 5 minutes to process
 
 # Initialize AWS clients
-sqs_client = boto3.client('sqs', region_name=AWS_REGION)
-dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-table = dynamodb.Table(DYNAMODB_TABLE)
+sqs_client = get_client('sqs', AWS_REGION)
 
 # Global flag for graceful shutdown
 shutdown_flag = False
 
 
+def task_table():
+    """DynamoDB task table for the calling thread (resources are not thread-safe)."""
+    return get_table(DYNAMODB_TABLE, AWS_REGION)
+
+
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     global shutdown_flag
@@ -51,58 +86,155 @@ def signal_handler(signum, frame):
     shutdown_flag = True
 
 
+class LaneScheduler:
+    """
+    Weighted drain order over the priority lanes.
+
+    Uses smooth weighted round-robin: with weights 6/3/1 and all lanes busy,
+    every 10 receives go 6 to interactive, 3 to normal and 1 to deferred,
+    interleaved, so batches never starve and never block interactive work.
+    An empty lane hands its turn to the next lane in priority order.
+    """
+
+    def __init__(self, lanes: List[Tuple[str, str, int]]):
+        """
+        Args:
+            lanes: (name, queue_url, weight) in priority order
+        """
+        self.lanes = lanes
+        self.current = {name: 0 for name, _, _ in lanes}
+        self.total_weight = sum(weight for _, _, weight in lanes)
+
+    def order(self) -> List[Tuple[str, str, int]]:
+        """Return the lanes to try for the next receive, best first."""
+        for name, _, weight in self.lanes:
+            self.current[name] += weight
+        first = max(self.lanes, key=lambda lane: self.current[lane[0]])
+        self.current[first[0]] -= self.total_weight
+        return [first] + [lane for lane in self.lanes if lane is not first]
+
+
+def build_lanes() -> List[Tuple[str, str, int]]:
+    """Build (name, queue_url, weight) for every configured lane, in priority order."""
+    weights = {}
+    for part in LANE_WEIGHTS.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = int(weight or 1)
+
+    lanes = []
+    for name, queue_url in (
+        ('interactive', SQS_INTERACTIVE_QUEUE_URL),
+        ('normal', SQS_QUEUE_URL),
+        ('deferred', SQS_DEFERRED_QUEUE_URL),
+    ):
+        if queue_url and all(queue_url != url for _, url, _ in lanes):
+            lanes.append((name, queue_url, max(weights.get(name, 1), 1)))
+    return lanes
+
+
+def receive_next_messages(
+    scheduler: LaneScheduler,
+    consumer: BatchConsumer
+) -> Optional[Tuple[List[Dict[str, Any]], str, str]]:
+    """
+    Receive messages (up to the consumer's free slots) from the lane whose turn it is.
+
+    Returns:
+        (messages, lane name, queue URL), or None if every lane is empty
+    """
+    lanes = scheduler.order()
+
+    if len(lanes) == 1:
+        # Single queue: plain long polling, as before lanes existed
+        name, queue_url, _ = lanes[0]
+        wait_times = [POLL_INTERVAL]
+    else:
+        # Short-poll lanes in turn order, then long-poll the top lane briefly
+        wait_times = [0] * len(lanes)
+        lanes = lanes + [scheduler.lanes[0]]
+        wait_times.append(LANE_IDLE_WAIT)
+
+    for (name, queue_url, _), wait_time in zip(lanes, wait_times):
+        messages = consumer.receive(queue_url, wait_time)
+        if messages:
+            return messages, name, queue_url
+
+    return None
+
+
 def update_task_status(
     task_id: str,
     status: str,
     result_s3_uri: Optional[str] = None,
     error_message: Optional[str] = None,
-    comfy_job_id: Optional[str] = None
+    retryable: bool = False,
+    comfy_job_id: Optional[str] = None,
+    started_at: Optional[float] = None
 ):
-    """Update task status in DynamoDB"""
-    try:
-        current_time = int(time.time())
-        update_expr = "SET #status = :status, updated_at = :updated_at"
-        expr_attr_names = {'#status': 'status'}
-        expr_attr_values = {
-            ':status': status,
-            ':updated_at': current_time
-        }
-
-        if result_s3_uri:
-            update_expr += ", result_s3_uri = :result_s3_uri"
-            expr_attr_values[':result_s3_uri'] = result_s3_uri
-
-        if error_message:
-            update_expr += ", error_message = :error_message"
-            expr_attr_values[':error_message'] = error_message
+    """
+    Update task status in DynamoDB (see task_claims.update_task_status).
 
-        if comfy_job_id:
-            update_expr += ", comfy_job_id = :comfy_job_id"
-            expr_attr_values[':comfy_job_id'] = comfy_job_id
+    started_at replaces the claim time with the time ComfyUI started
+    rendering, so execution statistics exclude the wait in the ComfyUI queue.
 
-        table.update_item(
+    Raises:
+        TaskCancelled: If the task was cancelled
+    """
+    task_claims.update_task_status(
+        task_table(),
+        task_id,
+        status,
+        error_message=error_message,
+        retryable=retryable,
+        started_at=started_at,
+        attributes={'result_s3_uri': result_s3_uri, 'comfy_job_id': comfy_job_id}
+    )
+
+
+def is_task_cancelled(task_id: str) -> bool:
+    """Check whether the task was cancelled (strongly consistent read, False on errors)."""
+    try:
+        item = task_table().get_item(
             Key={'task_id': task_id},
-            UpdateExpression=update_expr,
-            ExpressionAttributeNames=expr_attr_names,
-            ExpressionAttributeValues=expr_attr_values
-        )
-        print(f"✓ Updated task {task_id} status to: {status}")
-
-    except Exception as e:
-        print(f"✗ Error updating task status in DynamoDB: {e}")
-        raise
+            ProjectionExpression='#status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ConsistentRead=True
+        ).get('Item')
+    except ClientError as e:
+        print(f"⚠ Error checking cancellation of task {task_id}: {e}")
+        return False
+    return bool(item) and item.get('status') == 'cancelled'
+
+
+def cancel_comfyui_job(job_id: str) -> None:
+    """Ask the Unified API to interrupt (or dequeue) a ComfyUI job."""
+    try:
+        response = requests.delete(f"{COMFYUI_API_URL}/api/v1/jobs/{job_id}", timeout=10)
+        response.raise_for_status()
+        print(f"✓ Interrupted ComfyUI job {job_id}")
+    except requests.RequestException as e:
+        print(f"⚠ Error interrupting ComfyUI job {job_id}: {e}")
 
 
-def poll_comfyui_status(job_id: str, timeout: int = 600) -> Dict[str, Any]:
+def poll_comfyui_status(job_id: str, task_id: Optional[str] = None, timeout: int = 600) -> Dict[str, Any]:
     """
-    Poll ComfyUI API for job completion.
+    Wait for ComfyUI job completion by long polling the Unified API.
+
+    Each request is held by the API for up to COMFY_WAIT_SECONDS and
+    answered as soon as the job finishes; the task's cancellation is
+    checked between requests. An API that answers at once (no long-poll
+    support) is polled every COMFY_POLL_INTERVAL seconds instead.
 
     Args:
         job_id: ComfyUI job ID
+        task_id: Orchestrator task ID, checked for cancellation on every poll
         timeout: Maximum time to wait (seconds)
 
     Returns:
         Final job status dictionary
+
+    Raises:
+        TaskCancelled: If the task is cancelled while the job runs
     """
     start_time = time.time()
     poll_count = 0
@@ -111,10 +243,15 @@ def poll_comfyui_status(job_id: str, timeout: int = 600) -> Dict[str, Any]:
         if shutdown_flag:
             raise Exception("Shutdown requested during polling")
 
+        if task_id and is_task_cancelled(task_id):
+            raise TaskCancelled(task_id)
+
         try:
+            requested_at = time.time()
             response = requests.get(
                 f"{COMFYUI_API_URL}/api/v1/jobs/{job_id}",
-                timeout=10
+                params={'wait': COMFY_WAIT_SECONDS},
+                timeout=COMFY_WAIT_SECONDS + 10
             )
             response.raise_for_status()
             job_status = response.json()
@@ -128,12 +265,18 @@ def poll_comfyui_status(job_id: str, timeout: int = 600) -> Dict[str, Any]:
             elif status == 'failed':
                 print(f"✗ ComfyUI job {job_id} failed: {job_status.get('error')}")
                 return job_status
+            elif status == 'cancelled':
+                # Cancelled directly on the Unified API, not through the orchestrator
+                print(f"✗ ComfyUI job {job_id} was cancelled")
+                return {'status': 'failed', 'error': 'Cancelled on the GPU instance'}
             elif status in ('pending', 'processing'):
-                # Still processing, wait and retry
-                time.sleep(2)
+                # Still queued or rendering: the long poll already waited, ask again
+                elapsed = time.time() - requested_at
+                if elapsed < COMFY_POLL_INTERVAL:
+                    time.sleep(COMFY_POLL_INTERVAL - elapsed)
             else:
                 print(f"⚠ Unknown status '{status}' for ComfyUI job {job_id}")
-                time.sleep(2)
+                time.sleep(COMFY_POLL_INTERVAL)
 
         except requests.RequestException as e:
             print(f"⚠ Error polling ComfyUI status: {e}")
@@ -142,19 +285,34 @@ def poll_comfyui_status(job_id: str, timeout: int = 600) -> Dict[str, Any]:
     raise Exception(f"Timeout waiting for ComfyUI job {job_id} after {timeout} seconds")
 
 
-def process_task(message: Dict[str, Any]):
+def hand_off_stage(body: Dict[str, Any], status: str, result_url: Optional[str] = None):
+    """Queue (or skip) the pipeline stages waiting on this task; never raises."""
+    try:
+        finish_stage(task_table(), sqs_client, body, status, result_url)
+    except Exception as e:
+        print(f"✗ Error handing off pipeline stages of task {body.get('task_id')}: {e}")
+
+
+def process_task(message: Dict[str, Any]) -> bool:
     """
-    Process a single task from SQS.
+    Process a single task from SQS (runs on a consumer worker thread).
+
+    Args:
+        message: SQS message
 
     This is the core business logic:
     1. Parse task from SQS message
-    2. Update status to 'processing'
+    2. Claim the task (status 'processing', worker ID, lease)
     3. Call ComfyUI API
     4. Poll for completion
     5. Update final status
-    6. Delete SQS message
+
+    A cancelled task is dropped when dequeued; if it is cancelled while
+    running, its ComfyUI job is interrupted so the GPU frees up at once.
+
+    Returns:
+        True if the message is done and can be deleted, False to retry it
     """
-    receipt_handle = message['ReceiptHandle']
     body = json.loads(message['Body'])
 
     task_id = body.get('task_id')
@@ -166,15 +324,20 @@ def process_task(message: Dict[str, Any]):
     print(f"API path: {api_path}")
     print(f"{'='*60}")
 
+    comfy_job_id = None
     try:
-        # Step 1: Update DynamoDB to PROCESSING
-        update_task_status(task_id, 'processing')
-
-        # Step 2: Submit job to local ComfyUI API
-        print(f"→ Submitting to ComfyUI: POST {COMFYUI_API_URL}{api_path}")
+        # Step 1: Claim the task (fails if already cancelled; skips duplicates)
+        claim = claim_task(task_table(), task_id, VISIBILITY_TIMEOUT)
+        if claim != 'claimed':
+            return claim == 'done'
+
+        # Step 2: Submit job to local ComfyUI API (interactive work jumps the ComfyUI queue)
+        front = body.get('priority') == 'interactive'
+        print(f"→ Submitting to ComfyUI: POST {COMFYUI_API_URL}{api_path}{' (front)' if front else ''}")
         response = requests.post(
             f"{COMFYUI_API_URL}{api_path}",
             json=request_body,
+            params={'front': 'true'} if front else None,
             timeout=30
         )
         response.raise_for_status()
@@ -189,17 +352,19 @@ def process_task(message: Dict[str, Any]):
         # Update DynamoDB with ComfyUI job ID
         update_task_status(task_id, 'processing', comfy_job_id=comfy_job_id)
 
-        # Step 3: Poll ComfyUI for completion
-        print(f"→ Polling ComfyUI for completion...")
-        final_status = poll_comfyui_status(comfy_job_id)
+        # Step 3: Wait for ComfyUI completion (long polling)
+        print(f"→ Waiting for ComfyUI completion...")
+        final_status = poll_comfyui_status(comfy_job_id, task_id)
 
         # Step 4: Update DynamoDB with final status
         if final_status['status'] == 'completed':
             update_task_status(
                 task_id,
                 'completed',
-                result_s3_uri=final_status.get('result_s3_uri')
+                result_s3_uri=final_status.get('result_s3_uri'),
+                started_at=final_status.get('started_at')
             )
+            hand_off_stage(body, 'completed', final_status.get('result_s3_uri'))
             print(f"✓ Task {task_id} completed successfully")
             print(f"  Result: {final_status.get('result_s3_uri')}")
 
@@ -209,14 +374,18 @@ def process_task(message: Dict[str, Any]):
                 'failed',
                 error_message=final_status.get('error', 'Unknown error')
             )
+            hand_off_stage(body, 'failed')
             print(f"✗ Task {task_id} failed: {final_status.get('error')}")
 
-        # Step 5: Delete message from SQS (task completed)
-        sqs_client.delete_message(
-            QueueUrl=SQS_QUEUE_URL,
-            ReceiptHandle=receipt_handle
-        )
-        print(f"✓ Deleted message from SQS queue")
+        # Task finished: the consumer deletes the message
+        return True
+
+    except TaskCancelled:
+        print(f"⊘ Task {task_id} was cancelled")
+        hand_off_stage(body, 'cancelled')
+        if comfy_job_id:
+            cancel_comfyui_job(comfy_job_id)
+        return True
 
     except Exception as e:
         # Task failed - update DynamoDB but DO NOT delete SQS message
@@ -225,29 +394,42 @@ def process_task(message: Dict[str, Any]):
         print(f"✗ Error processing task {task_id}: {error_msg}")
 
         try:
-            update_task_status(task_id, 'failed', error_message=error_msg)
+            update_task_status(task_id, 'failed', error_message=error_msg, retryable=True)
         except Exception as db_error:
             print(f"✗ Failed to update error status in DynamoDB: {db_error}")
 
         # Don't delete SQS message - let it retry or go to DLQ
-        print(f"⚠ SQS message will become visible again for retry")
+        return False
 
 
 def main_loop():
     """
     Main polling loop.
 
-    Continuously polls SQS for messages and processes them.
+    Continuously polls SQS for messages and runs them on the batch
+    consumer (COMFY_PIPELINE_DEPTH tasks at once: ComfyUI renders one
+    prompt at a time, the others wait in its queue).
     Uses long polling (20 seconds) to reduce API calls and costs.
     """
+    consumer = BatchConsumer(
+        sqs_client,
+        process_task,
+        concurrency=COMFY_PIPELINE_DEPTH,
+        visibility_timeout=VISIBILITY_TIMEOUT,
+        on_heartbeat=lambda messages: renew_leases(task_table(), messages, VISIBILITY_TIMEOUT)
+    )
+
     print(f"\n{'='*60}")
     print(f"SQS to ComfyUI Adapter Started")
     print(f"{'='*60}")
     print(f"AWS Region: {AWS_REGION}")
-    print(f"SQS Queue: {SQS_QUEUE_URL}")
+    scheduler = LaneScheduler(build_lanes())
+    for name, queue_url, weight in scheduler.lanes:
+        print(f"SQS Lane: {name} (weight {weight}) {queue_url}")
     print(f"DynamoDB Table: {DYNAMODB_TABLE}")
     print(f"ComfyUI API: {COMFYUI_API_URL}")
-    print(f"Poll Interval: {POLL_INTERVAL} seconds (long polling)")
+    print(f"Poll Interval: {POLL_INTERVAL if len(scheduler.lanes) == 1 else LANE_IDLE_WAIT} seconds (long polling)")
+    print(f"Pipeline Depth: {consumer.concurrency} task(s)")
     print(f"{'='*60}\n")
 
     # Verify ComfyUI is accessible
@@ -266,28 +448,24 @@ def main_loop():
 
     while not shutdown_flag:
         try:
-            # Long poll SQS for messages
-            print(f"Polling SQS queue (waiting up to {POLL_INTERVAL} seconds)...")
-            response = sqs_client.receive_message(
-                QueueUrl=SQS_QUEUE_URL,
-                MaxNumberOfMessages=1,
-                WaitTimeSeconds=POLL_INTERVAL,
-                AttributeNames=['All'],
-                MessageAttributeNames=['All'],
-                VisibilityTimeout=300  # 5 minutes to process
-            )
+            # Receive only when a task slot is free
+            if not consumer.wait_for_slot():
+                continue
 
-            messages = response.get('Messages', [])
+            # Receive from the lane whose turn it is (long polls when idle)
+            received = receive_next_messages(scheduler, consumer)
 
-            if messages:
+            if received:
                 consecutive_errors = 0  # Reset error counter
-                for message in messages:
-                    if shutdown_flag:
-                        print("Shutdown requested, stopping message processing")
-                        break
-                    process_task(message)
+                messages, lane, queue_url = received
+                if shutdown_flag:
+                    # Not started: they become visible again after the timeout
+                    print("Shutdown requested, stopping message processing")
+                    break
+                print(f"Received {len(messages)} task(s) from {lane} lane")
+                consumer.submit(messages, queue_url)
             else:
-                print("No messages received (queue empty)")
+                print("No messages received (all lanes empty)")
 
         except ClientError as e:
             consecutive_errors += 1
@@ -313,7 +491,9 @@ def main_loop():
 
             time.sleep(10)
 
-    print("\nAdapter shutting down gracefully...")
+    print("\nAdapter shutting down gracefully, waiting for running tasks...")
+    consumer.drain()
+    print(f"Consumer stats: {consumer.snapshot()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import json
+import pathlib
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+# Ensure the adapter and its vendored modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture()
+def adapter(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with mock_aws():
+        import importlib
+
+        import aws_clients
+
+        aws_clients.reset()
+        adapter = importlib.import_module("sqs_to_comfy_adapter")
+        monkeypatch.setattr("task_claims.WORKER_ID", "worker-a")
+        boto3.resource("dynamodb", region_name=adapter.AWS_REGION).create_table(
+            TableName=adapter.DYNAMODB_TABLE,
+            KeySchema=[{"AttributeName": "task_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "task_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        yield adapter
+        aws_clients.reset()
+
+
+def put(adapter, **item) -> None:
+    adapter.task_table().put_item(Item={"task_id": "t1", **item})
+
+
+def get(adapter) -> dict:
+    return adapter.task_table().get_item(Key={"task_id": "t1"})["Item"]
+
+
+class FakeResponse:
+    def __init__(self, body: dict) -> None:
+        self.body = body
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self.body
+
+
+class FakeUnifiedApi:
+    """Renders one prompt at a time; job-1 finishes only once job-2 is queued behind it."""
+
+    def __init__(self) -> None:
+        self.posts = []
+
+    def post(self, url, json=None, params=None, timeout=None):
+        self.posts.append((url, params))
+        return FakeResponse({"job_id": f"job-{len(self.posts)}", "status": "pending"})
+
+    def get(self, url, params=None, timeout=None):
+        job_id = url.rsplit("/", 1)[-1]
+        if job_id == "job-1" and len(self.posts) < 2:
+            return FakeResponse({"job_id": job_id, "status": "processing"})
+        return FakeResponse({"job_id": job_id, "status": "completed", "result_s3_uri": f"s3://r/{job_id}.png", "started_at": 100})
+
+
+class FakeSqs:
+    def delete_message_batch(self, QueueUrl, Entries):
+        return {}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        return {}
+
+
+def message(task_id: str, priority: str = "normal") -> dict:
+    body = {"task_id": task_id, "api_path": "/api/v1/camera-angle/jobs", "request_body": {}, "priority": priority}
+    return {"MessageId": task_id, "ReceiptHandle": task_id, "Body": json.dumps(body)}
+
+
+@pytest.fixture()
+def unified_api(adapter, monkeypatch: pytest.MonkeyPatch):
+    api = FakeUnifiedApi()
+    monkeypatch.setattr(adapter.requests, "post", api.post)
+    monkeypatch.setattr(adapter.requests, "get", api.get)
+    monkeypatch.setattr(adapter, "COMFY_POLL_INTERVAL", 0.01)
+    return api
+
+
+def test_interactive_task_is_queued_at_the_front(adapter, unified_api):
+    put(adapter, status="pending")
+    unified_api.posts.append(("warm-up", None))  # job-1 is someone else's prompt
+
+    assert adapter.process_task(message("t1", priority="interactive")) is True
+
+    assert unified_api.posts[-1][1] == {"front": "true"}
+    item = get(adapter)
+    assert item["status"] == "completed"
+    assert item["started_at"] == 100
+
+
+def test_pipeline_depth_submits_next_task_while_one_renders(adapter, unified_api):
+    from sqs_consumer import BatchConsumer
+
+    for task_id in ("t1", "t2"):
+        adapter.task_table().put_item(Item={"task_id": task_id, "status": "pending"})
+    consumer = BatchConsumer(FakeSqs(), adapter.process_task, concurrency=2)
+
+    # With one task at a time, t1 would never finish: its prompt completes only once t2's is queued
+    consumer.submit([message("t1"), message("t2")], "queue")
+    consumer.drain()
+
+    assert consumer.acked == 2
+    for task_id in ("t1", "t2"):
+        assert adapter.task_table().get_item(Key={"task_id": task_id})["Item"]["status"] == "completed"
@@ -0,0 +1,89 @@
+import pathlib
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+# Ensure the Unified API and its vendored modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture()
+def api(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    import importlib
+
+    unified_api = importlib.import_module("unified_api")
+    monkeypatch.setattr(unified_api, "jobs", {})
+    monkeypatch.setattr(unified_api, "job_events", {})
+    monkeypatch.setattr(unified_api, "event_loop", None)
+    with TestClient(unified_api.app) as client:
+        client.module = unified_api
+        yield client
+
+
+def finish_later(unified_api, job_id: str, delay: float) -> None:
+    def finish():
+        time.sleep(delay)
+        unified_api.jobs[job_id].update(status="completed", result_s3_uri="s3://r/out.png")
+        unified_api.notify_job(job_id)
+
+    threading.Thread(target=finish, daemon=True).start()
+
+
+def test_long_poll_answers_when_the_job_finishes(api):
+    api.module.jobs["j1"] = {"status": "processing"}
+    finish_later(api.module, "j1", 0.3)
+
+    started = time.time()
+    response = api.get("/api/v1/jobs/j1", params={"wait": 10})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["result_s3_uri"] == "s3://r/out.png"
+    assert time.time() - started < 5
+
+
+def test_long_poll_returns_current_status_after_wait(api):
+    api.module.jobs["j1"] = {"status": "pending"}
+
+    started = time.time()
+    response = api.get("/api/v1/jobs/j1", params={"wait": 0.3})
+
+    assert response.json()["status"] == "pending"
+    assert time.time() - started >= 0.3
+
+
+def test_finished_job_is_answered_at_once(api):
+    api.module.jobs["j1"] = {"status": "failed", "error": "boom"}
+
+    started = time.time()
+    response = api.get("/api/v1/jobs/j1", params={"wait": 10})
+
+    assert response.json()["status"] == "failed"
+    assert time.time() - started < 1
+
+
+def test_cancel_wakes_long_poll(api):
+    api.module.jobs["j1"] = {"status": "processing"}
+
+    def cancel():
+        time.sleep(0.3)
+        api.delete("/api/v1/jobs/j1")
+
+    threading.Thread(target=cancel, daemon=True).start()
+    response = api.get("/api/v1/jobs/j1", params={"wait": 10})
+
+    assert response.json()["status"] == "cancelled"
+
+
+def test_wait_is_bounded(api):
+    api.module.jobs["j1"] = {"status": "pending"}
+
+    assert api.get("/api/v1/jobs/j1", params={"wait": api.module.MAX_WAIT_SECONDS + 1}).status_code == 422
+    assert api.get("/api/v1/jobs/missing", params={"wait": 1}).status_code == 404
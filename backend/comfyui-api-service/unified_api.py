@@ -8,13 +8,14 @@ import urllib.request
 import urllib.parse
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Literal
-import boto3
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 import uvicorn
 import requests
 
+from aws_clients import get_client
+
 # Configuration
 COMFYUI_HOST = "127.0.0.1"
 COMFYUI_PORT = 8188
@@ -22,9 +23,13 @@ WORKFLOW_DIR = "/home/ubuntu/ComfyUI/user/default/workflows"
 S3_BUCKET = os.getenv("S3_BUCKET", "short-drama-assets")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 CLOUDFRONT_DOMAIN = os.getenv("CLOUDFRONT_DOMAIN", "https://d3bg7alr1qwred.cloudfront.net")
+# Seconds between cancellation checks while waiting on the ComfyUI websocket
+CANCEL_CHECK_INTERVAL = 2
+# Longest long-poll accepted by GET /api/v1/jobs/{job_id}?wait=
+MAX_WAIT_SECONDS = 60
 
 # Initialize S3 client
-s3_client = boto3.client("s3", region_name=AWS_REGION)
+s3_client = get_client("s3", AWS_REGION)
 
 # Initialize FastAPI
 app = FastAPI(
@@ -36,6 +41,11 @@ app = FastAPI(
 # In-memory job storage
 jobs = {}
 
+# Long-poll waiters: job_id -> event set when the job finishes, and the
+# event loop they wait on (set by the first waiter)
+job_events: Dict[str, asyncio.Event] = {}
+event_loop: Optional[asyncio.AbstractEventLoop] = None
+
 # ==================== Models ====================
 
 
@@ -67,6 +77,8 @@ class JobStatus(BaseModel):
     status: str
     result_s3_uri: Optional[str] = None
     error: Optional[str] = None
+    # When ComfyUI started rendering the prompt (it may wait in the ComfyUI queue first)
+    started_at: Optional[float] = None
 
 
 # ==================== Utility Functions ====================
@@ -114,9 +126,11 @@ def upload_to_s3(local_path: str, s3_key: str) -> str:
     return f"{CLOUDFRONT_DOMAIN}/{s3_key}"
 
 
-def queue_prompt(prompt_workflow: Dict, client_id: str) -> str:
-    """Queue a prompt to ComfyUI"""
+def queue_prompt(prompt_workflow: Dict, client_id: str, front: bool = False) -> str:
+    """Queue a prompt to ComfyUI (front=True puts it ahead of the queued prompts)"""
     p = {"prompt": prompt_workflow, "client_id": client_id}
+    if front:
+        p["front"] = True
     data = json.dumps(p).encode("utf-8")
     req = urllib.request.Request(
         f"http://{COMFYUI_HOST}:{COMFYUI_PORT}/prompt", data=data
@@ -142,34 +156,103 @@ def get_history(prompt_id: str) -> Dict:
         return json.loads(response.read())
 
 
-def track_progress(prompt_id: str, client_id: str) -> Dict[str, Any]:
-    """Track progress via WebSocket"""
+def cancel_prompt(prompt_id: str):
+    """Interrupt a running prompt or delete it from the ComfyUI queue"""
+    base_url = f"http://{COMFYUI_HOST}:{COMFYUI_PORT}"
+    queue = requests.get(f"{base_url}/queue", timeout=5).json()
+    if any(item[1] == prompt_id for item in queue.get("queue_running", [])):
+        requests.post(f"{base_url}/interrupt", json={"prompt_id": prompt_id}, timeout=5)
+        print(f"Interrupted running prompt {prompt_id}")
+    elif any(item[1] == prompt_id for item in queue.get("queue_pending", [])):
+        requests.post(f"{base_url}/queue", json={"delete": [prompt_id]}, timeout=5)
+        print(f"Deleted queued prompt {prompt_id}")
+
+
+def submit_prompt(job_id: str, prompt_workflow: Dict, client_id: str) -> str:
+    """Queue a job's prompt, cancelling it at once if the job was cancelled meanwhile"""
+    jobs[job_id]["queued_at"] = time.time()
+    prompt_id = queue_prompt(prompt_workflow, client_id, jobs[job_id].get("front", False))
+    jobs[job_id]["prompt_id"] = prompt_id
+    if jobs[job_id]["status"] == "cancelled":
+        cancel_prompt(prompt_id)
+    return prompt_id
+
+
+def track_progress(prompt_id: str, client_id: str, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Track progress via WebSocket (returns None if the job is cancelled)"""
     ws = websocket.WebSocket()
     ws.connect(f"ws://{COMFYUI_HOST}:{COMFYUI_PORT}/ws?clientId={client_id}")
+    ws.settimeout(CANCEL_CHECK_INTERVAL)
 
     while True:
         try:
             out = ws.recv()
             if isinstance(out, str):
                 message = json.loads(out)
-                if message["type"] == "executing":
-                    data = message["data"]
+                data = message.get("data", {})
+                if message["type"] == "execution_start" and data.get("prompt_id") == prompt_id:
+                    if job_id:
+                        jobs[job_id]["started_at"] = time.time()
+                elif message["type"] == "executing":
                     if data["node"] is None and data["prompt_id"] == prompt_id:
                         break
+                elif message["type"] == "execution_interrupted" and data.get("prompt_id") == prompt_id:
+                    break
+        except websocket.WebSocketTimeoutException:
+            # A prompt deleted from the queue never reports back
+            if job_id and jobs[job_id]["status"] == "cancelled":
+                break
         except Exception as e:
             print(f"WebSocket error: {e}")
             break
 
     ws.close()
+    if job_id:
+        # Started before the websocket connected: the queueing time is the best guess
+        jobs[job_id].setdefault("started_at", jobs[job_id]["queued_at"])
+    if job_id and jobs[job_id]["status"] == "cancelled":
+        return None
     history = get_history(prompt_id)[prompt_id]
     return history
 
 
+def _wake_waiters(job_id: str):
+    event = job_events.pop(job_id, None)
+    if event:
+        event.set()
+
+
+def notify_job(job_id: str):
+    """Wake long-poll waiters of a job (call after it reached a final status, from any thread)"""
+    if event_loop is not None:
+        try:
+            event_loop.call_soon_threadsafe(_wake_waiters, job_id)
+        except RuntimeError:
+            pass  # Event loop closed (shutting down)
+
+
+async def wait_for_job(job_id: str, wait: float):
+    """Wait up to wait seconds for a pending/processing job to finish"""
+    global event_loop
+    # Set before the status check, so a job finishing after the check is notified
+    event_loop = asyncio.get_running_loop()
+    if wait <= 0 or jobs[job_id]["status"] not in ("pending", "processing"):
+        return
+    # The wake-up runs on this loop, so it cannot slip in before the event exists
+    event = job_events.setdefault(job_id, asyncio.Event())
+    try:
+        await asyncio.wait_for(event.wait(), wait)
+    except asyncio.TimeoutError:
+        pass
+
+
 # ==================== Processing Functions ====================
 
 
-async def process_camera_angle(job_id: str, request: CameraAngleRequest):
-    """Background task to process camera angle transformation"""
+def process_camera_angle(job_id: str, request: CameraAngleRequest):
+    """Background task to process camera angle transformation (runs in the threadpool)"""
+    if jobs[job_id]["status"] == "cancelled":
+        return
     try:
         jobs[job_id]["status"] = "processing"
 
@@ -247,11 +330,11 @@ async def process_camera_angle(job_id: str, request: CameraAngleRequest):
 
         # Execute workflow
         client_id = str(uuid.uuid4())
-        prompt_id = queue_prompt(workflow, client_id)
-        history = track_progress(prompt_id, client_id)
+        prompt_id = submit_prompt(job_id, workflow, client_id)
+        history = track_progress(prompt_id, client_id, job_id)
 
-        # Get output images
-        outputs = history["outputs"]
+        # Get output images (none for a cancelled job)
+        outputs = history["outputs"] if history else {}
         output_images = []
 
         for node_id, node_output in outputs.items():
@@ -266,7 +349,9 @@ async def process_camera_angle(job_id: str, request: CameraAngleRequest):
                     output_images.append(output_path)
 
         # Upload to S3
-        if output_images:
+        if jobs[job_id]["status"] == "cancelled":
+            print(f"Job {job_id} cancelled")
+        elif output_images:
             s3_key = f"comfyui-results/camera-angle/{job_id}/output.png"
             result_s3_uri = upload_to_s3(output_images[0], s3_key)
             jobs[job_id]["status"] = "completed"
@@ -285,13 +370,18 @@ async def process_camera_angle(job_id: str, request: CameraAngleRequest):
             os.remove(comfyui_input_path)
 
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
+        if jobs[job_id]["status"] != "cancelled":
+            jobs[job_id]["status"] = "failed"
+            jobs[job_id]["error"] = str(e)
         print(f"Error processing camera angle job {job_id}: {e}")
+    finally:
+        notify_job(job_id)
 
 
-async def process_image_edit(job_id: str, request: ImageEditRequest):
-    """Background task to process image editing"""
+def process_image_edit(job_id: str, request: ImageEditRequest):
+    """Background task to process image editing (runs in the threadpool)"""
+    if jobs[job_id]["status"] == "cancelled":
+        return
     try:
         jobs[job_id]["status"] = "processing"
 
@@ -379,11 +469,11 @@ async def process_image_edit(job_id: str, request: ImageEditRequest):
 
         # Execute workflow
         client_id = str(uuid.uuid4())
-        prompt_id = queue_prompt(workflow, client_id)
-        history = track_progress(prompt_id, client_id)
+        prompt_id = submit_prompt(job_id, workflow, client_id)
+        history = track_progress(prompt_id, client_id, job_id)
 
-        # Get output images
-        outputs = history["outputs"]
+        # Get output images (none for a cancelled job)
+        outputs = history["outputs"] if history else {}
         output_images = []
 
         for node_id, node_output in outputs.items():
@@ -398,7 +488,9 @@ async def process_image_edit(job_id: str, request: ImageEditRequest):
                     output_images.append(output_path)
 
         # Upload to S3
-        if output_images:
+        if jobs[job_id]["status"] == "cancelled":
+            print(f"Job {job_id} cancelled")
+        elif output_images:
             s3_key = f"comfyui-results/qwen-image-edit/{job_id}/output.png"
             result_s3_uri = upload_to_s3(output_images[0], s3_key)
             jobs[job_id]["status"] = "completed"
@@ -416,9 +508,12 @@ async def process_image_edit(job_id: str, request: ImageEditRequest):
                 os.remove(img_path)
 
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
+        if jobs[job_id]["status"] != "cancelled":
+            jobs[job_id]["status"] = "failed"
+            jobs[job_id]["error"] = str(e)
         print(f"Error processing image edit job {job_id}: {e}")
+    finally:
+        notify_job(job_id)
 
 
 # ==================== API Endpoints ====================
@@ -459,14 +554,15 @@ async def health_check():
 
 @app.post("/api/v1/camera-angle/jobs", response_model=JobStatus)
 async def create_camera_angle_job(
-    request: CameraAngleRequest, background_tasks: BackgroundTasks
+    request: CameraAngleRequest, background_tasks: BackgroundTasks, front: bool = False
 ):
-    """Submit a camera angle transformation job"""
+    """Submit a camera angle transformation job (?front=true jumps the ComfyUI queue)"""
     job_id = str(uuid.uuid4())
     jobs[job_id] = {
         "status": "pending",
         "type": "camera-angle",
         "created_at": time.time(),
+        "front": front,
     }
     background_tasks.add_task(process_camera_angle, job_id, request)
     return JobStatus(job_id=job_id, status="pending")
@@ -483,6 +579,7 @@ async def get_camera_angle_job(job_id: str):
         status=job["status"],
         result_s3_uri=job.get("result_s3_uri"),
         error=job.get("error"),
+        started_at=job.get("started_at"),
     )
 
 
@@ -491,14 +588,15 @@ async def get_camera_angle_job(job_id: str):
 
 @app.post("/api/v1/qwen-image-edit/jobs", response_model=JobStatus)
 async def create_qwen_image_edit_job(
-    request: ImageEditRequest, background_tasks: BackgroundTasks
+    request: ImageEditRequest, background_tasks: BackgroundTasks, front: bool = False
 ):
-    """Submit a Qwen image editing job"""
+    """Submit a Qwen image editing job (?front=true jumps the ComfyUI queue)"""
     job_id = str(uuid.uuid4())
     jobs[job_id] = {
         "status": "pending",
         "type": "qwen-image-edit",
         "created_at": time.time(),
+        "front": front,
     }
     background_tasks.add_task(process_image_edit, job_id, request)
     return JobStatus(job_id=job_id, status="pending")
@@ -515,6 +613,7 @@ async def get_qwen_image_edit_job(job_id: str):
         status=job["status"],
         result_s3_uri=job.get("result_s3_uri"),
         error=job.get("error"),
+        started_at=job.get("started_at"),
     )
 
 
@@ -522,16 +621,49 @@ async def get_qwen_image_edit_job(job_id: str):
 
 
 @app.get("/api/v1/jobs/{job_id}", response_model=JobStatus)
-async def get_job_status(job_id: str):
-    """Get status of any job (camera-angle or image-edit)"""
+async def get_job_status(
+    job_id: str, wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS)
+):
+    """
+    Get status of any job (camera-angle or image-edit).
+
+    With ?wait=N a pending or processing job is held for up to N seconds
+    and answered as soon as it finishes (long polling), so callers learn
+    about completion at once instead of on their next poll.
+    """
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    await wait_for_job(job_id, wait)
+    job = jobs[job_id]
+    return JobStatus(
+        job_id=job_id,
+        status=job["status"],
+        result_s3_uri=job.get("result_s3_uri"),
+        error=job.get("error"),
+        started_at=job.get("started_at"),
+    )
+
+
+@app.delete("/api/v1/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """
+    Cancel a job: a queued ComfyUI prompt is removed from the queue, a
+    running one is interrupted. Finished jobs are returned unchanged.
+    """
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail="Job not found")
     job = jobs[job_id]
+    if job["status"] in ("pending", "processing"):
+        job["status"] = "cancelled"
+        _wake_waiters(job_id)
+        if job.get("prompt_id"):
+            await asyncio.to_thread(cancel_prompt, job["prompt_id"])
     return JobStatus(
         job_id=job_id,
         status=job["status"],
         result_s3_uri=job.get("result_s3_uri"),
         error=job.get("error"),
+        started_at=job.get("started_at"),
     )
 
 
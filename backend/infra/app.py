@@ -11,6 +11,8 @@ Infrastructure includes:
 - IAM Roles (Orchestrator, GPU Instance, Lambda)
 - Lambda Function (Auto-shutdown)
 - CloudWatch Alarm (30-min idle detection)
+- Lambda Function (Daily task archive to S3)
+- S3 lifecycle rule expiring the input staging prefix
 """
 
 import os
@@ -27,6 +29,8 @@ from stacks.alarm_stack import AlarmStack
 from stacks.infrastructure_stack import InfrastructureStack
 from stacks.orchestrator_service_stack import OrchestratorServiceStack
 from stacks.canvas_service_stack import CanvasServiceStack
+from stacks.archive_stack import ArchiveStack
+from stacks.staging_stack import StagingStack
 
 app = App()
 
@@ -39,6 +43,15 @@ env = Environment(account=account, region=region)
 
 # Configuration
 gpu_instance_id = app.node.try_get_context('gpu_instance_id') or os.environ.get('GPU_INSTANCE_ID', 'i-0f0f6fd680921de5f')
+# GPU fleet mode: comma-separated pool of stop/start instances (defaults to the single instance)
+gpu_instance_ids = [
+    i.strip()
+    for i in (app.node.try_get_context('gpu_instance_ids') or os.environ.get('GPU_INSTANCE_IDS', '')).split(',')
+    if i.strip()
+] or [gpu_instance_id]
+gpu_fleet_min = os.environ.get('GPU_FLEET_MIN', '0')
+gpu_fleet_max = os.environ.get('GPU_FLEET_MAX', '0')
+gpu_fleet_jobs_per_instance = os.environ.get('GPU_FLEET_JOBS_PER_INSTANCE', '10')
 project_name = 'gpu-orchestrator'
 
 # Canvas Service configuration from environment
@@ -47,6 +60,14 @@ supabase_url = os.environ.get('SUPABASE_URL', '')
 supabase_key = os.environ.get('SUPABASE_SECRET_KEY', '')
 cloudfront_domain = os.environ.get('CLOUDFRONT_DOMAIN', 'https://d3bg7alr1qwred.cloudfront.net')
 
+# Task archive: terminal tasks older than this many days go to S3 (before their TTL)
+task_archive_prefix = os.environ.get('TASK_ARCHIVE_PREFIX', 'task-archive/')
+task_archive_after_days = os.environ.get('TASK_ARCHIVE_AFTER_DAYS', '7')
+
+# Input staging: key prefix in the assets bucket and how long staged inputs are kept
+staging_prefix = os.environ.get('STAGING_PREFIX', 'staging').strip('/')
+staging_expire_days = os.environ.get('STAGING_EXPIRE_DAYS', '1')
+
 # CORS configuration - comma-separated list of allowed origins
 cors_origins = os.environ.get('CORS_ORIGINS', 'https://canvas.starmates.ai,https://www.starmates.ai')
 
@@ -76,7 +97,12 @@ iam_stack = IamStack(
     dlq_arn=sqs_stack.dlq.queue_arn,
     table_arn=dynamodb_stack.table.table_arn,
     table_index_arn=f"{dynamodb_stack.table.table_arn}/index/*",
-    gpu_instance_id=gpu_instance_id,
+    gpu_instance_ids=gpu_instance_ids,
+    lane_queue_arns=[sqs_stack.interactive_queue.queue_arn, sqs_stack.deferred_queue.queue_arn],
+    assets_bucket=s3_bucket,
+    archive_bucket=s3_bucket,
+    archive_prefix=task_archive_prefix,
+    staging_prefix=staging_prefix,
     env=env,
     description="IAM roles for orchestrator, GPU instance, and Lambda"
 )
@@ -85,8 +111,16 @@ iam_stack = IamStack(
 lambda_stack = LambdaStack(
     app,
     f"{project_name}-lambda",
-    gpu_instance_id=gpu_instance_id,
+    gpu_instance_ids=gpu_instance_ids,
     lambda_role=iam_stack.lambda_role,
+    gpu_queue_urls=[
+        sqs_stack.queue.queue_url,
+        sqs_stack.interactive_queue.queue_url,
+        sqs_stack.deferred_queue.queue_url,
+    ],
+    fleet_min=gpu_fleet_min,
+    fleet_jobs_per_instance=gpu_fleet_jobs_per_instance,
+    table_name=dynamodb_stack.table.table_name,
     env=env,
     description="Lambda function for GPU auto-shutdown"
 )
@@ -97,6 +131,7 @@ alarm_stack = AlarmStack(
     f"{project_name}-alarm",
     queue=sqs_stack.queue,
     lambda_function=lambda_stack.shutdown_function,
+    lane_queues=[sqs_stack.interactive_queue, sqs_stack.deferred_queue],
     env=env,
     description="CloudWatch alarm for 30-minute idle detection"
 )
@@ -119,8 +154,18 @@ orchestrator_service_stack = OrchestratorServiceStack(
     ecs_security_group=infrastructure_stack.ecs_sg,
     namespace=infrastructure_stack.namespace,
     queue_url=sqs_stack.queue.queue_url,
+    interactive_queue_url=sqs_stack.interactive_queue.queue_url,
+    deferred_queue_url=sqs_stack.deferred_queue.queue_url,
     table_name=dynamodb_stack.table.table_name,
-    gpu_instance_id=gpu_instance_id,
+    gpu_instance_ids=gpu_instance_ids,
+    fleet_min=gpu_fleet_min,
+    fleet_max=gpu_fleet_max,
+    fleet_jobs_per_instance=gpu_fleet_jobs_per_instance,
+    archive_bucket=s3_bucket,
+    archive_prefix=task_archive_prefix,
+    assets_bucket=s3_bucket,
+    cloudfront_domain=cloudfront_domain,
+    staging_prefix=staging_prefix,
     orchestrator_role=iam_stack.orchestrator_role,
     cors_origins=cors_origins,
     env=env,
@@ -141,10 +186,37 @@ canvas_service_stack = CanvasServiceStack(
     supabase_key=supabase_key,
     cloudfront_domain=cloudfront_domain,
     cors_origins=cors_origins,
+    # GPU warm-up signals go to the orchestrator over service discovery
+    orchestrator_url="http://orchestrator-service.backend.local:8080",
     env=env,
     description="ECS Fargate service for Canvas image editing"
 )
 
+# Stack 9: Task archive (daily export of old terminal tasks to S3)
+archive_stack = ArchiveStack(
+    app,
+    f"{project_name}-archive",
+    table_name=dynamodb_stack.table.table_name,
+    archive_bucket=s3_bucket,
+    archive_role=iam_stack.archive_lambda_role,
+    archive_prefix=task_archive_prefix,
+    archive_after_days=task_archive_after_days,
+    env=env,
+    description="Lambda function archiving terminal tasks to S3"
+)
+
+# Stack 10: Input staging (lifecycle rule expiring staged inputs)
+staging_stack = StagingStack(
+    app,
+    f"{project_name}-staging",
+    assets_bucket=s3_bucket,
+    lifecycle_role=iam_stack.staging_lifecycle_role,
+    staging_prefix=staging_prefix,
+    expire_days=staging_expire_days,
+    env=env,
+    description="S3 lifecycle rule expiring the orchestrator's input staging prefix"
+)
+
 # Add explicit dependencies
 # Note: Some dependencies are implicit (e.g., AlarmStack uses lambda_function from LambdaStack)
 # CDK will automatically figure out the dependency graph
@@ -2,11 +2,13 @@
 CloudWatch Alarm Stack - 30-Minute Idle Detection
 
 Creates CloudWatch Alarm that:
-- Monitors SQS queue ApproximateNumberOfMessagesVisible metric
-- Triggers when queue is empty (0 messages) for 30 minutes
+- Monitors SQS ApproximateNumberOfMessagesVisible, summed over all GPU lanes
+- Triggers when every lane is empty (0 messages) for 30 minutes
 - Invokes Lambda function to shutdown GPU instance
 """
 
+from typing import List, Optional
+
 from aws_cdk import (
     Stack,
     Duration,
@@ -28,6 +30,7 @@ class AlarmStack(Stack):
         construct_id: str,
         queue: sqs.Queue,
         lambda_function: lambda_.Function,
+        lane_queues: Optional[List[sqs.Queue]] = None,
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -40,13 +43,29 @@ class AlarmStack(Stack):
             period=Duration.minutes(5),
         )
 
+        # With priority lanes the GPU is idle only when every lane is empty
+        if lane_queues:
+            lane_metrics = {
+                f"m{i}": lane.metric_approximate_number_of_messages_visible(
+                    statistic=cloudwatch.Stats.AVERAGE,
+                    period=Duration.minutes(5),
+                )
+                for i, lane in enumerate(lane_queues, start=1)
+            }
+            queue_visible_messages_metric = cloudwatch.MathExpression(
+                expression=" + ".join(["m0", *lane_metrics]),
+                using_metrics={"m0": queue_visible_messages_metric, **lane_metrics},
+                label="Visible messages (all GPU lanes)",
+                period=Duration.minutes(5),
+            )
+
         # CloudWatch Alarm
         self.queue_empty_alarm = cloudwatch.Alarm(
             self,
             "QueueEmptyFor30Min",
             alarm_name="QueueEmptyFor30Min",
             alarm_description=(
-                "Triggers GPU instance shutdown when SQS queue has been "
+                "Triggers GPU instance shutdown when the GPU SQS queues have been "
                 "empty (0 visible messages) for 30 minutes continuously"
             ),
             # Metric to monitor
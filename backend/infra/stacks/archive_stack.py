@@ -0,0 +1,87 @@
+"""
+Archive Stack - Task Archival Function
+
+Creates Lambda function that:
+- Runs daily (EventBridge schedule)
+- Exports completed/failed tasks older than TASK_ARCHIVE_AFTER_DAYS from
+  DynamoDB to S3 as daily, gzip-compressed JSON Lines partitions
+- Leaves expiry of the archived records to DynamoDB TTL
+"""
+
+from aws_cdk import (
+    Stack,
+    Duration,
+    CfnOutput,
+)
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_events as events
+from aws_cdk import aws_events_targets as targets
+from constructs import Construct
+import os
+
+
+class ArchiveStack(Stack):
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        table_name: str,
+        archive_bucket: str,
+        archive_role: iam.Role,
+        archive_prefix: str = "task-archive/",
+        archive_after_days: str = "7",
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # Lambda code is in backend/orchestrator/task_archive.py
+        lambda_code_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "orchestrator"
+        )
+
+        self.archive_function = lambda_.Function(
+            self,
+            "TaskArchiveFunction",
+            function_name="task-archive-lambda",
+            description="Archive old terminal tasks from DynamoDB to S3 before they expire",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="task_archive.lambda_handler",
+            code=lambda_.Code.from_asset(
+                lambda_code_path,
+                exclude=["*.pyc", "__pycache__", "*.md", "test_*.py", "benchmark.py", "*.txt", "aws/"]
+            ),
+            role=archive_role,
+            # A backlog of days is worked off over several runs (watermark)
+            timeout=Duration.minutes(15),
+            # Each day is compressed in memory before upload
+            memory_size=512,
+            # Note: AWS_REGION is automatically set by Lambda runtime
+            environment={
+                "DYNAMODB_TABLE": table_name,
+                "TASK_ARCHIVE_BUCKET": archive_bucket,
+                "TASK_ARCHIVE_PREFIX": archive_prefix,
+                "TASK_ARCHIVE_AFTER_DAYS": archive_after_days,
+            },
+            # One run at a time (the watermark is not locked)
+            reserved_concurrent_executions=1,
+        )
+
+        events.Rule(
+            self,
+            "TaskArchiveSchedule",
+            rule_name="task-archive-daily",
+            description="Archive terminal tasks to S3 once a day",
+            schedule=events.Schedule.cron(minute="30", hour="3"),
+            targets=[targets.LambdaFunction(self.archive_function)],
+        )
+
+        # Outputs
+        CfnOutput(
+            self,
+            "FunctionArn",
+            value=self.archive_function.function_arn,
+            description="ARN of the task archive Lambda function",
+            export_name=f"{construct_id}-FunctionArn"
+        )
@@ -39,6 +39,7 @@ class CanvasServiceStack(Stack):
         supabase_key: str,
         cloudfront_domain: str,
         cors_origins: str,
+        orchestrator_url: str = "",
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -121,6 +122,7 @@ class CanvasServiceStack(Stack):
                 "SUPABASE_SERVICE_ROLE_KEY": supabase_key,
                 "CLOUDFRONT_DOMAIN": cloudfront_domain,
                 "CORS_ORIGINS": cors_origins,
+                "ORCHESTRATOR_URL": orchestrator_url,
             },
             logging=ecs.LogDriver.aws_logs(
                 stream_prefix="canvas-service",
@@ -46,7 +46,8 @@ class DynamoDbStack(Stack):
             # Point-in-time recovery
             point_in_time_recovery=True,
             # Time to Live (TTL)
-            # Auto-delete items after 30 days (optional)
+            # Tasks expire 30 days after creation, 14 days after completing
+            # (archived to S3 by the task archive Lambda first)
             time_to_live_attribute="ttl",
         )
 
@@ -5,8 +5,12 @@ Creates IAM roles for:
 1. Orchestrator (Fargate task)
 2. GPU Instance (EC2)
 3. Lambda (Auto-shutdown)
+4. Lambda (Task archive)
+5. Lambda (Staging lifecycle rule)
 """
 
+from typing import List, Optional
+
 from aws_cdk import (
     Stack,
     CfnOutput,
@@ -24,11 +28,21 @@ class IamStack(Stack):
         dlq_arn: str,
         table_arn: str,
         table_index_arn: str,
-        gpu_instance_id: str,
+        gpu_instance_ids: List[str],
+        lane_queue_arns: Optional[List[str]] = None,
+        assets_bucket: str = "short-drama-assets",
+        archive_bucket: str = "short-drama-assets",
+        archive_prefix: str = "task-archive/",
+        staging_prefix: str = "staging",
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        gpu_instance_arns = [
+            f"arn:aws:ec2:{self.region}:{self.account}:instance/{instance_id}"
+            for instance_id in gpu_instance_ids
+        ]
+
         # ===================================================================
         # 1. Orchestrator Task Role (Fargate/ECS)
         # ===================================================================
@@ -52,6 +66,7 @@ class IamStack(Stack):
                 ],
                 resources=[
                     queue_arn,  # GPU tasks queue
+                    *(lane_queue_arns or []),  # GPU priority lanes
                     f"arn:aws:sqs:{self.region}:{self.account}:cpu_tasks_queue",  # CPU tasks queue
                 ]
             )
@@ -66,12 +81,54 @@ class IamStack(Stack):
                     "dynamodb:GetItem",
                     "dynamodb:UpdateItem",
                     "dynamodb:Query",
+                    "dynamodb:BatchGetItem",  # Bulk status, job watcher
+                    "dynamodb:BatchWriteItem",  # Batch submission
                     "dynamodb:DescribeTable",  # For health checks
                 ],
                 resources=[table_arn, table_index_arn]
             )
         )
 
+        # S3 permissions (input ETags for the result cache; s3:// inputs in
+        # other buckets get AccessDenied and bypass the cache)
+        self.orchestrator_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:GetObject",  # HeadObject is authorized by GetObject
+                ],
+                resources=[f"arn:aws:s3:::{assets_bucket}/*"]
+            )
+        )
+
+        # S3 permissions (write staged inputs, see staging.py)
+        self.orchestrator_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:PutObject",
+                ],
+                resources=[f"arn:aws:s3:::{assets_bucket}/{staging_prefix.strip('/')}/*"]
+            )
+        )
+
+        # S3 permissions (read the task archive; ListBucket lets missing
+        # partitions return NoSuchKey instead of AccessDenied)
+        self.orchestrator_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:ListBucket",
+                ],
+                resources=[f"arn:aws:s3:::{archive_bucket}"],
+                conditions={
+                    "StringLike": {
+                        "s3:prefix": [f"{archive_prefix}*"]
+                    }
+                }
+            )
+        )
+
         # EC2 permissions (describe and start GPU instance)
         self.orchestrator_role.add_to_policy(
             iam.PolicyStatement(
@@ -88,8 +145,9 @@ class IamStack(Stack):
                 effect=iam.Effect.ALLOW,
                 actions=[
                     "ec2:StartInstances",
+                    "ec2:StopInstances",  # Ends speculative warm-ups no job followed
                 ],
-                resources=[f"arn:aws:ec2:{self.region}:{self.account}:instance/{gpu_instance_id}"],
+                resources=gpu_instance_arns,
                 conditions={
                     "StringEquals": {
                         "ec2:ResourceTag/Purpose": "GPU-ComfyUI"
@@ -121,7 +179,7 @@ class IamStack(Stack):
                     "sqs:GetQueueAttributes",
                     "sqs:GetQueueUrl",
                 ],
-                resources=[queue_arn]
+                resources=[queue_arn, *(lane_queue_arns or [])]
             )
         )
 
@@ -195,7 +253,7 @@ class IamStack(Stack):
                 actions=[
                     "ec2:StopInstances",
                 ],
-                resources=[f"arn:aws:ec2:{self.region}:{self.account}:instance/{gpu_instance_id}"],
+                resources=gpu_instance_arns,
                 conditions={
                     "StringEquals": {
                         "ec2:ResourceTag/Purpose": "GPU-ComfyUI"
@@ -204,6 +262,110 @@ class IamStack(Stack):
             )
         )
 
+        # Fleet scale-in (backlog across GPU lanes, per-instance CPU utilization)
+        self.lambda_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "sqs:GetQueueAttributes",
+                ],
+                resources=[queue_arn, *(lane_queue_arns or [])]
+            )
+        )
+
+        # Fleet scale-in (processing tasks leased by each instance's adapters)
+        self.lambda_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "dynamodb:Query",
+                ],
+                resources=[table_index_arn]
+            )
+        )
+
+        self.lambda_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "cloudwatch:GetMetricStatistics",
+                ],
+                resources=["*"],  # GetMetricStatistics doesn't support resource-level permissions
+            )
+        )
+
+        # ===================================================================
+        # 4. Lambda Execution Role (Task archive)
+        # ===================================================================
+
+        self.archive_lambda_role = iam.Role(
+            self,
+            "LambdaTaskArchiveRole",
+            role_name="lambda-task-archive-role",
+            assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+            description="IAM role for the task archive Lambda function",
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name(
+                    "service-role/AWSLambdaBasicExecutionRole"
+                )
+            ]
+        )
+
+        # DynamoDB permissions (read terminal tasks, keep the watermark item)
+        self.archive_lambda_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "dynamodb:Query",
+                    "dynamodb:GetItem",
+                    "dynamodb:PutItem",
+                    "dynamodb:BatchWriteItem",  # Only with TASK_ARCHIVE_DELETE=1
+                ],
+                resources=[table_arn, table_index_arn]
+            )
+        )
+
+        # S3 permissions (write archive partitions)
+        self.archive_lambda_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:PutObject",
+                ],
+                resources=[f"arn:aws:s3:::{archive_bucket}/{archive_prefix}*"]
+            )
+        )
+
+        # ===================================================================
+        # 5. Lambda Execution Role (Staging lifecycle rule)
+        # ===================================================================
+
+        self.staging_lifecycle_role = iam.Role(
+            self,
+            "LambdaStagingLifecycleRole",
+            role_name="lambda-staging-lifecycle-role",
+            assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+            description="IAM role for the staging prefix lifecycle rule custom resource",
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name(
+                    "service-role/AWSLambdaBasicExecutionRole"
+                )
+            ]
+        )
+
+        # S3 permissions (read and merge the assets bucket's lifecycle rules;
+        # PutLifecycleConfiguration also authorizes DeleteBucketLifecycle)
+        self.staging_lifecycle_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:GetLifecycleConfiguration",
+                    "s3:PutLifecycleConfiguration",
+                ],
+                resources=[f"arn:aws:s3:::{assets_bucket}"]
+            )
+        )
+
         # ===================================================================
         # Outputs
         # ===================================================================
@@ -5,6 +5,8 @@ Creates Lambda function that:
 - Is triggered by CloudWatch Alarm (queue empty for 30 min)
 - Checks GPU instance state
 - Stops the instance if running
+- In fleet mode (several instance IDs), also runs every 5 minutes and stops
+  at most one idle instance per run (never the last one; the alarm does that)
 """
 
 from aws_cdk import (
@@ -14,7 +16,10 @@ from aws_cdk import (
 )
 from aws_cdk import aws_lambda as lambda_
 from aws_cdk import aws_iam as iam
+from aws_cdk import aws_events as events
+from aws_cdk import aws_events_targets as targets
 from constructs import Construct
+from typing import List, Optional
 import os
 
 
@@ -23,8 +28,12 @@ class LambdaStack(Stack):
         self,
         scope: Construct,
         construct_id: str,
-        gpu_instance_id: str,
+        gpu_instance_ids: List[str],
         lambda_role: iam.Role,
+        gpu_queue_urls: Optional[List[str]] = None,
+        fleet_min: str = "0",
+        fleet_jobs_per_instance: str = "10",
+        table_name: str = "task_store",
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -49,7 +58,7 @@ class LambdaStack(Stack):
             # Code
             code=lambda_.Code.from_asset(
                 lambda_code_path,
-                exclude=["*.pyc", "__pycache__", "*.md", "test_*.py", "*.txt", "aws/"]
+                exclude=["*.pyc", "__pycache__", "*.md", "test_*.py", "benchmark.py", "*.txt", "aws/"]
             ),
             # Role
             role=lambda_role,
@@ -60,7 +69,13 @@ class LambdaStack(Stack):
             # Environment variables
             # Note: AWS_REGION is automatically set by Lambda runtime
             environment={
-                "GPU_INSTANCE_ID": gpu_instance_id,
+                "GPU_INSTANCE_ID": gpu_instance_ids[0],
+                "GPU_INSTANCE_IDS": ",".join(gpu_instance_ids),
+                "GPU_QUEUE_URLS": ",".join(gpu_queue_urls or []),
+                "GPU_FLEET_MIN": fleet_min,
+                "GPU_FLEET_JOBS_PER_INSTANCE": fleet_jobs_per_instance,
+                # Task leases tell which fleet instances are busy
+                "DYNAMODB_TABLE": table_name,
             },
             # Reserved concurrent executions (optional)
             # Set to 1 to prevent multiple simultaneous executions
@@ -75,6 +90,18 @@ class LambdaStack(Stack):
             source_account=self.account,
         )
 
+        # Fleet mode: the idle alarm fires once when every lane drains, so
+        # gradual scale-in while work is still queued needs a schedule
+        if len(gpu_instance_ids) > 1:
+            events.Rule(
+                self,
+                "FleetScaleInSchedule",
+                rule_name="gpu-fleet-scale-in",
+                description="Stop one idle GPU fleet instance when the backlog allows",
+                schedule=events.Schedule.rate(Duration.minutes(5)),
+                targets=[targets.LambdaFunction(self.shutdown_function)],
+            )
+
         # Outputs
         CfnOutput(
             self,
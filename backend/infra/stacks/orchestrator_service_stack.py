@@ -8,6 +8,8 @@ Creates the ECS Fargate service for the GPU task orchestrator:
 - Service discovery integration
 """
 
+from typing import List
+
 from aws_cdk import (
     Stack,
     Duration,
@@ -36,9 +38,19 @@ class OrchestratorServiceStack(Stack):
         namespace: servicediscovery.PrivateDnsNamespace,
         queue_url: str,
         table_name: str,
-        gpu_instance_id: str,
+        gpu_instance_ids: List[str],
         orchestrator_role: iam.Role,
         cors_origins: str,
+        interactive_queue_url: str = "",
+        deferred_queue_url: str = "",
+        fleet_min: str = "0",
+        fleet_max: str = "0",
+        fleet_jobs_per_instance: str = "10",
+        archive_bucket: str = "",
+        archive_prefix: str = "task-archive/",
+        assets_bucket: str = "short-drama-assets",
+        cloudfront_domain: str = "",
+        staging_prefix: str = "staging",
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -97,8 +109,20 @@ class OrchestratorServiceStack(Stack):
             environment={
                 "AWS_DEFAULT_REGION": self.region,
                 "SQS_QUEUE_URL": queue_url,
+                "SQS_INTERACTIVE_QUEUE_URL": interactive_queue_url,
+                "SQS_DEFERRED_QUEUE_URL": deferred_queue_url,
                 "DYNAMODB_TABLE": table_name,
-                "GPU_INSTANCE_ID": gpu_instance_id,
+                "GPU_INSTANCE_ID": gpu_instance_ids[0],
+                "GPU_INSTANCE_IDS": ",".join(gpu_instance_ids),
+                "GPU_FLEET_MIN": fleet_min,
+                "GPU_FLEET_MAX": fleet_max,
+                "GPU_FLEET_JOBS_PER_INSTANCE": fleet_jobs_per_instance,
+                "TASK_ARCHIVE_BUCKET": archive_bucket,
+                "TASK_ARCHIVE_PREFIX": archive_prefix,
+                # Input staging writes here (PutObject is granted on this prefix only)
+                "S3_BUCKET_NAME": assets_bucket,
+                "CLOUDFRONT_DOMAIN": cloudfront_domain,
+                "STAGING_PREFIX": staging_prefix,
                 "CORS_ORIGINS": cors_origins,
             },
             logging=ecs.LogDriver.aws_logs(
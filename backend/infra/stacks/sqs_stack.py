@@ -2,8 +2,9 @@
 SQS Stack - Message Queue for GPU Task Orchestration
 
 Creates:
-- Main queue: gpu_tasks_queue
-- Dead Letter Queue (DLQ): gpu_tasks_queue_dlq
+- Main queue: gpu_tasks_queue (normal lane)
+- Priority lanes: gpu_tasks_queue_interactive, gpu_tasks_queue_deferred
+- Dead Letter Queue (DLQ): gpu_tasks_queue_dlq (shared by all lanes)
 """
 
 from aws_cdk import (
@@ -57,6 +58,40 @@ class SqsStack(Stack):
             removal_policy=RemovalPolicy.DESTROY,  # Can delete main queue
         )
 
+        # Priority lanes: same settings as the main queue, drained by the
+        # GPU adapter with weighted priority (interactive > normal > deferred)
+        self.interactive_queue = sqs.Queue(
+            self,
+            "GpuTasksInteractiveQueue",
+            queue_name=f"{queue_name}_interactive",
+            visibility_timeout=Duration.seconds(300),
+            receive_message_wait_time=Duration.seconds(20),
+            retention_period=Duration.days(1),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=3,
+                queue=self.dlq
+            ),
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
+        self.deferred_queue = sqs.Queue(
+            self,
+            "GpuTasksDeferredQueue",
+            queue_name=f"{queue_name}_deferred",
+            visibility_timeout=Duration.seconds(300),
+            receive_message_wait_time=Duration.seconds(20),
+            # Deferred jobs may wait hours for the GPU
+            retention_period=Duration.days(4),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=3,
+                queue=self.dlq
+            ),
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
+        # All GPU queues, in drain priority order
+        self.gpu_queues = [self.interactive_queue, self.queue, self.deferred_queue]
+
         # Outputs
         CfnOutput(
             self,
@@ -74,6 +109,22 @@ class SqsStack(Stack):
             export_name=f"{construct_id}-QueueArn"
         )
 
+        CfnOutput(
+            self,
+            "InteractiveQueueUrl",
+            value=self.interactive_queue.queue_url,
+            description="URL of the interactive GPU lane",
+            export_name=f"{construct_id}-InteractiveQueueUrl"
+        )
+
+        CfnOutput(
+            self,
+            "DeferredQueueUrl",
+            value=self.deferred_queue.queue_url,
+            description="URL of the deferred GPU lane",
+            export_name=f"{construct_id}-DeferredQueueUrl"
+        )
+
         CfnOutput(
             self,
             "DLQUrl",
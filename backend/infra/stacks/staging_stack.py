@@ -0,0 +1,82 @@
+"""
+Staging Stack - Input Staging Prefix Expiry
+
+Creates a custom resource that:
+- Adds an S3 lifecycle rule expiring the orchestrator's input staging
+  prefix (STAGING_PREFIX) in the assets bucket after STAGING_EXPIRE_DAYS
+- Merges the rule into the bucket's existing lifecycle configuration (the
+  bucket is not managed by CDK) and removes only that rule on delete
+"""
+
+from aws_cdk import (
+    Stack,
+    Duration,
+    CustomResource,
+    CfnOutput,
+)
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_iam as iam
+from aws_cdk import custom_resources as cr
+from constructs import Construct
+import os
+
+
+class StagingStack(Stack):
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        assets_bucket: str,
+        lifecycle_role: iam.Role,
+        staging_prefix: str = "staging",
+        expire_days: str = "1",
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # Lambda code is in backend/orchestrator/staging_lifecycle.py
+        lambda_code_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "orchestrator"
+        )
+
+        self.lifecycle_function = lambda_.Function(
+            self,
+            "StagingLifecycleFunction",
+            function_name="staging-lifecycle-lambda",
+            description="Keep the S3 lifecycle rule expiring the input staging prefix",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="staging_lifecycle.lambda_handler",
+            code=lambda_.Code.from_asset(
+                lambda_code_path,
+                exclude=["*.pyc", "__pycache__", "*.md", "test_*.py", "benchmark.py", "*.txt", "aws/"]
+            ),
+            role=lifecycle_role,
+            timeout=Duration.minutes(1),
+        )
+
+        provider = cr.Provider(
+            self,
+            "StagingLifecycleProvider",
+            on_event_handler=self.lifecycle_function,
+        )
+
+        CustomResource(
+            self,
+            "StagingLifecycleRule",
+            service_token=provider.service_token,
+            properties={
+                "Bucket": assets_bucket,
+                "Prefix": f"{staging_prefix.strip('/')}/",
+                "ExpirationDays": expire_days,
+            },
+        )
+
+        # Outputs
+        CfnOutput(
+            self,
+            "StagingPrefix",
+            value=f"s3://{assets_bucket}/{staging_prefix.strip('/')}/",
+            description=f"Input staging prefix (expires after {expire_days} days)",
+            export_name=f"{construct_id}-StagingPrefix"
+        )
@@ -0,0 +1,210 @@
+"""
+Queue-Aware Admission Control
+
+Submissions are checked against the current backlog of the queue(s) their
+job type runs on before anything is written or queued.
+
+- The backlog is the cached ApproximateNumberOfMessages + NotVisible +
+  Delayed of the queues (from HealthMonitor, no SQS call per request), plus
+  the jobs this orchestrator admitted since those stats were taken.
+- Each job type has a soft and a hard limit. Below soft a job is admitted.
+  Between soft and hard it is either rejected with 429 + Retry-After, or
+  queued with an SQS delay (ADMISSION_SOFT_ACTION). At or above hard it is
+  always rejected.
+- Retry-After / delay grow linearly from ADMISSION_MIN_WAIT_SECONDS at the
+  soft limit to ADMISSION_MAX_WAIT_SECONDS at the hard limit.
+- Deferred jobs are expected to wait, so only the hard limit applies to them.
+- Unknown backlog (stats not refreshed yet) admits everything.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 'reject' (429 + Retry-After) or 'delay' (queue with SQS DelaySeconds) above the soft limit
+ADMISSION_SOFT_ACTION = os.getenv('ADMISSION_SOFT_ACTION', 'reject')
+
+# Default limits (queued + in-flight messages) per queue group
+ADMISSION_GPU_SOFT_LIMIT = int(os.getenv('ADMISSION_GPU_SOFT_LIMIT', '100'))
+ADMISSION_GPU_HARD_LIMIT = int(os.getenv('ADMISSION_GPU_HARD_LIMIT', '300'))
+ADMISSION_CPU_SOFT_LIMIT = int(os.getenv('ADMISSION_CPU_SOFT_LIMIT', '500'))
+ADMISSION_CPU_HARD_LIMIT = int(os.getenv('ADMISSION_CPU_HARD_LIMIT', '2000'))
+
+# Per job type overrides, e.g. "qwen-image-edit=50:150,face-mask=300:1000"
+ADMISSION_LIMITS = os.getenv('ADMISSION_LIMITS', '')
+
+# Retry-After / delay range (seconds); SQS caps DelaySeconds at 900
+ADMISSION_MIN_WAIT_SECONDS = int(os.getenv('ADMISSION_MIN_WAIT_SECONDS', '15'))
+ADMISSION_MAX_WAIT_SECONDS = min(int(os.getenv('ADMISSION_MAX_WAIT_SECONDS', '900')), 900)
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse per job type limits.
+
+    Args:
+        spec: Comma-separated "job_type=soft:hard" entries
+
+    Returns:
+        Dict of job type -> (soft, hard)
+
+    Raises:
+        ValueError: If an entry is malformed or soft > hard
+    """
+    limits = {}
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        job_type, _, values = entry.partition('=')
+        soft, _, hard = values.partition(':')
+        soft, hard = int(soft), int(hard)
+        if soft > hard:
+            raise ValueError(f"Soft limit above hard limit for {job_type}: {entry}")
+        limits[job_type.strip()] = (soft, hard)
+    return limits
+
+
+class AdmissionDecision:
+    """Outcome of an admission check."""
+
+    def __init__(self, action: str, backlog: Optional[int], soft: int, hard: int, wait_seconds: int = 0):
+        self.action = action  # 'admit', 'delay' or 'reject'
+        self.backlog = backlog
+        self.soft = soft
+        self.hard = hard
+        self.wait_seconds = wait_seconds
+
+    @property
+    def delay_seconds(self) -> int:
+        """SQS DelaySeconds for an admitted job (0 unless delayed)."""
+        return self.wait_seconds if self.action == 'delay' else 0
+
+
+class AdmissionController:
+    """Per job type soft/hard backlog limits over cached queue statistics."""
+
+    def __init__(
+        self,
+        get_queue_stats: Callable[[str], Optional[Dict[str, Any]]],
+        queue_groups: Dict[str, List[str]],
+        job_groups: Dict[str, str]
+    ):
+        """
+        Args:
+            get_queue_stats: Returns cached stats of a queue by name
+                             ({'depth', 'in_flight', 'delayed', 'updated_at'}) or None
+            queue_groups: Group name (e.g., 'gpu') -> queue names sharing one worker pool
+            job_groups: Job type (e.g., 'camera-angle') -> group name
+        """
+        self.get_queue_stats = get_queue_stats
+        self.queue_groups = queue_groups
+        self.job_groups = job_groups
+
+        defaults = {
+            'gpu': (ADMISSION_GPU_SOFT_LIMIT, ADMISSION_GPU_HARD_LIMIT),
+            'cpu': (ADMISSION_CPU_SOFT_LIMIT, ADMISSION_CPU_HARD_LIMIT),
+        }
+        self.limits = {job_type: defaults[group] for job_type, group in job_groups.items()}
+        self.limits.update(parse_limits(ADMISSION_LIMITS))
+
+        self._lock = threading.Lock()
+        # group -> [(admitted_at, count)] not yet reflected in queue stats
+        self._recent: Dict[str, List[Tuple[float, int]]] = {group: [] for group in queue_groups}
+
+        self.admitted = 0
+        self.delayed = 0
+        self.rejected = 0
+
+    # ==================== Backlog ====================
+
+    def backlog(self, group: str) -> Optional[int]:
+        """
+        Estimate the current backlog of a queue group.
+
+        Args:
+            group: Queue group name
+
+        Returns:
+            Queued + in-flight + delayed messages, or None if no stats are known
+        """
+        stats = [self.get_queue_stats(name) for name in self.queue_groups[group]]
+        stats = [s for s in stats if s is not None]
+        if not stats:
+            return None
+
+        total = sum(s['depth'] + s['in_flight'] + s.get('delayed', 0) for s in stats)
+        taken_at = min(s['updated_at'] for s in stats)
+
+        with self._lock:
+            recent = [(t, n) for t, n in self._recent[group] if t >= taken_at]
+            self._recent[group] = recent
+            return total + sum(n for _, n in recent)
+
+    def _wait_seconds(self, backlog: int, soft: int, hard: int) -> int:
+        fraction = min(1.0, (backlog - soft) / max(1, hard - soft))
+        return int(ADMISSION_MIN_WAIT_SECONDS + (ADMISSION_MAX_WAIT_SECONDS - ADMISSION_MIN_WAIT_SECONDS) * fraction)
+
+    # ==================== Decisions ====================
+
+    def check(self, job_type: str, count: int = 1, deferred: bool = False) -> AdmissionDecision:
+        """
+        Decide whether jobs of a type may be queued now.
+
+        Args:
+            job_type: Job type (e.g., 'camera-angle', 'face-mask')
+            count: Number of jobs being submitted together
+            deferred: Deferred-lane jobs (only the hard limit applies)
+
+        Returns:
+            AdmissionDecision ('admit', 'delay' or 'reject')
+        """
+        soft, hard = self.limits[job_type]
+        backlog = self.backlog(self.job_groups[job_type])
+
+        if backlog is None:
+            return AdmissionDecision('admit', None, soft, hard)
+        projected = backlog + count
+        if projected > hard:
+            return AdmissionDecision('reject', backlog, soft, hard, ADMISSION_MAX_WAIT_SECONDS)
+        if projected > soft and not deferred:
+            action = 'delay' if ADMISSION_SOFT_ACTION == 'delay' else 'reject'
+            return AdmissionDecision(action, backlog, soft, hard, self._wait_seconds(projected, soft, hard))
+        return AdmissionDecision('admit', backlog, soft, hard)
+
+    def record(self, job_type: str, decision: AdmissionDecision, count: int = 1) -> None:
+        """
+        Record the outcome of a check.
+
+        Admitted and delayed jobs are added to the local backlog estimate
+        until the next queue stats refresh reflects them.
+
+        Args:
+            job_type: Job type that was checked
+            decision: The decision from check()
+            count: Number of jobs it covered
+        """
+        if decision.action == 'reject':
+            self.rejected += count
+            return
+
+        if decision.action == 'delay':
+            self.delayed += count
+        else:
+            self.admitted += count
+        with self._lock:
+            self._recent[self.job_groups[job_type]].append((time.time(), count))
+
+    # ==================== Introspection ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return limits, backlog estimates and counters for debug endpoints."""
+        return {
+            "soft_action": ADMISSION_SOFT_ACTION,
+            "limits": {job_type: {"soft": soft, "hard": hard} for job_type, (soft, hard) in self.limits.items()},
+            "backlog": {group: self.backlog(group) for group in self.queue_groups},
+            "admitted": self.admitted,
+            "delayed": self.delayed,
+            "rejected": self.rejected
+        }
@@ -1,19 +1,39 @@
 """
 DynamoDB helper functions for task state management.
+
+Task records carry a DynamoDB TTL ('ttl'): TASK_TTL_DAYS from creation,
+reset to TASK_TERMINAL_TTL_DAYS when a task completes, fails or is
+cancelled. Terminal tasks are exported to S3 by task_archive.py before
+they expire.
 """
 
-import boto3
+import json
+import os
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from botocore.exceptions import ClientError
 
+from .clients import get_resource, get_table
+
+# Task record lifetime in days (0 = never expire)
+TASK_TTL_DAYS = int(os.getenv('TASK_TTL_DAYS', '30'))
+TASK_TERMINAL_TTL_DAYS = int(os.getenv('TASK_TERMINAL_TTL_DAYS', '14'))
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def task_ttl(now: int, terminal: bool = False) -> Optional[int]:
+    """TTL timestamp of a task record written at now (None if expiry is disabled)."""
+    days = TASK_TERMINAL_TTL_DAYS if terminal else TASK_TTL_DAYS
+    return now + days * 86400 if days else None
+
 
 def create_task(
     table_name: str,
     task_id: str,
     job_type: str,
     region: str,
-    initial_status: str = 'pending'
+    initial_status: str = 'pending',
+    attributes: Optional[Dict[str, Any]] = None
 ) -> None:
     """
     Create a new task record in DynamoDB.
@@ -24,24 +44,30 @@ def create_task(
         job_type: Type of job (e.g., "/api/v1/camera-angle/jobs")
         region: AWS region name
         initial_status: Initial status (default: 'pending')
+        attributes: Extra attributes stored on the record (e.g., tenant)
 
     Raises:
         ClientError: If AWS API call fails
     """
-    dynamodb = boto3.resource('dynamodb', region_name=region)
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name, region)
 
     try:
         current_time = int(time.time())
+        item = {
+            'task_id': task_id,
+            'status': initial_status,
+            'job_type': job_type,
+            'created_at': current_time,
+            'updated_at': current_time
+        }
+        ttl = task_ttl(current_time)
+        if ttl:
+            item['ttl'] = ttl
+        if attributes:
+            item.update(attributes)
 
         table.put_item(
-            Item={
-                'task_id': task_id,
-                'status': initial_status,
-                'job_type': job_type,
-                'created_at': current_time,
-                'updated_at': current_time
-            },
+            Item=item,
             ConditionExpression='attribute_not_exists(task_id)'  # Prevent overwrites
         )
 
@@ -56,6 +82,157 @@ def create_task(
             raise
 
 
+def backfill_task(
+    table_name: str,
+    task_id: str,
+    job_type: str,
+    region: str,
+    attributes: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Fill in the creation attributes of a task whose create_task did not land.
+
+    Used when the SQS message was sent but the conditional put lost to a
+    worker's status upsert, or failed outright. Every attribute is written
+    with if_not_exists, so a status or TTL the worker already set is kept;
+    if the record does not exist yet it is created as 'pending'.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        task_id: Unique task identifier
+        job_type: Type of job (e.g., "/api/v1/camera-angle/jobs")
+        region: AWS region name
+        attributes: Extra attributes stored on the record (e.g., tenant)
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        current_time = int(time.time())
+        values = {
+            'status': 'pending',
+            'job_type': job_type,
+            'created_at': current_time,
+            'updated_at': current_time
+        }
+        ttl = task_ttl(current_time)
+        if ttl:
+            values['ttl'] = ttl
+        if attributes:
+            values.update(attributes)
+
+        names = {f"#a{i}": name for i, name in enumerate(values)}
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression="SET " + ", ".join(
+                f"{alias} = if_not_exists({alias}, :v{i})" for i, alias in enumerate(names)
+            ),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={f":v{i}": value for i, value in enumerate(values.values())}
+        )
+
+        print(f"Task {task_id} backfilled")
+
+    except ClientError as e:
+        print(f"Error backfilling task in DynamoDB: {e}")
+        raise
+
+
+def batch_create_tasks(
+    table_name: str,
+    tasks: List[Dict[str, str]],
+    region: str,
+    initial_status: str = 'pending'
+) -> List[Dict[str, str]]:
+    """
+    Create many task records using the DynamoDB batch writer.
+
+    Tasks are written in chunks of 25 (the BatchWriteItem limit); the batch
+    writer retries unprocessed items. Unlike create_task there is no
+    overwrite protection, so task IDs must be freshly generated.
+
+    A chunk that raises may still be partly written, so it is read back
+    (consistent read) and only the items that did not land are reported.
+    If that read fails too, the chunk's records that exist are marked
+    failed (and lose held_message, so FairQueue.load() does not send them)
+    and the whole chunk is reported.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        tasks: List of dicts with 'task_id', 'job_type' and optional
+               'attributes' (extra attributes stored on the record)
+        region: AWS region name
+        initial_status: Initial status (default: 'pending')
+
+    Returns:
+        List of {'task_id', 'error'} dicts for tasks that were not written
+    """
+    table = get_table(table_name, region)
+    current_time = int(time.time())
+    ttl = task_ttl(current_time)
+    failed = []
+
+    for i in range(0, len(tasks), 25):
+        chunk = tasks[i:i + 25]
+        try:
+            with table.batch_writer() as batch:
+                for task in chunk:
+                    item = {
+                        'task_id': task['task_id'],
+                        'status': initial_status,
+                        'job_type': task['job_type'],
+                        'created_at': current_time,
+                        'updated_at': current_time
+                    }
+                    if ttl:
+                        item['ttl'] = ttl
+                    item.update(task.get('attributes') or {})
+                    batch.put_item(Item=item)
+        except ClientError as e:
+            print(f"Error in batch create tasks: {e}")
+            chunk_ids = [task['task_id'] for task in chunk]
+            try:
+                written = {
+                    item['task_id']
+                    for item in batch_get_tasks(table_name, chunk_ids, region, consistent_read=True)
+                }
+            except ClientError as read_error:
+                print(f"Cannot check which tasks were written, failing the chunk: {read_error}")
+                for task_id in chunk_ids:
+                    _fail_unconfirmed_task(table, task_id, f"Failed to create task in database: {e}")
+                written = set()
+            failed.extend({'task_id': task_id, 'error': str(e)} for task_id in chunk_ids if task_id not in written)
+
+    print(f"Batch created {len(tasks) - len(failed)} task(s) with status: {initial_status}")
+    return failed
+
+
+def _fail_unconfirmed_task(table, task_id: str, error_message: str) -> None:
+    """Mark a task failed if its record exists (best effort, never creates one)."""
+    current_time = int(time.time())
+    update_expr = "SET #status = :failed, updated_at = :now, error_message = :error_message"
+    names = {'#status': 'status'}
+    values = {':failed': 'failed', ':now': current_time, ':error_message': error_message}
+    ttl = task_ttl(current_time, terminal=True)
+    if ttl:
+        update_expr += ", #ttl = :ttl"
+        names['#ttl'] = 'ttl'
+        values[':ttl'] = ttl
+    try:
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression=update_expr + " REMOVE held_message, held_queue_url",
+            ConditionExpression="attribute_exists(task_id)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            print(f"Error failing unconfirmed task {task_id}: {e}")
+
+
 def update_task_status(
     table_name: str,
     task_id: str,
@@ -71,7 +248,7 @@ def update_task_status(
     Args:
         table_name: Name of the DynamoDB table
         task_id: Unique task identifier
-        status: New status ('pending', 'processing', 'completed', 'failed')
+        status: New status ('pending', 'processing', 'completed', 'failed', 'cancelled')
         region: AWS region name
         result_s3_uri: S3 URI of the result (for completed tasks)
         error_message: Error message (for failed tasks)
@@ -80,8 +257,7 @@ def update_task_status(
     Raises:
         ClientError: If AWS API call fails
     """
-    dynamodb = boto3.resource('dynamodb', region_name=region)
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name, region)
 
     try:
         current_time = int(time.time())
@@ -94,6 +270,17 @@ def update_task_status(
             ':updated_at': current_time
         }
 
+        if status == 'processing':
+            # First pickup time, used for queue wait / execution statistics
+            update_expr += ", started_at = if_not_exists(started_at, :updated_at)"
+
+        ttl = task_ttl(current_time, terminal=True) if status in TERMINAL_STATUSES else None
+        if ttl:
+            # Terminal records live TASK_TERMINAL_TTL_DAYS (archived before expiry)
+            update_expr += ", #ttl = :ttl"
+            expr_attr_names['#ttl'] = 'ttl'
+            expr_attr_values[':ttl'] = ttl
+
         if result_s3_uri is not None:
             update_expr += ", result_s3_uri = :result_s3_uri"
             expr_attr_values[':result_s3_uri'] = result_s3_uri
@@ -120,7 +307,69 @@ def update_task_status(
         raise
 
 
-def get_task_status(table_name: str, task_id: str, region: str) -> Optional[Dict[str, Any]]:
+def cancel_task(table_name: str, task_id: str, region: str) -> Optional[Dict[str, Any]]:
+    """
+    Mark a pending, processing or waiting (pipeline stage) task 'cancelled'.
+
+    The write is conditional on the current status, so a task that has
+    already finished (or was cancelled) is never overwritten, and the
+    adapters' own writes are conditional on the task not being cancelled.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        task_id: Unique task identifier
+        region: AWS region name
+
+    Returns:
+        The task as it was before cancellation, or None if it does not
+        exist or has already finished
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+    current_time = int(time.time())
+
+    update_expr = "SET #status = :cancelled, updated_at = :updated_at, cancelled_at = :updated_at"
+    expr_attr_names = {'#status': 'status'}
+    expr_attr_values = {
+        ':cancelled': 'cancelled',
+        ':updated_at': current_time,
+        ':pending': 'pending',
+        ':processing': 'processing',
+        ':waiting': 'waiting'
+    }
+    ttl = task_ttl(current_time, terminal=True)
+    if ttl:
+        update_expr += ", #ttl = :ttl"
+        expr_attr_names['#ttl'] = 'ttl'
+        expr_attr_values[':ttl'] = ttl
+
+    try:
+        response = table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression=update_expr,
+            ConditionExpression="#status IN (:pending, :processing, :waiting)",
+            ExpressionAttributeNames=expr_attr_names,
+            ExpressionAttributeValues=expr_attr_values,
+            ReturnValues='ALL_OLD'
+        )
+        print(f"Task {task_id} cancelled")
+        return response.get('Attributes')
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        print(f"Error cancelling task in DynamoDB: {e}")
+        raise
+
+
+def get_task_status(
+    table_name: str,
+    task_id: str,
+    region: str,
+    consistent_read: bool = False
+) -> Optional[Dict[str, Any]]:
     """
     Retrieve task information from DynamoDB.
 
@@ -128,6 +377,7 @@ def get_task_status(table_name: str, task_id: str, region: str) -> Optional[Dict
         table_name: Name of the DynamoDB table
         task_id: Unique task identifier
         region: AWS region name
+        consistent_read: Use a strongly consistent read (e.g., right after creation)
 
     Returns:
         Dictionary containing task information, or None if not found
@@ -135,11 +385,10 @@ def get_task_status(table_name: str, task_id: str, region: str) -> Optional[Dict
     Raises:
         ClientError: If AWS API call fails
     """
-    dynamodb = boto3.resource('dynamodb', region_name=region)
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name, region)
 
     try:
-        response = table.get_item(Key={'task_id': task_id})
+        response = table.get_item(Key={'task_id': task_id}, ConsistentRead=consistent_read)
 
         item = response.get('Item')
         if item:
@@ -178,8 +427,7 @@ def query_tasks_by_status(
     Raises:
         ClientError: If AWS API call fails
     """
-    dynamodb = boto3.resource('dynamodb', region_name=region)
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name, region)
 
     try:
         response = table.query(
@@ -201,6 +449,221 @@ def query_tasks_by_status(
         raise
 
 
+def query_task_history(
+    table_name: str,
+    status: str,
+    since: int,
+    region: str,
+    until: Optional[int] = None,
+    max_items: int = 50000
+) -> List[Dict[str, Any]]:
+    """
+    List tasks with a status created in a time range (created_at and job_type only).
+
+    Pages through the 'status-created_at-index' GSI with a projection, so
+    this stays cheap even over weeks of history.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        status: Status to filter by (e.g., 'completed')
+        since: Unix timestamp; only tasks created at or after it are returned
+        region: AWS region name
+        until: Optional Unix timestamp; only tasks created before it are returned
+        max_items: Stop after this many items
+
+    Returns:
+        List of {'created_at', 'job_type'} items (newest first)
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+    items = []
+
+    try:
+        kwargs = {
+            'IndexName': 'status-created_at-index',
+            'KeyConditionExpression': '#status = :status AND created_at >= :since',
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': {':status': status, ':since': since},
+            'ProjectionExpression': 'created_at, job_type',
+            'ScanIndexForward': False
+        }
+        if until is not None:
+            kwargs['KeyConditionExpression'] = '#status = :status AND created_at BETWEEN :since AND :until'
+            kwargs['ExpressionAttributeValues'][':until'] = until - 1
+        while len(items) < max_items:
+            response = table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return items[:max_items]
+
+    except ClientError as e:
+        print(f"Error querying task history: {e}")
+        raise
+
+
+def query_held_tasks(table_name: str, region: str) -> List[Dict[str, Any]]:
+    """
+    List pending tasks held back by fair queuing (not sent to SQS yet).
+
+    Args:
+        table_name: Name of the DynamoDB table
+        region: AWS region name
+
+    Returns:
+        Held task items, oldest first
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+    items = []
+
+    try:
+        kwargs = {
+            'IndexName': 'status-created_at-index',
+            'KeyConditionExpression': '#status = :pending',
+            'FilterExpression': 'attribute_exists(held_message)',
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': {':pending': 'pending'}
+        }
+        while True:
+            response = table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return items
+
+    except ClientError as e:
+        print(f"Error querying held tasks: {e}")
+        raise
+
+
+def release_held_task(table_name: str, task_id: str, region: str) -> None:
+    """
+    Clear the held message of a task once it has been sent to SQS.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        task_id: Unique task identifier
+        region: AWS region name
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression="SET released_at = :now REMOVE held_message, held_queue_url",
+            ConditionExpression="attribute_exists(task_id)",
+            ExpressionAttributeValues={':now': int(time.time())}
+        )
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return  # Expired or deleted meanwhile
+        print(f"Error releasing held task in DynamoDB: {e}")
+        raise
+
+
+def update_staged_message(
+    table_name: str,
+    task_id: str,
+    attribute: str,
+    message: str,
+    status: str,
+    region: str
+) -> bool:
+    """
+    Replace the SQS message a task will be sent as, once its inputs are staged.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        task_id: Unique task identifier
+        attribute: 'held_message' (held job) or 'stage_message' (waiting pipeline stage)
+        message: New SQS message body (JSON)
+        status: Status the task must still have ('pending' or 'waiting')
+        region: AWS region name
+
+    Returns:
+        False if the task changed status or lost the message meanwhile
+        (cancelled, or already sent)
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression="SET #message = :message, updated_at = :now",
+            ConditionExpression="#status = :status AND attribute_exists(#message)",
+            ExpressionAttributeNames={'#message': attribute, '#status': 'status'},
+            ExpressionAttributeValues={':message': message, ':status': status, ':now': int(time.time())}
+        )
+        return True
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        print(f"Error updating staged message in DynamoDB: {e}")
+        raise
+
+
+def fail_held_task(table_name: str, task_id: str, error_message: str, region: str) -> bool:
+    """
+    Mark a held task failed before it was sent to SQS (e.g. a rejected input).
+
+    Args:
+        table_name: Name of the DynamoDB table
+        task_id: Unique task identifier
+        error_message: Error message recorded on the task
+        region: AWS region name
+
+    Returns:
+        False if the task was no longer held (cancelled, or already sent)
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        current_time = int(time.time())
+        update_expr = "SET #status = :failed, updated_at = :now, error_message = :error_message"
+        names = {'#status': 'status'}
+        values = {':failed': 'failed', ':pending': 'pending', ':now': current_time, ':error_message': error_message}
+        ttl = task_ttl(current_time, terminal=True)
+        if ttl:
+            update_expr += ", #ttl = :ttl"
+            names['#ttl'] = 'ttl'
+            values[':ttl'] = ttl
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression=update_expr + " REMOVE held_message, held_queue_url",
+            ConditionExpression="#status = :pending AND attribute_exists(held_message)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        print(f"Task {task_id} updated to status: failed")
+        return True
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        print(f"Error failing held task in DynamoDB: {e}")
+        raise
+
+
 def delete_task(table_name: str, task_id: str, region: str) -> None:
     """
     Delete a task from DynamoDB.
@@ -213,8 +676,7 @@ def delete_task(table_name: str, task_id: str, region: str) -> None:
     Raises:
         ClientError: If AWS API call fails
     """
-    dynamodb = boto3.resource('dynamodb', region_name=region)
-    table = dynamodb.Table(table_name)
+    table = get_table(table_name, region)
 
     try:
         table.delete_item(Key={'task_id': task_id})
@@ -228,15 +690,23 @@ def delete_task(table_name: str, task_id: str, region: str) -> None:
 def batch_get_tasks(
     table_name: str,
     task_ids: list,
-    region: str
+    region: str,
+    consistent_read: bool = False,
+    max_retries: int = 5
 ) -> list:
     """
-    Retrieve multiple tasks in a single batch operation.
+    Retrieve multiple tasks using BatchGetItem.
+
+    IDs are de-duplicated and fetched in chunks of 100 (the BatchGetItem
+    limit). UnprocessedKeys (throttling, 16 MB response limit) are retried
+    with exponential backoff.
 
     Args:
         table_name: Name of the DynamoDB table
         task_ids: List of task IDs to retrieve
         region: AWS region name
+        consistent_read: Use strongly consistent reads
+        max_retries: Maximum retries for UnprocessedKeys per chunk
 
     Returns:
         List of task items (may be fewer than requested if some don't exist)
@@ -244,20 +714,32 @@ def batch_get_tasks(
     Raises:
         ClientError: If AWS API call fails
     """
-    dynamodb = boto3.resource('dynamodb', region_name=region)
+    dynamodb = get_resource('dynamodb', region)
+    unique_ids = list(dict.fromkeys(task_ids))
+    items = []
 
     try:
-        keys = [{'task_id': task_id} for task_id in task_ids]
-
-        response = dynamodb.batch_get_item(
-            RequestItems={
+        for i in range(0, len(unique_ids), 100):
+            request_items = {
                 table_name: {
-                    'Keys': keys
+                    'Keys': [{'task_id': task_id} for task_id in unique_ids[i:i + 100]],
+                    'ConsistentRead': consistent_read
                 }
             }
-        )
 
-        items = response.get('Responses', {}).get(table_name, [])
+            for attempt in range(max_retries + 1):
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                items.extend(response.get('Responses', {}).get(table_name, []))
+
+                request_items = response.get('UnprocessedKeys') or {}
+                if not request_items:
+                    break
+                if attempt < max_retries:
+                    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            else:
+                unprocessed = len(request_items.get(table_name, {}).get('Keys', []))
+                print(f"Warning: {unprocessed} key(s) still unprocessed after {max_retries} retries")
+
         print(f"Retrieved {len(items)} task(s) from batch get")
 
         return items
@@ -265,3 +747,221 @@ def batch_get_tasks(
     except ClientError as e:
         print(f"Error in batch get tasks: {e}")
         raise
+
+
+def get_result_index(table_name: str, request_hash: str, region: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up the job recorded for a content-addressed request hash.
+
+    Index entries live in the task table under the key 'result#<hash>'
+    (they have no 'status' attribute, so the status GSI never sees them).
+
+    Args:
+        table_name: Name of the DynamoDB table
+        request_hash: Canonical request hash
+        region: AWS region name
+
+    Returns:
+        Index item with 'job_id', or None if the request was never seen
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        response = table.get_item(Key={'task_id': f"result#{request_hash}"}, ConsistentRead=True)
+        return response.get('Item')
+
+    except ClientError as e:
+        print(f"Error reading result index: {e}")
+        raise
+
+
+def put_result_index(
+    table_name: str,
+    request_hash: str,
+    job_id: str,
+    region: str,
+    replace_job_id: Optional[str] = None,
+    ttl_seconds: Optional[int] = None
+) -> bool:
+    """
+    Point a request hash at a job, unless another job claimed it first.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        request_hash: Canonical request hash
+        job_id: Job that will produce the result
+        region: AWS region name
+        replace_job_id: Existing job ID that may be replaced (e.g., it failed)
+        ttl_seconds: Optional lifetime of the entry (DynamoDB TTL attribute 'ttl')
+
+    Returns:
+        True if the entry now points at job_id, False if another job holds it
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+    current_time = int(time.time())
+
+    item = {
+        'task_id': f"result#{request_hash}",
+        'job_id': job_id,
+        'created_at': current_time
+    }
+    if ttl_seconds:
+        item['ttl'] = current_time + ttl_seconds
+
+    condition = 'attribute_not_exists(task_id)'
+    values = {}
+    if replace_job_id:
+        condition += ' OR job_id = :replace_job_id'
+        values[':replace_job_id'] = replace_job_id
+
+    try:
+        kwargs = {'Item': item, 'ConditionExpression': condition}
+        if values:
+            kwargs['ExpressionAttributeValues'] = values
+        table.put_item(**kwargs)
+        return True
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        print(f"Error writing result index: {e}")
+        raise
+
+
+def create_pipeline(
+    table_name: str,
+    pipeline_id: str,
+    steps: List[Dict[str, Any]],
+    tasks: List[Dict[str, Any]],
+    region: str
+) -> None:
+    """
+    Write a pipeline and the task records of all its stages.
+
+    The pipeline lives under 'pipeline#<id>' with its steps as a JSON
+    string (no 'status' attribute, so the status GSI never sees it).
+
+    Args:
+        table_name: Name of the DynamoDB table
+        pipeline_id: Unique pipeline identifier
+        steps: [{'id', 'job_type', 'job_id', 'depends_on'}, ...] in order
+        tasks: Stage task items ('task_id', 'status', 'job_type' and the
+               pipeline_stages attributes); timestamps and TTL are added
+        region: AWS region name
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+    current_time = int(time.time())
+    ttl = task_ttl(current_time)
+
+    try:
+        with table.batch_writer() as batch:
+            pipeline = {
+                'task_id': f"pipeline#{pipeline_id}",
+                'pipeline': json.dumps(steps),
+                'created_at': current_time
+            }
+            for item in [pipeline] + tasks:
+                item = dict(item, created_at=current_time)
+                if 'status' in item:
+                    item['updated_at'] = current_time
+                if ttl:
+                    item['ttl'] = ttl
+                batch.put_item(Item=item)
+
+        print(f"Pipeline {pipeline_id} created with {len(tasks)} stage(s)")
+
+    except ClientError as e:
+        print(f"Error creating pipeline in DynamoDB: {e}")
+        raise
+
+
+def get_pipeline(table_name: str, pipeline_id: str, region: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read the steps of a pipeline.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        pipeline_id: Unique pipeline identifier
+        region: AWS region name
+
+    Returns:
+        [{'id', 'job_type', 'job_id', 'depends_on'}, ...], or None if not found
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        item = table.get_item(Key={'task_id': f"pipeline#{pipeline_id}"}, ConsistentRead=True).get('Item')
+        return json.loads(item['pipeline']) if item else None
+
+    except ClientError as e:
+        print(f"Error reading pipeline: {e}")
+        raise
+
+
+def get_stats_item(table_name: str, name: str, region: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a persisted statistics document from the task table.
+
+    Statistics live under the key 'stats#<name>' as a JSON string (no
+    'status' attribute, so the status GSI never sees them).
+
+    Args:
+        table_name: Name of the DynamoDB table
+        name: Statistics document name (e.g., 'eta')
+        region: AWS region name
+
+    Returns:
+        The decoded document, or None if it was never written
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        response = table.get_item(Key={'task_id': f"stats#{name}"})
+        item = response.get('Item')
+        return json.loads(item['stats']) if item else None
+
+    except ClientError as e:
+        print(f"Error reading stats item: {e}")
+        raise
+
+
+def put_stats_item(table_name: str, name: str, stats: Dict[str, Any], region: str) -> None:
+    """
+    Write a statistics document to the task table (last writer wins).
+
+    Args:
+        table_name: Name of the DynamoDB table
+        name: Statistics document name (e.g., 'eta')
+        stats: JSON-serializable document
+        region: AWS region name
+
+    Raises:
+        ClientError: If AWS API call fails
+    """
+    table = get_table(table_name, region)
+
+    try:
+        table.put_item(Item={
+            'task_id': f"stats#{name}",
+            'stats': json.dumps(stats),
+            'updated_at': int(time.time())
+        })
+
+    except ClientError as e:
+        print(f"Error writing stats item: {e}")
+        raise
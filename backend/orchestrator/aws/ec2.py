@@ -2,10 +2,11 @@
 EC2 helper functions for managing AWS instances.
 """
 
-import boto3
 from typing import List, Dict, Optional, Any
 from botocore.exceptions import ClientError
 
+from .clients import get_client
+
 
 def list_ec2_instances(region: str, filters: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
@@ -22,7 +23,7 @@ def list_ec2_instances(region: str, filters: Optional[List[Dict[str, Any]]] = No
     Raises:
         ClientError: If AWS API call fails
     """
-    ec2_client = boto3.client('ec2', region_name=region)
+    ec2_client = get_client('ec2', region)
 
     try:
         if filters:
@@ -67,7 +68,7 @@ def get_instance_ip(instance_id: str, region: str) -> Optional[str]:
     Raises:
         ClientError: If AWS API call fails
     """
-    ec2_client = boto3.client('ec2', region_name=region)
+    ec2_client = get_client('ec2', region)
 
     try:
         response = ec2_client.describe_instances(InstanceIds=[instance_id])
@@ -97,7 +98,7 @@ def start_instance(instance_id: str, region: str) -> Dict[str, Any]:
     Raises:
         ClientError: If AWS API call fails
     """
-    ec2_client = boto3.client('ec2', region_name=region)
+    ec2_client = get_client('ec2', region)
 
     try:
         response = ec2_client.start_instances(InstanceIds=[instance_id])
@@ -132,7 +133,7 @@ def stop_instance(instance_id: str, region: str, force: bool = False) -> Dict[st
     Raises:
         ClientError: If AWS API call fails
     """
-    ec2_client = boto3.client('ec2', region_name=region)
+    ec2_client = get_client('ec2', region)
 
     try:
         response = ec2_client.stop_instances(
@@ -155,6 +156,42 @@ def stop_instance(instance_id: str, region: str, force: bool = False) -> Dict[st
         raise
 
 
+def wait_for_instance_state(
+    instance_id: str,
+    region: str,
+    waiter_name: str = 'instance_stopped',
+    delay: int = 5,
+    max_attempts: int = 60
+) -> None:
+    """
+    Block until an instance reaches a state using a boto3 EC2 waiter.
+
+    Args:
+        instance_id: The ID of the instance
+        region: AWS region name
+        waiter_name: EC2 waiter name ('instance_stopped', 'instance_running', ...)
+        delay: Seconds between DescribeInstances polls
+        max_attempts: Maximum number of polls before giving up
+
+    Raises:
+        WaiterError: If the instance does not reach the state in time
+        ClientError: If AWS API call fails
+    """
+    ec2_client = get_client('ec2', region)
+
+    try:
+        waiter = ec2_client.get_waiter(waiter_name)
+        waiter.wait(
+            InstanceIds=[instance_id],
+            WaiterConfig={'Delay': delay, 'MaxAttempts': max_attempts}
+        )
+        print(f"Instance {instance_id} reached waiter condition: {waiter_name}")
+
+    except ClientError as e:
+        print(f"Error waiting for instance {instance_id} ({waiter_name}): {e}")
+        raise
+
+
 def request_spot_instance(
     region: str,
     instance_type: str,
@@ -188,7 +225,7 @@ def request_spot_instance(
     Raises:
         ClientError: If AWS API call fails
     """
-    ec2_client = boto3.client('ec2', region_name=region)
+    ec2_client = get_client('ec2', region)
 
     # Build launch specification
     launch_spec = {
@@ -288,7 +325,7 @@ def launch_on_demand_instance(
     Raises:
         ClientError: If AWS API call fails
     """
-    ec2_client = boto3.client('ec2', region_name=region)
+    ec2_client = get_client('ec2', region)
 
     # Build launch parameters
     launch_params = {
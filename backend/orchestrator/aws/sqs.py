@@ -2,10 +2,11 @@
 SQS helper functions for message queue operations.
 """
 
-import boto3
 from typing import Dict, Any, Optional, List
 from botocore.exceptions import ClientError
 
+from .clients import get_client
+
 
 def send_message(
     queue_url: str,
@@ -30,7 +31,7 @@ def send_message(
     Raises:
         ClientError: If AWS API call fails
     """
-    sqs_client = boto3.client('sqs', region_name=region)
+    sqs_client = get_client('sqs', region)
 
     try:
         params = {
@@ -57,6 +58,53 @@ def send_message(
         raise
 
 
+def send_message_batch(
+    queue_url: str,
+    entries: List[Dict[str, Any]],
+    region: str
+) -> Dict[str, Any]:
+    """
+    Send messages to an SQS queue using SendMessageBatch.
+
+    Entries are sent in chunks of 10 (the SQS limit per call).
+
+    Args:
+        queue_url: The URL of the SQS queue
+        entries: List of dicts with 'Id' and 'MessageBody' (optionally
+                 'DelaySeconds' and 'MessageAttributes')
+        region: AWS region name
+
+    Returns:
+        Dictionary with 'Successful' (list of entry Ids) and
+        'Failed' (list of {'Id', 'Message'} dicts)
+
+    Raises:
+        ClientError: If AWS API call fails for a whole chunk
+    """
+    sqs_client = get_client('sqs', region)
+
+    successful = []
+    failed = []
+
+    for i in range(0, len(entries), 10):
+        chunk = entries[i:i + 10]
+        try:
+            response = sqs_client.send_message_batch(QueueUrl=queue_url, Entries=chunk)
+        except ClientError as e:
+            print(f"Error sending message batch to SQS: {e}")
+            failed.extend({'Id': entry['Id'], 'Message': str(e)} for entry in chunk)
+            continue
+
+        successful.extend(item['Id'] for item in response.get('Successful', []))
+        failed.extend(
+            {'Id': item['Id'], 'Message': item.get('Message', item.get('Code', 'Unknown error'))}
+            for item in response.get('Failed', [])
+        )
+
+    print(f"Batch sent to queue. Successful: {len(successful)}, Failed: {len(failed)}")
+    return {'Successful': successful, 'Failed': failed}
+
+
 def receive_messages(
     queue_url: str,
     region: str,
@@ -80,7 +128,7 @@ def receive_messages(
     Raises:
         ClientError: If AWS API call fails
     """
-    sqs_client = boto3.client('sqs', region_name=region)
+    sqs_client = get_client('sqs', region)
 
     try:
         params = {
@@ -120,7 +168,7 @@ def delete_message(queue_url: str, receipt_handle: str, region: str) -> None:
     Raises:
         ClientError: If AWS API call fails
     """
-    sqs_client = boto3.client('sqs', region_name=region)
+    sqs_client = get_client('sqs', region)
 
     try:
         sqs_client.delete_message(
@@ -154,7 +202,7 @@ def change_message_visibility(
     Raises:
         ClientError: If AWS API call fails
     """
-    sqs_client = boto3.client('sqs', region_name=region)
+    sqs_client = get_client('sqs', region)
 
     try:
         sqs_client.change_message_visibility(
@@ -183,7 +231,7 @@ def get_queue_attributes(queue_url: str, region: str) -> Dict[str, Any]:
     Raises:
         ClientError: If AWS API call fails
     """
-    sqs_client = boto3.client('sqs', region_name=region)
+    sqs_client = get_client('sqs', region)
 
     try:
         response = sqs_client.get_queue_attributes(
@@ -211,7 +259,7 @@ def purge_queue(queue_url: str, region: str) -> None:
     Raises:
         ClientError: If AWS API call fails
     """
-    sqs_client = boto3.client('sqs', region_name=region)
+    sqs_client = get_client('sqs', region)
 
     try:
         sqs_client.purge_queue(QueueUrl=queue_url)
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Load-Test Benchmark
+
+Runs the whole job pipeline on one machine and measures it under load:
+
+- SQS, DynamoDB, EC2 and S3 are served by a local moto server
+  (AWS_ENDPOINT_URL), with the same queues, task table and GSI as
+  production and a "running" GPU instance.
+- A fake ComfyUI Unified API / Paid API accepts any POST .../jobs and
+  completes the job after --gpu-latency seconds (+ jitter, optional
+  failure rate). Like the Unified API, GET /api/v1/jobs/{id}?wait=N holds
+  an unfinished job's status for up to N seconds.
+- orchestrator_api.app runs under uvicorn and the real adapters
+  (comfyui-api-service/sqs_to_comfy_adapter.py, one process per simulated
+  GPU instance, and paid-api-service/sqs_adapter.py for CPU jobs) run as
+  subprocesses against the stand-ins.
+
+Load is open-loop: submissions are scheduled at --rate per second for
+--duration seconds, and submit latency is measured from the scheduled
+send time, so a stalled server cannot hide latency by slowing the load
+down. While submitting, --pollers closed-loop clients poll
+GET /api/v1/jobs/{id} of random submitted jobs, and a watcher polls the
+bulk status endpoint to time every job from submission to its first
+observed terminal status. The GPU adapter long-polls the fake API
+(?wait=N), which answers as soon as the job is done; the CPU adapter still
+polls every 2s, so CPU job latencies include up to 2s of adapter polling.
+
+Results are printed as JSON (or written to --output): submit latency
+percentiles and status codes, status-poll throughput and latency,
+end-to-end latency and failure rate, and whether submit p99 stays under
+--max-submit-p99 (the "202 in under 1 second" rule). Jobs still
+unfinished at --drain-timeout count as failures. The exit code is 1 when
+the p99 budget is missed or any job did not finish.
+
+Requirements (not needed by the service itself):
+    pip install -r requirements-bench.txt
+
+Usage:
+    python benchmark.py --rate 20 --duration 60 --gpu-workers 2 \\
+        --job-mix camera-angle=0.8,face-mask=0.2 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+import httpx
+from moto.server import ThreadedMotoServer
+
+ORCHESTRATOR_DIR = Path(__file__).resolve().parent
+GPU_ADAPTER = ORCHESTRATOR_DIR.parent / 'comfyui-api-service' / 'sqs_to_comfy_adapter.py'
+CPU_ADAPTER = ORCHESTRATOR_DIR.parent / 'paid-api-service' / 'sqs_adapter.py'
+
+REGION = 'us-east-1'
+TABLE_NAME = 'task_store'
+# moto accepts any credentials; set explicitly so no real profile is picked up
+CREDENTIALS = {'aws_access_key_id': 'bench', 'aws_secret_access_key': 'bench'}
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+# Longest long-poll the fake job API holds (as the Unified API's MAX_WAIT_SECONDS)
+MAX_WAIT_SECONDS = 60
+
+# Request bodies per job type; seeds/prompts are made unique per job so the
+# result cache never turns a submission into a duplicate
+JOB_TYPES = {
+    'camera-angle': ('/api/v1/camera-angle/jobs', 'gpu', lambda i: {
+        'image_url': 's3://bench-assets/input.jpg', 'horizontal': 1, 'seed': i
+    }),
+    'qwen-image-edit': ('/api/v1/qwen-image-edit/jobs', 'gpu', lambda i: {
+        'image_url': 's3://bench-assets/input.jpg', 'prompt': f'benchmark {i}', 'seed': i
+    }),
+    'face-mask': ('/api/v1/face-mask/tasks', 'cpu', lambda i: {
+        'image_url': 's3://bench-assets/input.jpg', 'face_position_prompt': f'benchmark {i}'
+    }),
+}
+
+
+def log(message: str) -> None:
+    # stdout is reserved for the JSON report
+    print(message, file=sys.stderr, flush=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99, mean and max of latencies (seconds) in milliseconds."""
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[max(0, -(-len(ordered) * p // 100) - 1)] * 1000, 2)
+
+    return {
+        'p50': rank(50),
+        'p95': rank(95),
+        'p99': rank(99),
+        'mean': round(sum(ordered) / len(ordered) * 1000, 2),
+        'max': round(ordered[-1] * 1000, 2),
+    }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in JOB_TYPES:
+            raise argparse.ArgumentTypeError(f"unknown job type '{name}' (known: {', '.join(JOB_TYPES)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ==================== AWS Stand-Ins ====================
+
+def provision_aws(endpoint: str, gpu_workers: int) -> Dict[str, Any]:
+    """
+    Create the queues, task table and GPU instances on the moto server.
+
+    Returns:
+        Environment variables pointing the orchestrator at them
+    """
+    kwargs = {'region_name': REGION, 'endpoint_url': endpoint, **CREDENTIALS}
+    sqs = boto3.client('sqs', **kwargs)
+    queues = {
+        name: sqs.create_queue(QueueName=name, Attributes={'VisibilityTimeout': '900'})['QueueUrl']
+        for name in ('gpu_tasks_queue', 'cpu_tasks_queue')
+    }
+
+    boto3.client('dynamodb', **kwargs).create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{'AttributeName': 'task_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'task_id', 'AttributeType': 'S'},
+            {'AttributeName': 'status', 'AttributeType': 'S'},
+            {'AttributeName': 'created_at', 'AttributeType': 'N'},
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'status-created_at-index',
+            'KeySchema': [
+                {'AttributeName': 'status', 'KeyType': 'HASH'},
+                {'AttributeName': 'created_at', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        }],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+    boto3.client('s3', **kwargs).create_bucket(Bucket='bench-assets')
+
+    # Already running, so the run measures steady state rather than a cold start
+    instances = boto3.client('ec2', **kwargs).run_instances(
+        ImageId='ami-12c6146b', MinCount=gpu_workers, MaxCount=gpu_workers, InstanceType='g5.xlarge'
+    )['Instances']
+
+    return {
+        'SQS_QUEUE_URL': queues['gpu_tasks_queue'],
+        'CPU_QUEUE_URL': queues['cpu_tasks_queue'],
+        'DYNAMODB_TABLE': TABLE_NAME,
+        'GPU_INSTANCE_ID': instances[0]['InstanceId'],
+        'GPU_INSTANCE_IDS': ','.join(i['InstanceId'] for i in instances),
+        'S3_BUCKET_NAME': 'bench-assets',
+    }
+
+
+# ==================== Fake ComfyUI / Paid API ====================
+
+class FakeJobApi:
+    """
+    Stand-in for the ComfyUI Unified API and the Paid API Service.
+
+    POST to any path ending in /jobs returns a job ID; the job reports
+    'processing' until its simulated latency has elapsed. A status request
+    with ?wait=N is answered when the job finishes, or after N seconds.
+    """
+
+    def __init__(self, latency: float, jitter: float, failure_rate: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def submit(self) -> str:
+        job_id = str(uuid.uuid4())
+        with self.lock:
+            self.jobs[job_id] = {
+                'done_at': time.time() + max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)),
+                'failed': random.random() < self.failure_rate,
+            }
+        return job_id
+
+    def status(self, job_id: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        # Long poll: hold the request until the job is done, at most wait seconds
+        remaining = job['done_at'] - time.time()
+        if remaining > 0 and wait > 0:
+            time.sleep(min(remaining, wait, MAX_WAIT_SECONDS))
+        if time.time() < job['done_at']:
+            return {'job_id': job_id, 'status': 'processing'}
+        if job['failed']:
+            return {'job_id': job_id, 'status': 'failed', 'error': 'Simulated failure'}
+        result = f's3://bench-assets/results/{job_id}.png'
+        return {'job_id': job_id, 'status': 'completed', 'result_s3_uri': result, 'result_url': result}
+
+    def start(self, port: int) -> None:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                # The adapters add query parameters (?front=true, ?wait=N)
+                url = urlsplit(self.path)
+                if url.path == '/health':
+                    self._reply(200, {'status': 'healthy'})
+                    return
+                try:
+                    wait = float(parse_qs(url.query).get('wait', ['0'])[0])
+                except ValueError:
+                    self._reply(422, {'detail': 'wait must be a number'})
+                    return
+                job = api.status(url.path.rstrip('/').rsplit('/', 1)[-1], wait)
+                self._reply(200, job) if job else self._reply(404, {'detail': 'Job not found'})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if not urlsplit(self.path).path.endswith('/jobs'):
+                    self._reply(404, {'detail': 'Not found'})
+                    return
+                self._reply(200, {'job_id': api.submit(), 'status': 'pending'})
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.shutdown()
+
+
+# ==================== Processes ====================
+
+def spawn(args: List[str], cwd: Path, env: Dict[str, str], log_path: Optional[Path]) -> subprocess.Popen:
+    output = open(log_path, 'w') if log_path else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, *args], cwd=cwd, env=env, stdout=output, stderr=subprocess.STDOUT
+    )
+
+
+def stop_processes(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    deadline = time.time() + 10
+    for process in processes:
+        try:
+            process.wait(timeout=max(0.1, deadline - time.time()))
+        except subprocess.TimeoutExpired:
+            # Adapters may sit in an SQS long poll
+            process.kill()
+
+
+async def wait_healthy(client: httpx.AsyncClient, url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not become healthy within {timeout}s")
+
+
+# ==================== Load Generation ====================
+
+class Recorder:
+    """Raw samples collected during a run."""
+
+    def __init__(self):
+        self.submit_latencies: List[float] = []
+        self.submit_codes: Dict[str, int] = {}
+        self.submit_errors = 0
+        self.poll_latencies: List[float] = []
+        self.poll_errors = 0
+        self.submitted_at: Dict[str, float] = {}
+        self.finished: Dict[str, Dict[str, Any]] = {}
+
+
+async def submit_one(client: httpx.AsyncClient, recorder: Recorder, job_type: str, index: int, scheduled: float) -> None:
+    path, _, body = JOB_TYPES[job_type]
+    try:
+        response = await client.post(path, json=body(index))
+    except httpx.HTTPError:
+        recorder.submit_errors += 1
+        return
+    # Measured from the scheduled send time (no coordinated omission)
+    recorder.submit_latencies.append(time.perf_counter() - scheduled)
+    code = str(response.status_code)
+    recorder.submit_codes[code] = recorder.submit_codes.get(code, 0) + 1
+    if response.status_code == 202:
+        recorder.submitted_at[response.json()['job_id']] = time.time() - (time.perf_counter() - scheduled)
+
+
+async def submit_load(client: httpx.AsyncClient, recorder: Recorder, rate: float, duration: float, mix: Dict[str, float]) -> None:
+    """Open-loop submissions at a fixed rate."""
+    types, weights = list(mix), list(mix.values())
+    total = int(rate * duration)
+    start = time.perf_counter()
+    tasks = []
+    for index in range(total):
+        scheduled = start + index / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        job_type = random.choices(types, weights)[0]
+        tasks.append(asyncio.create_task(submit_one(client, recorder, job_type, index, scheduled)))
+    await asyncio.gather(*tasks)
+
+
+async def poll_load(client: httpx.AsyncClient, recorder: Recorder, stop: asyncio.Event) -> None:
+    """Closed-loop GET /api/v1/jobs/{id} on random submitted jobs."""
+    while not stop.is_set():
+        if not recorder.submitted_at:
+            await asyncio.sleep(0.05)
+            continue
+        job_id = random.choice(list(recorder.submitted_at))
+        started = time.perf_counter()
+        try:
+            response = await client.get(f'/api/v1/jobs/{job_id}')
+            response.raise_for_status()
+            recorder.poll_latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError:
+            recorder.poll_errors += 1
+
+
+async def watch_completions(client: httpx.AsyncClient, recorder: Recorder, stop: asyncio.Event, interval: float) -> None:
+    """Record the first terminal status of every submitted job through the bulk status endpoint."""
+    while not stop.is_set():
+        pending = [j for j in recorder.submitted_at if j not in recorder.finished]
+        for offset in range(0, len(pending), 100):
+            chunk = pending[offset:offset + 100]
+            try:
+                response = await client.post('/api/v1/jobs/status', json={'job_ids': chunk})
+                response.raise_for_status()
+            except httpx.HTTPError:
+                continue
+            now = time.time()
+            for job_id, entry in response.json()['jobs'].items():
+                if entry['status'] in TERMINAL_STATUSES:
+                    recorder.finished[job_id] = {
+                        'status': entry['status'],
+                        'seconds': now - recorder.submitted_at[job_id],
+                    }
+        await asyncio.sleep(interval)
+
+
+async def drive(base_url: str, args: argparse.Namespace, mix: Dict[str, float]) -> Dict[str, Any]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await wait_healthy(client, '/health')
+        log(f"Orchestrator healthy, submitting {args.rate}/s for {args.duration}s")
+
+        stop_polling = asyncio.Event()
+        stop_watching = asyncio.Event()
+        pollers = [asyncio.create_task(poll_load(client, recorder, stop_polling)) for _ in range(args.pollers)]
+        watcher = asyncio.create_task(watch_completions(client, recorder, stop_watching, args.watch_interval))
+
+        started = time.perf_counter()
+        await submit_load(client, recorder, args.rate, args.duration, mix)
+        submit_seconds = time.perf_counter() - started
+        stop_polling.set()
+        await asyncio.gather(*pollers)
+        poll_seconds = time.perf_counter() - started
+
+        log(f"Submitted {len(recorder.submitted_at)} job(s), waiting up to {args.drain_timeout}s for completion")
+        deadline = time.time() + args.drain_timeout
+        while len(recorder.finished) < len(recorder.submitted_at) and time.time() < deadline:
+            await asyncio.sleep(0.5)
+        stop_watching.set()
+        await watcher
+
+    e2e = [job['seconds'] for job in recorder.finished.values()]
+    submit = percentiles(recorder.submit_latencies)
+    failed = sum(1 for j in recorder.finished.values() if j['status'] != 'completed')
+    unfinished = len(recorder.submitted_at) - len(recorder.finished)
+    return {
+        'submit': {
+            'requests': len(recorder.submit_latencies) + recorder.submit_errors,
+            'accepted': len(recorder.submitted_at),
+            'status_codes': recorder.submit_codes,
+            'errors': recorder.submit_errors,
+            'achieved_rate': round(len(recorder.submit_latencies) / submit_seconds, 2),
+            'latency_ms': submit,
+        },
+        'status_poll': {
+            'requests': len(recorder.poll_latencies) + recorder.poll_errors,
+            'errors': recorder.poll_errors,
+            'throughput_rps': round(len(recorder.poll_latencies) / poll_seconds, 2),
+            'latency_ms': percentiles(recorder.poll_latencies),
+        },
+        'end_to_end': {
+            'completed': sum(1 for j in recorder.finished.values() if j['status'] == 'completed'),
+            'failed': sum(1 for j in recorder.finished.values() if j['status'] == 'failed'),
+            'cancelled': sum(1 for j in recorder.finished.values() if j['status'] == 'cancelled'),
+            'unfinished': unfinished,
+            # Jobs that did not finish by the drain timeout count as failures
+            'failure_rate': round((failed + unfinished) / len(recorder.submitted_at), 4) if recorder.submitted_at else 0.0,
+            'latency_ms': percentiles(e2e),
+        },
+        'slo': {
+            'max_submit_p99_ms': args.max_submit_p99 * 1000,
+            'passed': submit['p99'] is not None and submit['p99'] <= args.max_submit_p99 * 1000,
+        },
+    }
+
+
+# ==================== Main ====================
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = parse_mix(args.job_mix)
+    log_dir = Path(args.log_dir) if args.log_dir else None
+    if log_dir:
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+    moto_port, api_port, orchestrator_port = free_port(), free_port(), free_port()
+    # The moto server logs every request through werkzeug
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    moto = ThreadedMotoServer(ip_address='127.0.0.1', port=moto_port, verbose=False)
+    moto.start()
+    endpoint = f'http://127.0.0.1:{moto_port}'
+
+    fake_api = FakeJobApi(args.gpu_latency, args.gpu_jitter, args.failure_rate)
+    fake_api.start(api_port)
+    api_url = f'http://127.0.0.1:{api_port}'
+
+    processes: List[subprocess.Popen] = []
+    try:
+        env = {
+            **os.environ,
+            'AWS_ENDPOINT_URL': endpoint,
+            'AWS_ACCESS_KEY_ID': CREDENTIALS['aws_access_key_id'],
+            'AWS_SECRET_ACCESS_KEY': CREDENTIALS['aws_secret_access_key'],
+            'AWS_DEFAULT_REGION': REGION,
+            'AWS_REGION': REGION,
+            'PYTHONUNBUFFERED': '1',
+        }
+        env.update(provision_aws(endpoint, args.gpu_workers))
+        for override in args.env:
+            key, _, value = override.partition('=')
+            env[key] = value
+
+        processes.append(spawn(
+            ['-m', 'uvicorn', 'orchestrator_api:app', '--host', '127.0.0.1', '--port', str(orchestrator_port),
+             '--log-level', 'warning'],
+            ORCHESTRATOR_DIR, env, log_dir / 'orchestrator.log' if log_dir else None
+        ))
+        for worker in range(args.gpu_workers):
+            processes.append(spawn(
+                [str(GPU_ADAPTER)], GPU_ADAPTER.parent, {**env, 'COMFYUI_API_URL': api_url},
+                log_dir / f'gpu_adapter_{worker}.log' if log_dir else None
+            ))
+        if any(JOB_TYPES[name][1] == 'cpu' for name in mix):
+            for worker in range(args.cpu_workers):
+                processes.append(spawn(
+                    [str(CPU_ADAPTER)], CPU_ADAPTER.parent, {**env, 'PAID_API_URL': api_url},
+                    log_dir / f'cpu_adapter_{worker}.log' if log_dir else None
+                ))
+
+        results = asyncio.run(drive(f'http://127.0.0.1:{orchestrator_port}', args, mix))
+    finally:
+        stop_processes(processes)
+        fake_api.stop()
+        moto.stop()
+
+    return {
+        'config': {
+            'rate': args.rate,
+            'duration': args.duration,
+            'job_mix': mix,
+            'pollers': args.pollers,
+            'connections': args.connections,
+            'gpu_workers': args.gpu_workers,
+            'cpu_workers': args.cpu_workers,
+            'gpu_latency': args.gpu_latency,
+            'gpu_jitter': args.gpu_jitter,
+            'failure_rate': args.failure_rate,
+        },
+        **results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=10, help='Job submissions per second')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of submissions')
+    parser.add_argument('--job-mix', default='camera-angle=1', help="Weighted job types, e.g. 'camera-angle=0.8,face-mask=0.2'")
+    parser.add_argument('--pollers', type=int, default=4, help='Concurrent status-poll clients')
+    parser.add_argument('--connections', type=int, default=100, help='HTTP connection pool size of the load generator')
+    parser.add_argument('--gpu-workers', type=int, default=1, help='GPU adapters (simulated GPU instances)')
+    parser.add_argument('--cpu-workers', type=int, default=1, help='CPU adapters (when the mix has CPU jobs)')
+    parser.add_argument('--gpu-latency', type=float, default=2.0, help='Simulated job execution seconds')
+    parser.add_argument('--gpu-jitter', type=float, default=0.5, help='Uniform +/- jitter on the execution seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of jobs the fake API fails')
+    parser.add_argument('--watch-interval', type=float, default=0.5, help='Seconds between bulk status polls for end-to-end timing')
+    parser.add_argument('--drain-timeout', type=float, default=120, help='Seconds to wait for submitted jobs to finish')
+    parser.add_argument('--max-submit-p99', type=float, default=1.0, help='Submit p99 budget in seconds')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='Extra orchestrator/adapter environment (repeatable)')
+    parser.add_argument('--log-dir', help='Write orchestrator and adapter logs here')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+        log(f"Report written to {args.output}")
+    else:
+        print(text)
+
+    log(f"Submit p99 {report['submit']['latency_ms']['p99']} ms "
+        f"({'PASS' if report['slo']['passed'] else 'FAIL'}, budget {report['slo']['max_submit_p99_ms']:.0f} ms)")
+    unfinished = report['end_to_end']['unfinished']
+    if unfinished:
+        log(f"FAIL: {unfinished} job(s) did not finish within {args.drain_timeout:.0f}s")
+    return 0 if report['slo']['passed'] and not unfinished else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+Per-Job-Type ETA Estimation
+
+Rolling latency statistics per job type, combined with the live queue
+backlog and GPU state into estimated start/completion times.
+
+- Statistics come from the task records the orchestrator already reads
+  (status polls, bulk status, the job watcher): queue wait is
+  created_at -> started_at, execution is started_at -> updated_at of a
+  completed job. Jobs without started_at use the updated_at of their first
+  observed 'processing' record.
+- GPU cold start is the time from a GPU start request to the first job
+  starting after it.
+- Every statistic is an exponentially weighted moving average, updated in
+  O(1) per observation; an estimate is O(1) per request.
+- Statistics are persisted to the task table ('stats#eta') every
+  ETA_PERSIST_INTERVAL seconds when changed, and loaded on startup.
+
+Estimates assume the backlog is worked through in order (lanes are not
+modelled) and are best-effort: None means no estimate.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from aws.dynamodb import get_stats_item, put_stats_item
+
+# Weight of a new observation in the moving averages
+ETA_ALPHA = float(os.getenv('ETA_ALPHA', '0.1'))
+# Seconds between persisting changed statistics
+ETA_PERSIST_INTERVAL = int(os.getenv('ETA_PERSIST_INTERVAL', '60'))
+# Priors used until a job type has observations (seconds)
+ETA_DEFAULT_EXECUTION_SECONDS = float(os.getenv('ETA_DEFAULT_EXECUTION_SECONDS', '30'))
+ETA_DEFAULT_COLD_START_SECONDS = float(os.getenv('ETA_DEFAULT_COLD_START_SECONDS', '180'))
+# Jobs processed in parallel per queue group (both adapters are sequential)
+ETA_CONCURRENCY = {
+    'gpu': int(os.getenv('ETA_GPU_CONCURRENCY', '1')),
+    'cpu': int(os.getenv('ETA_CPU_CONCURRENCY', '1')),
+}
+# Jobs whose timing is remembered for estimates on status reads
+ETA_TRACKED_JOBS = int(os.getenv('ETA_TRACKED_JOBS', '10000'))
+
+STATS_NAME = 'eta'
+
+
+def job_type_from_path(api_path: str) -> str:
+    """Map an API path ('/api/v1/camera-angle/jobs') to its job type ('camera-angle')."""
+    parts = api_path.strip('/').split('/')
+    return parts[2] if len(parts) > 2 else api_path
+
+
+class RollingStat:
+    """Exponentially weighted moving average with an observation count."""
+
+    def __init__(self, mean: Optional[float] = None, count: int = 0):
+        self.mean = mean
+        self.count = count
+
+    def add(self, value: float) -> None:
+        """Fold one observation into the average."""
+        value = max(0.0, float(value))
+        self.mean = value if self.mean is None else self.mean + ETA_ALPHA * (value - self.mean)
+        self.count += 1
+
+    def get(self, default: float) -> float:
+        """Return the average, or a default before the first observation."""
+        return default if self.mean is None else self.mean
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'mean': None if self.mean is None else round(self.mean, 2), 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RollingStat':
+        return cls(data.get('mean'), int(data.get('count', 0)))
+
+
+class EtaEstimator:
+    """Rolling per job type latency statistics and start/completion estimates."""
+
+    def __init__(
+        self,
+        table_name: str,
+        region: str,
+        executor: Executor,
+        gpu_state,
+        get_backlog: Callable[[str], Optional[int]],
+        job_groups: Dict[str, str]
+    ):
+        """
+        Args:
+            table_name: DynamoDB task table (statistics are persisted there)
+            region: AWS region name
+            executor: Executor for blocking boto3 calls
+            gpu_state: Shared GpuStateManager
+            get_backlog: Returns the current backlog of a queue group, or None
+            job_groups: Job type (e.g., 'camera-angle') -> queue group ('gpu' or 'cpu')
+        """
+        self.table_name = table_name
+        self.region = region
+        self.executor = executor
+        self.gpu_state = gpu_state
+        self.get_backlog = get_backlog
+        self.job_groups = job_groups
+
+        self._lock = threading.Lock()
+        self.queue_wait: Dict[str, RollingStat] = {job_type: RollingStat() for job_type in job_groups}
+        self.execution: Dict[str, RollingStat] = {job_type: RollingStat() for job_type in job_groups}
+        self.cold_start = RollingStat()
+        # GPU start already matched to a first job start
+        self._cold_start_measured_at: float = 0
+
+        # job_id -> {'job_type', 'created_at', 'started_at', 'estimated_start', 'done'}
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        self.observations = 0
+        self.dirty = False
+        self.persisted_at: float = 0
+
+        self._loop_task: Optional[asyncio.Task] = None
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== Lifecycle ====================
+
+    async def load(self) -> None:
+        """Load persisted statistics (missing or unreadable statistics start empty)."""
+        try:
+            stats = await self._run_blocking(get_stats_item, self.table_name, STATS_NAME, self.region)
+        except Exception as e:
+            print(f"Could not load ETA statistics: {e}")
+            return
+        if not stats:
+            return
+
+        with self._lock:
+            for job_type, data in stats.get('queue_wait', {}).items():
+                self.queue_wait[job_type] = RollingStat.from_dict(data)
+            for job_type, data in stats.get('execution', {}).items():
+                self.execution[job_type] = RollingStat.from_dict(data)
+            if 'cold_start' in stats:
+                self.cold_start = RollingStat.from_dict(stats['cold_start'])
+        print(f"Loaded ETA statistics for {len(stats.get('execution', {}))} job type(s)")
+
+    async def start(self) -> None:
+        """Load statistics and start the persistence loop (call from the running event loop)."""
+        await self.load()
+        self._loop_task = asyncio.create_task(self._persist_loop())
+
+    async def stop(self) -> None:
+        """Cancel the persistence loop and persist once more if changed."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+        await self.persist()
+
+    async def persist(self) -> None:
+        """Write the statistics to the task table if they changed."""
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            await self._run_blocking(put_stats_item, self.table_name, STATS_NAME, self.stats(), self.region)
+            self.persisted_at = time.time()
+        except Exception as e:
+            self.dirty = True
+            print(f"Error persisting ETA statistics: {e}")
+
+    async def _persist_loop(self) -> None:
+        while True:
+            await asyncio.sleep(ETA_PERSIST_INTERVAL)
+            await self.persist()
+
+    # ==================== Observations ====================
+
+    def _track(self, job_id: str) -> Dict[str, Any]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._jobs[job_id] = {}
+            while len(self._jobs) > ETA_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+        else:
+            self._jobs.move_to_end(job_id)
+        return job
+
+    def on_submitted(self, job_id: str, job_type: str) -> None:
+        """Remember a job submitted here and pin its estimated start."""
+        now = time.time()
+        estimated_start = now + self._expected_wait(job_type, include_self=False)
+        with self._lock:
+            job = self._track(job_id)
+            job.update(job_type=job_type, created_at=now, estimated_start=estimated_start)
+
+    def observe(self, task: Dict[str, Any]) -> None:
+        """
+        Fold a task record read from DynamoDB into the statistics.
+
+        Each job contributes its queue wait once (when it is first seen
+        started) and its execution time once (when first seen completed).
+
+        Args:
+            task: Task item with job_type, status, created_at, updated_at
+                  and optionally started_at
+        """
+        status = task.get('status')
+        job_id = task.get('task_id')
+        job_type = job_type_from_path(task.get('job_type', ''))
+        if not job_id or job_type not in self.job_groups:
+            return
+
+        with self._lock:
+            job = self._track(job_id)
+            if job.get('done'):
+                return
+
+            job['job_type'] = job_type
+            job['created_at'] = float(task.get('created_at', 0)) or job.get('created_at')
+            if status not in ('processing', 'completed', 'failed', 'cancelled'):
+                return
+            started_at = task.get('started_at') or job.get('started_at')
+            if started_at is None and status == 'processing':
+                # First 'processing' record: updated_at is when the adapter picked it up
+                started_at = task.get('updated_at')
+            if started_at is None:
+                # Finished before we ever saw it start: no split available
+                job['done'] = status != 'processing'
+                return
+            started_at = float(started_at)
+
+            if job.get('started_at') is None:
+                job['started_at'] = started_at
+                if job['created_at']:
+                    self.queue_wait[job_type].add(started_at - job['created_at'])
+                self._observe_cold_start(job_type, started_at)
+                self.observations += 1
+                self.dirty = True
+
+            if status == 'completed':
+                self.execution[job_type].add(float(task.get('updated_at', started_at)) - started_at)
+                self.observations += 1
+                self.dirty = True
+            job['done'] = status != 'processing'
+
+    def _observe_cold_start(self, job_type: str, started_at: float) -> None:
+        started = self.gpu_state.last_start_at
+        if self.job_groups[job_type] != 'gpu' or not started or started <= self._cold_start_measured_at:
+            return
+        if started_at >= started:
+            # First job picked up after the instance was started. A warm-up
+            # start idles until the first job, so it says nothing about boot time.
+            if not self.gpu_state.last_start_speculative:
+                self.cold_start.add(started_at - started)
+            self._cold_start_measured_at = started
+
+    # ==================== Estimates ====================
+
+    def execution_seconds(self, job_type: str) -> float:
+        """Average (or prior) execution time of a job type in seconds."""
+        stat = self.execution.get(job_type)
+        return stat.get(ETA_DEFAULT_EXECUTION_SECONDS) if stat else ETA_DEFAULT_EXECUTION_SECONDS
+
+    def _group_execution_seconds(self, group: str) -> float:
+        """Average execution time of the group's job types, weighted by observations."""
+        stats = [s for job_type, s in self.execution.items() if self.job_groups.get(job_type) == group]
+        observed = [s for s in stats if s.mean is not None]
+        total = sum(s.count for s in observed)
+        if not total:
+            return ETA_DEFAULT_EXECUTION_SECONDS
+        return sum(s.mean * s.count for s in observed) / total
+
+    def _cold_start_remaining(self, group: str) -> float:
+        if group != 'gpu':
+            return 0.0
+        cold_start = self.cold_start.get(ETA_DEFAULT_COLD_START_SECONDS)
+        started = self.gpu_state.last_start_at
+        if started and started > self._cold_start_measured_at:
+            # Starting right now: no job has been picked up since the start
+            return max(0.0, started + cold_start - time.time())
+        if self.gpu_state.state in ('running', 'pending'):
+            return 0.0
+        return cold_start
+
+    def _expected_wait(self, job_type: str, include_self: bool = True) -> float:
+        """Seconds until a job queued now starts: cold start + backlog drain time."""
+        group = self.job_groups[job_type]
+        backlog = self.get_backlog(group)
+        if backlog is None:
+            backlog = 0
+        elif not include_self:
+            # The backlog estimate already counts the job being submitted
+            backlog = max(0, backlog - 1)
+        workers = ETA_CONCURRENCY[group]
+        if group == 'gpu':
+            # Fleet mode: every active instance drains the shared queues
+            workers *= max(1, self.gpu_state.active_count())
+        drain = backlog * self._group_execution_seconds(group) / max(1, workers)
+        return self._cold_start_remaining(group) + drain
+
+    def estimate(self, job_id: str, status: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Estimate when a job starts and completes.
+
+        Args:
+            job_id: Job identifier
+            status: Current public status of the job
+
+        Returns:
+            (estimated_start, estimated_completion) as epoch seconds, or
+            (None, None) for finished or unknown jobs
+        """
+        if status not in ('pending', 'processing'):
+            return None, None
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            job = dict(job) if job else None
+        if not job or job.get('job_type') not in self.job_groups:
+            return None, None
+
+        now = time.time()
+        job_type = job['job_type']
+
+        if status == 'processing' or job.get('started_at'):
+            start = job.get('started_at') or now
+        elif job.get('estimated_start'):
+            # Pinned at submission; if overdue, it is about to start
+            start = max(job['estimated_start'], now)
+        elif job.get('created_at'):
+            # Submitted elsewhere: fall back to the historical queue wait
+            wait = self.queue_wait[job_type].get(self._expected_wait(job_type))
+            start = max(job['created_at'] + wait, now)
+        else:
+            return None, None
+
+        completion = max(start + self.execution_seconds(job_type), now)
+        return int(start), int(completion)
+
+    # ==================== Introspection ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the persisted statistics document."""
+        with self._lock:
+            return {
+                'queue_wait': {job_type: s.to_dict() for job_type, s in self.queue_wait.items()},
+                'execution': {job_type: s.to_dict() for job_type, s in self.execution.items()},
+                'cold_start': self.cold_start.to_dict()
+            }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return statistics and counters for debug endpoints."""
+        return {
+            **self.stats(),
+            "tracked_jobs": len(self._jobs),
+            "observations": self.observations,
+            "persisted_at": self.persisted_at or None,
+            "expected_wait_seconds": {
+                job_type: round(self._expected_wait(job_type), 1) for job_type in self.job_groups
+            }
+        }
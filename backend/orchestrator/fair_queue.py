@@ -0,0 +1,510 @@
+"""
+Per-Tenant Fair Queuing for GPU Jobs
+
+SQS hands out messages roughly in arrival order, so a tenant that queues a
+few hundred jobs would hold the GPU for hours while everyone else waits
+behind them. Instead, only a small window of GPU jobs is in SQS at a time
+and the orchestrator decides which tenant's job goes next.
+
+- Window: FAIR_QUEUE_WINDOW interactive/normal lane messages (queued +
+  in flight + delayed) per active GPU instance. Below it, jobs are sent to
+  SQS directly as before; once it is full, new jobs are held.
+- Failing messages do not fill the window: a sent task whose status is
+  'failed' with a retry pending (waiting to be redelivered, or already
+  dead-lettered) is left out of the count for FAIR_FAILING_SECONDS after
+  it is first seen failing, so poison messages cannot stall every
+  tenant's held jobs.
+- Held jobs are the DynamoDB-backed ready index: the task record is
+  written as usual ('pending') plus the SQS message it will be sent as
+  (held_message, held_queue_url). The in-memory per-tenant queues are
+  rebuilt from those records on startup. Jobs whose inputs are still
+  being staged (staging.py) have such a record too, so after a restart
+  they are recovered here, with their original inputs; with fair queuing
+  off, recovered jobs are sent at once.
+- Release: a loop tops the window up every FAIR_RELEASE_INTERVAL seconds
+  (and right after a job is held), picking jobs by deficit round-robin
+  across tenants. A job costs its job type's average GPU seconds (from the
+  ETA statistics) and each turn credits a tenant FAIR_QUANTUM_SECONDS
+  times its TENANT_WEIGHTS weight, so tenants get equal GPU time, not
+  equal job counts.
+- Concurrency cap: a tenant with TENANT_MAX_CONCURRENCY sent but
+  unfinished jobs is skipped until one of them finishes.
+- Deferred jobs bypass fair queuing; they already wait for idle capacity.
+
+Pipeline stages queued by the adapters are not held.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from aws.dynamodb import TERMINAL_STATUSES, batch_get_tasks, query_held_tasks, release_held_task
+from aws.sqs import get_queue_attributes, send_message
+from eta import job_type_from_path
+from tenants import DEFAULT_TENANT
+
+# GPU messages allowed in SQS per active instance before jobs are held (0 = no fair queuing)
+FAIR_QUEUE_WINDOW = int(os.getenv('FAIR_QUEUE_WINDOW', '3'))
+# Estimated GPU seconds credited to a tenant per round-robin turn
+FAIR_QUANTUM_SECONDS = float(os.getenv('FAIR_QUANTUM_SECONDS', '30'))
+# Relative shares, e.g. "batch-service=0.5,studio=2" (unlisted tenants: 1)
+TENANT_WEIGHTS = os.getenv('TENANT_WEIGHTS', '')
+# Max sent-but-unfinished GPU jobs per tenant (0 = no cap)
+TENANT_MAX_CONCURRENCY = int(os.getenv('TENANT_MAX_CONCURRENCY', '0'))
+# Seconds between release checks while jobs are held
+FAIR_RELEASE_INTERVAL = float(os.getenv('FAIR_RELEASE_INTERVAL', '1'))
+# Max seconds a failing (retrying or dead-lettered) GPU message is left out of the window
+FAIR_FAILING_SECONDS = float(os.getenv('FAIR_FAILING_SECONDS', '600'))
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Parse per-tenant weights.
+
+    Args:
+        spec: Comma-separated "tenant=weight" entries
+
+    Returns:
+        Dict of tenant -> weight
+
+    Raises:
+        ValueError: If a weight is not a positive number
+    """
+    weights = {}
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        tenant, _, weight = entry.rpartition('=')
+        if float(weight) <= 0:
+            raise ValueError(f"Tenant weight must be positive: {entry}")
+        weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class HeldJob:
+    """A GPU job waiting for its tenant's turn."""
+
+    __slots__ = ('task_id', 'tenant', 'job_type', 'queue_url', 'message')
+
+    def __init__(self, task_id: str, tenant: str, job_type: str, queue_url: str, message: str):
+        self.task_id = task_id
+        self.tenant = tenant
+        self.job_type = job_type
+        self.queue_url = queue_url
+        self.message = message  # SQS message body (JSON)
+
+
+class FairQueue:
+    """Window-limited SQS release of GPU jobs, deficit round-robin across tenants."""
+
+    def __init__(
+        self,
+        table_name: str,
+        region: str,
+        executor: Executor,
+        queue_urls: List[str],
+        get_queue_stats: Callable[[str], Optional[Dict[str, Any]]],
+        queue_names: List[str],
+        get_workers: Callable[[], int],
+        get_cost: Callable[[str], float]
+    ):
+        """
+        Args:
+            table_name: DynamoDB task table (held jobs, in-flight statuses)
+            region: AWS region name
+            executor: Executor for blocking boto3 calls
+            queue_urls: SQS queues counted against the window
+            get_queue_stats: Returns cached stats of a queue by name (HealthMonitor)
+            queue_names: Names of the same queues for get_queue_stats
+            get_workers: Returns the number of active GPU instances
+            get_cost: Returns the estimated GPU seconds of a job type
+        """
+        self.table_name = table_name
+        self.region = region
+        self.executor = executor
+        self.queue_urls = list(dict.fromkeys(url for url in queue_urls if url))
+        self.get_queue_stats = get_queue_stats
+        self.queue_names = queue_names
+        self.get_workers = get_workers
+        self.get_cost = get_cost
+        self.weights = parse_weights(TENANT_WEIGHTS)
+
+        self._lock = threading.Lock()
+        # tenant -> held jobs in submission order; _active is the round-robin order
+        self._held: Dict[str, Deque[HeldJob]] = {}
+        self._active: Deque[str] = deque()
+        self._deficit: Dict[str, float] = {}
+        self._turn: Optional[str] = None
+        self._held_ids: Set[str] = set()
+        # tenant -> task IDs sent to SQS and not seen finished or failing
+        self._in_flight: Dict[str, Set[str]] = {}
+        # task ID -> (tenant, first seen failing, failing now) of sent tasks with a retry pending
+        self._failing: Dict[str, Tuple[str, float, bool]] = {}
+        # Own queue reading (total, taken_at) and sends since
+        self._sqs_backlog: Optional[Tuple[int, float]] = None
+        self._sent: List[Tuple[float, int]] = []
+
+        self.held_total = 0
+        self.released = 0
+        self.recovered = 0
+        self.released_by_tenant: Dict[str, int] = {}
+
+        self._wake: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return FAIR_QUEUE_WINDOW > 0
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== Lifecycle ====================
+
+    async def load(self) -> None:
+        """Rebuild the held queues from the task table (jobs held before a restart)."""
+        try:
+            items = await self._run_blocking(query_held_tasks, self.table_name, self.region)
+        except Exception as e:
+            print(f"Could not load held GPU jobs: {e}")
+            return
+        for item in sorted(items, key=lambda i: int(i.get('created_at', 0))):
+            if item['task_id'] in self._held_ids:
+                continue
+            self._enqueue(HeldJob(
+                item['task_id'],
+                item.get('tenant') or DEFAULT_TENANT,
+                job_type_from_path(item.get('job_type', '')),
+                item['held_queue_url'],
+                item['held_message']
+            ))
+            self.recovered += 1
+        if items:
+            print(f"Recovered {len(items)} held GPU job(s)")
+
+    async def start(self) -> None:
+        """Recover held jobs and start the release loop (call from the running event loop)."""
+        self._wake = asyncio.Event()
+        await self.load()
+        if not self.enabled:
+            # Nothing is held back: send what was held (or still being staged) before the restart
+            jobs = [job for tenant in list(self._held) for job in self._held[tenant]]
+            for tenant in list(self._held):
+                self._remove_tenant(tenant)
+            self._held_ids.clear()
+            if jobs:
+                failed = await self._run_blocking(self._send, jobs)
+                print(f"Sent {len(jobs) - len(failed)} recovered GPU job(s)")
+            return
+        self._loop_task = asyncio.create_task(self._release_loop())
+
+    async def stop(self) -> None:
+        """Cancel the release loop; held jobs stay in the task table."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+
+    # ==================== Submission ====================
+
+    def window(self) -> int:
+        """Max GPU messages in SQS right now."""
+        return FAIR_QUEUE_WINDOW * max(1, self.get_workers())
+
+    def outstanding(self) -> int:
+        """GPU messages in SQS: the freshest queue reading plus jobs sent since, minus failing ones."""
+        readings = [self._sqs_backlog] if self._sqs_backlog else []
+        stats = [self.get_queue_stats(name) for name in self.queue_names]
+        stats = [s for s in stats if s is not None]
+        if stats:
+            readings.append((
+                sum(s['depth'] + s['in_flight'] + s.get('delayed', 0) for s in stats),
+                min(s['updated_at'] for s in stats)
+            ))
+        # No reading yet: count only what was sent since startup
+        total, taken_at = max(readings, key=lambda reading: reading[1]) if readings else (0, 0.0)
+        with self._lock:
+            self._sent = [(t, n) for t, n in self._sent if t >= taken_at]
+            failing = sum(1 for _, _, now_failing in self._failing.values() if now_failing)
+            return max(0, total - failing) + sum(n for _, n in self._sent)
+
+    def _capped(self, tenant: str) -> bool:
+        return bool(TENANT_MAX_CONCURRENCY) and len(self._in_flight.get(tenant, ())) >= TENANT_MAX_CONCURRENCY
+
+    def direct_slots(self, tenant: str, count: int = 1) -> int:
+        """
+        Decide how many of a tenant's new GPU jobs may go to SQS directly.
+
+        Jobs are held while others are held (no overtaking), beyond the
+        tenant's concurrency cap, and beyond the free part of the window.
+
+        Args:
+            tenant: Tenant submitting the jobs
+            count: Number of jobs submitted together
+
+        Returns:
+            How many of the jobs to send now; the rest are held
+        """
+        if not self.enabled:
+            return count
+        if self._held_ids:
+            return 0
+        free = self.window() - self.outstanding()
+        if TENANT_MAX_CONCURRENCY:
+            free = min(free, TENANT_MAX_CONCURRENCY - len(self._in_flight.get(tenant, ())))
+        return max(0, min(count, free))
+
+    def note_sent(self, tenant: str, task_ids: List[str]) -> None:
+        """Record GPU jobs sent to SQS directly (window and concurrency accounting)."""
+        if not task_ids:
+            return
+        with self._lock:
+            self._sent.append((time.time(), len(task_ids)))
+        self._in_flight.setdefault(tenant, set()).update(task_ids)
+
+    def _enqueue(self, job: HeldJob, front: bool = False) -> None:
+        if job.tenant not in self._held:
+            self._held[job.tenant] = deque()
+            self._active.append(job.tenant)
+            self._deficit[job.tenant] = 0.0
+        if front:
+            self._held[job.tenant].appendleft(job)
+        else:
+            self._held[job.tenant].append(job)
+        self._held_ids.add(job.task_id)
+
+    def hold(self, jobs: List[HeldJob]) -> None:
+        """
+        Queue jobs whose task records (with held_message) are written.
+
+        The release loop is woken so free window slots are used at once.
+        """
+        for job in jobs:
+            self._enqueue(job)
+        self.held_total += len(jobs)
+        if self._wake is not None:
+            self._wake.set()
+
+    def discard(self, task_id: str) -> bool:
+        """Drop a held job (e.g. cancelled). Returns True if it was held."""
+        if task_id not in self._held_ids:
+            return False
+        self._held_ids.discard(task_id)
+        for tenant, jobs in self._held.items():
+            for job in jobs:
+                if job.task_id == task_id:
+                    jobs.remove(job)
+                    if not jobs:
+                        self._remove_tenant(tenant)
+                    return True
+        return False
+
+    def _remove_tenant(self, tenant: str) -> None:
+        del self._held[tenant]
+        self._active.remove(tenant)
+        self._deficit.pop(tenant, None)
+        if self._turn == tenant:
+            self._turn = None
+
+    # ==================== Release ====================
+
+    def _next(self) -> Optional[HeldJob]:
+        """Pick the next held job by deficit round-robin, or None if every tenant is capped."""
+        capped = 0
+        while self._active and capped < len(self._active):
+            tenant = self._active[0]
+            if self._capped(tenant):
+                capped += 1
+                self._active.rotate(-1)
+                self._turn = None
+                continue
+            capped = 0
+
+            if self._turn != tenant:
+                # New turn: credit the tenant its quantum
+                self._turn = tenant
+                self._deficit[tenant] += FAIR_QUANTUM_SECONDS * self.weights.get(tenant, 1.0)
+
+            job = self._held[tenant][0]
+            cost = self.get_cost(job.job_type)
+            if self._deficit[tenant] < cost:
+                # Not enough credit yet: keep it for the next turn
+                self._active.rotate(-1)
+                self._turn = None
+                continue
+
+            self._deficit[tenant] -= cost
+            self._held[tenant].popleft()
+            self._held_ids.discard(job.task_id)
+            if not self._held[tenant]:
+                self._remove_tenant(tenant)
+            return job
+        return None
+
+    def _read_state(self, tracked: List[str]) -> Tuple[int, float, Dict[str, str]]:
+        """
+        Read the window's queues and the status of sent jobs (blocking).
+
+        Returns:
+            (messages in the queues, time of the reading, task ID -> state),
+            state being 'finished', 'failing' (failed, retry pending) or 'running'
+        """
+        total = 0
+        taken_at = time.time()
+        for queue_url in self.queue_urls:
+            attributes = get_queue_attributes(queue_url=queue_url, region=self.region)
+            total += sum(
+                int(attributes.get(name, 0))
+                for name in ('ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible', 'ApproximateNumberOfMessagesDelayed')
+            )
+
+        states: Dict[str, str] = {}
+        if tracked:
+            tasks = batch_get_tasks(table_name=self.table_name, task_ids=tracked, region=self.region, consistent_read=True)
+            items = {task['task_id']: task for task in tasks}
+            for task_id in tracked:
+                item = items.get(task_id, {'status': 'completed'})
+                if item.get('status') == 'failed' and item.get('retryable'):
+                    states[task_id] = 'failing'
+                elif item.get('status') in TERMINAL_STATUSES:
+                    states[task_id] = 'finished'
+                else:
+                    states[task_id] = 'running'
+        return total, taken_at, states
+
+    def _update_tracking(self, states: Dict[str, str], now: float) -> None:
+        """Apply a status reading to the in-flight and failing task sets."""
+        for tenant, task_ids in list(self._in_flight.items()):
+            for task_id in list(task_ids):
+                state = states.get(task_id, 'running')
+                if state != 'running':
+                    task_ids.discard(task_id)
+                if state == 'failing':
+                    self._failing[task_id] = (tenant, now, True)
+            if not task_ids:
+                del self._in_flight[tenant]
+
+        for task_id, (tenant, since, _) in list(self._failing.items()):
+            state = states.get(task_id, 'failing')
+            if state == 'finished' or now - since > FAIR_FAILING_SECONDS:
+                # Done, or dead-lettered by now: its message is no longer in SQS
+                del self._failing[task_id]
+            else:
+                # A redelivered attempt is running again and occupies the window
+                self._failing[task_id] = (tenant, since, state == 'failing')
+
+    def _send(self, jobs: List[HeldJob]) -> List[HeldJob]:
+        """
+        Send released jobs to SQS and clear their held message (blocking).
+
+        Returns:
+            Jobs that could not be sent (held again by the caller)
+        """
+        failed = []
+        for job in jobs:
+            try:
+                send_message(queue_url=job.queue_url, message_body=job.message, region=self.region)
+            except Exception as e:
+                print(f"Error releasing GPU job {job.task_id}: {e}")
+                failed.append(job)
+                continue
+            try:
+                release_held_task(self.table_name, job.task_id, self.region)
+            except Exception as e:
+                # Sent anyway; a restart would send it again (the adapter runs it once more)
+                print(f"Error clearing held message of task {job.task_id}: {e}")
+        return failed
+
+    async def refresh(self) -> None:
+        """Take a queue reading and update the in-flight and failing task sets."""
+        tracked = [task_id for task_ids in self._in_flight.values() for task_id in task_ids] + list(self._failing)
+        total, taken_at, states = await self._run_blocking(self._read_state, tracked)
+        self._update_tracking(states, taken_at)
+        self._sqs_backlog = (total, taken_at)
+
+    async def release(self) -> int:
+        """
+        Send held jobs until the window is full.
+
+        Returns:
+            Number of jobs sent
+        """
+        await self.refresh()
+
+        free = self.window() - self.outstanding()
+        jobs = []
+        while free > len(jobs):
+            job = self._next()
+            if job is None:
+                break
+            jobs.append(job)
+            # Count it against the cap before picking the next job
+            self._in_flight.setdefault(job.tenant, set()).add(job.task_id)
+        if not jobs:
+            return 0
+
+        failed = await self._run_blocking(self._send, jobs)
+        for job in reversed(failed):
+            self._in_flight.get(job.tenant, set()).discard(job.task_id)
+            self._enqueue(job, front=True)
+        sent = [job for job in jobs if job not in failed]
+        for job in sent:
+            self.note_sent(job.tenant, [job.task_id])
+            self.released_by_tenant[job.tenant] = self.released_by_tenant.get(job.tenant, 0) + 1
+        self.released += len(sent)
+        return len(sent)
+
+    async def _release_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), FAIR_RELEASE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                if self._held_ids:
+                    await self.release()
+                elif self._in_flight or self._failing:
+                    # Keep the tracked sets current (and small) while nothing is held
+                    await self.refresh()
+            except Exception as e:
+                print(f"Error releasing held GPU jobs: {e}")
+
+    # ==================== Snapshot ====================
+
+    def held_count(self) -> int:
+        """Number of held jobs."""
+        return len(self._held_ids)
+
+    def queue_stats(self) -> Dict[str, Any]:
+        """Held jobs as queue stats, so admission control and ETAs count them."""
+        return {"depth": len(self._held_ids), "in_flight": 0, "delayed": 0, "updated_at": time.time()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return window, held queues and counters for debug endpoints."""
+        return {
+            "enabled": self.enabled,
+            "window": self.window(),
+            "outstanding": self.outstanding(),
+            "quantum_seconds": FAIR_QUANTUM_SECONDS,
+            "max_concurrency": TENANT_MAX_CONCURRENCY or None,
+            "weights": self.weights,
+            "held": {tenant: len(jobs) for tenant, jobs in self._held.items()},
+            "deficits": {tenant: round(deficit, 1) for tenant, deficit in self._deficit.items()},
+            "in_flight": {tenant: len(task_ids) for tenant, task_ids in self._in_flight.items()},
+            "failing": sum(1 for _, _, now_failing in self._failing.values() if now_failing),
+            "held_total": self.held_total,
+            "released": self.released,
+            "recovered": self.recovered,
+            "released_by_tenant": self.released_by_tenant
+        }
@@ -0,0 +1,472 @@
+"""
+GPU Instance State Cache
+
+A single background-owned view of the GPU instance, shared by every request
+handler in the orchestrator.
+
+- One poller calls DescribeInstances with adaptive frequency: fast while the
+  instance is pending/stopping or a start is in flight, slow while steady.
+- Job submissions read the cached state and cost zero EC2 API calls when the
+  instance is already running or pending.
+- Concurrent submissions share a single in-flight start request.
+- A 'stopping' instance is handled by a waiter that starts it again as soon
+  as it reaches 'stopped'.
+- Fleet mode: with a pool of instance IDs (GPU_INSTANCE_IDS), one
+  DescribeInstances covers the pool and start requests bring up
+  ceil(backlog / GPU_FLEET_JOBS_PER_INSTANCE) instances within the fleet
+  bounds; the shutdown Lambda stops idle instances one at a time.
+- Deferred jobs never start the instance on submit; DeferredStartPolicy
+  starts it once their backlog or age crosses a threshold.
+- Speculative warm-up starts (warmup.WarmupController) start one instance
+  without recording job demand, and can be stopped again if no job follows.
+
+All boto3 calls run on the executor passed in, never on the event loop.
+"""
+
+import asyncio
+import functools
+import math
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from aws.ec2 import list_ec2_instances, start_instance, stop_instance, wait_for_instance_state
+
+# Poll intervals (seconds)
+GPU_POLL_FAST_INTERVAL = int(os.getenv('GPU_POLL_FAST_INTERVAL', '5'))
+GPU_POLL_SLOW_INTERVAL = int(os.getenv('GPU_POLL_SLOW_INTERVAL', '60'))
+
+# Deferred lane: start the GPU once this many deferred jobs wait, or the
+# oldest one has waited this long (seconds)
+DEFERRED_START_BACKLOG = int(os.getenv('DEFERRED_START_BACKLOG', '20'))
+DEFERRED_MAX_AGE_SECONDS = int(os.getenv('DEFERRED_MAX_AGE_SECONDS', '3600'))
+DEFERRED_CHECK_INTERVAL = int(os.getenv('DEFERRED_CHECK_INTERVAL', '30'))
+
+# Fleet mode (more than one instance ID): scale on backlog per instance
+GPU_FLEET_MIN = int(os.getenv('GPU_FLEET_MIN', '0'))
+GPU_FLEET_MAX = int(os.getenv('GPU_FLEET_MAX', '0'))  # 0 = whole pool
+GPU_FLEET_JOBS_PER_INSTANCE = int(os.getenv('GPU_FLEET_JOBS_PER_INSTANCE', '10'))
+
+TRANSITIONAL_STATES = ('pending', 'stopping')
+ACTIVE_STATES = ('running', 'pending')
+# Aggregate pool state: the first of these any instance is in
+STATE_PREFERENCE = ('running', 'pending', 'stopping', 'stopped')
+
+
+class GpuStateManager:
+    """
+    Cached state of the GPU instance pool with single-flight starts.
+
+    With one instance ID this is the classic single-GPU setup. With a pool
+    (fleet mode) the aggregate `state` is the "best" state of any instance
+    (running > pending > stopping > stopped), and start requests bring up
+    as many instances as the backlog needs.
+    """
+
+    def __init__(
+        self,
+        instance_ids: Union[str, List[str]],
+        region: str,
+        executor: Executor,
+        get_backlog: Optional[Callable[[], Optional[int]]] = None
+    ):
+        """
+        Args:
+            instance_ids: GPU instance ID, or the pool of instance IDs (fleet mode)
+            region: AWS region name
+            executor: Executor for blocking boto3 calls
+            get_backlog: Returns the GPU backlog (queued + in-flight jobs) or
+                         None if unknown; used to size the fleet
+        """
+        self.instance_ids = [instance_ids] if isinstance(instance_ids, str) else list(instance_ids)
+        self.instance_id = self.instance_ids[0]
+        self.region = region
+        self.executor = executor
+        self.get_backlog = get_backlog
+
+        # instance_id -> {'state', 'public_ip'}
+        self.instances: Dict[str, Dict[str, Optional[str]]] = {
+            instance_id: {'state': None, 'public_ip': None} for instance_id in self.instance_ids
+        }
+        self.state: Optional[str] = None
+        self.public_ip: Optional[str] = None
+        self.last_updated: float = 0
+        self.last_running_at: float = 0
+        self.demand_at: float = 0
+        self.last_start_at: float = 0
+        # Whether the last start was a speculative warm-up (not job demand)
+        self.last_start_speculative = False
+        self.describe_calls = 0
+        self.start_calls = 0
+
+        self._start_tasks: Dict[str, asyncio.Task] = {}
+        self._poller_task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def fleet_mode(self) -> bool:
+        return len(self.instance_ids) > 1
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== Lifecycle ====================
+
+    def start(self) -> None:
+        """Start the background poller (call from the running event loop)."""
+        self._wake = asyncio.Event()
+        self._poller_task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """Cancel the poller and any in-flight starts."""
+        for task in (self._poller_task, *self._start_tasks.values()):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # ==================== Polling ====================
+
+    async def refresh(self) -> Optional[str]:
+        """Describe every pool instance with one call and update the cached state."""
+        self.describe_calls += 1
+        instances = await self._run_blocking(
+            list_ec2_instances,
+            region=self.region,
+            filters=[{'Name': 'instance-id', 'Values': self.instance_ids}]
+        )
+
+        found = {instance['InstanceId']: instance for instance in instances}
+        for instance_id in self.instance_ids:
+            instance = found.get(instance_id)
+            if instance is None:
+                print(f"Warning: GPU instance {instance_id} not found")
+                self._set_instance_state(instance_id, None, None)
+            else:
+                self._set_instance_state(instance_id, instance['State'], instance.get('PublicIpAddress'))
+        return self.state
+
+    def _set_instance_state(self, instance_id: str, state: Optional[str], public_ip: Optional[str]) -> None:
+        instance = self.instances[instance_id]
+        if state != instance['state']:
+            print(f"GPU instance {instance_id} state: {instance['state']} -> {state}")
+        if public_ip != instance['public_ip']:
+            print(f"GPU instance {instance_id} IP updated: {instance['public_ip']} -> {public_ip}")
+        instance['state'] = state
+        instance['public_ip'] = public_ip
+        self._update_aggregate()
+
+    def _update_aggregate(self) -> None:
+        now = time.time()
+        states = [instance['state'] for instance in self.instances.values()]
+        self.state = next((s for s in STATE_PREFERENCE if s in states), None)
+        self.public_ip = next(
+            (i['public_ip'] for i in self.instances.values() if i['state'] == 'running' and i['public_ip']),
+            None
+        )
+        self.last_updated = now
+        if self.state == 'running':
+            self.last_running_at = now
+
+    def active_count(self) -> int:
+        """Number of instances running, booting or being started."""
+        return sum(
+            1 for instance_id, instance in self.instances.items()
+            if instance['state'] in ACTIVE_STATES or self._start_in_flight(instance_id)
+        )
+
+    def _poll_interval(self) -> int:
+        if self.state in TRANSITIONAL_STATES or any(self._start_in_flight(i) for i in self.instance_ids):
+            return GPU_POLL_FAST_INTERVAL
+        if any(i['state'] in TRANSITIONAL_STATES for i in self.instances.values()):
+            return GPU_POLL_FAST_INTERVAL
+        return GPU_POLL_SLOW_INTERVAL
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                # A job was submitted while we believed an instance was up,
+                # but it has since been stopped (e.g. by the idle Lambda).
+                if self.state in ('stopped', 'stopping') and self.demand_at > self.last_running_at:
+                    self._scale()
+                elif self.fleet_mode and self.state in ACTIVE_STATES:
+                    # Scale out while the backlog per instance is above target
+                    self._scale()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error refreshing GPU instance state: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._poll_interval())
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    # ==================== Start (single-flight) ====================
+
+    def request_start(self) -> None:
+        """
+        Make sure GPU capacity will be running for a newly submitted job.
+
+        Reads only the cached state; never blocks and makes no EC2 calls
+        itself when enough instances are already running or pending.
+        """
+        self.demand_at = time.time()
+
+        if any(instance['state'] is None for instance in self.instances.values()) and self._wake is not None:
+            # Unknown state: refresh now, the poller starts instances if needed
+            self._wake.set()
+        self._scale()
+
+    def request_warm(self) -> bool:
+        """
+        Speculatively start one instance ahead of expected jobs.
+
+        Unlike request_start() no job demand is recorded, so if the
+        instance is stopped again the poller does not restart it.
+
+        Returns:
+            True if a start was issued, False if an instance is already
+            up or starting (or the pool state is not known yet)
+        """
+        if any(instance['state'] is None for instance in self.instances.values()):
+            return False
+        if self.active_count() > 0:
+            return False
+
+        for state in ('stopped', 'stopping'):
+            for instance_id, instance in self.instances.items():
+                if instance['state'] == state:
+                    self._ensure_start(instance_id, speculative=True)
+                    return True
+        return False
+
+    async def stop_active_instances(self) -> List[str]:
+        """
+        Stop every running or pending pool instance.
+
+        Used to end a speculative warm-up that no job followed.
+
+        Returns:
+            IDs of the instances a stop was sent to
+        """
+        stopped = []
+        for instance_id, instance in self.instances.items():
+            if instance['state'] not in ACTIVE_STATES or self._start_in_flight(instance_id):
+                continue
+            try:
+                result = await self._run_blocking(stop_instance, instance_id, self.region)
+                self._set_instance_state(instance_id, result['CurrentState'], None)
+                stopped.append(instance_id)
+            except Exception as e:
+                print(f"Error stopping GPU instance {instance_id}: {e}")
+        if stopped and self._wake is not None:
+            self._wake.set()
+        return stopped
+
+    def desired_count(self) -> int:
+        """
+        Number of instances the current backlog calls for (at least one).
+
+        Single instance: always 1. Fleet: ceil(backlog / GPU_FLEET_JOBS_PER_INSTANCE)
+        within [GPU_FLEET_MIN, GPU_FLEET_MAX].
+        """
+        if not self.fleet_mode:
+            return 1
+        backlog = self.get_backlog() if self.get_backlog else None
+        wanted = math.ceil(backlog / GPU_FLEET_JOBS_PER_INSTANCE) if backlog else 1
+        upper = min(GPU_FLEET_MAX, len(self.instance_ids)) if GPU_FLEET_MAX else len(self.instance_ids)
+        return max(1, GPU_FLEET_MIN, min(wanted, upper))
+
+    def _scale(self) -> None:
+        """Start stopped instances until desired_count() are active."""
+        missing = self.desired_count() - self.active_count()
+        if missing <= 0:
+            return
+
+        # Prefer stopped instances (they start right away) over stopping ones
+        candidates = [
+            instance_id for state in ('stopped', 'stopping')
+            for instance_id, instance in self.instances.items()
+            if instance['state'] == state and not self._start_in_flight(instance_id)
+        ]
+        for instance_id in candidates[:missing]:
+            self._ensure_start(instance_id)
+
+    def _start_in_flight(self, instance_id: str) -> bool:
+        task = self._start_tasks.get(instance_id)
+        return task is not None and not task.done()
+
+    def _ensure_start(self, instance_id: str, speculative: bool = False) -> None:
+        if self._start_in_flight(instance_id):
+            return
+        self._start_tasks[instance_id] = asyncio.create_task(self._start_instance(instance_id, speculative))
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _start_instance(self, instance_id: str, speculative: bool = False) -> None:
+        instance = self.instances[instance_id]
+        try:
+            if instance['state'] == 'stopping':
+                print(f"GPU instance {instance_id} is stopping, waiting for it to stop before restarting...")
+                await self._run_blocking(
+                    wait_for_instance_state,
+                    instance_id,
+                    self.region,
+                    waiter_name='instance_stopped',
+                    delay=GPU_POLL_FAST_INTERVAL
+                )
+                self._set_instance_state(instance_id, 'stopped', None)
+
+            print(f"Starting GPU instance {instance_id}...")
+            self.start_calls += 1
+            self.last_start_at = time.time()
+            self.last_start_speculative = speculative
+            result = await self._run_blocking(start_instance, instance_id, self.region)
+            # The poller may already have observed a newer state
+            if instance['state'] not in ACTIVE_STATES:
+                self._set_instance_state(instance_id, result['CurrentState'], instance['public_ip'])
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error starting GPU instance {instance_id}: {e}")
+            # Don't fail any request - tasks are already queued
+
+    # ==================== Introspection ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the cached state for debug/health endpoints."""
+        snapshot = {
+            "instance_id": self.instance_id,
+            "state": self.state,
+            "current_ip": self.public_ip,
+            "last_updated": self.last_updated,
+            "last_updated_ago": f"{int(time.time() - self.last_updated)}s ago" if self.last_updated > 0 else "never",
+            "start_in_flight": any(self._start_in_flight(i) for i in self.instance_ids),
+            "poll_interval": self._poll_interval(),
+            "describe_calls": self.describe_calls,
+            "start_calls": self.start_calls
+        }
+        if self.fleet_mode:
+            snapshot["fleet"] = {
+                "size": len(self.instance_ids),
+                "min": GPU_FLEET_MIN,
+                "max": GPU_FLEET_MAX or len(self.instance_ids),
+                "jobs_per_instance": GPU_FLEET_JOBS_PER_INSTANCE,
+                "active": self.active_count(),
+                "desired": self.desired_count(),
+                "instances": {
+                    instance_id: {**instance, "start_in_flight": self._start_in_flight(instance_id)}
+                    for instance_id, instance in self.instances.items()
+                }
+            }
+        return snapshot
+
+
+class DeferredStartPolicy:
+    """
+    Decide when deferred (batch) jobs justify starting the GPU.
+
+    Deferred jobs run whenever the instance is already up. While it is
+    stopped, the instance is started only once DEFERRED_START_BACKLOG jobs
+    are waiting or the oldest has waited DEFERRED_MAX_AGE_SECONDS.
+    """
+
+    def __init__(self, gpu_state: GpuStateManager, get_backlog: Callable[[], Optional[Dict[str, Any]]]):
+        """
+        Args:
+            gpu_state: Shared GPU state manager
+            get_backlog: Returns cached stats of the deferred queue
+                         ({'depth', 'in_flight', 'updated_at'}) or None if unknown
+        """
+        self.gpu_state = gpu_state
+        self.get_backlog = get_backlog
+
+        self.waiting_since: Optional[float] = None
+        self.submitted = 0
+        self.last_submitted_at: float = 0
+        self.starts_triggered = 0
+
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic check (call from the running event loop)."""
+        self._loop_task = asyncio.create_task(self._check_loop())
+
+    async def stop(self) -> None:
+        """Cancel the periodic check."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+
+    def note_submitted(self, count: int = 1) -> None:
+        """Record deferred jobs queued by this orchestrator (no GPU start)."""
+        now = time.time()
+        self.submitted += count
+        self.last_submitted_at = now
+        if self.waiting_since is None:
+            self.waiting_since = now
+        self.check()
+
+    def _backlog(self) -> int:
+        stats = self.get_backlog()
+        if stats is None:
+            # Deferred queue not tracked separately: count our own submissions
+            return self.submitted
+
+        depth = stats['depth'] + stats.get('delayed', 0)
+        if depth == 0 and stats['updated_at'] > self.last_submitted_at:
+            # Drained since our last submission
+            self.waiting_since = None
+            self.submitted = 0
+        elif depth > 0 and self.waiting_since is None:
+            # Backlog we didn't submit (e.g. before a restart): start the clock now
+            self.waiting_since = time.time()
+        return max(depth, self.submitted)
+
+    def check(self) -> None:
+        """Start the GPU if the deferred backlog or its age crossed a threshold."""
+        backlog = self._backlog()
+        if backlog == 0 or self.waiting_since is None:
+            return
+
+        if self.gpu_state.state in ACTIVE_STATES:
+            # Already up: the adapter drains deferred jobs between others
+            self.submitted = 0
+            return
+
+        age = time.time() - self.waiting_since
+        if backlog >= DEFERRED_START_BACKLOG or age >= DEFERRED_MAX_AGE_SECONDS:
+            print(f"Deferred backlog {backlog} (oldest {int(age)}s), starting GPU instance")
+            self.starts_triggered += 1
+            self.gpu_state.request_start()
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(DEFERRED_CHECK_INTERVAL)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking deferred backlog: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return deferred lane state for debug endpoints."""
+        return {
+            "backlog_threshold": DEFERRED_START_BACKLOG,
+            "max_age_seconds": DEFERRED_MAX_AGE_SECONDS,
+            "waiting_since": self.waiting_since,
+            "submitted_since_drain": self.submitted,
+            "starts_triggered": self.starts_triggered
+        }
@@ -0,0 +1,195 @@
+"""
+Orchestrator Health Monitor
+
+Component health is refreshed by one background task instead of per probe.
+
+- Every HEALTH_REFRESH_INTERVAL seconds the monitor calls DescribeTable and
+  GetQueueAttributes once (per queue) on the AWS executor.
+- /health probes read the cached snapshot: no AWS calls, no client builds,
+  and the snapshot reports its own age.
+- A deep check refreshes everything on demand (plus an S3 bucket check)
+  for manual diagnosis.
+- The snapshot also carries queue depth / in-flight counts so other
+  features (admission control, ETAs, scaling) can reuse them for free.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional
+
+from aws.clients import get_client
+from aws.sqs import get_queue_attributes
+
+# Seconds between background refreshes
+HEALTH_REFRESH_INTERVAL = int(os.getenv('HEALTH_REFRESH_INTERVAL', '15'))
+# Snapshot older than this is reported unhealthy (refresh loop stuck)
+HEALTH_STALE_SECONDS = int(os.getenv('HEALTH_STALE_SECONDS', str(HEALTH_REFRESH_INTERVAL * 4)))
+
+
+class HealthMonitor:
+    """Background-refreshed component health and queue statistics."""
+
+    def __init__(
+        self,
+        table_name: str,
+        queues: Dict[str, str],
+        region: str,
+        executor: Executor,
+        bucket_name: Optional[str] = None
+    ):
+        """
+        Args:
+            table_name: DynamoDB task table to check
+            queues: Queue name (e.g., 'gpu', 'cpu') -> SQS queue URL
+            region: AWS region name
+            executor: Executor for blocking boto3 calls
+            bucket_name: Optional S3 bucket included in deep checks
+        """
+        self.table_name = table_name
+        self.queues = {name: url for name, url in queues.items() if url}
+        self.region = region
+        self.executor = executor
+        self.bucket_name = bucket_name
+
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.queue_stats: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: float = 0
+        self.refreshes = 0
+
+        self._loop_task: Optional[asyncio.Task] = None
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== Lifecycle ====================
+
+    def start(self) -> None:
+        """Start the background refresh loop (call from the running event loop)."""
+        self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Cancel the refresh loop."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error refreshing health status: {e}")
+            await asyncio.sleep(HEALTH_REFRESH_INTERVAL)
+
+    # ==================== Checks ====================
+
+    async def _check(self, name: str, func, *args, **kwargs) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = await self._run_blocking(func, *args, **kwargs)
+            status = {"status": "healthy", "error": None}
+        except Exception as e:
+            result = None
+            status = {"status": "unhealthy", "error": str(e)}
+        status["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        status["checked_at"] = time.time()
+        return {"name": name, "health": status, "result": result}
+
+    def _describe_table(self) -> Dict[str, Any]:
+        table = get_client('dynamodb', self.region).describe_table(TableName=self.table_name)['Table']
+        if table.get('TableStatus') not in ('ACTIVE', 'UPDATING'):
+            raise RuntimeError(f"Table status is {table.get('TableStatus')}")
+        return table
+
+    def _head_bucket(self) -> None:
+        get_client('s3', self.region).head_bucket(Bucket=self.bucket_name)
+
+    async def refresh(self, deep: bool = False) -> Dict[str, Any]:
+        """
+        Run every component check once and update the cached snapshot.
+
+        Args:
+            deep: Also check the S3 bucket (manual diagnosis only)
+
+        Returns:
+            The updated snapshot
+        """
+        checks = [self._check('dynamodb', self._describe_table)]
+        checks += [
+            self._check(f'sqs:{name}', get_queue_attributes, queue_url=url, region=self.region)
+            for name, url in self.queues.items()
+        ]
+        if deep and self.bucket_name:
+            checks.append(self._check('s3', self._head_bucket))
+
+        results = await asyncio.gather(*checks)
+
+        now = time.time()
+        for check in results:
+            self.components[check['name']] = check['health']
+            if check['name'].startswith('sqs:') and check['result'] is not None:
+                attributes = check['result']
+                self.queue_stats[check['name'][len('sqs:'):]] = {
+                    "depth": int(attributes.get('ApproximateNumberOfMessages', 0)),
+                    "in_flight": int(attributes.get('ApproximateNumberOfMessagesNotVisible', 0)),
+                    "delayed": int(attributes.get('ApproximateNumberOfMessagesDelayed', 0)),
+                    "updated_at": now
+                }
+
+        self.checked_at = now
+        self.refreshes += 1
+        return self.snapshot()
+
+    # ==================== Snapshot ====================
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the last completed refresh, or None before the first."""
+        return round(time.time() - self.checked_at, 1) if self.checked_at else None
+
+    def get_queue_stats(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return cached depth / in-flight / delayed counts for a queue.
+
+        Args:
+            name: Queue name given to the constructor (e.g., 'gpu')
+
+        Returns:
+            Dict with depth, in_flight, delayed and updated_at, or None if unknown
+        """
+        return self.queue_stats.get(name)
+
+    def is_healthy(self) -> bool:
+        """True if every component passed its last check and the data is current."""
+        age = self.age_seconds()
+        if age is None or age > HEALTH_STALE_SECONDS:
+            return False
+        return all(c['status'] == 'healthy' for name, c in self.components.items() if name != 's3')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the cached health data (no AWS calls)."""
+        age = self.age_seconds()
+        if age is None:
+            status = "starting"
+        elif self.is_healthy():
+            status = "healthy"
+        else:
+            status = "unhealthy"
+
+        return {
+            "status": status,
+            "checked_at": self.checked_at or None,
+            "age_seconds": age,
+            "refresh_interval": HEALTH_REFRESH_INTERVAL,
+            "components": dict(self.components),
+            "queues": dict(self.queue_stats)
+        }
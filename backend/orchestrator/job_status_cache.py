@@ -0,0 +1,145 @@
+"""
+Job Status Cache
+
+Read-through, in-memory cache in front of the DynamoDB task store.
+
+- Terminal states (completed/failed/cancelled) never change, so they are kept until
+  evicted by the LRU bound; repeated polls on finished jobs cost no reads.
+- Non-terminal states are kept for a short TTL, since the adapters update
+  them outside this process.
+- IDs created by this orchestrator are remembered for a short window so
+  their first reads can be strongly consistent instead of retried.
+- The orchestrator's own writes (submit, failure marking) and the job
+  watcher's reads update the cache directly.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from job_watcher import TERMINAL_STATUSES
+
+# Max cached jobs (least recently used are evicted first)
+JOB_STATUS_CACHE_SIZE = int(os.getenv('JOB_STATUS_CACHE_SIZE', '10000'))
+# Seconds a non-terminal status is served from cache
+JOB_STATUS_CACHE_TTL = float(os.getenv('JOB_STATUS_CACHE_TTL', '2'))
+# Seconds after creation during which reads use ConsistentRead
+JOB_STATUS_FRESH_SECONDS = float(os.getenv('JOB_STATUS_FRESH_SECONDS', '30'))
+
+
+class JobStatusCache:
+    """LRU/TTL cache of public job status fields keyed by job ID."""
+
+    def __init__(
+        self,
+        max_size: int = JOB_STATUS_CACHE_SIZE,
+        ttl: float = JOB_STATUS_CACHE_TTL,
+        fresh_seconds: float = JOB_STATUS_FRESH_SECONDS
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.fresh_seconds = fresh_seconds
+
+        self._lock = threading.Lock()
+        # job_id -> (fields, expires_at); expires_at is None for terminal states
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        # job_id -> creation time, insertion-ordered for cheap pruning
+        self._created: "OrderedDict[str, float]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return cached status fields, or None on a miss or expired entry.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Dict with status, result_url and error, or None
+        """
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None:
+                fields, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(job_id)
+                    self.hits += 1
+                    return dict(fields)
+                del self._entries[job_id]
+            self.misses += 1
+            return None
+
+    def put(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Store status fields read from or written to DynamoDB.
+
+        Args:
+            job_id: Job identifier
+            fields: Dict with status, result_url and error
+        """
+        terminal = fields.get('status') in TERMINAL_STATUSES
+        expires_at = None if terminal else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._entries[job_id] = (dict(fields), expires_at)
+            self._entries.move_to_end(job_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if terminal:
+                self._created.pop(job_id, None)
+
+    def invalidate(self, job_id: str) -> None:
+        """Drop a cached entry (e.g., after an out-of-band write)."""
+        with self._lock:
+            self._entries.pop(job_id, None)
+
+    # ==================== Write Hooks ====================
+
+    def on_created(self, job_id: str, status: str = 'pending') -> None:
+        """Record a job this orchestrator just created."""
+        now = time.monotonic()
+        with self._lock:
+            self._created[job_id] = now
+            self._created.move_to_end(job_id)
+            cutoff = now - self.fresh_seconds
+            while self._created and next(iter(self._created.values())) < cutoff:
+                self._created.popitem(last=False)
+        self.put(job_id, {'status': status, 'result_url': None, 'error': None})
+
+    def on_status_written(
+        self,
+        job_id: str,
+        status: str,
+        result_url: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Record a status update this orchestrator wrote."""
+        self.put(job_id, {'status': status, 'result_url': result_url, 'error': error})
+
+    def is_fresh(self, job_id: str) -> bool:
+        """True if the job was created here recently enough to need a consistent read."""
+        with self._lock:
+            created_at = self._created.get(job_id)
+        return created_at is not None and time.monotonic() - created_at < self.fresh_seconds
+
+    # ==================== Introspection ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return cache counters for debug endpoints."""
+        with self._lock:
+            terminal = sum(1 for _, expires_at in self._entries.values() if expires_at is None)
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "terminal_entries": terminal,
+                "fresh_jobs": len(self._created),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,245 @@
+"""
+Job Status Watcher Hub
+
+A single in-process watcher shared by every streaming client (SSE and
+WebSocket) of the orchestrator.
+
+- Clients subscribe to sets of job IDs and receive updates on a queue.
+- One background loop reads every watched, non-terminal job with a single
+  BatchGetItem per tick (batch_get_tasks chunks by 100), no matter how many
+  clients watch the same job.
+- Only state changes are pushed. A job is dropped from the watch set once
+  it reaches a terminal status, or after it has been missing for a few
+  ticks (eventual consistency right after submit).
+
+All boto3 calls run on the executor passed in, never on the event loop.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from aws.dynamodb import TERMINAL_STATUSES, batch_get_tasks
+
+# Seconds between watcher reads while at least one job is watched
+JOB_WATCH_INTERVAL = float(os.getenv('JOB_WATCH_INTERVAL', '1'))
+# Ticks a job may be missing from DynamoDB before subscribers get 'not_found'
+JOB_WATCH_NOT_FOUND_TICKS = int(os.getenv('JOB_WATCH_NOT_FOUND_TICKS', '6'))
+
+
+def status_fields(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a DynamoDB task item to the public status fields."""
+    return {
+        'status': task.get('status', 'unknown'),
+        'result_url': task.get('result_url') or task.get('result_s3_uri'),  # Try both field names
+        'error': task.get('error') or task.get('error_message')  # Try both field names
+    }
+
+
+class Subscription:
+    """One client's view of the hub: the jobs it watches and its update queue."""
+
+    def __init__(self):
+        self.job_ids: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    @property
+    def active(self) -> bool:
+        """True while jobs are watched or updates are still queued."""
+        return bool(self.job_ids) or not self.queue.empty()
+
+
+class JobWatcherHub:
+    """Batched DynamoDB watcher that fans job status changes out to subscribers."""
+
+    def __init__(
+        self,
+        table_name: str,
+        region: str,
+        executor: Executor,
+        status_cache=None,
+        task_observer: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self.table_name = table_name
+        self.region = region
+        self.executor = executor
+        # Optional JobStatusCache refreshed with every status read here
+        self.status_cache = status_cache
+        # Optional callback given every task item read (e.g., ETA statistics)
+        self.task_observer = task_observer
+
+        self._watchers: Dict[str, Set[Subscription]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._missing: Dict[str, int] = {}
+
+        self.ticks = 0
+        self.items_read = 0
+        self.updates_pushed = 0
+
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== Lifecycle ====================
+
+    def start(self) -> None:
+        """Start the background watcher loop (call from the running event loop)."""
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        """Cancel the watcher loop."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+
+    # ==================== Subscriptions ====================
+
+    def subscribe(self, job_ids: Iterable[str], subscription: Optional[Subscription] = None) -> Subscription:
+        """
+        Watch job IDs for a (new or existing) subscription.
+
+        The last known state of a job already watched by another client is
+        pushed immediately; new jobs are picked up on the next tick.
+
+        Args:
+            job_ids: Job IDs to watch
+            subscription: Existing subscription to extend, or None for a new one
+
+        Returns:
+            The subscription receiving updates
+        """
+        sub = subscription or Subscription()
+        for job_id in job_ids:
+            if job_id in sub.job_ids:
+                continue
+            sub.job_ids.add(job_id)
+            self._watchers.setdefault(job_id, set()).add(sub)
+
+            last = self._last.get(job_id)
+            if last is not None:
+                sub.queue.put_nowait({'job_id': job_id, **last})
+
+        if self._watchers and self._wake is not None:
+            self._wake.set()
+        return sub
+
+    def unsubscribe(self, subscription: Subscription, job_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Stop watching some or all of a subscription's jobs.
+
+        Args:
+            subscription: The subscription to update
+            job_ids: Job IDs to drop, or None to drop all of them
+        """
+        for job_id in list(subscription.job_ids if job_ids is None else job_ids):
+            subscription.job_ids.discard(job_id)
+            subs = self._watchers.get(job_id)
+            if subs is None:
+                continue
+            subs.discard(subscription)
+            if not subs:
+                self._forget(job_id)
+
+    def _forget(self, job_id: str) -> None:
+        self._watchers.pop(job_id, None)
+        self._last.pop(job_id, None)
+        self._missing.pop(job_id, None)
+
+    # ==================== Watch Loop ====================
+
+    async def _watch_loop(self) -> None:
+        while True:
+            if not self._watchers:
+                # Idle: no DynamoDB reads until someone subscribes
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error polling watched jobs: {e}")
+
+            await asyncio.sleep(JOB_WATCH_INTERVAL)
+
+    async def poll_once(self) -> None:
+        """Read every watched job once and push the ones that changed."""
+        job_ids = list(self._watchers)
+        if not job_ids:
+            return
+
+        self.ticks += 1
+        tasks = await self._run_blocking(
+            batch_get_tasks,
+            table_name=self.table_name,
+            task_ids=job_ids,
+            region=self.region
+        )
+        self.items_read += len(tasks)
+        if self.task_observer is not None:
+            for task in tasks:
+                self.task_observer(task)
+        found = {task['task_id']: status_fields(task) for task in tasks}
+
+        for job_id in job_ids:
+            if job_id not in self._watchers:
+                # Unsubscribed while the read was in flight
+                continue
+
+            fields = found.get(job_id)
+            if fields is None:
+                self._missing[job_id] = self._missing.get(job_id, 0) + 1
+                if self._missing[job_id] >= JOB_WATCH_NOT_FOUND_TICKS:
+                    self._push(job_id, {'status': 'not_found', 'result_url': None, 'error': 'Job not found'})
+                    self._drop(job_id)
+                continue
+
+            self._missing.pop(job_id, None)
+            if self.status_cache is not None:
+                self.status_cache.put(job_id, fields)
+            if fields != self._last.get(job_id):
+                self._last[job_id] = fields
+                self._push(job_id, fields)
+
+            if fields['status'] in TERMINAL_STATUSES:
+                self._drop(job_id)
+
+    def _push(self, job_id: str, fields: Dict[str, Any]) -> None:
+        update = {'job_id': job_id, **fields}
+        for sub in self._watchers.get(job_id, ()):
+            sub.queue.put_nowait(update)
+            self.updates_pushed += 1
+
+    def _drop(self, job_id: str) -> None:
+        """Stop watching a finished job; subscribers already have its final state."""
+        for sub in self._watchers.get(job_id, ()):
+            sub.job_ids.discard(job_id)
+        self._forget(job_id)
+
+    # ==================== Introspection ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return watcher counters for debug endpoints."""
+        subscribers = set()
+        for subs in self._watchers.values():
+            subscribers.update(subs)
+        return {
+            "watched_jobs": len(self._watchers),
+            "subscribers": len(subscribers),
+            "interval_seconds": JOB_WATCH_INTERVAL,
+            "ticks": self.ticks,
+            "items_read": self.items_read,
+            "updates_pushed": self.updates_pushed
+        }
@@ -4,7 +4,22 @@ AWS Lambda Function: GPU Auto-Shutdown
 This Lambda function is triggered by CloudWatch Alarm when the SQS queue
 has been empty for 30 minutes. It safely shuts down the GPU instance.
 
-Trigger: CloudWatch Alarm (QueueEmptyFor30Min)
+Fleet mode (GPU_INSTANCE_IDS lists more than one instance): the function is
+also invoked on a schedule and scales the pool in one instance at a time.
+Each run computes the instances the backlog needs,
+max(1, GPU_FLEET_MIN, ceil(backlog / GPU_FLEET_JOBS_PER_INSTANCE)), and if
+more are running, stops the least busy idle one (lowest CPU utilization)
+that has been up for at least GPU_FLEET_MIN_UPTIME_MINUTES. The schedule
+never stops the last instance: going to GPU_FLEET_MIN (default 0) is left
+to the idle alarm, which stops every idle instance above it.
+
+An instance is idle when no 'processing' task holds a live lease
+(lease_expires_at) by one of its adapters. Adapters record worker_id as
+"<host>:<pid>", where the host is the instance's hostname (ip-10-0-1-5),
+private DNS name, private IP or instance ID (set WORKER_ID accordingly).
+If the tasks cannot be read, nothing is stopped.
+
+Trigger: CloudWatch Alarm (QueueEmptyFor30Min); EventBridge schedule in fleet mode
 Runtime: Python 3.11
 Memory: 128 MB
 Timeout: 60 seconds
@@ -12,23 +27,196 @@ Timeout: 60 seconds
 Required IAM Permissions:
 - ec2:DescribeInstances
 - ec2:StopInstances (with condition on resource tag)
+- sqs:GetQueueAttributes (fleet mode)
+- cloudwatch:GetMetricStatistics (fleet mode)
+- dynamodb:Query on status-created_at-index (fleet mode)
 - logs:CreateLogGroup
 - logs:CreateLogStream
 - logs:PutLogEvents
 """
 
 import json
+import math
 import os
+import time
 import boto3
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Set
 
 # Configuration
 GPU_INSTANCE_ID = os.environ.get('GPU_INSTANCE_ID', 'i-0f0f6fd680921de5f')
 # AWS_REGION is automatically set by Lambda runtime
 AWS_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
 
-# Initialize EC2 client
+# Fleet mode configuration
+GPU_INSTANCE_IDS = [i.strip() for i in os.environ.get('GPU_INSTANCE_IDS', '').split(',') if i.strip()] or [GPU_INSTANCE_ID]
+GPU_QUEUE_URLS = [u.strip() for u in os.environ.get('GPU_QUEUE_URLS', '').split(',') if u.strip()]
+GPU_FLEET_MIN = int(os.environ.get('GPU_FLEET_MIN', '0'))
+GPU_FLEET_JOBS_PER_INSTANCE = int(os.environ.get('GPU_FLEET_JOBS_PER_INSTANCE', '10'))
+GPU_FLEET_MIN_UPTIME_MINUTES = int(os.environ.get('GPU_FLEET_MIN_UPTIME_MINUTES', '15'))
+DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'task_store')
+
+# Initialize AWS clients
 ec2_client = boto3.client('ec2', region_name=AWS_REGION)
+sqs_client = boto3.client('sqs', region_name=AWS_REGION)
+cloudwatch_client = boto3.client('cloudwatch', region_name=AWS_REGION)
+dynamodb_client = boto3.client('dynamodb', region_name=AWS_REGION)
+
+
+def get_gpu_backlog() -> int:
+    """Sum queued, in-flight and delayed messages over every GPU lane queue."""
+    backlog = 0
+    for queue_url in GPU_QUEUE_URLS:
+        attributes = sqs_client.get_queue_attributes(
+            QueueUrl=queue_url,
+            AttributeNames=[
+                'ApproximateNumberOfMessages',
+                'ApproximateNumberOfMessagesNotVisible',
+                'ApproximateNumberOfMessagesDelayed'
+            ]
+        )['Attributes']
+        backlog += sum(int(value) for value in attributes.values())
+    return backlog
+
+
+def get_average_cpu(instance_id: str, minutes: int) -> float:
+    """Average CPUUtilization of an instance over the last minutes (0 if no data)."""
+    end = datetime.now(timezone.utc)
+    response = cloudwatch_client.get_metric_statistics(
+        Namespace='AWS/EC2',
+        MetricName='CPUUtilization',
+        Dimensions=[{'Name': 'InstanceId', 'Value': instance_id}],
+        StartTime=end - timedelta(minutes=minutes),
+        EndTime=end,
+        Period=300,
+        Statistics=['Average']
+    )
+    datapoints = response.get('Datapoints', [])
+    if not datapoints:
+        return 0.0
+    return sum(point['Average'] for point in datapoints) / len(datapoints)
+
+
+def get_busy_workers() -> Set[str]:
+    """Hosts (worker_id without the pid) holding a live lease on a processing task."""
+    now = int(time.time())
+    hosts = set()
+    paginator = dynamodb_client.get_paginator('query')
+    for page in paginator.paginate(
+        TableName=DYNAMODB_TABLE,
+        IndexName='status-created_at-index',
+        KeyConditionExpression='#status = :processing',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':processing': {'S': 'processing'}},
+        ProjectionExpression='worker_id, lease_expires_at'
+    ):
+        for item in page['Items']:
+            worker_id = item.get('worker_id', {}).get('S')
+            lease = int(item.get('lease_expires_at', {}).get('N', '0'))
+            if worker_id and lease >= now:
+                hosts.add(worker_id.rsplit(':', 1)[0])
+    return hosts
+
+
+def instance_hosts(instance: Dict[str, Any]) -> Set[str]:
+    """Names an adapter on this instance may record as its worker_id host."""
+    names = {instance['InstanceId']}
+    if instance.get('PrivateIpAddress'):
+        names.add(instance['PrivateIpAddress'])
+    if instance.get('PrivateDnsName'):
+        names.add(instance['PrivateDnsName'])
+        names.add(instance['PrivateDnsName'].split('.')[0])
+    return names
+
+
+def stop_instances(instance_ids: List[str]) -> List[Dict[str, Any]]:
+    """Stop instances and return their state changes."""
+    stop_response = ec2_client.stop_instances(InstanceIds=instance_ids)
+    print("✓ Stop command sent successfully")
+    return [
+        {
+            'instance_id': change['InstanceId'],
+            'previous_state': change['PreviousState']['Name'],
+            'current_state': change['CurrentState']['Name']
+        }
+        for change in stop_response['StoppingInstances']
+    ]
+
+
+def scale_in_fleet(idle_alarm: bool = False) -> dict:
+    """
+    Stop idle GPU instances the backlog does not need.
+
+    Args:
+        idle_alarm: Invoked by the idle alarm (every lane empty for 30
+                    minutes): stop every idle instance above GPU_FLEET_MIN.
+                    Otherwise (schedule) stop at most one and keep at least one.
+
+    Returns:
+        Response dictionary with status code and body
+    """
+    response = ec2_client.describe_instances(InstanceIds=GPU_INSTANCE_IDS)
+    instances = [i for r in response['Reservations'] for i in r['Instances']]
+    running = [i for i in instances if i['State']['Name'] == 'running']
+
+    backlog = get_gpu_backlog()
+    floor = GPU_FLEET_MIN if idle_alarm else max(1, GPU_FLEET_MIN)
+    desired = max(floor, math.ceil(backlog / GPU_FLEET_JOBS_PER_INSTANCE))
+    print(f"Fleet: {len(running)} running, backlog {backlog}, desired {desired}")
+
+    if len(running) <= desired:
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'No scale-in needed',
+                'running': len(running),
+                'desired': desired,
+                'backlog': backlog
+            })
+        }
+
+    # Only instances whose adapters hold no task lease; the backlog counts
+    # in-flight messages, so a busy instance would lose its job to a redelivery
+    busy = get_busy_workers()
+    candidates = [i for i in running if not instance_hosts(i) & busy]
+    if not idle_alarm:
+        # Never stop an instance that just booted (it may not have picked up work yet)
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=GPU_FLEET_MIN_UPTIME_MINUTES)
+        candidates = [i for i in candidates if i['LaunchTime'] <= cutoff]
+    if not candidates:
+        print(f"No idle instance to stop ({len(running) - len(candidates)} busy or recently started)")
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'No idle instance to stop',
+                'running': len(running),
+                'desired': desired
+            })
+        }
+
+    if idle_alarm:
+        instance_ids = [i['InstanceId'] for i in candidates][:len(running) - desired]
+    else:
+        # Least busy instance first; one per invocation so capacity drains gradually
+        window = max(GPU_FLEET_MIN_UPTIME_MINUTES, 10)
+        cpu = {i['InstanceId']: get_average_cpu(i['InstanceId'], window) for i in candidates}
+        instance_ids = [min(cpu, key=cpu.get)]
+        print(f"Least busy idle instance: {instance_ids[0]} (avg CPU {cpu[instance_ids[0]]:.1f}%)")
+    print(f"Stopping instance(s) {', '.join(instance_ids)}...")
+
+    stopped = stop_instances(instance_ids)
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'GPU instance shutdown initiated',
+            'instances': stopped,
+            'running': len(running) - len(stopped),
+            'desired': desired,
+            'backlog': backlog,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    }
 
 
 def lambda_handler(event, context):
@@ -36,10 +224,11 @@ def lambda_handler(event, context):
     Lambda handler function.
 
     This function is called when CloudWatch Alarm enters ALARM state
-    (i.e., SQS queue has been empty for 30 minutes).
+    (i.e., SQS queue has been empty for 30 minutes), and on an EventBridge
+    schedule in fleet mode.
 
     Args:
-        event: CloudWatch Alarm event
+        event: CloudWatch Alarm event or scheduled event
         context: Lambda context
 
     Returns:
@@ -89,6 +278,17 @@ def lambda_handler(event, context):
                     })
                 }
 
+        # Fleet mode: the schedule scales in one instance at a time, the
+        # idle alarm stops every idle one
+        if len(GPU_INSTANCE_IDS) > 1:
+            return scale_in_fleet(idle_alarm=event.get('source') != 'aws.events')
+        if event.get('source') == 'aws.events':
+            print("Scheduled scale-in only applies in fleet mode, skipping shutdown")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'message': 'Not in fleet mode'})
+            }
+
         # Step 2: Check GPU instance state
         print(f"Checking instance {GPU_INSTANCE_ID}...")
         response = ec2_client.describe_instances(
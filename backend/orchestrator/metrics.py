@@ -0,0 +1,247 @@
+"""
+Prometheus Metrics
+
+Metrics served at GET /metrics in the Prometheus text format.
+
+- AWS call latency histograms by service, operation and outcome ('ok',
+  the AWS error code, or the exception type), recorded by botocore event
+  hooks on every client from aws.clients.
+- Latency histograms for the hot-path blocks already wrapped in timed()
+  (submit_task, get_job_status, ...).
+- HTTP responses by route and status code, job submissions by job type
+  and outcome.
+- GPU state, cached queue depth, cache and admission counters are read
+  from the existing in-memory objects at scrape time, so they cost
+  nothing per request.
+
+Per-request overhead is a dict lookup and a histogram/counter increment
+(microseconds).
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from aws.clients import set_metrics_observer
+
+GPU_STATES = ('pending', 'running', 'stopping', 'stopped', 'shutting-down', 'terminated')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+registry = CollectorRegistry()
+
+AWS_CALL_SECONDS = Histogram(
+    'orchestrator_aws_call_seconds',
+    'Latency of AWS API calls',
+    ['service', 'operation', 'outcome'],
+    buckets=LATENCY_BUCKETS,
+    registry=registry
+)
+OPERATION_SECONDS = Histogram(
+    'orchestrator_operation_seconds',
+    'Latency of instrumented orchestrator operations',
+    ['operation'],
+    buckets=LATENCY_BUCKETS,
+    registry=registry
+)
+HTTP_RESPONSES = Counter(
+    'orchestrator_http_responses_total',
+    'HTTP responses by route and status code',
+    ['method', 'route', 'status'],
+    registry=registry
+)
+GPU_WARM_SIGNALS = Counter(
+    'orchestrator_gpu_warm_signals_total',
+    'GPU warm-up signals by reason and action taken',
+    ['reason', 'action'],
+    registry=registry
+)
+JOB_CANCELLATIONS = Counter(
+    'orchestrator_job_cancellations_total',
+    'Cancelled jobs by their status when cancelled',
+    ['previous_status'],
+    registry=registry
+)
+JOB_SUBMISSIONS = Counter(
+    'orchestrator_job_submissions_total',
+    'Job submissions by job type and outcome',
+    ['job_type', 'outcome'],
+    registry=registry
+)
+
+
+class _Observer:
+    """Receives latencies from aws.clients."""
+
+    def observe_aws_call(self, service: str, operation: str, outcome: str, seconds: float) -> None:
+        AWS_CALL_SECONDS.labels(service, operation, outcome).observe(seconds)
+
+    def observe_operation(self, operation: str, seconds: float) -> None:
+        OPERATION_SECONDS.labels(operation).observe(seconds)
+
+
+def count_submission(job_type: str, outcome: str, count: int = 1) -> None:
+    """
+    Count job submissions.
+
+    Args:
+        job_type: Job type (e.g., 'camera-angle')
+        outcome: 'queued', 'delayed', 'held', 'staging', 'rejected', 'invalid', 'cache_hit',
+                 'attached' or 'failed'
+        count: Number of jobs
+    """
+    JOB_SUBMISSIONS.labels(job_type, outcome).inc(count)
+
+
+def count_cancellation(previous_status: str) -> None:
+    """
+    Count a cancelled job.
+
+    Args:
+        previous_status: 'pending' (never reached the GPU) or 'processing'
+                         (interrupted by the adapter)
+    """
+    JOB_CANCELLATIONS.labels(previous_status).inc()
+
+
+def count_warm(reason: str, action: str) -> None:
+    """
+    Count a GPU warm-up signal.
+
+    Args:
+        reason: 'session', 'upload' or 'manual'
+        action: What WarmupController.warm() did (e.g., 'started', 'rate_limited')
+    """
+    GPU_WARM_SIGNALS.labels(reason, action).inc()
+
+
+class StateCollector:
+    """Scrape-time collector over the orchestrator's in-memory state."""
+
+    def __init__(
+        self,
+        gpu_state,
+        health_monitor,
+        job_status_cache,
+        result_cache,
+        admission,
+        input_stager,
+        aws_stats: Callable[[], Dict[str, Any]]
+    ):
+        self.gpu_state = gpu_state
+        self.health_monitor = health_monitor
+        self.job_status_cache = job_status_cache
+        self.result_cache = result_cache
+        self.admission = admission
+        self.input_stager = input_stager
+        self.aws_stats = aws_stats
+
+    def collect(self) -> Iterable:
+        gpu = GaugeMetricFamily('orchestrator_gpu_state', 'Cached GPU instance state (1 for the current state)', labels=['state'])
+        for state in GPU_STATES:
+            gpu.add_metric([state], 1 if self.gpu_state.state == state else 0)
+        yield gpu
+
+        instances = GaugeMetricFamily('orchestrator_gpu_instances', 'GPU pool instances by state', labels=['state'])
+        for state in GPU_STATES:
+            instances.add_metric([state], sum(1 for i in self.gpu_state.instances.values() if i['state'] == state))
+        yield instances
+
+        desired = GaugeMetricFamily('orchestrator_gpu_instances_desired', 'GPU instances the current backlog calls for')
+        desired.add_metric([], self.gpu_state.desired_count())
+        yield desired
+
+        age = GaugeMetricFamily('orchestrator_gpu_state_age_seconds', 'Seconds since the GPU state was refreshed')
+        age.add_metric([], time.time() - self.gpu_state.last_updated if self.gpu_state.last_updated else float('nan'))
+        yield age
+
+        messages = GaugeMetricFamily('orchestrator_queue_messages', 'Cached SQS queue message counts', labels=['queue', 'kind'])
+        updated = GaugeMetricFamily('orchestrator_queue_stats_age_seconds', 'Seconds since queue counts were refreshed', labels=['queue'])
+        now = time.time()
+        for queue, stats in self.health_monitor.queue_stats.items():
+            for kind in ('depth', 'in_flight', 'delayed'):
+                messages.add_metric([queue, kind], stats.get(kind, 0))
+            updated.add_metric([queue], now - stats['updated_at'])
+        yield messages
+        yield updated
+
+        healthy = GaugeMetricFamily('orchestrator_healthy', 'Whether the cached health snapshot is healthy')
+        healthy.add_metric([], 1 if self.health_monitor.is_healthy() else 0)
+        yield healthy
+
+        cache = CounterMetricFamily('orchestrator_job_status_cache_lookups', 'Job status cache lookups', labels=['result'])
+        cache.add_metric(['hit'], self.job_status_cache.hits)
+        cache.add_metric(['miss'], self.job_status_cache.misses)
+        yield cache
+
+        results = CounterMetricFamily('orchestrator_result_cache_lookups', 'Result cache lookups', labels=['result'])
+        results.add_metric(['completed_hit'], self.result_cache.completed_hits)
+        results.add_metric(['attached'], self.result_cache.attached)
+        results.add_metric(['miss'], self.result_cache.misses)
+        results.add_metric(['bypassed'], self.result_cache.bypassed)
+        yield results
+
+        staging = CounterMetricFamily('orchestrator_staging_inputs', 'Input staging outcomes per input', labels=['result'])
+        staging.add_metric(['staged'], self.input_stager.staged)
+        staging.add_metric(['rejected'], self.input_stager.rejected)
+        staging.add_metric(['passed_through'], self.input_stager.passed_through)
+        staging.add_metric(['write_failed'], self.input_stager.write_failures)
+        staging.add_metric(['not_allowed'], self.input_stager.not_allowed)
+        yield staging
+
+        backlog = GaugeMetricFamily('orchestrator_admission_backlog', 'Estimated backlog per queue group', labels=['group'])
+        for group in self.admission.queue_groups:
+            value = self.admission.backlog(group)
+            backlog.add_metric([group], float('nan') if value is None else value)
+        yield backlog
+
+        stats = self.aws_stats()
+        clients = CounterMetricFamily('orchestrator_aws_client_requests', 'AWS client factory requests', labels=['result'])
+        clients.add_metric(['build'], stats['client_builds'])
+        clients.add_metric(['cache_hit'], stats['client_cache_hits'])
+        yield clients
+
+
+def install(collector: Optional[StateCollector] = None) -> None:
+    """Start recording AWS call latencies and register the state collector."""
+    set_metrics_observer(_Observer())
+    if collector is not None:
+        registry.register(collector)
+
+
+def render() -> bytes:
+    """Return every metric in the Prometheus text format."""
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting HTTP responses by route and status.
+
+    Routes are labelled by endpoint name (not the raw path) so job IDs
+    never become label values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = scope.get('endpoint')
+            route = getattr(endpoint, '__name__', 'unmatched')
+            HTTP_RESPONSES.labels(scope['method'], route, str(status[0])).inc()
+
@@ -9,21 +9,39 @@ import os
 import json
 import uuid
 import time
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Dict, Any
 from dotenv import load_dotenv
 from pathlib import Path
 
-import boto3
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
 
-from aws.ec2 import start_instance, list_ec2_instances, get_instance_ip
-from aws.sqs import send_message
-from aws.dynamodb import create_task, get_task_status
+from aws.sqs import send_message, send_message_batch
+from aws.dynamodb import (
+    create_task, backfill_task, get_task_status, update_task_status, cancel_task, batch_create_tasks,
+    batch_get_tasks, create_pipeline, get_pipeline, release_held_task, update_staged_message, fail_held_task
+)
+from aws.clients import get_client, get_table, get_stats, timed
+from gpu_state import GpuStateManager, DeferredStartPolicy
+from job_watcher import JobWatcherHub, status_fields
+from job_status_cache import JobStatusCache
+from health import HealthMonitor
+from admission import AdmissionController, AdmissionDecision
+from eta import EtaEstimator, job_type_from_path
+from warmup import WarmupController
+from pipelines import MAX_PIPELINE_STEPS, plan_pipeline, pipeline_status
+from pipeline_stages import skip_stages
+from tenants import TenantMiddleware, TenantRateLimiter, current_tenant
+from fair_queue import FairQueue, HeldJob
+from staging import InputStager, InputRejected
+import metrics
+from result_cache import ResultCache, RESULT_CLAIM_GRACE_SECONDS
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 # Load environment variables
@@ -35,7 +53,24 @@ AWS_REGION = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', '')
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'task_store')
 GPU_INSTANCE_ID = os.getenv('GPU_INSTANCE_ID', 'i-0f0f6fd680921de5f')
+# Fleet mode: comma-separated pool of GPU instance IDs (overrides GPU_INSTANCE_ID)
+GPU_INSTANCE_IDS = [i.strip() for i in os.getenv('GPU_INSTANCE_IDS', '').split(',') if i.strip()] or [GPU_INSTANCE_ID]
 S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'short-drama-assets')
+# Archive of old terminal tasks (task_archive.py), read by historical analytics
+TASK_ARCHIVE_BUCKET = os.getenv('TASK_ARCHIVE_BUCKET', S3_BUCKET_NAME)
+
+# GPU priority lanes: interactive / normal / deferred
+# Each lane has its own queue; unset lanes fall back to SQS_QUEUE_URL.
+SQS_INTERACTIVE_QUEUE_URL = os.getenv('SQS_INTERACTIVE_QUEUE_URL', '')
+SQS_DEFERRED_QUEUE_URL = os.getenv('SQS_DEFERRED_QUEUE_URL', '')
+GPU_LANE_QUEUES = {
+    'interactive': SQS_INTERACTIVE_QUEUE_URL or SQS_QUEUE_URL,
+    'normal': SQS_QUEUE_URL,
+    'deferred': SQS_DEFERRED_QUEUE_URL or SQS_QUEUE_URL,
+}
+JobPriority = Literal['interactive', 'normal', 'deferred']
+# Sources of GPU warm-up signals
+WarmReason = Literal['session', 'upload', 'manual']
 
 # CPU Task Configuration
 CPU_QUEUE_URL = os.getenv('CPU_QUEUE_URL', 'https://sqs.us-east-1.amazonaws.com/982081090398/cpu_tasks_queue')
@@ -45,55 +80,179 @@ CPU_TASK_TYPES = {
     'full_face_swap': '/api/v1/full-face-swap/jobs'
 }
 
-# Global state for GPU instance IP (refreshed periodically)
-gpu_instance_ip = {"current_ip": None, "last_updated": 0}
-IP_REFRESH_INTERVAL = 300  # Refresh IP every 5 minutes
+# Batch submission limit (jobs per POST /api/v1/jobs:batch)
+MAX_BATCH_JOBS = int(os.getenv('MAX_BATCH_JOBS', '100'))
 
+# Bulk status limit (job IDs per /api/v1/jobs/status call)
+MAX_STATUS_BATCH = 100
 
-async def refresh_gpu_ip():
-    """Background task to periodically refresh GPU instance IP."""
-    while True:
-        try:
-            ip = get_instance_ip(GPU_INSTANCE_ID, AWS_REGION)
-            if ip != gpu_instance_ip["current_ip"]:
-                print(f"GPU instance IP updated: {gpu_instance_ip['current_ip']} -> {ip}")
-                gpu_instance_ip["current_ip"] = ip
-            gpu_instance_ip["last_updated"] = time.time()
-        except Exception as e:
-            print(f"Error refreshing GPU IP: {e}")
+# Bounded executor for blocking boto3 calls made from async handlers
+AWS_EXECUTOR_WORKERS = int(os.getenv('AWS_EXECUTOR_WORKERS', '32'))
+aws_executor = ThreadPoolExecutor(max_workers=AWS_EXECUTOR_WORKERS, thread_name_prefix='aws')
+
+# Separate executor for input staging (downloads + image work), so slow
+# inputs cannot starve the boto3 calls above
+STAGING_WORKERS = int(os.getenv('STAGING_WORKERS', '8'))
+staging_executor = ThreadPoolExecutor(max_workers=STAGING_WORKERS, thread_name_prefix='staging')
+
+# Cached GPU instance (pool) state, owned by a background poller; in fleet
+# mode the GPU backlog sizes the number of running instances
+gpu_state = GpuStateManager(
+    GPU_INSTANCE_IDS,
+    AWS_REGION,
+    aws_executor,
+    get_backlog=lambda: admission.backlog('gpu')
+)
+
+# Background-refreshed component health and queue depth
+health_monitor = HealthMonitor(
+    DYNAMODB_TABLE,
+    {
+        'gpu': SQS_QUEUE_URL,
+        'gpu_interactive': SQS_INTERACTIVE_QUEUE_URL,
+        'gpu_deferred': SQS_DEFERRED_QUEUE_URL,
+        'cpu': CPU_QUEUE_URL
+    },
+    AWS_REGION,
+    aws_executor,
+    bucket_name=S3_BUCKET_NAME
+)
+
+# Deferred jobs start the GPU only past a backlog/age threshold
+deferred_policy = DeferredStartPolicy(
+    gpu_state,
+    lambda: health_monitor.get_queue_stats('gpu_deferred') if SQS_DEFERRED_QUEUE_URL else None
+)
+
+# Per job type backlog limits over the cached queue depth (held GPU jobs included)
+admission = AdmissionController(
+    lambda name: fair_queue.queue_stats() if name == 'gpu_held' else health_monitor.get_queue_stats(name),
+    {'gpu': ['gpu', 'gpu_interactive', 'gpu_deferred', 'gpu_held'], 'cpu': ['cpu']},
+    {'camera-angle': 'gpu', 'qwen-image-edit': 'gpu', 'face-mask': 'cpu', 'full-face-swap': 'cpu'}
+)
+
+# Rolling per job type latency statistics -> estimated start/completion
+eta_estimator = EtaEstimator(
+    DYNAMODB_TABLE,
+    AWS_REGION,
+    aws_executor,
+    gpu_state,
+    admission.backlog,
+    admission.job_groups
+)
+
+# Interactive/normal GPU jobs beyond a small SQS window are held and
+# released by deficit round-robin across tenants
+fair_queue = FairQueue(
+    DYNAMODB_TABLE,
+    AWS_REGION,
+    aws_executor,
+    [GPU_LANE_QUEUES['interactive'], GPU_LANE_QUEUES['normal']],
+    health_monitor.get_queue_stats,
+    ['gpu', 'gpu_interactive'],
+    gpu_state.active_count,
+    eta_estimator.execution_seconds
+)
+
+# Per-tenant submission rate cap (token bucket)
+tenant_limiter = TenantRateLimiter()
+
+# While the GPU is not running, inputs are validated, normalized and
+# copied to the same-region staging prefix (in the background) before the
+# job is queued
+input_stager = InputStager(
+    S3_BUCKET_NAME,
+    AWS_REGION,
+    staging_executor,
+    lambda: gpu_state.state != 'running'
+)
+
+# Speculative GPU starts from canvas activity and the hour-of-week usage model
+warmup = WarmupController(
+    DYNAMODB_TABLE,
+    AWS_REGION,
+    aws_executor,
+    gpu_state,
+    lambda: admission.backlog('gpu'),
+    [job_type for job_type, group in admission.job_groups.items() if group == 'gpu'],
+    archive_bucket=TASK_ARCHIVE_BUCKET
+)
+
+# Read-through job status cache (terminal states kept, others short TTL)
+job_status_cache = JobStatusCache()
+
+# Shared watcher behind the job status streams (one BatchGetItem per tick)
+job_watcher = JobWatcherHub(
+    DYNAMODB_TABLE,
+    AWS_REGION,
+    aws_executor,
+    status_cache=job_status_cache,
+    task_observer=eta_estimator.observe
+)
+
+# Content-addressed result index for deterministic GPU requests
+result_cache = ResultCache(DYNAMODB_TABLE, AWS_REGION, aws_executor)
 
-        await asyncio.sleep(IP_REFRESH_INTERVAL)
+# Seconds between SSE keep-alive comments on an idle stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Prometheus metrics: AWS call latency hooks + scrape-time state collector
+metrics.install(metrics.StateCollector(
+    gpu_state,
+    health_monitor,
+    job_status_cache,
+    result_cache,
+    admission,
+    input_stager,
+    get_stats
+))
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage startup and shutdown tasks."""
-    # Startup: Get initial GPU IP and start background refresh task
+    # Startup: log configuration and start the GPU state poller
     print("Starting Orchestrator Service...")
     print(f"AWS Region: {AWS_REGION}")
     print(f"SQS Queue: {SQS_QUEUE_URL}")
+    print(f"SQS Lanes: interactive={GPU_LANE_QUEUES['interactive']} deferred={GPU_LANE_QUEUES['deferred']}")
     print(f"DynamoDB Table: {DYNAMODB_TABLE}")
-    print(f"GPU Instance: {GPU_INSTANCE_ID}")
+    print(f"GPU Instances: {', '.join(GPU_INSTANCE_IDS)}")
 
-    try:
-        initial_ip = get_instance_ip(GPU_INSTANCE_ID, AWS_REGION)
-        gpu_instance_ip["current_ip"] = initial_ip
-        gpu_instance_ip["last_updated"] = time.time()
-        print(f"Initial GPU instance IP: {initial_ip}")
-    except Exception as e:
-        print(f"Warning: Could not get initial GPU IP: {e}")
+    # Start background GPU state poller (also tracks the instance IP)
+    gpu_state.start()
+
+    # Start the job status watcher used by the streaming endpoints
+    job_watcher.start()
+
+    # Start the background health refresher (probes read its snapshot)
+    health_monitor.start()
+
+    # Start the deferred-lane GPU start check
+    deferred_policy.start()
 
-    # Start background IP refresh task
-    refresh_task = asyncio.create_task(refresh_gpu_ip())
+    # Load ETA statistics and start persisting them periodically
+    await eta_estimator.start()
+
+    # Load (or bootstrap) the usage model and start the warm-up checks
+    await warmup.start()
+
+    # Recover held GPU jobs and start releasing them fairly
+    await fair_queue.start()
 
     yield
 
-    # Shutdown: Cancel background task
-    refresh_task.cancel()
-    try:
-        await refresh_task
-    except asyncio.CancelledError:
-        pass
+    # Shutdown: Cancel background tasks
+    await input_stager.stop()
+    await fair_queue.stop()
+    await warmup.stop()
+    await eta_estimator.stop()
+    await deferred_policy.stop()
+    await health_monitor.stop()
+    await job_watcher.stop()
+    await gpu_state.stop()
+    aws_executor.shutdown(wait=False)
+    staging_executor.shutdown(wait=False)
     print("Orchestrator Service shut down")
 
 
@@ -114,6 +273,12 @@ else:
     # Default to localhost for development
     allowed_origins = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
+# Count responses by route and status for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Resolve the tenant (API key or client address) of every request
+app.add_middleware(TenantMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -170,103 +335,598 @@ class JobResponse(BaseModel):
     status: str
     result_url: Optional[str] = None
     error: Optional[str] = None
+    estimated_start: Optional[int] = None  # epoch seconds, pending/processing jobs only
+    estimated_completion: Optional[int] = None
+
+class BatchJobItem(BaseModel):
+    job_type: Literal['camera-angle', 'qwen-image-edit', 'face-mask', 'full-face-swap']
+    request: Dict[str, Any]
+
+class BatchJobRequest(BaseModel):
+    jobs: List[BatchJobItem] = Field(..., min_length=1, max_length=MAX_BATCH_JOBS)
+    priority: JobPriority = 'normal'  # GPU lane for every GPU job in the batch
+
+class BatchJobResult(BaseModel):
+    index: int
+    job_id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BatchJobResponse(BaseModel):
+    accepted: int
+    failed: int
+    jobs: List[BatchJobResult]
+
+class PipelineStep(BaseModel):
+    id: str = Field(..., pattern=r'^[A-Za-z0-9_-]{1,64}$')
+    job_type: Literal['camera-angle', 'qwen-image-edit', 'face-mask', 'full-face-swap']
+    request: Dict[str, Any]  # values may be "{{<step id>.result_url}}"
+
+class PipelineRequest(BaseModel):
+    steps: List[PipelineStep] = Field(..., min_length=1, max_length=MAX_PIPELINE_STEPS)
+    priority: JobPriority = 'normal'  # GPU lane for every GPU step
+
+class PipelineStepStatus(BaseModel):
+    id: str
+    job_id: str
+    job_type: str
+    depends_on: List[str]
+    status: str
+    result_url: Optional[str] = None
+    error: Optional[str] = None
+
+class PipelineResponse(BaseModel):
+    pipeline_id: str
+    status: str
+    result_url: Optional[str] = None  # result of the final step
+    steps: List[PipelineStepStatus]
+
+class JobStatusBatchRequest(BaseModel):
+    job_ids: List[str] = Field(..., min_length=1, max_length=MAX_STATUS_BATCH)
+
+class JobStatusEntry(BaseModel):
+    status: str
+    result_url: Optional[str] = None
+    error: Optional[str] = None
+
+class JobStatusBatchResponse(BaseModel):
+    jobs: Dict[str, JobStatusEntry]
+    not_found: List[str]
+
+class WarmRequest(BaseModel):
+    reason: WarmReason = 'manual'
+
+class WarmResponse(BaseModel):
+    action: str  # started, already_running, rate_limited, budget_exhausted, unavailable, disabled
+    gpu_state: Optional[str]
+
+# Batch job types: job_type -> (request model, api_path, task_type, is GPU task)
+BATCH_JOB_TYPES = {
+    'camera-angle': (CameraAngleRequest, '/api/v1/camera-angle/jobs', None, True),
+    'qwen-image-edit': (ImageEditRequest, '/api/v1/qwen-image-edit/jobs', None, True),
+    'face-mask': (FaceMaskRequest, '/api/v1/face-mask/jobs', 'face_mask', False),
+    'full-face-swap': (FullFaceSwapRequest, '/api/v1/full-face-swap/jobs', 'full_face_swap', False),
+}
 
 # ==================== Helper Functions ====================
 
-def ensure_gpu_running():
+async def run_blocking(func, *args, **kwargs):
     """
-    Check if GPU instance is running, start it if stopped.
+    Run a blocking (boto3) call on the bounded AWS executor.
 
-    Business Rule: The orchestrator must start the GPU instance
-    when tasks are submitted, ensuring it's available to process work.
+    Keeps slow AWS calls off the event loop so one request cannot
+    stall every other request on the worker.
     """
-    try:
-        instances = list_ec2_instances(
-            region=AWS_REGION,
-            filters=[{'Name': 'instance-id', 'Values': [GPU_INSTANCE_ID]}]
-        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(aws_executor, functools.partial(func, *args, **kwargs))
 
-        if not instances:
-            print(f"Warning: GPU instance {GPU_INSTANCE_ID} not found")
-            return
 
-        instance = instances[0]
-        state = instance['State']
+def job_response(job_id: str, entry: JobStatusEntry) -> JobResponse:
+    """Build a JobResponse with estimated start/completion for unfinished jobs."""
+    estimated_start, estimated_completion = eta_estimator.estimate(job_id, entry.status)
+    return JobResponse(
+        job_id=job_id,
+        **entry.dict(),
+        estimated_start=estimated_start,
+        estimated_completion=estimated_completion
+    )
+
 
-        print(f"GPU instance {GPU_INSTANCE_ID} state: {state}")
+def admit(job_type: str, count: int = 1, priority: Optional[JobPriority] = None) -> int:
+    """
+    Apply admission control before queuing jobs.
 
-        if state == 'stopped':
-            print(f"Starting GPU instance {GPU_INSTANCE_ID}...")
-            start_instance(GPU_INSTANCE_ID, AWS_REGION)
-        elif state in ('running', 'pending'):
-            print(f"GPU instance already {state}, no action needed")
-        else:
-            print(f"GPU instance in unexpected state: {state}")
+    Args:
+        job_type: Job type being submitted (e.g., 'camera-angle')
+        count: Number of jobs submitted together
+        priority: GPU lane, if a GPU job (deferred jobs only hit the hard limit)
 
-    except Exception as e:
-        print(f"Error checking/starting GPU instance: {e}")
-        # Don't fail the request - task is already queued
+    Returns:
+        SQS DelaySeconds to queue the jobs with (0 unless over the soft limit)
 
-def submit_task(api_path: str, request_body: dict) -> str:
+    Raises:
+        HTTPException: 429 with Retry-After if the backlog or the tenant's
+                       rate cap is over the limit
     """
-    Submit a task to the processing queue.
+    tenant = current_tenant.get()
+    retry_after = tenant_limiter.acquire(tenant, count)
+    if retry_after is not None:
+        metrics.count_submission(job_type, 'rejected', count)
+        print(f"Rate cap rejected {count} {job_type} job(s) of tenant {tenant}")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many jobs from {tenant}, retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
 
-    This is the core orchestration logic:
-    1. Generate unique task_id
-    2. Write PENDING status to DynamoDB
-    3. Send task message to SQS
-    4. Ensure GPU instance is running
-    5. Return task_id immediately
+    decision = admission.check(job_type, count=count, deferred=priority == 'deferred')
+    admission.record(job_type, decision, count=count)
+
+    if decision.action == 'reject':
+        metrics.count_submission(job_type, 'rejected', count)
+        print(f"Admission rejected {count} {job_type} job(s): backlog {decision.backlog} (soft {decision.soft}, hard {decision.hard})")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Queue is full for {job_type} jobs ({decision.backlog} waiting), retry later",
+            headers={"Retry-After": str(decision.wait_seconds)}
+        )
+    if decision.action == 'delay':
+        print(f"Admission delaying {count} {job_type} job(s) by {decision.delay_seconds}s: backlog {decision.backlog}")
+    return decision.delay_seconds
+
+
+def admit_all(type_counts: Dict[str, int], priority: JobPriority) -> Dict[str, AdmissionDecision]:
+    """
+    Apply admission control to jobs of several types submitted together.
+
+    All-or-nothing: every type is checked first and the decisions are only
+    recorded if none of them rejects, so a rejected submission leaves no
+    admitted jobs behind in the backlog estimate.
 
     Args:
-        api_path: The ComfyUI API endpoint path (e.g., "/api/v1/camera-angle/jobs")
-        request_body: The original request payload as dict
+        type_counts: Job type -> number of jobs of that type
+        priority: GPU lane of the GPU jobs (deferred jobs only hit the hard limit)
 
     Returns:
-        task_id: Unique identifier for tracking this task
+        Job type -> AdmissionDecision ('admit' or 'delay')
+
+    Raises:
+        HTTPException: 429 with Retry-After if the tenant's rate cap or any
+                       job type's backlog is over the limit
     """
-    # Step 1: Generate task ID
-    task_id = str(uuid.uuid4())
+    total = sum(type_counts.values())
+    tenant = current_tenant.get()
+    retry_after = tenant_limiter.acquire(tenant, total)
+    if retry_after is not None:
+        for job_type, count in type_counts.items():
+            metrics.count_submission(job_type, 'rejected', count)
+        print(f"Rate cap rejected {total} job(s) from tenant {tenant}")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many jobs from {tenant}, retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
 
-    # Step 2: Write to DynamoDB with PENDING status
-    try:
-        create_task(
-            table_name=DYNAMODB_TABLE,
-            task_id=task_id,
-            job_type=api_path,
-            region=AWS_REGION
+    decisions = {
+        job_type: admission.check(
+            job_type,
+            count=count,
+            deferred=BATCH_JOB_TYPES[job_type][3] and priority == 'deferred'
         )
-    except Exception as e:
-        print(f"Error writing to DynamoDB: {e}")
+        for job_type, count in type_counts.items()
+    }
+    rejected = [job_type for job_type, decision in decisions.items() if decision.action == 'reject']
+    for job_type, decision in decisions.items():
+        if rejected and decision.action != 'reject':
+            continue
+        admission.record(job_type, decision, count=type_counts[job_type])
+    if rejected:
+        for job_type, count in type_counts.items():
+            metrics.count_submission(job_type, 'rejected', count)
+        retry_after = max(decisions[job_type].wait_seconds for job_type in rejected)
+        print(f"Admission rejected {total} job(s): over limit for {', '.join(rejected)}")
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to create task in database: {str(e)}"
+            status_code=429,
+            detail=f"Queue is full for {', '.join(rejected)} jobs, retry later",
+            headers={"Retry-After": str(retry_after)}
         )
+    for job_type, decision in decisions.items():
+        if decision.action == 'delay':
+            print(f"Admission delaying {type_counts[job_type]} {job_type} job(s) by {decision.delay_seconds}s: backlog {decision.backlog}")
+    return decisions
 
-    # Step 3: Send message to SQS
-    message_body = {
-        "task_id": task_id,
-        "api_path": api_path,
-        "request_body": request_body
-    }
 
+def check_inputs(job_type: str, request_body: dict) -> bool:
+    """
+    Decide whether a GPU job's inputs are staged, after a cheap check of its input URLs.
+
+    The staging itself runs in the background (stage_job) once the task
+    record is written, so it never delays the 202.
+
+    Args:
+        job_type: Job type (e.g., 'camera-angle')
+        request_body: Validated request payload as dict
+
+    Returns:
+        True if the job's inputs are staged before it is queued
+
+    Raises:
+        HTTPException: 422 if an input URL has an unsupported scheme
+    """
+    if not input_stager.should_stage(job_type):
+        return False
     try:
-        send_message(
-            queue_url=SQS_QUEUE_URL,
-            message_body=json.dumps(message_body),
+        input_stager.check(request_body)
+    except InputRejected as e:
+        metrics.count_submission(job_type, 'invalid')
+        raise HTTPException(status_code=422, detail=f"Invalid input image: {e}")
+    return True
+
+
+async def fail_staged_job(task_id: str, message_body: dict, error: str) -> None:
+    """Fail a held job that could not be queued, and the pipeline stages after it."""
+    try:
+        if not await run_blocking(fail_held_task, DYNAMODB_TABLE, task_id, error, AWS_REGION):
+            return  # Cancelled meanwhile
+        job_status_cache.on_status_written(task_id, 'failed', error=error)
+        pipeline = message_body.get('pipeline') or {}
+        if pipeline.get('next_stages'):
+            await run_blocking(skip_downstream, pipeline['next_stages'], 'failed', f"Upstream step '{pipeline['step']}' failed")
+    except Exception as e:
+        print(f"Error marking task {task_id} as failed: {e}")
+
+
+async def stage_job(
+    task_id: str,
+    job_type: str,
+    queue_url: str,
+    message_body: dict,
+    delay_seconds: int = 0,
+    waiting: bool = False
+) -> None:
+    """
+    Stage a job's inputs in the background, then queue it with the staged message.
+
+    The task record already carries the unstaged message (held_message,
+    or stage_message of a waiting pipeline stage), so after a restart or a
+    staging error the job still runs with its original URLs. Jobs cancelled
+    meanwhile are dropped; a waiting stage whose dependencies finished first
+    has been queued with its original URLs.
+
+    Args:
+        task_id: Task ID the staged keys are named after
+        job_type: Job type (e.g., 'camera-angle')
+        queue_url: Queue the job is sent to
+        message_body: SQS message with the unstaged request body
+        delay_seconds: SQS delay from admission control
+        waiting: The job is a pipeline stage waiting on its dependencies
+    """
+    try:
+        staged_body = await input_stager.stage(task_id, job_type, message_body['request_body'])
+    except InputRejected as e:
+        print(f"Rejected {job_type} job {task_id}: {e}")
+        if waiting:
+            try:
+                await run_blocking(skip_downstream, [task_id], 'failed', f"Invalid input image: {e}")
+            except Exception as e:
+                print(f"Error marking task {task_id} as failed: {e}")
+        else:
+            await fail_staged_job(task_id, message_body, f"Invalid input image: {e}")
+        return
+    except Exception as e:
+        print(f"Error staging inputs of {task_id}, queuing the original ones: {e}")
+        staged_body = message_body['request_body']
+
+    message = json.dumps(dict(message_body, request_body=staged_body))
+    try:
+        recorded = await run_blocking(
+            update_staged_message,
+            table_name=DYNAMODB_TABLE,
+            task_id=task_id,
+            attribute='stage_message' if waiting else 'held_message',
+            message=message,
+            status='waiting' if waiting else 'pending',
             region=AWS_REGION
         )
+        if not recorded:
+            return
     except Exception as e:
-        print(f"Error sending to SQS: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to queue task: {str(e)}"
+        if waiting:
+            print(f"Error recording staged inputs of {task_id}, it keeps the original ones: {e}")
+            return
+        print(f"Error recording staged inputs of {task_id}, queuing it anyway: {e}")
+    if waiting:
+        return  # The adapter finishing its last dependency queues it
+
+    tenant = message_body['tenant']
+    fair = message_body.get('priority') != 'deferred'
+    if fair and not fair_queue.direct_slots(tenant):
+        fair_queue.hold([HeldJob(task_id, tenant, job_type, queue_url, message)])
+        return
+    try:
+        await run_blocking(
+            send_message,
+            queue_url=queue_url,
+            message_body=message,
+            region=AWS_REGION,
+            delay_seconds=delay_seconds
         )
+    except Exception as e:
+        print(f"Error sending staged job {task_id} to SQS: {e}")
+        await fail_staged_job(task_id, message_body, f"Failed to queue task: {e}")
+        return
+    if fair:
+        fair_queue.note_sent(tenant, [task_id])
+    try:
+        await run_blocking(release_held_task, DYNAMODB_TABLE, task_id, AWS_REGION)
+    except Exception as e:
+        # Sent anyway; a restart would send it again (the adapter runs it once more)
+        print(f"Error clearing held message of task {task_id}: {e}")
+
+
+async def submit_task(
+    api_path: str,
+    request_body: dict,
+    queue_url: Optional[str] = None,
+    task_type: Optional[str] = None,
+    start_gpu: bool = True,
+    task_id: Optional[str] = None,
+    priority: JobPriority = 'normal',
+    delay_seconds: int = 0,
+    stage: bool = False
+) -> str:
+    """
+    Submit a task to the processing queue.
+
+    This is the core orchestration logic:
+    1. Generate unique task_id
+    2. Write PENDING status to DynamoDB and send the task message to SQS
+       concurrently on the AWS executor. Once the message is sent the job
+       is accepted; a record write that failed or lost to a worker's upsert
+       is backfilled. Interactive/normal GPU jobs are held instead (record
+       only) while the fair queue's window is full, and so are jobs whose
+       inputs are staged first (stage_job queues them).
+    3. Ask the cached GPU state to start the instance if needed (GPU tasks
+       only; deferred jobs leave that to the deferred-lane policy)
+    4. Return task_id immediately
+
+    Args:
+        api_path: The ComfyUI API endpoint path (e.g., "/api/v1/camera-angle/jobs")
+        request_body: The original request payload as dict
+        queue_url: Target SQS queue (defaults to the GPU queue of the priority lane)
+        task_type: Optional task type added to the message (CPU tasks)
+        start_gpu: Whether this task needs the GPU instance
+        task_id: Pre-generated task ID (e.g., already claimed in the result index)
+        priority: GPU lane ('interactive', 'normal' or 'deferred')
+        delay_seconds: SQS delay before the message becomes visible (admission control)
+        stage: Stage the inputs in the background before queuing (check_inputs)
+
+    Returns:
+        task_id: Unique identifier for tracking this task
+    """
+    with timed('submit_task'):
+        # Step 1: Generate task ID
+        task_id = task_id or str(uuid.uuid4())
+        tenant = current_tenant.get()
+        queue_url = queue_url or GPU_LANE_QUEUES[priority]
+        job_type = job_type_from_path(api_path)
+
+        message_body = {
+            "task_id": task_id,
+            "api_path": api_path,
+            "request_body": request_body,
+            "tenant": tenant
+        }
+        if task_type:
+            message_body["task_type"] = task_type
+        if start_gpu:
+            message_body["priority"] = priority
+
+        fair = start_gpu and priority != 'deferred'
+        if stage or (fair and not fair_queue.direct_slots(tenant)):
+            # Step 2 (held): the record carries the message; staging or the fair queue sends it
+            try:
+                await run_blocking(
+                    create_task,
+                    table_name=DYNAMODB_TABLE,
+                    task_id=task_id,
+                    job_type=api_path,
+                    region=AWS_REGION,
+                    attributes={'tenant': tenant, 'held_message': json.dumps(message_body), 'held_queue_url': queue_url}
+                )
+            except Exception as e:
+                metrics.count_submission(job_type, 'failed')
+                print(f"Error writing to DynamoDB: {e}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to create task in database: {str(e)}"
+                )
+            if stage:
+                input_stager.spawn(stage_job(task_id, job_type, queue_url, message_body, delay_seconds))
+                outcome = 'staging'
+            else:
+                fair_queue.hold([HeldJob(task_id, tenant, job_type, queue_url, json.dumps(message_body))])
+                outcome = 'held'
+        else:
+            # Step 2: Write to DynamoDB and send to SQS concurrently
+            db_result, sqs_result = await asyncio.gather(
+                run_blocking(
+                    create_task,
+                    table_name=DYNAMODB_TABLE,
+                    task_id=task_id,
+                    job_type=api_path,
+                    region=AWS_REGION,
+                    attributes={'tenant': tenant}
+                ),
+                run_blocking(
+                    send_message,
+                    queue_url=queue_url,
+                    message_body=json.dumps(message_body),
+                    region=AWS_REGION,
+                    delay_seconds=delay_seconds
+                ),
+                return_exceptions=True
+            )
+
+            if isinstance(sqs_result, Exception):
+                metrics.count_submission(job_type, 'failed')
+                print(f"Error sending to SQS: {sqs_result}")
+                if not isinstance(db_result, Exception):
+                    # Don't leave an orphaned PENDING record behind
+                    try:
+                        await run_blocking(
+                            update_task_status,
+                            table_name=DYNAMODB_TABLE,
+                            task_id=task_id,
+                            status='failed',
+                            region=AWS_REGION,
+                            error_message=f"Failed to queue task: {sqs_result}"
+                        )
+                        job_status_cache.on_status_written(task_id, 'failed', error=f"Failed to queue task: {sqs_result}")
+                    except Exception as e:
+                        print(f"Error marking task {task_id} as failed: {e}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to queue task: {str(sqs_result)}"
+                )
+
+            if isinstance(db_result, Exception):
+                # The message is queued and will run, so this is still a 202:
+                # a 500 would make the client retry and render twice. A worker
+                # may also have upserted the record before our conditional put
+                # landed (ValueError); either way fill in what is missing.
+                if not isinstance(db_result, ValueError):
+                    print(f"Error writing to DynamoDB (task {task_id} is queued): {db_result}")
+                try:
+                    await run_blocking(
+                        backfill_task,
+                        table_name=DYNAMODB_TABLE,
+                        task_id=task_id,
+                        job_type=api_path,
+                        region=AWS_REGION,
+                        attributes={'tenant': tenant}
+                    )
+                except Exception as e:
+                    print(f"Error backfilling task {task_id}: {e}")
+
+            if fair:
+                fair_queue.note_sent(tenant, [task_id])
+            outcome = 'delayed' if delay_seconds else 'queued'
+
+        # Reads of this job start from the cache and use consistent reads
+        job_status_cache.on_created(task_id)
+        eta_estimator.on_submitted(task_id, job_type)
+        metrics.count_submission(job_type, outcome)
+
+        if start_gpu:
+            warmup.on_submitted()
+
+        # Step 3: Ensure GPU is running (cached state, no EC2 call when up)
+        if start_gpu and priority == 'deferred':
+            deferred_policy.note_submitted()
+        elif start_gpu:
+            gpu_state.request_start()
+
+        return task_id
+
+
+async def submit_gpu_job(
+    job_type: str,
+    api_path: str,
+    request_body: dict,
+    priority: JobPriority = 'normal'
+) -> JobResponse:
+    """
+    Submit a GPU job through the content-addressed result cache.
 
-    # Step 4: Ensure GPU is running (non-blocking, best effort)
-    ensure_gpu_running()
+    Deterministic requests (seed set, inputs with ETags) are looked up in
+    the result index first:
+    - already completed: the existing result is returned immediately
+    - pending/processing: the submission is attached to the existing job
+    - failed, or never seen: a new job is claimed in the index and queued
+    Everything else (and any result index error) is submitted normally.
 
-    return task_id
+    Admission control applies only when a new job is queued; cache hits
+    are served even while the queue is full. A new job's inputs are
+    checked (check_inputs) after admission and staged in the background,
+    so the cache key is always computed from the client's URLs.
+
+    Args:
+        job_type: Job type for admission control (e.g., 'camera-angle')
+        api_path: The ComfyUI API endpoint path
+        request_body: The validated request payload as dict
+        priority: GPU lane for a newly queued job
+
+    Returns:
+        JobResponse for the new or existing job
+
+    Raises:
+        HTTPException: 429 if admission control rejects a new job,
+                       422 if its input URLs are not usable
+    """
+    delay_seconds = None
+    stage = None
+    task_id = str(uuid.uuid4())
+    try:
+        request_hash = await result_cache.request_key(api_path, request_body)
+        replace_job_id = None
+
+        # Second pass only if a concurrent identical submission won the claim
+        attempts = 2 if request_hash else 0
+        for _ in range(attempts):
+            entry = await result_cache.lookup(request_hash)
+            if entry:
+                existing = await read_job_status(entry['job_id'])
+                if existing is None and time.time() - int(entry.get('created_at', 0)) < RESULT_CLAIM_GRACE_SECONDS:
+                    # Claimed moments ago; the task record may not be written yet
+                    existing = JobStatusEntry(status='pending')
+
+                if existing is not None and existing.status not in ('failed', 'cancelled'):
+                    if existing.status == 'completed':
+                        result_cache.completed_hits += 1
+                        metrics.count_submission(job_type, 'cache_hit')
+                    else:
+                        result_cache.attached += 1
+                        metrics.count_submission(job_type, 'attached')
+                    print(f"Result cache hit for {api_path}: job {entry['job_id']} ({existing.status})")
+                    return job_response(entry['job_id'], existing)
+
+                replace_job_id = entry['job_id']
+
+            if delay_seconds is None:
+                delay_seconds = admit(job_type, priority=priority)
+            if stage is None:
+                stage = check_inputs(job_type, request_body)
+            if await result_cache.claim(request_hash, task_id, replace_job_id):
+                result_cache.misses += 1
+                await submit_task(
+                    api_path=api_path,
+                    request_body=request_body,
+                    task_id=task_id,
+                    priority=priority,
+                    delay_seconds=delay_seconds,
+                    stage=stage
+                )
+                return job_response(task_id, JobStatusEntry(status="pending"))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Result cache unavailable, submitting without it: {e}")
+
+    if delay_seconds is None:
+        delay_seconds = admit(job_type, priority=priority)
+    if stage is None:
+        stage = check_inputs(job_type, request_body)
+    await submit_task(
+        api_path=api_path,
+        request_body=request_body,
+        task_id=task_id,
+        priority=priority,
+        delay_seconds=delay_seconds,
+        stage=stage
+    )
+    return job_response(task_id, JobStatusEntry(status="pending"))
 
 # ==================== API Endpoints ====================
 
@@ -280,7 +940,11 @@ async def root():
         "endpoints": {
             "camera_angle": "/api/v1/camera-angle/jobs",
             "qwen_image_edit": "/api/v1/qwen-image-edit/jobs",
+            "batch": "/api/v1/jobs:batch",
             "job_status": "/api/v1/jobs/{job_id}",
+            "job_status_bulk": "/api/v1/jobs/status",
+            "job_status_stream": "/api/v1/jobs/stream",
+            "job_status_ws": "/api/v1/jobs/ws",
             "health": "/health"
         }
     }
@@ -292,32 +956,23 @@ async def health_check():
 
     This checks the orchestrator itself, not the GPU instance.
     The GPU instance is ephemeral and may be stopped.
-    """
-    # Check if we can connect to DynamoDB
-    try:
-        # Simple connectivity check
-        dynamodb = boto3.client('dynamodb', region_name=AWS_REGION)
-        dynamodb.describe_table(TableName=DYNAMODB_TABLE)
-        db_status = "healthy"
-    except Exception as e:
-        db_status = f"unhealthy: {str(e)}"
 
-    # Check if we can connect to SQS
-    try:
-        sqs = boto3.client('sqs', region_name=AWS_REGION)
-        sqs.get_queue_attributes(QueueUrl=SQS_QUEUE_URL, AttributeNames=['All'])
-        queue_status = "healthy"
-    except Exception as e:
-        queue_status = f"unhealthy: {str(e)}"
-
-    overall_healthy = db_status == "healthy" and queue_status == "healthy"
+    Served from the health monitor's cached snapshot (refreshed in the
+    background), so load balancer probes never call AWS themselves.
+    """
+    snapshot = health_monitor.snapshot()
+    messages = {
+        "healthy": "Orchestrator is running",
+        "starting": "Orchestrator is starting (first health check pending)",
+    }
 
     return {
-        "status": "healthy" if overall_healthy else "unhealthy",
-        "message": "Orchestrator is running" if overall_healthy else "Orchestrator has issues",
+        "status": snapshot["status"],
+        "message": messages.get(snapshot["status"], "Orchestrator has issues"),
+        "age_seconds": snapshot["age_seconds"],
         "components": {
-            "dynamodb": db_status,
-            "sqs": queue_status
+            name: component["status"] if component["status"] == "healthy" else f"unhealthy: {component['error']}"
+            for name, component in snapshot["components"].items()
         }
     }
 
@@ -332,62 +987,137 @@ async def health_check_v1():
     return await health_check()
 
 
+@app.get("/health/deep")
+async def deep_health_check():
+    """
+    Deep health check for manual diagnosis.
+
+    Re-runs every component check right now (DynamoDB, SQS queues, S3
+    bucket, GPU instance state) instead of reading the cached snapshot,
+    and returns per-component latency, errors and queue statistics.
+    Not meant for load balancer probes.
+    """
+    snapshot, gpu_result = await asyncio.gather(
+        health_monitor.refresh(deep=True),
+        gpu_state.refresh(),
+        return_exceptions=True
+    )
+    if isinstance(snapshot, Exception):
+        raise HTTPException(status_code=500, detail=f"Health check failed: {str(snapshot)}")
+
+    snapshot["gpu_instance"] = gpu_state.snapshot()
+    if isinstance(gpu_result, Exception):
+        snapshot["gpu_instance"]["error"] = str(gpu_result)
+    snapshot["job_watcher"] = job_watcher.snapshot()
+    snapshot["job_status_cache"] = job_status_cache.snapshot()
+    return snapshot
+
+
+@app.get("/debug/health")
+async def get_health_snapshot():
+    """Return the full cached health snapshot, including queue depth and in-flight counts."""
+    return health_monitor.snapshot()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics (AWS call latency, responses, submissions, GPU and queue state)."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
 @app.get("/debug/gpu-instance")
 async def get_gpu_instance_info():
     """
     Debug endpoint to check GPU instance information.
 
-    Returns current GPU instance IP and last refresh time.
+    Returns cached GPU instance state, IP and last refresh time (plus
+    per-instance state and desired size in fleet mode).
     """
-    return {
-        "instance_id": GPU_INSTANCE_ID,
-        "current_ip": gpu_instance_ip["current_ip"],
-        "last_updated": gpu_instance_ip["last_updated"],
-        "last_updated_ago": f"{int(time.time() - gpu_instance_ip['last_updated'])}s ago" if gpu_instance_ip["last_updated"] > 0 else "never"
-    }
+    snapshot = gpu_state.snapshot()
+    snapshot["deferred_lane"] = deferred_policy.snapshot()
+    return snapshot
+
+# ==================== GPU Warm-Up ====================
+
+@app.post("/api/v1/gpu/warm", response_model=WarmResponse, status_code=202)
+async def warm_gpu(request: Optional[WarmRequest] = None):
+    """
+    Signal that GPU jobs are likely soon (e.g. a canvas session was opened).
+
+    Starts the GPU speculatively unless an instance is already up, a
+    speculative start happened within WARM_MIN_INTERVAL_SECONDS, or the
+    daily speculative uptime budget is used up. A speculative start no job
+    follows is stopped again after WARM_MAX_SPECULATIVE_SECONDS.
+
+    Reads only cached state; returns immediately.
+    """
+    reason = request.reason if request else 'manual'
+    action = warmup.warm(reason)
+    metrics.count_warm(reason, action)
+    return WarmResponse(action=action, gpu_state=gpu_state.state)
+
+
+@app.get("/debug/warmup")
+async def get_warmup_info():
+    """Get speculative start state, counters and the hour-of-week usage model."""
+    return warmup.snapshot()
 
 # ==================== Camera Angle API ====================
 
 @app.post("/api/v1/camera-angle/jobs", response_model=JobResponse, status_code=202)
-async def create_camera_angle_job(request: CameraAngleRequest):
+async def create_camera_angle_job(
+    request: CameraAngleRequest,
+    priority: JobPriority = Query('interactive', description="GPU lane: interactive, normal or deferred")
+):
     """
     Submit a camera angle transformation job.
 
     This endpoint returns within 1 second with a 202 Accepted response.
     Clients should poll GET /api/v1/jobs/{job_id} for status updates.
+
+    Identical deterministic requests (same seed and inputs) reuse the
+    existing job or its completed result instead of rendering again.
+
+    Single submissions default to the interactive lane; pass
+    ?priority=normal or ?priority=deferred for background work.
+
+    Returns 429 with Retry-After when the GPU backlog is over its limit,
+    and 422 when the GPU is cold and an input is not a usable image.
     """
-    task_id = submit_task(
+    return await submit_gpu_job(
+        job_type='camera-angle',
         api_path="/api/v1/camera-angle/jobs",
-        request_body=request.dict()
-    )
-
-    return JobResponse(
-        job_id=task_id,
-        status="pending",
-        result_url=None,
-        error=None
+        request_body=request.dict(),
+        priority=priority
     )
 
 # ==================== Qwen Image Edit API ====================
 
 @app.post("/api/v1/qwen-image-edit/jobs", response_model=JobResponse, status_code=202)
-async def create_qwen_image_edit_job(request: ImageEditRequest):
+async def create_qwen_image_edit_job(
+    request: ImageEditRequest,
+    priority: JobPriority = Query('interactive', description="GPU lane: interactive, normal or deferred")
+):
     """
     Submit a Qwen image editing job.
 
     This endpoint returns within 1 second with a 202 Accepted response.
     Clients should poll GET /api/v1/jobs/{job_id} for status updates.
+
+    Identical deterministic requests (same seed and inputs) reuse the
+    existing job or its completed result instead of rendering again.
+
+    Single submissions default to the interactive lane; pass
+    ?priority=normal or ?priority=deferred for background work.
+
+    Returns 429 with Retry-After when the GPU backlog is over its limit,
+    and 422 when the GPU is cold and an input is not a usable image.
     """
-    task_id = submit_task(
+    return await submit_gpu_job(
+        job_type='qwen-image-edit',
         api_path="/api/v1/qwen-image-edit/jobs",
-        request_body=request.dict()
-    )
-
-    return JobResponse(
-        job_id=task_id,
-        status="pending",
-        result_url=None,
-        error=None
+        request_body=request.dict(),
+        priority=priority
     )
 
 # ==================== CPU Tasks (Face Mask & Face Swap) ====================
@@ -399,6 +1129,8 @@ async def create_face_mask_task(request: FaceMaskRequest):
 
     This endpoint returns within 1 second with a 202 Accepted response.
     Clients should poll GET /api/v1/jobs/{job_id} for status updates.
+
+    Returns 429 with Retry-After when the CPU backlog is over its limit.
     """
     if not CPU_QUEUE_URL:
         raise HTTPException(
@@ -406,48 +1138,19 @@ async def create_face_mask_task(request: FaceMaskRequest):
             detail="CPU_QUEUE_URL not configured"
         )
 
-    # Generate task ID
-    task_id = str(uuid.uuid4())
-
-    try:
-        # Create task record in DynamoDB
-        create_task(
-            table_name=DYNAMODB_TABLE,
-            task_id=task_id,
-            job_type='/api/v1/face-mask/jobs',
-            region=AWS_REGION,
-            initial_status='pending'
-        )
-
-        # Send message to CPU SQS queue
-        message_body = json.dumps({
-            'task_id': task_id,
-            'task_type': 'face_mask',
-            'api_path': '/api/v1/face-mask/jobs',
-            'request_body': request.dict()
-        })
-
-        send_message(
-            queue_url=CPU_QUEUE_URL,
-            message_body=message_body,
-            region=AWS_REGION
-        )
+    delay_seconds = admit('face-mask')
+    task_id = await submit_task(
+        api_path='/api/v1/face-mask/jobs',
+        request_body=request.dict(),
+        queue_url=CPU_QUEUE_URL,
+        task_type='face_mask',
+        start_gpu=False,
+        delay_seconds=delay_seconds
+    )
 
-        print(f"✓ Submitted face mask task {task_id}")
+    print(f"✓ Submitted face mask task {task_id}")
 
-        return JobResponse(
-            job_id=task_id,
-            status="pending",
-            result_url=None,
-            error=None
-        )
-
-    except Exception as e:
-        print(f"✗ Error submitting face mask task: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to submit task: {str(e)}"
-        )
+    return job_response(task_id, JobStatusEntry(status="pending"))
 
 @app.post("/api/v1/full-face-swap/tasks", response_model=JobResponse, status_code=202)
 async def create_full_face_swap_task(request: FullFaceSwapRequest):
@@ -456,6 +1159,8 @@ async def create_full_face_swap_task(request: FullFaceSwapRequest):
 
     This endpoint returns within 1 second with a 202 Accepted response.
     Clients should poll GET /api/v1/jobs/{job_id} for status updates.
+
+    Returns 429 with Retry-After when the CPU backlog is over its limit.
     """
     if not CPU_QUEUE_URL:
         raise HTTPException(
@@ -463,99 +1168,917 @@ async def create_full_face_swap_task(request: FullFaceSwapRequest):
             detail="CPU_QUEUE_URL not configured"
         )
 
-    # Generate task ID
-    task_id = str(uuid.uuid4())
+    delay_seconds = admit('full-face-swap')
+    task_id = await submit_task(
+        api_path='/api/v1/full-face-swap/jobs',
+        request_body=request.dict(),
+        queue_url=CPU_QUEUE_URL,
+        task_type='full_face_swap',
+        start_gpu=False,
+        delay_seconds=delay_seconds
+    )
 
-    try:
-        # Create task record in DynamoDB
-        create_task(
-            table_name=DYNAMODB_TABLE,
-            task_id=task_id,
-            job_type='/api/v1/full-face-swap/jobs',
-            region=AWS_REGION,
-            initial_status='pending'
+    print(f"✓ Submitted full face swap task {task_id}")
+
+    return job_response(task_id, JobStatusEntry(status="pending"))
+
+# ==================== Batch Submission ====================
+
+@app.post("/api/v1/jobs:batch", response_model=BatchJobResponse, status_code=202)
+async def create_jobs_batch(request: BatchJobRequest):
+    """
+    Submit many jobs (any mix of job types) in one call.
+
+    All items are validated together; if any item is invalid nothing is
+    submitted and a 422 lists every invalid item. Task records are written
+    with the DynamoDB batch writer (25 per call) and messages are sent with
+    SendMessageBatch (10 per call), cutting AWS round trips ~10x.
+
+    The response reports a job_id and status per item, in request order.
+    Items that failed to be written or queued have status 'failed'.
+
+    GPU jobs go to the lane given by `priority` (default 'normal'). A
+    'deferred' batch does not start the GPU; it runs while the instance
+    is up anyway, or once the deferred backlog/age threshold is reached.
+
+    Admission control is applied per job type to the whole batch: if any
+    type is over its limit the batch is rejected with 429 + Retry-After.
+    The tenant's rate cap counts every job of the batch.
+
+    While the fair queue's window is full, the batch's interactive/normal
+    GPU jobs are held and released by round-robin across tenants.
+
+    While the GPU is cold, GPU jobs' inputs are staged in the background
+    before they are queued; a job whose input turns out not to be a usable
+    image fails on its own. Input URLs with an unsupported scheme reject
+    the whole batch with 422.
+    """
+    # Step 1: Validate every item before touching AWS
+    parsed = []
+    staged = set()
+    errors = []
+    for index, item in enumerate(request.jobs):
+        model, api_path, task_type, is_gpu = BATCH_JOB_TYPES[item.job_type]
+        try:
+            body = model(**item.request).dict()
+            if is_gpu and input_stager.should_stage(item.job_type):
+                input_stager.check(body)
+                staged.add(index)
+        except ValidationError as e:
+            errors.append({"index": index, "job_type": item.job_type, "errors": e.errors(include_url=False, include_context=False)})
+            continue
+        except InputRejected as e:
+            metrics.count_submission(item.job_type, 'invalid')
+            errors.append({"index": index, "job_type": item.job_type, "errors": [str(e)]})
+            continue
+        parsed.append((index, api_path, task_type, is_gpu, body))
+
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    if any(not is_gpu for _, _, _, is_gpu, _ in parsed) and not CPU_QUEUE_URL:
+        raise HTTPException(
+            status_code=500,
+            detail="CPU_QUEUE_URL not configured"
         )
 
-        # Send message to CPU SQS queue
-        message_body = json.dumps({
-            'task_id': task_id,
-            'task_type': 'full_face_swap',
-            'api_path': '/api/v1/full-face-swap/jobs',
-            'request_body': request.dict()
-        })
-
-        send_message(
-            queue_url=CPU_QUEUE_URL,
-            message_body=message_body,
+    # Rate cap and admission control, all-or-nothing on reject
+    type_counts: Dict[str, int] = {}
+    for item in request.jobs:
+        type_counts[item.job_type] = type_counts.get(item.job_type, 0) + 1
+
+    decisions = admit_all(type_counts, request.priority)
+    tenant = current_tenant.get()
+
+    with timed('submit_batch'):
+        results = {
+            index: BatchJobResult(index=index, job_id=str(uuid.uuid4()), status="pending")
+            for index, _, _, _, _ in parsed
+        }
+
+        # Step 2: Build every message; hold the fair-queued GPU jobs if the window is full
+        # and the jobs being staged (stage_job queues them)
+        messages = {}
+        for index, api_path, task_type, is_gpu, body in parsed:
+            message_body = {
+                "task_id": results[index].job_id,
+                "api_path": api_path,
+                "request_body": body,
+                "tenant": tenant
+            }
+            if task_type:
+                message_body["task_type"] = task_type
+            if is_gpu:
+                message_body["priority"] = request.priority
+            queue_url = GPU_LANE_QUEUES[request.priority] if is_gpu else CPU_QUEUE_URL
+            messages[index] = (queue_url, json.dumps(message_body))
+
+        fair = request.priority != 'deferred'
+        gpu_indexes = [index for index, _, _, is_gpu, _ in parsed if is_gpu and index not in staged]
+        direct = fair_queue.direct_slots(tenant, len(gpu_indexes)) if fair else len(gpu_indexes)
+        held = set(gpu_indexes[direct:]) | staged
+
+        # Step 3: Write all task records
+        tasks = []
+        for index, api_path, _, _, _ in parsed:
+            attributes = {'tenant': tenant}
+            if index in held:
+                attributes['held_queue_url'], attributes['held_message'] = messages[index]
+            tasks.append({'task_id': results[index].job_id, 'job_type': api_path, 'attributes': attributes})
+        failed_writes = await run_blocking(
+            batch_create_tasks,
+            table_name=DYNAMODB_TABLE,
+            tasks=tasks,
             region=AWS_REGION
         )
+        failed_ids = {f['task_id']: f['error'] for f in failed_writes}
+
+        # Step 4: Enqueue written tasks, grouped by queue (held ones go to the fair queue)
+        entries_by_queue: Dict[str, List[Dict[str, Any]]] = {}
+        held_jobs = []
+        for index, api_path, _, _, _ in parsed:
+            job_type = request.jobs[index].job_type
+            task_id = results[index].job_id
+            if task_id in failed_ids or index in staged:
+                continue
+            queue_url, message = messages[index]
+            if index in held:
+                held_jobs.append(HeldJob(task_id, tenant, job_type, queue_url, message))
+                continue
+            entry = {
+                'Id': str(index),
+                'MessageBody': message
+            }
+            if decisions[job_type].delay_seconds:
+                entry['DelaySeconds'] = decisions[job_type].delay_seconds
+            entries_by_queue.setdefault(queue_url, []).append(entry)
+
+        send_results = await asyncio.gather(*[
+            run_blocking(send_message_batch, queue_url=queue_url, entries=entries, region=AWS_REGION)
+            for queue_url, entries in entries_by_queue.items()
+        ])
+
+        failed_sends = {}
+        for send_result in send_results:
+            for failure in send_result['Failed']:
+                failed_sends[int(failure['Id'])] = failure['Message']
+
+        # Step 5: Record failures (written-but-not-queued tasks are marked failed)
+        for index, result in results.items():
+            if result.job_id in failed_ids:
+                result.status = "failed"
+                result.error = f"Failed to create task in database: {failed_ids[result.job_id]}"
+                result.job_id = None
+            elif index in failed_sends:
+                result.status = "failed"
+                result.error = f"Failed to queue task: {failed_sends[index]}"
+
+        for index, result in results.items():
+            job_type = request.jobs[index].job_type
+            if result.status == "pending":
+                job_status_cache.on_created(result.job_id)
+                eta_estimator.on_submitted(result.job_id, job_type)
+                if index in staged:
+                    metrics.count_submission(job_type, 'staging')
+                elif index in held:
+                    metrics.count_submission(job_type, 'held')
+                else:
+                    metrics.count_submission(job_type, 'delayed' if decisions[job_type].delay_seconds else 'queued')
+            else:
+                metrics.count_submission(job_type, 'failed')
+                if result.job_id:
+                    job_status_cache.on_status_written(result.job_id, 'failed', error=result.error)
+
+        if failed_sends:
+            await asyncio.gather(*[
+                run_blocking(
+                    update_task_status,
+                    table_name=DYNAMODB_TABLE,
+                    task_id=results[index].job_id,
+                    status='failed',
+                    region=AWS_REGION,
+                    error_message=results[index].error
+                )
+                for index in failed_sends
+            ], return_exceptions=True)
+
+        if fair:
+            fair_queue.note_sent(tenant, [
+                results[index].job_id for index, _, _, is_gpu, _ in parsed
+                if is_gpu and index not in held and results[index].status == "pending"
+            ])
+        # Only now: the release loop must see the direct sends above first
+        if held_jobs:
+            fair_queue.hold(held_jobs)
+        for index in staged:
+            if results[index].status == "pending":
+                queue_url, message = messages[index]
+                input_stager.spawn(stage_job(
+                    results[index].job_id,
+                    request.jobs[index].job_type,
+                    queue_url,
+                    json.loads(message),
+                    decisions[request.jobs[index].job_type].delay_seconds
+                ))
+
+        # Step 6: Start the GPU if any GPU job was queued (deferred: maybe later)
+        queued_gpu = sum(1 for index, _, _, is_gpu, _ in parsed if is_gpu and results[index].status == "pending")
+        if queued_gpu:
+            warmup.on_submitted(queued_gpu)
+        if queued_gpu and request.priority == 'deferred':
+            deferred_policy.note_submitted(queued_gpu)
+        elif queued_gpu:
+            gpu_state.request_start()
+
+    ordered = [results[index] for index in sorted(results)]
+    accepted = sum(1 for r in ordered if r.status == "pending")
+    print(f"✓ Batch submitted: {accepted} accepted, {len(ordered) - accepted} failed")
+
+    return BatchJobResponse(
+        accepted=accepted,
+        failed=len(ordered) - accepted,
+        jobs=ordered
+    )
 
-        print(f"✓ Submitted full face swap task {task_id}")
+# ==================== Pipelines ====================
 
-        return JobResponse(
-            job_id=task_id,
-            status="pending",
-            result_url=None,
-            error=None
-        )
+def skip_downstream(task_ids: List[str], status: str, reason: str) -> None:
+    """Fail or cancel waiting pipeline stages (blocking; run on the AWS executor)."""
+    skip_stages(get_table(DYNAMODB_TABLE, AWS_REGION), task_ids, status, reason)
 
-    except Exception as e:
-        print(f"✗ Error submitting full face swap task: {e}")
+
+async def read_pipeline(pipeline_id: str) -> Optional[PipelineResponse]:
+    """Read a pipeline and the current status of each of its stages."""
+    steps = await run_blocking(get_pipeline, table_name=DYNAMODB_TABLE, pipeline_id=pipeline_id, region=AWS_REGION)
+    if steps is None:
+        return None
+
+    tasks = await run_blocking(
+        batch_get_tasks,
+        table_name=DYNAMODB_TABLE,
+        task_ids=[step['job_id'] for step in steps],
+        region=AWS_REGION
+    )
+    entries = {task['task_id']: task_to_status_entry(task) for task in tasks}
+
+    stages = []
+    for step in steps:
+        entry = entries.get(step['job_id'], JobStatusEntry(status='unknown'))
+        stages.append(PipelineStepStatus(
+            id=step['id'],
+            job_id=step['job_id'],
+            job_type=step['job_type'],
+            depends_on=step['depends_on'],
+            **entry.dict()
+        ))
+
+    depended_on = {ref for step in steps for ref in step['depends_on']}
+    final = [stage for stage in stages if stage.id not in depended_on]
+    return PipelineResponse(
+        pipeline_id=pipeline_id,
+        status=pipeline_status([stage.status for stage in stages]),
+        result_url=final[0].result_url if len(final) == 1 else None,
+        steps=stages
+    )
+
+
+@app.post("/api/v1/pipelines", response_model=PipelineResponse, status_code=202)
+async def create_pipeline_job(request: PipelineRequest):
+    """
+    Submit a multi-stage pipeline: a DAG of steps whose inputs reference
+    earlier steps' results.
+
+    A request value of exactly "{{<step id>.result_url}}" is replaced with
+    that step's result URL before the step runs, and makes the step depend
+    on it. Example (client-orchestrated face swap, server-side):
+
+        {"steps": [
+          {"id": "mask", "job_type": "face-mask", "request": {"image_url": "..."}},
+          {"id": "swap", "job_type": "full-face-swap", "request": {
+              "source_image_url": "{{mask.result_url}}", "target_face_url": "..."}}
+        ]}
+
+    Every step gets a job ID at once. Steps without dependencies are queued
+    now; the others wait (status 'waiting') and are queued by the adapter
+    that completes their last dependency, on the CPU or GPU queue of their
+    job type. If a step fails or is cancelled, every step after it fails or
+    is cancelled too. The GPU is started right away if any step needs it,
+    so a cold start overlaps the CPU steps before it.
+
+    Admission control applies to the steps queued now. While the GPU is
+    cold, the literal input URLs of GPU steps are staged in the background
+    (references to earlier steps are left alone) before the step is
+    queued; a step whose input is not a usable image fails, and the steps
+    after it with it. Input URLs with an unsupported scheme reject the
+    pipeline with 422.
+    """
+    # Step 1: Validate the DAG and every step's request
+    try:
+        ordered = plan_pipeline([step.dict() for step in request.steps])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    errors = []
+    bodies = {}
+    staged = set()
+    for index, step in enumerate(request.steps):
+        model, _, _, is_gpu = BATCH_JOB_TYPES[step.job_type]
+        try:
+            bodies[step.id] = model(**step.request).dict()
+            if is_gpu and input_stager.should_stage(step.job_type):
+                input_stager.check(bodies[step.id])
+                staged.add(step.id)
+        except ValidationError as e:
+            errors.append({"index": index, "step": step.id, "errors": e.errors(include_url=False, include_context=False)})
+        except InputRejected as e:
+            metrics.count_submission(step.job_type, 'invalid')
+            errors.append({"index": index, "step": step.id, "errors": [str(e)]})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    if any(not BATCH_JOB_TYPES[step['job_type']][3] for step in ordered) and not CPU_QUEUE_URL:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to submit task: {str(e)}"
+            detail="CPU_QUEUE_URL not configured"
         )
 
+    # Admission control for the steps queued now
+    roots = [step for step in ordered if not step['depends_on']]
+    type_counts: Dict[str, int] = {}
+    for step in roots:
+        type_counts[step['job_type']] = type_counts.get(step['job_type'], 0) + 1
+    delays = {
+        job_type: decision.delay_seconds
+        for job_type, decision in admit_all(type_counts, request.priority).items()
+    }
+
+    with timed('submit_pipeline'):
+        pipeline_id = str(uuid.uuid4())
+        tenant = current_tenant.get()
+        job_ids = {step['id']: str(uuid.uuid4()) for step in ordered}
+
+        # Step 2: One task record per stage (waiting stages carry their message,
+        # and so do steps being staged: stage_job queues them)
+        tasks, messages, staging = [], {}, []
+        for step in ordered:
+            _, api_path, task_type, is_gpu = BATCH_JOB_TYPES[step['job_type']]
+            task_id = job_ids[step['id']]
+            next_stages = [job_ids[next_id] for next_id in step['next_steps']]
+            message_body = {
+                "task_id": task_id,
+                "api_path": api_path,
+                "request_body": bodies[step['id']],
+                "tenant": tenant,
+                "pipeline": {"id": pipeline_id, "step": step['id'], "next_stages": next_stages}
+            }
+            if task_type:
+                message_body["task_type"] = task_type
+            if is_gpu:
+                message_body["priority"] = request.priority
+            queue_url = GPU_LANE_QUEUES[request.priority] if is_gpu else CPU_QUEUE_URL
+
+            task = {
+                'task_id': task_id,
+                'status': 'waiting' if step['depends_on'] else 'pending',
+                'job_type': api_path,
+                'tenant': tenant,
+                'pipeline_id': pipeline_id,
+                'next_stages': next_stages
+            }
+            if step['depends_on']:
+                task.update(
+                    stage_message=json.dumps(message_body),
+                    stage_queue_url=queue_url,
+                    waiting_on=len(step['depends_on']),
+                    stage_outputs={}
+                )
+            elif step['id'] in staged:
+                task.update(held_message=json.dumps(message_body), held_queue_url=queue_url)
+            else:
+                messages[task_id] = (queue_url, message_body, delays[step['job_type']])
+            if step['id'] in staged:
+                staging.append((step, queue_url, message_body))
+            tasks.append(task)
+
+        steps = [
+            {'id': step['id'], 'job_type': step['job_type'], 'job_id': job_ids[step['id']], 'depends_on': step['depends_on']}
+            for step in ordered
+        ]
+        try:
+            await run_blocking(
+                create_pipeline,
+                table_name=DYNAMODB_TABLE,
+                pipeline_id=pipeline_id,
+                steps=steps,
+                tasks=tasks,
+                region=AWS_REGION
+            )
+        except Exception as e:
+            for step in ordered:
+                metrics.count_submission(step['job_type'], 'failed')
+            raise HTTPException(status_code=500, detail=f"Failed to create pipeline in database: {str(e)}")
+
+        # Step 3: Queue the steps without dependencies
+        send_results = await asyncio.gather(*[
+            run_blocking(
+                send_message,
+                queue_url=queue_url,
+                message_body=json.dumps(message_body),
+                region=AWS_REGION,
+                delay_seconds=delay_seconds
+            )
+            for queue_url, message_body, delay_seconds in messages.values()
+        ], return_exceptions=True)
+
+        failures = {
+            task_id: result for task_id, result in zip(messages, send_results) if isinstance(result, Exception)
+        }
+        for task_id, error in failures.items():
+            message_body = messages[task_id][1]
+            try:
+                await run_blocking(
+                    update_task_status,
+                    table_name=DYNAMODB_TABLE,
+                    task_id=task_id,
+                    status='failed',
+                    region=AWS_REGION,
+                    error_message=f"Failed to queue task: {error}"
+                )
+                await run_blocking(
+                    skip_downstream,
+                    message_body['pipeline']['next_stages'],
+                    'failed',
+                    f"Upstream step '{message_body['pipeline']['step']}' failed"
+                )
+            except Exception as e:
+                print(f"Error marking pipeline {pipeline_id} as failed: {e}")
+        if failures:
+            for step in ordered:
+                metrics.count_submission(step['job_type'], 'failed')
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to queue pipeline: {str(next(iter(failures.values())))}"
+            )
+
+        if request.priority != 'deferred':
+            fair_queue.note_sent(tenant, [
+                job_ids[step['id']] for step in roots
+                if BATCH_JOB_TYPES[step['job_type']][3] and step['id'] not in staged
+            ])
+        for step, queue_url, message_body in staging:
+            input_stager.spawn(stage_job(
+                job_ids[step['id']],
+                step['job_type'],
+                queue_url,
+                message_body,
+                delays.get(step['job_type'], 0),
+                waiting=bool(step['depends_on'])
+            ))
+
+        for step in ordered:
+            task_id = job_ids[step['id']]
+            job_status_cache.on_created(task_id, 'waiting' if step['depends_on'] else 'pending')
+            if not step['depends_on']:
+                eta_estimator.on_submitted(task_id, step['job_type'])
+            if step['id'] in staged and not step['depends_on']:
+                metrics.count_submission(step['job_type'], 'staging')
+            else:
+                metrics.count_submission(step['job_type'], 'delayed' if delays.get(step['job_type']) else 'queued')
+
+        # Step 4: Start the GPU now if any step needs it (overlaps the CPU steps)
+        gpu_steps = sum(1 for step in ordered if BATCH_JOB_TYPES[step['job_type']][3])
+        if gpu_steps:
+            warmup.on_submitted(gpu_steps)
+        if gpu_steps and request.priority == 'deferred':
+            deferred_policy.note_submitted(gpu_steps)
+        elif gpu_steps:
+            gpu_state.request_start()
+
+    print(f"✓ Pipeline {pipeline_id} submitted: {len(ordered)} step(s), {len(messages)} queued now")
+
+    return PipelineResponse(
+        pipeline_id=pipeline_id,
+        status='pending',
+        steps=[
+            PipelineStepStatus(**step, status='waiting' if step['depends_on'] else 'pending')
+            for step in steps
+        ]
+    )
+
+
+@app.get("/api/v1/pipelines/{pipeline_id}", response_model=PipelineResponse)
+async def get_pipeline_status(pipeline_id: str):
+    """
+    Get a pipeline's overall status and the status of every step.
+
+    The pipeline is 'failed'/'cancelled' as soon as any step is,
+    'completed' once every step is, and 'processing' once any step has
+    started. result_url is the final step's result.
+    """
+    with timed('get_pipeline_status'):
+        try:
+            pipeline = await read_pipeline(pipeline_id)
+        except Exception as e:
+            print(f"Error retrieving pipeline status: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve pipeline status: {str(e)}")
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return pipeline
+
+
+@app.delete("/api/v1/pipelines/{pipeline_id}", response_model=PipelineResponse)
+async def cancel_pipeline(pipeline_id: str):
+    """
+    Cancel every unfinished step of a pipeline (see DELETE /api/v1/jobs/{job_id}).
+
+    Finished steps keep their status and result.
+    """
+    with timed('cancel_pipeline'):
+        try:
+            pipeline = await read_pipeline(pipeline_id)
+            if pipeline is None:
+                raise HTTPException(status_code=404, detail="Pipeline not found")
+
+            unfinished = [step for step in pipeline.steps if step.status in ('pending', 'processing', 'waiting')]
+            results = await asyncio.gather(*[
+                run_blocking(cancel_task, table_name=DYNAMODB_TABLE, task_id=step.job_id, region=AWS_REGION)
+                for step in unfinished
+            ])
+            for step, previous in zip(unfinished, results):
+                if previous is not None:
+                    metrics.count_cancellation(previous.get('status', 'unknown'))
+                    job_status_cache.on_status_written(step.job_id, 'cancelled')
+            print(f"Pipeline {pipeline_id} cancelled ({sum(1 for r in results if r is not None)} step(s))")
+
+            return await read_pipeline(pipeline_id)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error cancelling pipeline: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to cancel pipeline: {str(e)}")
+
+
 # ==================== Unified Job Status ====================
 
-@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse)
-async def get_job_status(job_id: str):
+def task_to_status_entry(task: Dict[str, Any]) -> JobStatusEntry:
+    """Map a DynamoDB task item to the public status fields."""
+    return JobStatusEntry(**status_fields(task))
+
+
+def parse_job_ids(ids: str) -> List[str]:
+    """Split a comma-separated ids query parameter."""
+    job_ids = [job_id.strip() for job_id in ids.split(",") if job_id.strip()]
+    if not job_ids:
+        raise HTTPException(status_code=400, detail="No job IDs given")
+    return job_ids
+
+
+async def get_job_statuses(job_ids: List[str]) -> JobStatusBatchResponse:
+    """Fetch many job statuses from the cache, then BatchGetItem for misses."""
+    job_ids = list(dict.fromkeys(job_ids))
+    if len(job_ids) > MAX_STATUS_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_STATUS_BATCH} job IDs per request"
+        )
+
+    jobs = {}
+    with timed('get_job_statuses'):
+        for job_id in job_ids:
+            cached = job_status_cache.get(job_id)
+            if cached is not None:
+                jobs[job_id] = JobStatusEntry(**cached)
+
+        missing = [job_id for job_id in job_ids if job_id not in jobs]
+        if missing:
+            try:
+                tasks = await run_blocking(
+                    batch_get_tasks,
+                    table_name=DYNAMODB_TABLE,
+                    task_ids=missing,
+                    region=AWS_REGION,
+                    consistent_read=any(job_status_cache.is_fresh(job_id) for job_id in missing)
+                )
+            except Exception as e:
+                print(f"Error retrieving job statuses: {e}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to retrieve job statuses: {str(e)}"
+                )
+
+            for task in tasks:
+                eta_estimator.observe(task)
+                entry = task_to_status_entry(task)
+                job_status_cache.put(task['task_id'], entry.dict())
+                jobs[task['task_id']] = entry
+
+    return JobStatusBatchResponse(
+        jobs=jobs,
+        not_found=[job_id for job_id in job_ids if job_id not in jobs]
+    )
+
+
+@app.get("/api/v1/jobs/status", response_model=JobStatusBatchResponse)
+async def get_job_statuses_query(ids: str = Query(..., description="Comma-separated job IDs")):
     """
-    Get the status of any job (camera-angle or qwen-image-edit).
+    Get the status of up to 100 jobs in one call.
 
-    This endpoint simply queries DynamoDB and returns the current state.
-    The orchestrator does NOT process tasks - it only reports their status.
+    Example: GET /api/v1/jobs/status?ids=id1,id2,id3
+    """
+    return await get_job_statuses(parse_job_ids(ids))
+
+
+@app.post("/api/v1/jobs/status", response_model=JobStatusBatchResponse)
+async def get_job_statuses_body(request: JobStatusBatchRequest):
+    """
+    Get the status of up to 100 jobs in one call.
+
+    Clients polling many jobs should use this instead of one
+    GET /api/v1/jobs/{job_id} per job: one request per poll tick,
+    backed by BatchGetItem, regardless of how many jobs are tracked.
+    """
+    return await get_job_statuses(request.job_ids)
 
-    Includes retry logic: if job not found on first attempt, waits 1 second and retries.
-    This handles eventual consistency issues with DynamoDB.
+
+# ==================== Job Status Streams ====================
+
+@app.get("/api/v1/jobs/stream")
+async def stream_job_statuses(request: Request, ids: str = Query(..., description="Comma-separated job IDs")):
     """
+    Stream status changes for up to 100 jobs as Server-Sent Events.
+
+    Each change is sent as a `status` event whose data is
+    {"job_id", "status", "result_url", "error"}. Jobs are dropped after a
+    terminal status (or status "not_found"); a final `done` event is sent
+    once every job has finished.
+
+    All streams share one watcher that reads watched jobs with a single
+    BatchGetItem per tick, so clients no longer poll per job.
+
+    Example: GET /api/v1/jobs/stream?ids=id1,id2
+    """
+    job_ids = list(dict.fromkeys(parse_job_ids(ids)))
+    if len(job_ids) > MAX_STATUS_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_STATUS_BATCH} job IDs per stream"
+        )
+
+    subscription = job_watcher.subscribe(job_ids)
+
+    async def events():
+        try:
+            while subscription.active:
+                try:
+                    update = await asyncio.wait_for(subscription.queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(update)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        finally:
+            job_watcher.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/api/v1/jobs/ws")
+async def job_status_socket(websocket: WebSocket):
+    """
+    Watch job statuses over a WebSocket.
+
+    Client messages:
+        {"action": "subscribe", "job_ids": ["id1", ...]}
+        {"action": "unsubscribe", "job_ids": ["id1", ...]}
+
+    Server messages are status changes:
+        {"job_id", "status", "result_url", "error"}
+    with status "not_found" for jobs that never appeared. Finished jobs are
+    dropped automatically; at most 100 jobs are watched per connection.
+    """
+    await websocket.accept()
+    subscription = job_watcher.subscribe([])
+
+    async def send_updates():
+        try:
+            while True:
+                update = await subscription.queue.get()
+                await websocket.send_json(update)
+        except (WebSocketDisconnect, RuntimeError):
+            # Socket closed; the receive loop below handles cleanup
+            pass
+
+    sender = asyncio.create_task(send_updates())
     try:
-        # First attempt
-        task = get_task_status(
+        while True:
+            try:
+                message = await websocket.receive_json()
+                action = message.get("action")
+                job_ids = [str(job_id) for job_id in message.get("job_ids", [])]
+            except (ValueError, AttributeError, TypeError):
+                await websocket.send_json({"error": "Expected {\"action\": ..., \"job_ids\": [...]}"})
+                continue
+
+            if action == "subscribe":
+                new_ids = [job_id for job_id in dict.fromkeys(job_ids) if job_id not in subscription.job_ids]
+                if len(subscription.job_ids) + len(new_ids) > MAX_STATUS_BATCH:
+                    await websocket.send_json({"error": f"At most {MAX_STATUS_BATCH} jobs per connection"})
+                    continue
+                job_watcher.subscribe(new_ids, subscription)
+            elif action == "unsubscribe":
+                job_watcher.unsubscribe(subscription, job_ids)
+            else:
+                await websocket.send_json({"error": f"Unknown action: {action}"})
+
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        job_watcher.unsubscribe(subscription)
+
+
+@app.get("/debug/job-watcher")
+async def get_job_watcher_info():
+    """Report the shared job status watcher counters."""
+    return job_watcher.snapshot()
+
+
+async def read_job_status(job_id: str) -> Optional[JobStatusEntry]:
+    """
+    Read one job's status through the job status cache.
+
+    Jobs created by this orchestrator are read with ConsistentRead while
+    fresh. Any other job that is not found is retried once with a
+    consistent read (it may have just been created by another replica).
+
+    Returns:
+        JobStatusEntry, or None if the job does not exist
+
+    Raises:
+        ClientError: If the DynamoDB read fails
+    """
+    cached = job_status_cache.get(job_id)
+    if cached is not None:
+        return JobStatusEntry(**cached)
+
+    fresh = job_status_cache.is_fresh(job_id)
+    task = await run_blocking(
+        get_task_status,
+        table_name=DYNAMODB_TABLE,
+        task_id=job_id,
+        region=AWS_REGION,
+        consistent_read=fresh
+    )
+
+    # Eventually consistent miss: retry once, strongly consistent
+    if not task and not fresh:
+        print(f"Job {job_id} not found on first attempt, retrying with consistent read...")
+        task = await run_blocking(
+            get_task_status,
             table_name=DYNAMODB_TABLE,
             task_id=job_id,
-            region=AWS_REGION
+            region=AWS_REGION,
+            consistent_read=True
         )
 
-        # If not found, wait 1 second and retry once
-        if not task:
-            import time
-            time.sleep(1)
-            print(f"Job {job_id} not found on first attempt, retrying...")
-            task = get_task_status(
+    if not task:
+        return None
+
+    eta_estimator.observe(task)
+    entry = task_to_status_entry(task)
+    job_status_cache.put(job_id, entry.dict())
+    return entry
+
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the status of any job (camera-angle or qwen-image-edit).
+
+    This endpoint reads the job status cache first and only queries DynamoDB
+    on a miss. Finished jobs are served from the cache indefinitely.
+    The orchestrator does NOT process tasks - it only reports their status.
+
+    Pending and processing jobs include estimated_start and
+    estimated_completion (epoch seconds) when an estimate is available.
+    """
+    with timed('get_job_status'):
+        try:
+            entry = await read_job_status(job_id)
+            if entry is None:
+                raise HTTPException(status_code=404, detail="Job not found")
+
+            return job_response(job_id, entry)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error retrieving job status: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to retrieve job status: {str(e)}"
+            )
+
+
+@app.delete("/api/v1/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancel a pending, processing or waiting (pipeline stage) job.
+
+    The task is marked 'cancelled' with a conditional write. The adapter
+    drops a cancelled task when it dequeues it, and interrupts the
+    ComfyUI job of a task that is already running, so the GPU moves on
+    to the next job at once. A job still held by the fair queue is
+    dropped from it. Cancelling a cancelled job is a no-op.
+
+    Raises:
+        HTTPException: 404 if the job does not exist, 409 if it has
+                       already completed or failed
+    """
+    with timed('cancel_job'):
+        try:
+            previous = await run_blocking(
+                cancel_task,
                 table_name=DYNAMODB_TABLE,
                 task_id=job_id,
                 region=AWS_REGION
             )
+            if previous is None:
+                task = await run_blocking(
+                    get_task_status,
+                    table_name=DYNAMODB_TABLE,
+                    task_id=job_id,
+                    region=AWS_REGION,
+                    consistent_read=True
+                )
+                if not task:
+                    raise HTTPException(status_code=404, detail="Job not found")
+                entry = task_to_status_entry(task)
+                job_status_cache.put(job_id, entry.dict())
+                if entry.status != 'cancelled':
+                    raise HTTPException(status_code=409, detail=f"Job already {entry.status}")
+                return job_response(job_id, entry)
+
+            metrics.count_cancellation(previous.get('status', 'unknown'))
+            job_status_cache.on_status_written(job_id, 'cancelled')
+            if previous.get('held_message'):
+                fair_queue.discard(job_id)
+            print(f"Job {job_id} cancelled (was {previous.get('status')})")
+            if previous.get('next_stages'):
+                # Pipeline stage: nothing downstream can run any more
+                await run_blocking(skip_downstream, previous['next_stages'], 'cancelled', f"Upstream job {job_id} cancelled")
+            return job_response(job_id, JobStatusEntry(status='cancelled'))
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error cancelling job: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to cancel job: {str(e)}"
+            )
 
-        if not task:
-            raise HTTPException(status_code=404, detail="Job not found")
 
-        return JobResponse(
-            job_id=job_id,
-            status=task.get('status', 'unknown'),
-            result_url=task.get('result_url') or task.get('result_s3_uri'),  # Try both field names
-            error=task.get('error') or task.get('error_message')  # Try both field names
-        )
+@app.get("/debug/job-status-cache")
+async def get_job_status_cache_info():
+    """Report job status cache size and hit rate."""
+    return job_status_cache.snapshot()
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error retrieving job status: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to retrieve job status: {str(e)}"
-        )
+
+@app.get("/debug/admission")
+async def get_admission_info():
+    """Get admission control limits, backlog estimates and counters."""
+    return admission.snapshot()
+
+
+@app.get("/debug/fair-queue")
+async def get_fair_queue_info():
+    """Get held GPU jobs per tenant, round-robin deficits and rate cap counters."""
+    return {**fair_queue.snapshot(), "rate_cap": tenant_limiter.snapshot()}
+
+@app.get("/debug/staging")
+async def get_staging_info():
+    """Get input staging settings and counters."""
+    return input_stager.snapshot()
+
+
+@app.get("/debug/eta")
+async def get_eta_info():
+    """Get rolling per job type latency statistics and current expected waits."""
+    return eta_estimator.snapshot()
+
+
+@app.get("/debug/result-cache")
+async def get_result_cache_info():
+    """Report content-addressed result cache hits, attaches and bypasses."""
+    return result_cache.snapshot()
 
 # ==================== Image Management ====================
 
@@ -572,7 +2095,7 @@ async def delete_image(s3_key: str):
     """
     try:
         # Delete from S3
-        s3_client = boto3.client('s3', region_name=AWS_REGION)
+        s3_client = get_client('s3', AWS_REGION)
         s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
 
         print(f"Deleted image from S3: s3://{S3_BUCKET_NAME}/{s3_key}")
@@ -599,6 +2122,6 @@ if __name__ == "__main__":
     print(f"AWS Region: {AWS_REGION}")
     print(f"SQS Queue: {SQS_QUEUE_URL}")
     print(f"DynamoDB Table: {DYNAMODB_TABLE}")
-    print(f"GPU Instance: {GPU_INSTANCE_ID}")
+    print(f"GPU Instances: {', '.join(GPU_INSTANCE_IDS)}")
 
     uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -0,0 +1,90 @@
+"""
+Multi-Stage Job Pipelines
+
+Planning and status for POST /api/v1/pipelines: a DAG of job steps whose
+inputs reference earlier steps' results ("{{step.result_url}}").
+
+- plan_pipeline() validates the spec and orders the steps topologically.
+- Stages run as ordinary tasks on their CPU or GPU queue; the hand-off
+  between stages is done by the adapters (pipeline_stages.finish_stage),
+  so a pipeline's latency is the sum of its execution times with no
+  client polling gaps.
+- The pipeline itself is a 'pipeline#<id>' item in the task table (no
+  status attribute, so it stays out of the status GSI); its status is
+  derived from its stages' statuses on read.
+"""
+
+import os
+from typing import Any, Dict, List
+
+from pipeline_stages import find_references
+
+# Max steps per pipeline
+MAX_PIPELINE_STEPS = int(os.getenv('MAX_PIPELINE_STEPS', '10'))
+
+
+def plan_pipeline(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate a pipeline spec and order it so every step follows its dependencies.
+
+    Args:
+        steps: [{'id', 'job_type', 'request'}, ...]
+
+    Returns:
+        The steps in topological order, each with 'depends_on' (sorted step
+        IDs) and 'next_steps' (step IDs that depend on it)
+
+    Raises:
+        ValueError: Duplicate IDs, unknown references or a cycle
+    """
+    by_id = {}
+    for step in steps:
+        if step['id'] in by_id:
+            raise ValueError(f"Duplicate step id '{step['id']}'")
+        by_id[step['id']] = dict(step, next_steps=[])
+
+    for step in by_id.values():
+        depends_on = sorted(find_references(step['request']))
+        unknown = [ref for ref in depends_on if ref not in by_id]
+        if unknown:
+            raise ValueError(f"Step '{step['id']}' references unknown step(s): {', '.join(unknown)}")
+        if step['id'] in depends_on:
+            raise ValueError(f"Step '{step['id']}' references itself")
+        step['depends_on'] = depends_on
+        for ref in depends_on:
+            by_id[ref]['next_steps'].append(step['id'])
+
+    # Kahn's algorithm, keeping the request order among ready steps
+    remaining = {step_id: len(step['depends_on']) for step_id, step in by_id.items()}
+    ready = [step['id'] for step in steps if not remaining[step['id']]]
+    ordered = []
+    while ready:
+        step_id = ready.pop(0)
+        ordered.append(by_id[step_id])
+        for next_id in by_id[step_id]['next_steps']:
+            remaining[next_id] -= 1
+            if not remaining[next_id]:
+                ready.append(next_id)
+
+    if len(ordered) != len(by_id):
+        cycle = sorted(step_id for step_id, count in remaining.items() if count)
+        raise ValueError(f"Pipeline has a cycle between steps: {', '.join(cycle)}")
+    return ordered
+
+
+def pipeline_status(statuses: List[str]) -> str:
+    """
+    Overall status of a pipeline from its stages' statuses.
+
+    failed/cancelled as soon as any stage is; completed once all are;
+    processing once any stage has started; pending otherwise.
+    """
+    if 'failed' in statuses:
+        return 'failed'
+    if 'cancelled' in statuses:
+        return 'cancelled'
+    if all(status == 'completed' for status in statuses):
+        return 'completed'
+    if any(status in ('processing', 'completed') for status in statuses):
+        return 'processing'
+    return 'pending'
@@ -0,0 +1,204 @@
+"""
+Content-Addressed Result Cache
+
+Identical GPU requests (same parameters, same seed, same input images) are
+rendered once.
+
+- The request key is a SHA-256 of the canonical request body, with every
+  input image URL replaced by an identity of its content. For s3:// inputs
+  that is the S3 ETag alone (a content hash), so the same object hashes the
+  same under any key. HTTP ETags are only unique per resource (nginx-style
+  mtime-size ETags collide across hosts), so http(s) inputs keep their
+  host and path next to the ETag; only the query string is dropped, so
+  differently presigned URLs of one object still hash the same.
+- The key maps to a job in a result index stored in the task table
+  ('result#<hash>', see aws.dynamodb.get_result_index).
+- Requests without a seed are nondeterministic and bypass the cache, as do
+  requests whose inputs have no ETag.
+
+All boto3 and HTTP calls run on the executor passed in, never on the event loop.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from aws.clients import get_client
+from aws.dynamodb import get_result_index, put_result_index
+
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', '1') != '0'
+# Lifetime of a result index entry (days)
+RESULT_CACHE_TTL_DAYS = int(os.getenv('RESULT_CACHE_TTL_DAYS', '7'))
+# A claimed job may not be written yet; treat it as pending for this long (seconds)
+RESULT_CLAIM_GRACE_SECONDS = int(os.getenv('RESULT_CLAIM_GRACE_SECONDS', '60'))
+# Timeout for HEAD requests against http(s) inputs (seconds)
+INPUT_HEAD_TIMEOUT = float(os.getenv('RESULT_CACHE_HEAD_TIMEOUT', '3'))
+
+# Request fields holding input image URLs
+IMAGE_FIELDS = ('image_url', 'image2_url', 'image3_url')
+
+
+def get_input_etag(url: str, region: str) -> Optional[str]:
+    """
+    Get the ETag of an input image without downloading it.
+
+    Args:
+        url: s3://bucket/key or http(s) URL
+        region: AWS region name (for s3:// URLs)
+
+    Returns:
+        ETag without quotes, or None if it cannot be determined
+    """
+    try:
+        if url.startswith('s3://'):
+            parsed = urlparse(url)
+            response = get_client('s3', region).head_object(Bucket=parsed.netloc, Key=parsed.path.lstrip('/'))
+            etag = response.get('ETag')
+        elif url.startswith(('http://', 'https://')):
+            response = requests.head(url, timeout=INPUT_HEAD_TIMEOUT, allow_redirects=True)
+            if response.status_code != 200:
+                return None
+            etag = response.headers.get('ETag')
+        else:
+            return None
+    except Exception as e:
+        print(f"Could not get ETag for {url}: {e}")
+        return None
+
+    if not etag:
+        return None
+    # Weak validators (W/"...") don't identify content byte-for-byte
+    if etag.startswith('W/'):
+        return None
+    return etag.strip('"')
+
+
+def input_identity(url: str, etag: str) -> Dict[str, str]:
+    """
+    Identify an input image's content for the request hash.
+
+    Args:
+        url: s3://bucket/key or http(s) URL of the input
+        etag: ETag of the input (get_input_etag)
+
+    Returns:
+        {'etag': ...} for s3:// inputs, {'origin': host/path, 'etag': ...} otherwise
+    """
+    if url.startswith('s3://'):
+        return {'etag': etag}
+    parsed = urlparse(url)
+    return {'origin': f"{parsed.netloc.lower()}{parsed.path}", 'etag': etag}
+
+
+def compute_request_hash(api_path: str, request_body: Dict[str, Any], inputs: Dict[str, Dict[str, str]]) -> str:
+    """
+    Compute the canonical hash of a request.
+
+    Args:
+        api_path: ComfyUI API path the request is sent to
+        request_body: Validated request body (all defaults filled in)
+        inputs: Image field name -> input_identity() of the input at that field
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    body = {key: value for key, value in request_body.items() if value is not None}
+    for field, identity in inputs.items():
+        body[field] = identity
+    canonical = json.dumps({'api_path': api_path, 'request': body}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Result index lookups and claims for deterministic GPU requests."""
+
+    def __init__(self, table_name: str, region: str, executor: Executor):
+        self.table_name = table_name
+        self.region = region
+        self.executor = executor
+
+        self.completed_hits = 0
+        self.attached = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def request_key(self, api_path: str, request_body: Dict[str, Any]) -> Optional[str]:
+        """
+        Compute the cache key of a request, or None if it must bypass the cache.
+
+        Args:
+            api_path: ComfyUI API path the request is sent to
+            request_body: Validated request body
+
+        Returns:
+            Request hash, or None (cache disabled, no seed, or unknown inputs)
+        """
+        if not RESULT_CACHE_ENABLED or request_body.get('seed') is None:
+            self.bypassed += 1
+            return None
+
+        fields = [field for field in IMAGE_FIELDS if request_body.get(field)]
+        etags = await asyncio.gather(*[
+            self._run_blocking(get_input_etag, request_body[field], self.region)
+            for field in fields
+        ])
+        if any(etag is None for etag in etags):
+            self.bypassed += 1
+            return None
+
+        return compute_request_hash(api_path, request_body, {
+            field: input_identity(request_body[field], etag) for field, etag in zip(fields, etags)
+        })
+
+    async def lookup(self, request_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the index entry ('job_id', 'created_at') for a request hash, if any."""
+        return await self._run_blocking(
+            get_result_index,
+            table_name=self.table_name,
+            request_hash=request_hash,
+            region=self.region
+        )
+
+    async def claim(self, request_hash: str, job_id: str, replace_job_id: Optional[str] = None) -> bool:
+        """
+        Point a request hash at a new job.
+
+        Args:
+            request_hash: Request hash from request_key()
+            job_id: The job about to be submitted
+            replace_job_id: Indexed job that may be replaced (failed or missing)
+
+        Returns:
+            True if claimed, False if a concurrent submission claimed it first
+        """
+        return await self._run_blocking(
+            put_result_index,
+            table_name=self.table_name,
+            request_hash=request_hash,
+            job_id=job_id,
+            region=self.region,
+            replace_job_id=replace_job_id,
+            ttl_seconds=RESULT_CACHE_TTL_DAYS * 86400
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return result cache counters for debug endpoints."""
+        return {
+            "enabled": RESULT_CACHE_ENABLED,
+            "ttl_days": RESULT_CACHE_TTL_DAYS,
+            "completed_hits": self.completed_hits,
+            "attached": self.attached,
+            "misses": self.misses,
+            "bypassed": self.bypassed
+        }
@@ -0,0 +1,375 @@
+"""
+Input Pre-Staging During GPU Cold Starts
+
+While the GPU instance is stopped or booting, a submitted job would sit in
+SQS for minutes and the adapter would then download its inputs serially
+from arbitrary HTTP/CloudFront URLs. The orchestrator uses that dead time:
+
+- Every input image URL of a GPU job (image_url, image2_url, image3_url)
+  is fetched, decoded and validated as an image.
+- The image is normalized the way the workflow would anyway: EXIF
+  orientation applied (as ComfyUI's LoadImage does), converted to RGB and
+  downscaled with Lanczos to the megapixels of the workflow's
+  ImageScaleToTotalPixels node. Smaller images are left for the node to
+  upscale on the GPU.
+- The result is written as PNG to STAGING_PREFIX/<task id>/<field>.png in
+  the same-region assets bucket, and the SQS message carries the staged
+  s3:// keys instead of the original URLs. The prefix is expired by an S3
+  lifecycle rule (infra StagingStack, STAGING_EXPIRE_DAYS).
+
+Staging never delays the 202: the request path only runs check() (URL
+schemes), writes the task record with the message it would have sent
+(held_message, or a waiting pipeline stage's stage_message) and hands the
+job to spawn(). The background task stages the inputs, rewrites that
+message and only then sends it. Bad inputs (missing, 4xx, not a decodable
+image, too large) fail the task without waking the GPU. Transient
+problems (timeouts, 5xx, S3 errors) leave the original URL in place for
+the GPU to fetch as before, as does running out of STAGING_TIMEOUT_SECONDS.
+Failing to write the staging prefix also leaves the original URL, but is
+counted separately (write_failures) since it is a deployment problem.
+
+The orchestrator runs inside the VPC, so it only fetches from the assets
+bucket, its CloudFront domain (CLOUDFRONT_DOMAIN) and STAGING_ALLOWED_HOSTS,
+without following redirects. Inputs elsewhere are left for the GPU to fetch.
+
+All fetching and image work runs on the executor passed in, never on the
+event loop.
+"""
+
+import asyncio
+import functools
+import io
+import math
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Coroutine, Dict, List, Set, Tuple
+from urllib.parse import urlparse
+
+import requests
+from botocore.exceptions import ClientError
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from aws.clients import get_client
+from result_cache import IMAGE_FIELDS
+
+# When to stage: 'cold' (GPU not running), 'always' or 'off'
+STAGING_MODE = os.getenv('STAGING_MODE', 'cold')
+# Key prefix of staged inputs in the assets bucket
+STAGING_PREFIX = os.getenv('STAGING_PREFIX', 'staging').strip('/')
+# Time budget for staging one job's inputs; past it the original URLs are kept
+STAGING_TIMEOUT_SECONDS = float(os.getenv('STAGING_TIMEOUT_SECONDS', '10'))
+# Timeout for fetching one http(s) input (seconds)
+STAGING_FETCH_TIMEOUT = float(os.getenv('STAGING_FETCH_TIMEOUT', '8'))
+# Largest input accepted (bytes)
+STAGING_MAX_INPUT_BYTES = int(os.getenv('STAGING_MAX_INPUT_BYTES', str(25 * 1024 * 1024)))
+# CloudFront domain in front of the assets bucket (with or without https://)
+CLOUDFRONT_DOMAIN = os.getenv('CLOUDFRONT_DOMAIN', '')
+# Further hosts http(s) inputs may be fetched from, comma-separated
+STAGING_ALLOWED_HOSTS = os.getenv('STAGING_ALLOWED_HOSTS', '')
+
+# Megapixels of the ImageScaleToTotalPixels node in each job type's workflow
+# (comfyui-api-service/workflows); ComfyUI counts a megapixel as 1024 * 1024
+WORKFLOW_MEGAPIXELS = {
+    'camera-angle': 1.0,
+    'qwen-image-edit': 1.0,
+}
+
+# Refuse decompression bombs instead of only warning about them
+Image.MAX_IMAGE_PIXELS = 64 * 1024 * 1024
+
+
+class InputRejected(ValueError):
+    """An input is missing or is not a usable image."""
+
+
+class InputUnavailable(Exception):
+    """An input could not be fetched right now; the GPU should try itself."""
+
+
+class StagingWriteFailed(Exception):
+    """A staged input could not be written to the staging prefix."""
+
+
+def fetch_input(url: str, region: str) -> bytes:
+    """
+    Download an input image.
+
+    Args:
+        url: s3://bucket/key or http(s) URL
+        region: AWS region name (for s3:// URLs)
+
+    Returns:
+        The raw bytes
+
+    Raises:
+        InputRejected: The input does not exist, is forbidden or is too large
+        InputUnavailable: Timeouts, 5xx or other transient errors
+    """
+    if url.startswith('s3://'):
+        parsed = urlparse(url)
+        try:
+            response = get_client('s3', region).get_object(Bucket=parsed.netloc, Key=parsed.path.lstrip('/'))
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code in ('NoSuchKey', 'NoSuchBucket', 'AccessDenied', '404', '403'):
+                raise InputRejected(f"Cannot read {url}: {code}")
+            raise InputUnavailable(f"Cannot read {url}: {code}")
+        if response.get('ContentLength', 0) > STAGING_MAX_INPUT_BYTES:
+            raise InputRejected(f"{url} is larger than {STAGING_MAX_INPUT_BYTES} bytes")
+        return response['Body'].read()
+
+    if not url.startswith(('http://', 'https://')):
+        raise InputRejected(f"Unsupported image URL: {url}. Must start with s3://, http:// or https://")
+
+    try:
+        # No redirects: an allowed host must not send us somewhere inside the VPC
+        response = requests.get(url, stream=True, timeout=STAGING_FETCH_TIMEOUT, allow_redirects=False)
+    except requests.RequestException as e:
+        raise InputUnavailable(f"Cannot fetch {url}: {e}")
+    with response:
+        if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+            raise InputRejected(f"Cannot fetch {url}: HTTP {response.status_code}")
+        if response.status_code != 200:
+            raise InputUnavailable(f"Cannot fetch {url}: HTTP {response.status_code}")
+        data = bytearray()
+        try:
+            for chunk in response.iter_content(chunk_size=65536):
+                data.extend(chunk)
+                if len(data) > STAGING_MAX_INPUT_BYTES:
+                    raise InputRejected(f"{url} is larger than {STAGING_MAX_INPUT_BYTES} bytes")
+        except requests.RequestException as e:
+            raise InputUnavailable(f"Cannot fetch {url}: {e}")
+    return bytes(data)
+
+
+def normalize_image(data: bytes, megapixels: float) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Decode an image and normalize it the way the workflow would.
+
+    Args:
+        data: Raw image bytes
+        megapixels: Target size of the workflow's ImageScaleToTotalPixels node
+
+    Returns:
+        (PNG bytes, (width, height)) of the normalized image
+
+    Raises:
+        InputRejected: The bytes are not a decodable image
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        image = ImageOps.exif_transpose(image)
+    except UnidentifiedImageError:
+        raise InputRejected("Not a decodable image")
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InputRejected(f"Not a decodable image: {e}")
+
+    image = image.convert('RGB')
+    total = int(megapixels * 1024 * 1024)
+    width, height = image.size
+    if width * height > total:
+        # Same arithmetic as ImageScaleToTotalPixels
+        scale = math.sqrt(total / (width * height))
+        image = image.resize((round(width * scale), round(height * scale)), Image.LANCZOS)
+
+    out = io.BytesIO()
+    image.save(out, format='PNG')
+    return out.getvalue(), image.size
+
+
+class InputStager:
+    """Fetches, validates and normalizes GPU job inputs into the staging prefix."""
+
+    def __init__(
+        self,
+        bucket_name: str,
+        region: str,
+        executor: Executor,
+        is_cold: Callable[[], bool]
+    ):
+        """
+        Args:
+            bucket_name: Same-region assets bucket the GPU reads from
+            region: AWS region name
+            executor: Executor for downloads and image work
+            is_cold: Returns True while the GPU is not running
+        """
+        self.bucket_name = bucket_name
+        self.region = region
+        self.executor = executor
+        self.is_cold = is_cold
+        self.allowed_hosts = {
+            f"{bucket_name}.s3.amazonaws.com",
+            f"{bucket_name}.s3.{region}.amazonaws.com",
+            f"{bucket_name}.s3-{region}.amazonaws.com",
+        }
+        for host in [CLOUDFRONT_DOMAIN] + STAGING_ALLOWED_HOSTS.split(','):
+            host = host.strip()
+            if host:
+                self.allowed_hosts.add((urlparse(host).hostname if '://' in host else host.split('/')[0]).lower())
+
+        # Background staging tasks (kept referenced until done)
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.staged = 0
+        self.rejected = 0
+        self.passed_through = 0
+        self.write_failures = 0
+        self.not_allowed = 0
+        self.timeouts = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_total = 0.0
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def should_stage(self, job_type: str) -> bool:
+        """Whether inputs of this job type are staged right now."""
+        if job_type not in WORKFLOW_MEGAPIXELS or STAGING_MODE == 'off':
+            return False
+        return STAGING_MODE == 'always' or self.is_cold()
+
+    def allowed(self, url: str) -> bool:
+        """Whether the orchestrator may fetch an input (assets bucket, CloudFront or allow-list)."""
+        parsed = urlparse(url)
+        if parsed.scheme == 's3':
+            return parsed.netloc == self.bucket_name
+        return parsed.scheme in ('http', 'https') and (parsed.hostname or '').lower() in self.allowed_hosts
+
+    @staticmethod
+    def input_fields(request_body: Dict[str, Any]) -> List[str]:
+        """Image fields holding a URL (not a pipeline "{{step.result_url}}" reference)."""
+        return [
+            field for field in IMAGE_FIELDS
+            if isinstance(request_body.get(field), str) and not request_body[field].startswith('{{')
+        ]
+
+    def check(self, request_body: Dict[str, Any]) -> None:
+        """
+        Cheap validation done before a job is accepted (no network calls).
+
+        Raises:
+            InputRejected: An input URL has an unsupported scheme
+        """
+        for field in self.input_fields(request_body):
+            if not request_body[field].startswith(('s3://', 'http://', 'https://')):
+                self.rejected += 1
+                raise InputRejected(f"{field}: Unsupported image URL. Must start with s3://, http:// or https://")
+
+    def spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a staging coroutine in the background (call from the running event loop)."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> None:
+        """Cancel unfinished staging; those jobs are recovered from their held records."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _stage_one(self, task_id: str, field: str, url: str, megapixels: float) -> str:
+        """Stage one input (blocking) and return its s3:// URI."""
+        data = fetch_input(url, self.region)
+        png, size = normalize_image(data, megapixels)
+        key = f"{STAGING_PREFIX}/{task_id}/{field}.png"
+        try:
+            get_client('s3', self.region).put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=png,
+                ContentType='image/png'
+            )
+        except ClientError as e:
+            raise StagingWriteFailed(f"Cannot write s3://{self.bucket_name}/{key}: {e}")
+        self.bytes_in += len(data)
+        self.bytes_out += len(png)
+        print(f"Staged {field} of {task_id}: {len(data)} -> {len(png)} bytes ({size[0]}x{size[1]})")
+        return f"s3://{self.bucket_name}/{key}"
+
+    async def stage(self, task_id: str, job_type: str, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Stage every input image of a GPU job.
+
+        Values that are not URLs (e.g. pipeline "{{step.result_url}}"
+        references) and URLs the orchestrator may not fetch (allowed())
+        are left alone.
+
+        Args:
+            task_id: Task ID the staged keys are named after
+            job_type: Job type (selects the workflow's target size)
+            request_body: Validated request body
+
+        Returns:
+            A copy of the request body pointing at the staged inputs (inputs
+            that could not be staged in time keep their original URL)
+
+        Raises:
+            InputRejected: An input is missing or not a usable image
+        """
+        megapixels = WORKFLOW_MEGAPIXELS[job_type]
+        fields = []
+        for field in self.input_fields(request_body):
+            if self.allowed(request_body[field]):
+                fields.append(field)
+            else:
+                self.not_allowed += 1
+        if not fields:
+            return request_body
+
+        started = time.time()
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*[
+                    self._run_blocking(self._stage_one, task_id, field, request_body[field], megapixels)
+                    for field in fields
+                ], return_exceptions=True),
+                timeout=STAGING_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"Staging {task_id} took over {STAGING_TIMEOUT_SECONDS}s, keeping original inputs")
+            return request_body
+        finally:
+            self.seconds_total += time.time() - started
+
+        staged = dict(request_body)
+        for field, result in zip(fields, results):
+            if isinstance(result, InputRejected):
+                self.rejected += 1
+                raise InputRejected(f"{field}: {result}")
+            if isinstance(result, StagingWriteFailed):
+                # Our own bucket/permissions, not the input: keep it out of passed_through
+                self.write_failures += 1
+                print(f"ERROR: Staging write failed for {field} of {task_id}, the GPU will fetch it: {result}")
+                continue
+            if isinstance(result, Exception):
+                self.passed_through += 1
+                print(f"Could not stage {field} of {task_id}, the GPU will fetch it: {result}")
+                continue
+            self.staged += 1
+            staged[field] = result
+        return staged
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return staging settings and counters for debug endpoints."""
+        return {
+            "mode": STAGING_MODE,
+            "prefix": f"s3://{self.bucket_name}/{STAGING_PREFIX}/",
+            "timeout_seconds": STAGING_TIMEOUT_SECONDS,
+            "allowed_hosts": sorted(self.allowed_hosts),
+            "in_progress": len(self._tasks),
+            "staged": self.staged,
+            "rejected": self.rejected,
+            "passed_through": self.passed_through,
+            "write_failures": self.write_failures,
+            "not_allowed": self.not_allowed,
+            "timeouts": self.timeouts,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "seconds_total": round(self.seconds_total, 3)
+        }
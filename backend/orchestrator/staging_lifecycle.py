@@ -0,0 +1,78 @@
+"""
+Lambda Function: Staging Prefix Lifecycle Rule
+
+CloudFormation custom resource (CDK Provider onEvent handler) that keeps an
+S3 lifecycle rule expiring the input staging prefix (see staging.py) on the
+assets bucket. The bucket is not managed by CDK, so the rule is merged into
+its existing lifecycle configuration by rule ID instead of replacing it:
+
+- Create/Update: the rule is added, or replaced if it exists
+- Delete: only this rule is removed (the configuration is deleted once no
+  rules are left)
+
+Resource properties: Bucket, Prefix, ExpirationDays
+
+Trigger: CloudFormation (StagingStack)
+Runtime: Python 3.11
+
+Required IAM Permissions:
+- s3:GetLifecycleConfiguration, s3:PutLifecycleConfiguration on the bucket
+"""
+
+import os
+from typing import Any, Dict, List
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Configuration
+AWS_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+
+RULE_ID = 'expire-orchestrator-staging'
+
+
+def get_rules(s3, bucket: str) -> List[Dict[str, Any]]:
+    """Return the bucket's lifecycle rules (empty if it has none)."""
+    try:
+        return s3.get_bucket_lifecycle_configuration(Bucket=bucket)['Rules']
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchLifecycleConfiguration':
+            return []
+        raise
+
+
+def put_rules(s3, bucket: str, rules: List[Dict[str, Any]]) -> None:
+    """Write the bucket's lifecycle rules (deleting the configuration if empty)."""
+    if rules:
+        s3.put_bucket_lifecycle_configuration(Bucket=bucket, LifecycleConfiguration={'Rules': rules})
+    else:
+        s3.delete_bucket_lifecycle(Bucket=bucket)
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Add, update or remove the staging expiration rule.
+
+    Args:
+        event: CloudFormation custom resource event
+        context: Lambda context
+
+    Returns:
+        PhysicalResourceId of the rule
+    """
+    props = event['ResourceProperties']
+    bucket = props['Bucket']
+    s3 = boto3.client('s3', region_name=AWS_REGION)
+
+    rules = [rule for rule in get_rules(s3, bucket) if rule.get('ID') != RULE_ID]
+    if event['RequestType'] != 'Delete':
+        rules.append({
+            'ID': RULE_ID,
+            'Filter': {'Prefix': props['Prefix']},
+            'Status': 'Enabled',
+            'Expiration': {'Days': int(props['ExpirationDays'])},
+        })
+    put_rules(s3, bucket, rules)
+
+    print(f"{event['RequestType']} lifecycle rule {RULE_ID} on s3://{bucket}/{props['Prefix']}")
+    return {'PhysicalResourceId': f"{bucket}/{RULE_ID}"}
@@ -0,0 +1,267 @@
+"""
+Lambda Function: Archive Terminal Tasks to S3
+
+This Lambda function runs daily and compacts finished task records
+older than TASK_ARCHIVE_AFTER_DAYS into partitioned, gzip-compressed JSON
+Lines files, one UTC day per object:
+
+    s3://<TASK_ARCHIVE_BUCKET>/<TASK_ARCHIVE_PREFIX>dt=YYYY-MM-DD/tasks.jsonl.gz
+
+- Records are read from the status-created_at-index GSI (no table scan).
+- Progress is kept in the 'stats#archive' item ({"archived_until": ts}), so
+  every day is exported once; objects have fixed keys, so re-running a day
+  after a failure overwrites instead of duplicating.
+- Archived records are left to DynamoDB TTL (deletes are free) unless
+  TASK_ARCHIVE_DELETE=1, which deletes them right after the export.
+- read_archived_tasks() reads the archive back, so historical analytics
+  (e.g. the GPU usage model) never scan the hot table.
+
+Trigger: EventBridge schedule (daily)
+Runtime: Python 3.11
+Memory: 512 MB
+Timeout: 15 minutes
+
+Required IAM Permissions:
+- dynamodb:Query (status-created_at-index)
+- dynamodb:GetItem, dynamodb:PutItem (stats#archive)
+- dynamodb:BatchWriteItem (only with TASK_ARCHIVE_DELETE=1)
+- s3:PutObject on the archive prefix
+"""
+
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+
+import boto3
+
+# Configuration
+AWS_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'task_store')
+TASK_ARCHIVE_BUCKET = os.environ.get('TASK_ARCHIVE_BUCKET', os.environ.get('S3_BUCKET_NAME', ''))
+TASK_ARCHIVE_PREFIX = os.environ.get('TASK_ARCHIVE_PREFIX', 'task-archive/')
+# Terminal tasks are archived once they are this old (must be below TASK_TERMINAL_TTL_DAYS)
+TASK_ARCHIVE_AFTER_DAYS = int(os.environ.get('TASK_ARCHIVE_AFTER_DAYS', '7'))
+TASK_ARCHIVE_DELETE = os.environ.get('TASK_ARCHIVE_DELETE', '0') == '1'
+
+ARCHIVED_STATUSES = ('completed', 'failed', 'cancelled')
+STATS_KEY = 'stats#archive'
+DAY = 86400
+
+_clients: Dict[str, Any] = {}
+
+
+def _table():
+    if 'table' not in _clients:
+        _clients['table'] = boto3.resource('dynamodb', region_name=AWS_REGION).Table(DYNAMODB_TABLE)
+    return _clients['table']
+
+
+def _s3():
+    if 's3' not in _clients:
+        _clients['s3'] = boto3.client('s3', region_name=AWS_REGION)
+    return _clients['s3']
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+
+def partition_key(prefix: str, day_start: int) -> str:
+    """S3 key of the archive object holding tasks created on a UTC day."""
+    day = datetime.fromtimestamp(day_start, tz=timezone.utc).strftime('%Y-%m-%d')
+    return f"{prefix}dt={day}/tasks.jsonl.gz"
+
+
+# ==================== Watermark ====================
+
+def get_archived_until() -> Optional[int]:
+    """Return the created_at up to which tasks are archived (None before the first run)."""
+    item = _table().get_item(Key={'task_id': STATS_KEY}).get('Item')
+    return json.loads(item['stats'])['archived_until'] if item else None
+
+
+def set_archived_until(timestamp: int) -> None:
+    # Same layout as aws.dynamodb.put_stats_item (JSON under 'stats')
+    _table().put_item(Item={
+        'task_id': STATS_KEY,
+        'stats': json.dumps({'archived_until': timestamp}),
+        'updated_at': int(time.time())
+    })
+
+
+def oldest_created_at() -> Optional[int]:
+    """created_at of the oldest terminal task still in the table."""
+    oldest = None
+    for status in ARCHIVED_STATUSES:
+        items = _table().query(
+            IndexName='status-created_at-index',
+            KeyConditionExpression='#status = :status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':status': status},
+            ProjectionExpression='created_at',
+            ScanIndexForward=True,
+            Limit=1
+        ).get('Items', [])
+        if items and (oldest is None or int(items[0]['created_at']) < oldest):
+            oldest = int(items[0]['created_at'])
+    return oldest
+
+
+# ==================== Export ====================
+
+def query_day(status: str, day_start: int) -> Iterator[Dict[str, Any]]:
+    """Yield every task with a status created during the UTC day starting at day_start."""
+    kwargs = {
+        'IndexName': 'status-created_at-index',
+        'KeyConditionExpression': '#status = :status AND created_at BETWEEN :start AND :end',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':status': status, ':start': day_start, ':end': day_start + DAY - 1},
+    }
+    while True:
+        response = _table().query(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def export_day(day_start: int) -> Dict[str, Any]:
+    """
+    Write the terminal tasks created on one UTC day to a single gzip JSONL object.
+
+    Args:
+        day_start: Unix timestamp of 00:00 UTC of the day
+
+    Returns:
+        {'key', 'tasks', 'bytes', 'task_ids'}; no object is written for an empty day
+    """
+    buffer = io.BytesIO()
+    task_ids = []
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as archive:
+        for status in ARCHIVED_STATUSES:
+            for item in query_day(status, day_start):
+                archive.write(json.dumps(item, default=_json_default).encode() + b'\n')
+                task_ids.append(item['task_id'])
+
+    key = partition_key(TASK_ARCHIVE_PREFIX, day_start)
+    if task_ids:
+        _s3().put_object(
+            Bucket=TASK_ARCHIVE_BUCKET,
+            Key=key,
+            Body=buffer.getvalue(),
+            ContentType='application/gzip'
+        )
+    return {'key': key, 'tasks': len(task_ids), 'bytes': buffer.tell(), 'task_ids': task_ids}
+
+
+def delete_tasks(task_ids) -> None:
+    with _table().batch_writer() as batch:
+        for task_id in task_ids:
+            batch.delete_item(Key={'task_id': task_id})
+
+
+def archive(now: Optional[float] = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Archive every complete UTC day older than TASK_ARCHIVE_AFTER_DAYS not archived yet.
+
+    Args:
+        now: Current Unix time (defaults to time.time())
+        deadline: Unix time after which no new day is started
+
+    Returns:
+        Summary with the days and tasks archived and the new watermark
+    """
+    now = now or time.time()
+    cutoff = int((now - TASK_ARCHIVE_AFTER_DAYS * DAY) // DAY * DAY)
+
+    day_start = get_archived_until()
+    if day_start is None:
+        oldest = oldest_created_at()
+        day_start = oldest // DAY * DAY if oldest is not None else cutoff
+
+    days, tasks = [], 0
+    while day_start < cutoff:
+        if deadline and time.time() > deadline:
+            print("Deadline reached, remaining days are archived on the next run")
+            break
+        result = export_day(day_start)
+        set_archived_until(day_start + DAY)
+        if result['tasks']:
+            print(f"Archived {result['tasks']} task(s) to s3://{TASK_ARCHIVE_BUCKET}/{result['key']} ({result['bytes']} bytes)")
+            if TASK_ARCHIVE_DELETE:
+                delete_tasks(result['task_ids'])
+            days.append(result['key'])
+            tasks += result['tasks']
+        day_start += DAY
+
+    return {'days': days, 'tasks': tasks, 'archived_until': day_start}
+
+
+# ==================== Read Back ====================
+
+def read_archived_tasks(s3_client, bucket: str, prefix: str, since: int, until: int) -> Iterator[Dict[str, Any]]:
+    """
+    Yield archived tasks created in [since, until).
+
+    Only the daily partitions overlapping the range are read.
+
+    Args:
+        s3_client: boto3 S3 client
+        bucket: Archive bucket
+        prefix: Archive key prefix (e.g., 'task-archive/')
+        since: Unix timestamp (inclusive)
+        until: Unix timestamp (exclusive)
+    """
+    day_start = since // DAY * DAY
+    while day_start < until:
+        try:
+            body = s3_client.get_object(Bucket=bucket, Key=partition_key(prefix, day_start))['Body'].read()
+        except s3_client.exceptions.NoSuchKey:
+            body = None
+        if body:
+            for line in gzip.decompress(body).splitlines():
+                task = json.loads(line)
+                if since <= task.get('created_at', 0) < until:
+                    yield task
+        day_start += DAY
+
+
+def lambda_handler(event, context):
+    """
+    Lambda handler function.
+
+    Args:
+        event: EventBridge scheduled event
+        context: Lambda context
+
+    Returns:
+        Response dictionary with status code and body
+    """
+    print(f"Lambda invoked at {datetime.utcnow().isoformat()}")
+
+    if not TASK_ARCHIVE_BUCKET:
+        print("ERROR: TASK_ARCHIVE_BUCKET is not set")
+        return {'statusCode': 500, 'body': json.dumps({'error': 'TASK_ARCHIVE_BUCKET is not set'})}
+
+    try:
+        # Leave a minute to record the watermark of the day in progress
+        deadline = time.time() + context.get_remaining_time_in_millis() / 1000 - 60 if context else None
+        summary = archive(deadline=deadline)
+        print(f"✓ Archived {summary['tasks']} task(s) over {len(summary['days'])} day(s)")
+        return {'statusCode': 200, 'body': json.dumps(summary)}
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+
+
+# For local testing
+if __name__ == "__main__":
+    print(json.dumps(lambda_handler({}, None), indent=2))
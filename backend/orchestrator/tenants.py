@@ -0,0 +1,189 @@
+"""
+Tenant Identity and Rate Caps
+
+Every job is tagged with the tenant that submitted it, for fair queuing
+(fair_queue.py) and per-tenant limits.
+
+- The tenant is an authenticated identity: the tenant TENANT_API_KEYS
+  maps the request's API key (TENANT_KEY_HEADER, X-API-Key by default) to.
+  Anything the client could pick freely (a tenant header, the first
+  X-Forwarded-For hop) would let one caller spread its jobs over many
+  tenants and bypass the rate cap and fair queuing.
+- Without a known key the tenant is the client address: the X-Forwarded-For
+  entry appended by our own load balancer (TRUSTED_PROXY_HOPS entries from
+  the end), or the socket peer when there is no such header.
+- TenantMiddleware resolves it once per request into a context variable;
+  handlers read it with current_tenant.get().
+- TenantRateLimiter is a token bucket per tenant: TENANT_RATE_PER_MINUTE
+  jobs per minute with bursts of up to TENANT_RATE_BURST. Over the cap a
+  submission gets 429 + Retry-After.
+"""
+
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+# Request header carrying the caller's API key
+TENANT_KEY_HEADER = os.getenv('TENANT_KEY_HEADER', 'X-API-Key')
+# API keys of known tenants, e.g. "k3y...=studio,s3cr3t...=batch-service"
+TENANT_API_KEYS = os.getenv('TENANT_API_KEYS', '')
+# Proxies that append to X-Forwarded-For in front of the orchestrator (ALB = 1, CloudFront + ALB = 2)
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '1'))
+# Jobs per minute per tenant (0 = no rate cap) and the bucket size
+TENANT_RATE_PER_MINUTE = float(os.getenv('TENANT_RATE_PER_MINUTE', '0'))
+TENANT_RATE_BURST = int(os.getenv('TENANT_RATE_BURST', '100'))
+# Max tenants tracked by the rate limiter (least recently seen are dropped)
+TENANT_TRACKED_MAX = int(os.getenv('TENANT_TRACKED_MAX', '10000'))
+
+DEFAULT_TENANT = 'anonymous'
+MAX_TENANT_LENGTH = 64
+
+current_tenant: ContextVar[str] = ContextVar('current_tenant', default=DEFAULT_TENANT)
+
+
+def parse_api_keys(spec: str) -> List[Tuple[bytes, str]]:
+    """
+    Parse the tenant API keys.
+
+    Args:
+        spec: Comma-separated "key=tenant" entries
+
+    Returns:
+        List of (key, tenant)
+
+    Raises:
+        ValueError: If an entry has no key or no tenant
+    """
+    keys = []
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key, _, tenant = entry.rpartition('=')
+        if not key.strip() or not tenant.strip():
+            raise ValueError("Tenant API key entries must be key=tenant")
+        keys.append((key.strip().encode(), tenant.strip()))
+    return keys
+
+
+_api_keys = parse_api_keys(TENANT_API_KEYS)
+
+
+def tenant_for_key(key: bytes) -> Optional[str]:
+    """Return the tenant an API key belongs to, or None if it is unknown."""
+    tenant = None
+    for known, name in _api_keys:
+        # Compare every key in constant time so the lookup does not leak key prefixes
+        if hmac.compare_digest(known, key):
+            tenant = name
+    return tenant
+
+
+def tenant_from_scope(scope) -> str:
+    """
+    Resolve the tenant of an ASGI request.
+
+    Args:
+        scope: ASGI connection scope (HTTP or WebSocket)
+
+    Returns:
+        The API key's tenant, else the client address, else 'anonymous'
+    """
+    headers = dict(scope.get('headers') or [])
+    key = headers.get(TENANT_KEY_HEADER.lower().encode(), b'').strip()
+    tenant = (tenant_for_key(key) if key else None) or ''
+    if not tenant:
+        # Entries before the ones our proxies appended are whatever the client sent
+        hops = [hop.strip() for hop in headers.get(b'x-forwarded-for', b'').decode('latin-1').split(',')]
+        if TRUSTED_PROXY_HOPS > 0 and len(hops) >= TRUSTED_PROXY_HOPS:
+            tenant = hops[-TRUSTED_PROXY_HOPS]
+    if not tenant and scope.get('client'):
+        tenant = scope['client'][0]
+    return tenant[:MAX_TENANT_LENGTH] or DEFAULT_TENANT
+
+
+class TenantMiddleware:
+    """Pure ASGI middleware setting current_tenant for the request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] not in ('http', 'websocket'):
+            await self.app(scope, receive, send)
+            return
+
+        token = current_tenant.set(tenant_from_scope(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
+
+
+class TenantRateLimiter:
+    """Token bucket per tenant over submitted jobs."""
+
+    def __init__(
+        self,
+        per_minute: float = TENANT_RATE_PER_MINUTE,
+        burst: int = TENANT_RATE_BURST,
+        max_tenants: int = TENANT_TRACKED_MAX
+    ):
+        self.rate = per_minute / 60
+        self.burst = max(burst, 1)
+        self.max_tenants = max_tenants
+
+        self._lock = threading.Lock()
+        # tenant -> (tokens, refilled_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, tenant: str, count: int = 1) -> Optional[int]:
+        """
+        Take count jobs from the tenant's bucket.
+
+        Args:
+            tenant: Tenant identity
+            count: Number of jobs submitted together
+
+        Returns:
+            None if admitted, else seconds until the jobs would fit (Retry-After)
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            tokens, refilled_at = self._buckets.pop(tenant, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - refilled_at) * self.rate)
+            # A batch larger than the bucket is let through on a full bucket
+            # and paid off afterwards (the balance goes negative)
+            needed = min(count, self.burst)
+            if tokens >= needed:
+                self._buckets[tenant] = (tokens - count, now)
+                retry_after = None
+            else:
+                self._buckets[tenant] = (tokens, now)
+                self.limited += 1
+                retry_after = int((needed - tokens) / self.rate) + 1
+            while len(self._buckets) > self.max_tenants:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return limiter settings and counters for debug endpoints."""
+        return {
+            "per_minute": TENANT_RATE_PER_MINUTE if self.enabled else None,
+            "burst": self.burst,
+            "tenants_tracked": len(self._buckets),
+            "limited": self.limited
+        }
@@ -0,0 +1,92 @@
+import pathlib
+import sys
+import time
+from typing import Any, Dict, Optional
+
+import pytest
+from fastapi import HTTPException
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from admission import AdmissionController, parse_limits  # noqa: E402
+
+
+class FakeQueueStats:
+    def __init__(self, **depths: int) -> None:
+        self.depths = depths
+        self.updated_at = time.time()
+
+    def __call__(self, name: str) -> Optional[Dict[str, Any]]:
+        if name not in self.depths:
+            return None
+        return {"depth": self.depths[name], "in_flight": 0, "delayed": 0, "updated_at": self.updated_at}
+
+
+def controller(stats: FakeQueueStats) -> AdmissionController:
+    admission = AdmissionController(
+        stats,
+        {"gpu": ["gpu"], "cpu": ["cpu"]},
+        {"camera-angle": "gpu", "face-mask": "cpu"}
+    )
+    admission.limits = {"camera-angle": (10, 20), "face-mask": (10, 20)}
+    return admission
+
+
+def test_parse_limits():
+    assert parse_limits("camera-angle=5:10, face-mask=1:2") == {"camera-angle": (5, 10), "face-mask": (1, 2)}
+    with pytest.raises(ValueError):
+        parse_limits("camera-angle=10:5")
+
+
+def test_soft_and_hard_limits():
+    admission = controller(FakeQueueStats(gpu=5))
+
+    assert admission.check("camera-angle").action == "admit"
+    assert admission.check("camera-angle", count=10).action == "reject"  # soft action defaults to reject
+    assert admission.check("camera-angle", count=10, deferred=True).action == "admit"
+    assert admission.check("camera-angle", count=20, deferred=True).action == "reject"
+
+
+def test_unknown_backlog_admits():
+    admission = controller(FakeQueueStats())
+
+    assert admission.check("camera-angle", count=1000).action == "admit"
+
+
+def test_recorded_jobs_count_until_stats_refresh():
+    admission = controller(FakeQueueStats(gpu=5))
+    admission.record("camera-angle", admission.check("camera-angle", count=4), count=4)
+
+    assert admission.backlog("gpu") == 9
+
+
+@pytest.fixture()
+def api(monkeypatch: pytest.MonkeyPatch):
+    import importlib
+
+    api = importlib.import_module("orchestrator_api")
+    monkeypatch.setattr(api, "admission", controller(FakeQueueStats(gpu=0, cpu=5)))
+    monkeypatch.setattr(api.tenant_limiter, "acquire", lambda tenant, count=1: None)
+    return api
+
+
+def test_admit_all_records_nothing_when_one_type_rejects(api):
+    with pytest.raises(HTTPException) as excinfo:
+        api.admit_all({"camera-angle": 2, "face-mask": 16}, "normal")
+
+    assert excinfo.value.status_code == 429
+    # The admissible camera-angle jobs must not linger in the backlog estimate
+    assert api.admission.backlog("gpu") == 0
+    assert api.admission.admitted == 0
+    assert api.admission.rejected == 16
+
+
+def test_admit_all_records_every_type_when_all_pass(api):
+    decisions = api.admit_all({"camera-angle": 2, "face-mask": 1}, "normal")
+
+    assert {job_type: d.action for job_type, d in decisions.items()} == {"camera-angle": "admit", "face-mask": "admit"}
+    assert api.admission.backlog("gpu") == 2
+    assert api.admission.backlog("cpu") == 6
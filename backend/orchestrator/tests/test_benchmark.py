@@ -0,0 +1,58 @@
+import pathlib
+import sys
+import time
+
+import httpx
+import pytest
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import benchmark  # noqa: E402
+
+
+@pytest.fixture
+def fake_api():
+    api = benchmark.FakeJobApi(latency=0.0, jitter=0.0, failure_rate=0.0)
+    port = benchmark.free_port()
+    api.start(port)
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+        yield client
+    api.stop()
+
+
+def test_fake_api_ignores_query_parameters(fake_api):
+    # The GPU adapter queues interactive jobs with ?front=true
+    response = fake_api.post("/api/v1/camera-angle/jobs", params={"front": "true"}, json={})
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    status = fake_api.get(f"/api/v1/jobs/{job_id}", params={"front": "true"})
+    assert status.status_code == 200
+    assert status.json()["status"] == "completed"
+
+
+def test_fake_api_unknown_paths(fake_api):
+    assert fake_api.post("/api/v1/camera-angle/run", json={}).status_code == 404
+    assert fake_api.get("/api/v1/jobs/missing").status_code == 404
+    assert fake_api.get("/health?probe=1").status_code == 200
+
+
+def test_fake_api_long_poll():
+    api = benchmark.FakeJobApi(latency=0.3, jitter=0.0, failure_rate=0.0)
+    job_id = api.submit()
+
+    assert api.status(job_id)["status"] == "processing"
+    assert api.status(job_id, wait=0.05)["status"] == "processing"
+    started = time.time()
+    assert api.status(job_id, wait=10)["status"] == "completed"
+    assert time.time() - started < 5
+
+
+def test_fake_api_parses_wait(fake_api):
+    job_id = fake_api.post("/api/v1/camera-angle/jobs", json={}).json()["job_id"]
+
+    assert fake_api.get(f"/api/v1/jobs/{job_id}", params={"wait": 5}).json()["status"] == "completed"
+    assert fake_api.get(f"/api/v1/jobs/{job_id}", params={"wait": "soon"}).status_code == 422
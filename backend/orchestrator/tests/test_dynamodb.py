@@ -0,0 +1,97 @@
+import pathlib
+import sys
+
+import pytest
+from botocore.exceptions import ClientError
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from aws import dynamodb  # noqa: E402
+
+THROTTLED = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "Slow down"}}, "BatchWriteItem")
+
+
+class PartialWriter:
+    """Batch writer that writes the first `limit` items, then raises."""
+
+    def __init__(self, table, limit: int) -> None:
+        self.table = table
+        self.limit = limit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def put_item(self, Item):
+        if self.limit == 0:
+            raise THROTTLED
+        self.limit -= 1
+        self.table.put_item(Item=Item)
+
+
+class FlakyTable:
+    def __init__(self, table, limit: int) -> None:
+        self.table = table
+        self.limit = limit
+
+    def batch_writer(self):
+        return PartialWriter(self.table, self.limit)
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    with moto.mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        table = resource.create_table(
+            TableName="tasks",
+            KeySchema=[{"AttributeName": "task_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "task_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        monkeypatch.setattr(dynamodb, "get_resource", lambda service, region: resource)
+        yield table
+
+
+def tasks(count: int):
+    return [
+        {"task_id": f"t{i}", "job_type": "camera-angle", "attributes": {"held_message": "{}", "held_queue_url": "q"}}
+        for i in range(count)
+    ]
+
+
+def test_partially_written_chunk_reports_only_missing_items(monkeypatch, table):
+    monkeypatch.setattr(dynamodb, "get_table", lambda name, region: FlakyTable(table, 2))
+
+    failed = dynamodb.batch_create_tasks("tasks", tasks(4), "us-east-1")
+
+    assert [f["task_id"] for f in failed] == ["t2", "t3"]
+    assert table.get_item(Key={"task_id": "t0"})["Item"]["status"] == "pending"
+
+
+def test_unverifiable_chunk_is_failed_and_released(monkeypatch, table):
+    monkeypatch.setattr(dynamodb, "get_table", lambda name, region: FlakyTable(table, 2))
+
+    def unreadable(*args, **kwargs):
+        raise THROTTLED
+
+    monkeypatch.setattr(dynamodb, "batch_get_tasks", unreadable)
+
+    failed = dynamodb.batch_create_tasks("tasks", tasks(4), "us-east-1")
+
+    assert [f["task_id"] for f in failed] == ["t0", "t1", "t2", "t3"]
+    written = table.get_item(Key={"task_id": "t0"})["Item"]
+    assert written["status"] == "failed"
+    assert "held_message" not in written
+    # Never-written tasks are not created by the cleanup
+    assert "Item" not in table.get_item(Key={"task_id": "t3"})
@@ -0,0 +1,137 @@
+import asyncio
+import importlib
+import json
+import pathlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import pytest
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+fair_queue = importlib.import_module("fair_queue")
+
+QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/123456789012/gpu"
+
+
+class FakeAws:
+    """Queue attributes, task statuses and sends seen by the fair queue."""
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.sent: List[str] = []
+
+    def get_queue_attributes(self, queue_url: str, region: str) -> Dict[str, str]:
+        return {"ApproximateNumberOfMessages": str(self.messages)}
+
+    def batch_get_tasks(self, table_name: str, task_ids: List[str], region: str, consistent_read: bool = False):
+        return [self.tasks[task_id] for task_id in task_ids if task_id in self.tasks]
+
+    def send_message(self, queue_url: str, message_body: str, region: str) -> None:
+        self.sent.append(json.loads(message_body)["task_id"])
+        self.messages += 1
+
+    def release_held_task(self, table_name: str, task_id: str, region: str) -> None:
+        pass
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    fake = FakeAws()
+    for name in ("get_queue_attributes", "batch_get_tasks", "send_message", "release_held_task"):
+        monkeypatch.setattr(fair_queue, name, getattr(fake, name))
+    monkeypatch.setattr(fair_queue, "FAIR_QUEUE_WINDOW", 2)
+    monkeypatch.setattr(fair_queue, "FAIR_FAILING_SECONDS", 600)
+    return fake
+
+
+@pytest.fixture
+def queue(aws):
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield fair_queue.FairQueue(
+        table_name="tasks",
+        region="us-east-1",
+        executor=executor,
+        queue_urls=[QUEUE_URL],
+        get_queue_stats=lambda name: None,
+        queue_names=[],
+        get_workers=lambda: 1,
+        get_cost=lambda job_type: fair_queue.FAIR_QUANTUM_SECONDS
+    )
+    executor.shutdown()
+
+
+def held(task_id: str, tenant: str) -> "fair_queue.HeldJob":
+    return fair_queue.HeldJob(task_id, tenant, "camera-angle", QUEUE_URL, json.dumps({"task_id": task_id}))
+
+
+def test_round_robin_across_tenants(aws, queue):
+    queue.hold([held("a1", "a"), held("a2", "a"), held("a3", "a"), held("b1", "b")])
+
+    assert asyncio.run(queue.release()) == 2
+    assert aws.sent == ["a1", "b1"]
+
+
+def test_failing_messages_do_not_fill_the_window(aws, queue):
+    aws.messages = 2
+    aws.tasks = {
+        "t1": {"task_id": "t1", "status": "failed", "retryable": True},
+        "t2": {"task_id": "t2", "status": "failed", "retryable": True},
+    }
+    queue.note_sent("a", ["t1", "t2"])
+    queue.hold([held("b1", "b")])
+
+    assert asyncio.run(queue.release()) == 1
+    assert aws.sent == ["b1"]
+    assert queue.snapshot()["failing"] == 2
+
+
+def test_failing_messages_count_again_after_the_grace_period(monkeypatch, aws, queue):
+    aws.messages = 2
+    aws.tasks = {
+        "t1": {"task_id": "t1", "status": "failed", "retryable": True},
+        "t2": {"task_id": "t2", "status": "processing"},
+    }
+    queue.note_sent("a", ["t1", "t2"])
+    asyncio.run(queue.refresh())
+    assert queue.snapshot()["failing"] == 1
+
+    # Redelivered and running again: it occupies the window
+    aws.tasks["t1"] = {"task_id": "t1", "status": "processing"}
+    asyncio.run(queue.refresh())
+    assert queue.snapshot()["failing"] == 0
+
+    aws.tasks["t1"] = {"task_id": "t1", "status": "failed", "retryable": True}
+    monkeypatch.setattr(fair_queue, "FAIR_FAILING_SECONDS", -1)
+    queue.hold([held("b1", "b")])
+    assert asyncio.run(queue.release()) == 0
+    assert queue.snapshot()["failing"] == 0
+
+
+def test_finished_tasks_leave_the_tracked_sets(aws, queue):
+    aws.tasks = {
+        "t1": {"task_id": "t1", "status": "completed"},
+        "t2": {"task_id": "t2", "status": "failed"},
+        "t3": {"task_id": "t3", "status": "processing"},
+    }
+    queue.note_sent("a", ["t1", "t2", "t3"])
+
+    asyncio.run(queue.refresh())
+
+    assert queue.snapshot()["in_flight"] == {"a": 1}
+    assert queue.snapshot()["failing"] == 0
+
+
+def test_concurrency_cap_skips_capped_tenant(monkeypatch, aws, queue):
+    monkeypatch.setattr(fair_queue, "TENANT_MAX_CONCURRENCY", 1)
+    aws.tasks = {"t1": {"task_id": "t1", "status": "processing"}}
+    queue.note_sent("a", ["t1"])
+    queue.hold([held("a1", "a"), held("b1", "b")])
+
+    assert asyncio.run(queue.release()) == 1
+    assert aws.sent == ["b1"]
@@ -0,0 +1,130 @@
+import importlib
+import pathlib
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import pytest
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+lambda_shutdown = importlib.import_module("lambda_shutdown")
+
+BOOTED = datetime.now(timezone.utc) - timedelta(hours=1)
+
+
+def instance(instance_id: str, host: str) -> Dict[str, Any]:
+    return {
+        "InstanceId": instance_id,
+        "State": {"Name": "running"},
+        "LaunchTime": BOOTED,
+        "PrivateDnsName": f"{host}.ec2.internal",
+        "PrivateIpAddress": host[3:].replace("-", "."),
+    }
+
+
+class FakeEc2:
+    def __init__(self, instances: List[Dict[str, Any]]) -> None:
+        self.instances = instances
+        self.stopped: List[str] = []
+
+    def describe_instances(self, InstanceIds):
+        return {"Reservations": [{"Instances": self.instances}]}
+
+    def stop_instances(self, InstanceIds):
+        self.stopped.extend(InstanceIds)
+        return {"StoppingInstances": [
+            {"InstanceId": i, "PreviousState": {"Name": "running"}, "CurrentState": {"Name": "stopping"}}
+            for i in InstanceIds
+        ]}
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    ec2 = FakeEc2([instance("i-a", "ip-10-0-1-5"), instance("i-b", "ip-10-0-1-6")])
+    leases: Dict[str, int] = {}
+    monkeypatch.setattr(lambda_shutdown, "ec2_client", ec2)
+    monkeypatch.setattr(lambda_shutdown, "GPU_INSTANCE_IDS", ["i-a", "i-b"])
+    monkeypatch.setattr(lambda_shutdown, "GPU_FLEET_MIN", 0)
+    monkeypatch.setattr(lambda_shutdown, "get_gpu_backlog", lambda: 0)
+    monkeypatch.setattr(lambda_shutdown, "get_average_cpu", lambda instance_id, minutes: {"i-a": 5.0, "i-b": 50.0}[instance_id])
+    monkeypatch.setattr(lambda_shutdown, "get_busy_workers", lambda: {
+        worker.rsplit(":", 1)[0] for worker, expires in leases.items() if expires >= time.time()
+    })
+    return ec2, leases
+
+
+def test_schedule_keeps_the_last_instance(fleet):
+    ec2, _ = fleet
+
+    lambda_shutdown.scale_in_fleet()
+    assert ec2.stopped == ["i-a"]
+
+    ec2.instances = [i for i in ec2.instances if i["InstanceId"] not in ec2.stopped]
+    lambda_shutdown.scale_in_fleet()
+    assert ec2.stopped == ["i-a"]
+
+
+def test_instance_with_a_leased_task_is_not_stopped(fleet):
+    ec2, leases = fleet
+    # Lowest CPU, but rendering
+    leases["ip-10-0-1-5:4242"] = int(time.time()) + 300
+    leases["ip-10-0-1-6:77"] = int(time.time()) - 60  # expired lease
+
+    lambda_shutdown.scale_in_fleet()
+
+    assert ec2.stopped == ["i-b"]
+
+
+def test_idle_alarm_stops_every_idle_instance(fleet):
+    ec2, leases = fleet
+
+    lambda_shutdown.scale_in_fleet(idle_alarm=True)
+    assert sorted(ec2.stopped) == ["i-a", "i-b"]
+
+    ec2.stopped.clear()
+    leases["i-b:1"] = int(time.time()) + 300
+    lambda_shutdown.scale_in_fleet(idle_alarm=True)
+    assert ec2.stopped == ["i-a"]
+
+
+def test_busy_workers_are_read_from_live_leases(monkeypatch):
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+
+    with moto.mock_aws():
+        client = boto3.client("dynamodb", region_name="us-east-1")
+        client.create_table(
+            TableName="tasks",
+            KeySchema=[{"AttributeName": "task_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "task_id", "AttributeType": "S"},
+                {"AttributeName": "status", "AttributeType": "S"},
+                {"AttributeName": "created_at", "AttributeType": "N"},
+            ],
+            GlobalSecondaryIndexes=[{
+                "IndexName": "status-created_at-index",
+                "KeySchema": [{"AttributeName": "status", "KeyType": "HASH"},
+                              {"AttributeName": "created_at", "KeyType": "RANGE"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        now = int(time.time())
+        for task_id, status, worker, lease in [
+            ("t1", "processing", "ip-10-0-1-5:42", now + 300),
+            ("t2", "processing", "ip-10-0-1-6:42", now - 60),
+            ("t3", "pending", "ip-10-0-1-7:42", now + 300),
+        ]:
+            client.put_item(TableName="tasks", Item={
+                "task_id": {"S": task_id}, "status": {"S": status}, "created_at": {"N": str(now)},
+                "worker_id": {"S": worker}, "lease_expires_at": {"N": str(lease)},
+            })
+        monkeypatch.setattr(lambda_shutdown, "dynamodb_client", client)
+        monkeypatch.setattr(lambda_shutdown, "DYNAMODB_TABLE", "tasks")
+
+        assert lambda_shutdown.get_busy_workers() == {"ip-10-0-1-5"}
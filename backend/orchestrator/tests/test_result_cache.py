@@ -0,0 +1,64 @@
+import asyncio
+import pathlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import pytest
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import result_cache  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+
+BODY = {"image_url": None, "horizontal": 1, "seed": 7}
+
+
+@pytest.fixture()
+def cache(monkeypatch: pytest.MonkeyPatch):
+    etags: Dict[str, Optional[str]] = {}
+    monkeypatch.setattr(result_cache, "get_input_etag", lambda url, region: etags.get(url))
+    cache = ResultCache("task_store", "us-east-1", ThreadPoolExecutor(max_workers=2))
+    return cache, etags
+
+
+def key(cache: ResultCache, **body) -> Optional[str]:
+    return asyncio.run(cache.request_key("/api/v1/camera-angle/jobs", {**BODY, **body}))
+
+
+def test_same_etag_on_different_hosts_does_not_collide(cache):
+    # nginx-style "mtime-size" ETags are not unique across servers
+    cache, etags = cache
+    etags["https://a.example.com/in.jpg"] = "5f1a-2b3c"
+    etags["https://b.example.com/in.jpg"] = "5f1a-2b3c"
+
+    assert key(cache, image_url="https://a.example.com/in.jpg") != key(cache, image_url="https://b.example.com/in.jpg")
+
+
+def test_presigned_urls_of_one_object_share_a_key(cache):
+    cache, etags = cache
+    first = "https://bucket.s3.amazonaws.com/in.jpg?X-Amz-Signature=aaa"
+    second = "https://bucket.s3.amazonaws.com/in.jpg?X-Amz-Signature=bbb"
+    etags[first] = etags[second] = "d41d8cd98f00b204e9800998ecf8427e"
+
+    assert key(cache, image_url=first) == key(cache, image_url=second)
+
+
+def test_s3_inputs_are_keyed_by_content_etag(cache):
+    cache, etags = cache
+    etags["s3://bucket/a.jpg"] = etags["s3://bucket/copy-of-a.jpg"] = "d41d8cd98f00b204e9800998ecf8427e"
+
+    assert key(cache, image_url="s3://bucket/a.jpg") == key(cache, image_url="s3://bucket/copy-of-a.jpg")
+
+
+def test_requests_without_seed_or_etag_bypass_the_cache(cache):
+    cache, etags = cache
+    etags["s3://bucket/a.jpg"] = "d41d8cd98f00b204e9800998ecf8427e"
+
+    assert key(cache, image_url="s3://bucket/a.jpg", seed=None) is None
+    assert key(cache, image_url="s3://bucket/unknown.jpg") is None
+    assert cache.bypassed == 2
@@ -0,0 +1,192 @@
+import asyncio
+import importlib
+import json
+import pathlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import pytest
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+staging = importlib.import_module("staging")
+
+
+@pytest.fixture
+def stager(monkeypatch):
+    monkeypatch.setattr(staging, "CLOUDFRONT_DOMAIN", "https://d123.cloudfront.net")
+    monkeypatch.setattr(staging, "STAGING_ALLOWED_HOSTS", "images.example.com")
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield staging.InputStager("assets", "us-east-1", executor, lambda: True)
+    executor.shutdown()
+
+
+def test_only_own_bucket_and_allowed_hosts_are_fetched(stager):
+    assert stager.allowed("s3://assets/uploads/a.png")
+    assert stager.allowed("https://assets.s3.us-east-1.amazonaws.com/uploads/a.png")
+    assert stager.allowed("https://d123.cloudfront.net/uploads/a.png")
+    assert stager.allowed("https://images.example.com/a.png")
+
+    assert not stager.allowed("s3://someone-elses-bucket/a.png")
+    assert not stager.allowed("http://169.254.169.254/latest/meta-data/")
+    assert not stager.allowed("http://orchestrator.internal:8080/debug/staging")
+    assert not stager.allowed("https://d123.cloudfront.net.evil.com/a.png")
+
+
+def test_inputs_on_other_hosts_are_passed_through(monkeypatch, stager):
+    monkeypatch.setattr(staging, "fetch_input", lambda url, region: pytest.fail(f"fetched {url}"))
+    body = {"image_url": "http://10.0.0.5/a.png", "image2_url": "{{mask.result_url}}"}
+
+    assert asyncio.run(stager.stage("t1", "camera-angle", body)) == body
+    assert stager.not_allowed == 1
+
+
+def test_write_failures_are_not_counted_as_pass_through(monkeypatch, stager):
+    def stage_one(task_id, field, url, megapixels):
+        raise staging.StagingWriteFailed("Cannot write s3://assets/staging/t1/image_url.png: AccessDenied")
+
+    monkeypatch.setattr(stager, "_stage_one", stage_one)
+    body = {"image_url": "s3://assets/uploads/a.png"}
+
+    assert asyncio.run(stager.stage("t1", "camera-angle", body)) == body
+    assert stager.write_failures == 1
+    assert stager.passed_through == 0
+
+
+def test_check_rejects_unsupported_schemes(stager):
+    stager.check({"image_url": "s3://assets/a.png", "image2_url": "{{mask.result_url}}"})
+    with pytest.raises(staging.InputRejected):
+        stager.check({"image_url": "file:///etc/passwd"})
+
+
+class FakeTaskStore:
+    def __init__(self) -> None:
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.sent: List[Dict[str, Any]] = []
+        self.failed: Dict[str, str] = {}
+        self.released: List[str] = []
+
+    def create_task(self, table_name: str, task_id: str, job_type: str, region: str, attributes=None) -> None:
+        self.records[task_id] = {"status": "pending", **(attributes or {})}
+
+    def send_message(self, queue_url: str, message_body: str, region: str, delay_seconds: int = 0) -> str:
+        self.sent.append(json.loads(message_body))
+        return "message-id"
+
+    def update_staged_message(self, table_name, task_id, attribute, message, status, region) -> bool:
+        record = self.records[task_id]
+        if record["status"] != status or attribute not in record:
+            return False
+        record[attribute] = message
+        return True
+
+    def fail_held_task(self, table_name, task_id, error_message, region) -> bool:
+        self.failed[task_id] = error_message
+        self.records[task_id]["status"] = "failed"
+        return True
+
+    def release_held_task(self, table_name, task_id, region) -> None:
+        self.released.append(task_id)
+        self.records[task_id].pop("held_message")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = importlib.import_module("orchestrator_api")
+    store = FakeTaskStore()
+    for name in ("create_task", "send_message", "update_staged_message", "fail_held_task", "release_held_task"):
+        monkeypatch.setattr(api, name, getattr(store, name))
+    monkeypatch.setattr("fair_queue.FAIR_QUEUE_WINDOW", 0)
+    monkeypatch.setattr(api.gpu_state, "request_start", lambda: None)
+    monkeypatch.setattr(api.warmup, "on_submitted", lambda: None)
+    api.store = store
+    return api
+
+
+def test_staging_runs_after_the_job_is_accepted(monkeypatch, api):
+    async def scenario():
+        staged = asyncio.Event()
+
+        async def stage(task_id, job_type, request_body):
+            await staged.wait()
+            return dict(request_body, image_url=f"s3://assets/staging/{task_id}/image_url.png")
+
+        monkeypatch.setattr(api.input_stager, "stage", stage)
+        task_id = await api.submit_task(
+            "/api/v1/camera-angle/jobs", {"image_url": "https://d123.cloudfront.net/a.png"}, stage=True
+        )
+
+        # Accepted with the unstaged message on the record, nothing sent yet
+        record = api.store.records[task_id]
+        assert json.loads(record["held_message"])["request_body"]["image_url"] == "https://d123.cloudfront.net/a.png"
+        assert api.store.sent == []
+
+        staged.set()
+        await asyncio.gather(*api.input_stager._tasks)
+        return task_id
+
+    task_id = asyncio.run(scenario())
+
+    assert [m["request_body"]["image_url"] for m in api.store.sent] == [f"s3://assets/staging/{task_id}/image_url.png"]
+    assert api.store.released == [task_id]
+
+
+def test_rejected_input_fails_the_held_job(monkeypatch, api):
+    async def stage(task_id, job_type, request_body):
+        raise staging.InputRejected("image_url: Not a decodable image")
+
+    async def scenario():
+        monkeypatch.setattr(api.input_stager, "stage", stage)
+        task_id = await api.submit_task("/api/v1/camera-angle/jobs", {"image_url": "s3://assets/a.png"}, stage=True)
+        await asyncio.gather(*api.input_stager._tasks)
+        return task_id
+
+    task_id = asyncio.run(scenario())
+
+    assert api.store.sent == []
+    assert "Not a decodable image" in api.store.failed[task_id]
+
+
+def test_cancelled_job_is_not_sent_after_staging(monkeypatch, api):
+    async def scenario():
+        async def stage(task_id, job_type, request_body):
+            api.store.records[task_id]["status"] = "cancelled"
+            return request_body
+
+        monkeypatch.setattr(api.input_stager, "stage", stage)
+        await api.submit_task("/api/v1/camera-angle/jobs", {"image_url": "s3://assets/a.png"}, stage=True)
+        await asyncio.gather(*api.input_stager._tasks)
+
+    asyncio.run(scenario())
+
+    assert api.store.sent == []
+
+
+def test_lifecycle_rule_is_merged_into_existing_rules():
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    staging_lifecycle = importlib.import_module("staging_lifecycle")
+
+    with moto.mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="assets")
+        archive_rule = {"ID": "archive", "Filter": {"Prefix": "task-archive/"}, "Status": "Enabled",
+                        "Expiration": {"Days": 365}}
+        s3.put_bucket_lifecycle_configuration(Bucket="assets", LifecycleConfiguration={"Rules": [archive_rule]})
+
+        def event(request_type, days):
+            return {"RequestType": request_type,
+                    "ResourceProperties": {"Bucket": "assets", "Prefix": "staging/", "ExpirationDays": days}}
+
+        staging_lifecycle.lambda_handler(event("Create", "1"), None)
+        staging_lifecycle.lambda_handler(event("Update", "2"), None)
+        rules = {rule["ID"]: rule for rule in staging_lifecycle.get_rules(s3, "assets")}
+        assert set(rules) == {"archive", staging_lifecycle.RULE_ID}
+        assert rules[staging_lifecycle.RULE_ID]["Expiration"] == {"Days": 2}
+
+        staging_lifecycle.lambda_handler(event("Delete", "2"), None)
+        assert [rule["ID"] for rule in staging_lifecycle.get_rules(s3, "assets")] == ["archive"]
@@ -0,0 +1,104 @@
+import asyncio
+import pathlib
+import sys
+from typing import Any, Dict, List
+
+import pytest
+from fastapi import HTTPException
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+class FakeTaskStore:
+    def __init__(self, create_error: Exception | None = None, send_error: Exception | None = None) -> None:
+        self.create_error = create_error
+        self.send_error = send_error
+        self.created: List[str] = []
+        self.sent: List[str] = []
+        self.backfilled: List[Dict[str, Any]] = []
+        self.statuses: Dict[str, str] = {}
+
+    def create_task(self, table_name: str, task_id: str, job_type: str, region: str, attributes=None) -> None:
+        if self.create_error:
+            raise self.create_error
+        self.created.append(task_id)
+
+    def send_message(self, queue_url: str, message_body: str, region: str, delay_seconds: int = 0) -> str:
+        if self.send_error:
+            raise self.send_error
+        self.sent.append(message_body)
+        return "message-id"
+
+    def backfill_task(self, table_name: str, task_id: str, job_type: str, region: str, attributes=None) -> None:
+        self.backfilled.append({"task_id": task_id, "job_type": job_type, **(attributes or {})})
+
+    def update_task_status(self, table_name: str, task_id: str, status: str, region: str, **_kwargs: Any) -> None:
+        self.statuses[task_id] = status
+
+
+@pytest.fixture()
+def api(monkeypatch: pytest.MonkeyPatch):
+    import importlib
+
+    api = importlib.import_module("orchestrator_api")
+    monkeypatch.setattr("fair_queue.FAIR_QUEUE_WINDOW", 0)
+    monkeypatch.setattr(api.gpu_state, "request_start", lambda: None)
+    monkeypatch.setattr(api.warmup, "on_submitted", lambda: None)
+    return api
+
+
+def install(api, monkeypatch: pytest.MonkeyPatch, store: FakeTaskStore) -> None:
+    for name in ("create_task", "send_message", "backfill_task", "update_task_status"):
+        monkeypatch.setattr(api, name, getattr(store, name))
+
+
+def submit(api) -> str:
+    return asyncio.run(api.submit_task("/api/v1/camera-angle/jobs", {"image_url": "s3://b/k.png"}))
+
+
+def test_submit_writes_record_and_sends(api, monkeypatch):
+    store = FakeTaskStore()
+    install(api, monkeypatch, store)
+
+    task_id = submit(api)
+
+    assert store.created == [task_id]
+    assert len(store.sent) == 1
+    assert store.backfilled == []
+
+
+def test_lost_conditional_put_is_backfilled(api, monkeypatch):
+    # The adapter upserted the record before our put landed
+    store = FakeTaskStore(create_error=ValueError("exists"))
+    install(api, monkeypatch, store)
+
+    task_id = submit(api)
+
+    assert len(store.sent) == 1
+    assert store.backfilled == [{"task_id": task_id, "job_type": "/api/v1/camera-angle/jobs", "tenant": "anonymous"}]
+
+
+def test_failed_record_write_after_send_is_still_accepted(api, monkeypatch):
+    # The job is queued and will run: a 500 would make the client render twice
+    store = FakeTaskStore(create_error=RuntimeError("throttled"))
+    install(api, monkeypatch, store)
+
+    task_id = submit(api)
+
+    assert len(store.sent) == 1
+    assert [entry["task_id"] for entry in store.backfilled] == [task_id]
+
+
+def test_failed_send_marks_record_failed(api, monkeypatch):
+    store = FakeTaskStore(send_error=RuntimeError("sqs down"))
+    install(api, monkeypatch, store)
+
+    with pytest.raises(HTTPException) as excinfo:
+        submit(api)
+
+    assert excinfo.value.status_code == 500
+    assert list(store.statuses.values()) == ["failed"]
+    assert store.backfilled == []
@@ -0,0 +1,53 @@
+import importlib
+import pathlib
+import sys
+
+import pytest
+
+
+# Ensure orchestrator modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+tenants = importlib.import_module("tenants")
+
+
+@pytest.fixture(autouse=True)
+def api_keys(monkeypatch):
+    monkeypatch.setattr(tenants, "_api_keys", tenants.parse_api_keys("s3cr3t=studio, other-key=batch-service"))
+    monkeypatch.setattr(tenants, "TRUSTED_PROXY_HOPS", 1)
+
+
+def scope(*headers, client=("10.0.1.5", 40000)):
+    return {"type": "http", "headers": [(k.encode(), v.encode()) for k, v in headers], "client": client}
+
+
+def test_parse_api_keys():
+    assert tenants.parse_api_keys("a=x, b=c=y") == [(b"a", "x"), (b"b=c", "y")]
+    with pytest.raises(ValueError):
+        tenants.parse_api_keys("no-tenant=")
+
+
+def test_api_key_identifies_tenant():
+    assert tenants.tenant_from_scope(scope(("x-api-key", "s3cr3t"))) == "studio"
+
+
+def test_client_chosen_headers_are_ignored():
+    # Unknown key and a spoofed X-Tenant-ID / first X-Forwarded-For hop
+    request = scope(
+        ("x-api-key", "guess"),
+        ("x-tenant-id", "studio"),
+        ("x-forwarded-for", "1.2.3.4, 203.0.113.7")
+    )
+    assert tenants.tenant_from_scope(request) == "203.0.113.7"
+
+
+def test_trusted_proxy_hops(monkeypatch):
+    monkeypatch.setattr(tenants, "TRUSTED_PROXY_HOPS", 2)
+    request = scope(("x-forwarded-for", "1.2.3.4, 203.0.113.7, 130.176.0.1"))
+    assert tenants.tenant_from_scope(request) == "203.0.113.7"
+
+
+def test_falls_back_to_peer_address():
+    assert tenants.tenant_from_scope(scope()) == "10.0.1.5"
+    assert tenants.tenant_from_scope(scope(client=None)) == tenants.DEFAULT_TENANT
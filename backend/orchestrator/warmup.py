@@ -0,0 +1,375 @@
+"""
+Predictive GPU Warm-Up
+
+Starts the GPU speculatively when work is likely to arrive, so the first
+edit of a session runs on a warm instance instead of paying the cold start.
+
+- Warm signals: POST /api/v1/gpu/warm, sent by canvas_service when a
+  session is created or an image is uploaded. A signal while an instance
+  is up (or starting) only reads the cached GPU state.
+- Usage model: expected GPU jobs per UTC hour-of-week (168 buckets),
+  bootstrapped from the created_at of the last WARM_HISTORY_DAYS of tasks
+  (the S3 task archive, plus the hot table for days not archived yet) and
+  then updated hourly from live submissions as an exponentially
+  weighted average per bucket. Persisted to the task table ('stats#usage').
+- Schedule: when the hour starting WARM_LEAD_SECONDS from now expects at
+  least WARM_BUSY_JOBS_PER_HOUR jobs, the GPU is started ahead of it.
+- Guards: at most one speculative start per WARM_MIN_INTERVAL_SECONDS; a
+  speculative start no job follows within WARM_MAX_SPECULATIVE_SECONDS is
+  stopped again (only while the GPU backlog is empty); speculative uptime
+  per UTC day is capped at WARM_DAILY_BUDGET_SECONDS.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from aws.clients import get_client
+from aws.dynamodb import get_stats_item, put_stats_item, query_task_history
+from eta import job_type_from_path
+from task_archive import TASK_ARCHIVE_PREFIX, read_archived_tasks
+
+# Set to 0 to ignore warm signals and the schedule
+WARM_ENABLED = os.getenv('WARM_ENABLED', '1') != '0'
+# Minimum seconds between two speculative starts
+WARM_MIN_INTERVAL_SECONDS = int(os.getenv('WARM_MIN_INTERVAL_SECONDS', '300'))
+# A speculative start no job follows within this many seconds is stopped again
+WARM_MAX_SPECULATIVE_SECONDS = int(os.getenv('WARM_MAX_SPECULATIVE_SECONDS', '900'))
+# Speculative uptime allowed per UTC day (seconds)
+WARM_DAILY_BUDGET_SECONDS = int(os.getenv('WARM_DAILY_BUDGET_SECONDS', '7200'))
+
+# Usage model
+WARM_SCHEDULE_ENABLED = os.getenv('WARM_SCHEDULE_ENABLED', '1') != '0'
+WARM_BUSY_JOBS_PER_HOUR = float(os.getenv('WARM_BUSY_JOBS_PER_HOUR', '5'))
+WARM_LEAD_SECONDS = int(os.getenv('WARM_LEAD_SECONDS', '300'))
+WARM_HISTORY_DAYS = int(os.getenv('WARM_HISTORY_DAYS', '28'))
+WARM_MODEL_ALPHA = float(os.getenv('WARM_MODEL_ALPHA', '0.25'))
+WARM_CHECK_INTERVAL = int(os.getenv('WARM_CHECK_INTERVAL', '60'))
+
+STATS_NAME = 'usage'
+HOURS_PER_WEEK = 168
+HISTORY_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def hour_of_week(timestamp: float) -> int:
+    """UTC hour-of-week bucket (0 = Monday 00:00) of a Unix timestamp."""
+    t = time.gmtime(timestamp)
+    return t.tm_wday * 24 + t.tm_hour
+
+
+class UsageModel:
+    """Expected jobs per hour-of-week, updated as a weekly moving average."""
+
+    def __init__(self, rates: Optional[List[float]] = None):
+        self.rates: List[float] = list(rates) if rates else [0.0] * HOURS_PER_WEEK
+        # Hour currently being counted (Unix time // 3600) and its job count
+        self._hour: Optional[int] = None
+        self._count = 0
+
+    @classmethod
+    def from_history(cls, timestamps: Iterable[float], days: int) -> 'UsageModel':
+        """
+        Build a model from historical submission times.
+
+        Args:
+            timestamps: created_at of past jobs
+            days: Length of the history window (the average is over days / 7 weeks)
+        """
+        counts = [0] * HOURS_PER_WEEK
+        for timestamp in timestamps:
+            counts[hour_of_week(timestamp)] += 1
+        weeks = max(days / 7, 1)
+        return cls([count / weeks for count in counts])
+
+    def roll(self, now: float) -> bool:
+        """
+        Fold the finished hour into its bucket once a new hour has begun.
+
+        Returns:
+            True if an hour was folded in (the model changed)
+        """
+        hour = int(now // 3600)
+        if self._hour is None:
+            self._hour = hour
+            return False
+        if hour == self._hour:
+            return False
+        bucket = hour_of_week(self._hour * 3600)
+        self.rates[bucket] += WARM_MODEL_ALPHA * (self._count - self.rates[bucket])
+        self._hour = hour
+        self._count = 0
+        return True
+
+    def record(self, now: float, count: int = 1) -> None:
+        """Count submitted jobs towards the current hour."""
+        self.roll(now)
+        self._count += count
+
+    def expected(self, timestamp: float) -> float:
+        """Expected jobs in the hour-of-week containing timestamp."""
+        return self.rates[hour_of_week(timestamp)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'rates': [round(rate, 3) for rate in self.rates]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'UsageModel':
+        rates = data.get('rates') or []
+        return cls(rates if len(rates) == HOURS_PER_WEEK else None)
+
+
+class WarmupController:
+    """Rate-limited, budgeted speculative GPU starts from signals and the usage model."""
+
+    def __init__(
+        self,
+        table_name: str,
+        region: str,
+        executor: Executor,
+        gpu_state,
+        get_backlog: Callable[[], Optional[int]],
+        gpu_job_types: Iterable[str],
+        archive_bucket: Optional[str] = None
+    ):
+        """
+        Args:
+            table_name: DynamoDB task table (history source, model persistence)
+            region: AWS region name
+            executor: Executor for blocking boto3 calls
+            gpu_state: Shared GpuStateManager
+            get_backlog: Returns the GPU backlog (queued + in-flight jobs) or None
+            gpu_job_types: Job types that run on the GPU (e.g., 'camera-angle')
+            archive_bucket: S3 bucket of the task archive (None: hot table only)
+        """
+        self.table_name = table_name
+        self.region = region
+        self.executor = executor
+        self.gpu_state = gpu_state
+        self.get_backlog = get_backlog
+        self.gpu_job_types = set(gpu_job_types)
+        self.archive_bucket = archive_bucket
+
+        self.model = UsageModel()
+        self.model_source = 'empty'
+
+        # Current speculative episode (start time), None when there is none
+        self.speculative_since: Optional[float] = None
+        self.speculative_reason: Optional[str] = None
+        self._charged_at: float = 0
+        self.last_warm_at: float = 0
+
+        # Speculative uptime spent on the current UTC day
+        self._budget_day: Optional[int] = None
+        self.budget_used: float = 0
+
+        self.signals: Dict[str, int] = {}
+        self.starts: Dict[str, int] = {}
+        self.converted = 0
+        self.expired = 0
+
+        self._loop_task: Optional[asyncio.Task] = None
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== Lifecycle ====================
+
+    async def load(self) -> None:
+        """Load the persisted usage model, or bootstrap it from task history."""
+        try:
+            stats = await self._run_blocking(get_stats_item, self.table_name, STATS_NAME, self.region)
+        except Exception as e:
+            print(f"Could not load usage model: {e}")
+            stats = None
+        if stats:
+            self.model = UsageModel.from_dict(stats)
+            self.model_source = 'persisted'
+            print("Loaded GPU usage model")
+            return
+
+        try:
+            timestamps = await self._run_blocking(self._history_timestamps)
+        except Exception as e:
+            print(f"Could not read task history for the usage model: {e}")
+            return
+        self.model = UsageModel.from_history(timestamps, WARM_HISTORY_DAYS)
+        self.model_source = 'history'
+        print(f"Built GPU usage model from {len(timestamps)} historical job(s)")
+        await self.persist()
+
+    def _history_timestamps(self) -> List[int]:
+        """created_at of GPU jobs over the history window: archive first, then the hot table."""
+        since = int(time.time()) - WARM_HISTORY_DAYS * 86400
+        items: List[Dict[str, Any]] = []
+
+        archived_until = None
+        if self.archive_bucket:
+            archived_until = (get_stats_item(self.table_name, 'archive', self.region) or {}).get('archived_until')
+        if archived_until and archived_until > since:
+            s3 = get_client('s3', self.region)
+            items.extend(
+                task for task in read_archived_tasks(s3, self.archive_bucket, TASK_ARCHIVE_PREFIX, since, archived_until)
+                if task.get('status') in HISTORY_STATUSES
+            )
+            since = archived_until
+
+        for status in HISTORY_STATUSES:
+            items.extend(query_task_history(self.table_name, status, since, self.region))
+
+        return [
+            int(item['created_at']) for item in items
+            if job_type_from_path(item.get('job_type', '')) in self.gpu_job_types
+        ]
+
+    async def start(self) -> None:
+        """Load the usage model and start the check loop (call from the running event loop)."""
+        await self.load()
+        self._loop_task = asyncio.create_task(self._check_loop())
+
+    async def stop(self) -> None:
+        """Cancel the check loop and persist the usage model."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+        await self.persist()
+
+    async def persist(self) -> None:
+        """Write the usage model to the task table."""
+        try:
+            await self._run_blocking(put_stats_item, self.table_name, STATS_NAME, self.model.to_dict(), self.region)
+        except Exception as e:
+            print(f"Error persisting usage model: {e}")
+
+    # ==================== Signals ====================
+
+    def on_submitted(self, count: int = 1) -> None:
+        """Count submitted GPU jobs towards the usage model."""
+        self.model.record(time.time(), count)
+
+    def warm(self, reason: str) -> str:
+        """
+        Start the GPU speculatively if allowed.
+
+        Args:
+            reason: Signal source (e.g., 'session', 'upload', 'schedule')
+
+        Returns:
+            'started', 'already_running', 'rate_limited', 'budget_exhausted',
+            'unavailable' (pool state unknown) or 'disabled'
+        """
+        now = time.time()
+        self.signals[reason] = self.signals.get(reason, 0) + 1
+
+        if not WARM_ENABLED:
+            return 'disabled'
+        if self.gpu_state.active_count() > 0:
+            return 'already_running'
+        if now - self.last_warm_at < WARM_MIN_INTERVAL_SECONDS:
+            return 'rate_limited'
+        if self._budget_left(now) <= 0:
+            return 'budget_exhausted'
+        if not self.gpu_state.request_warm():
+            return 'unavailable'
+
+        print(f"Speculative GPU start ({reason})")
+        self.last_warm_at = now
+        self.speculative_since = now
+        self.speculative_reason = reason
+        self._charged_at = now
+        self.starts[reason] = self.starts.get(reason, 0) + 1
+        return 'started'
+
+    # ==================== Speculative Uptime ====================
+
+    def _budget_left(self, now: float) -> float:
+        day = int(now // 86400)
+        if day != self._budget_day:
+            self._budget_day = day
+            self.budget_used = 0
+        return WARM_DAILY_BUDGET_SECONDS - self.budget_used
+
+    def _charge(self, now: float) -> None:
+        self._budget_left(now)
+        self.budget_used += now - self._charged_at
+        self._charged_at = now
+
+    def _end_episode(self, now: float) -> None:
+        self._charge(now)
+        self.speculative_since = None
+        self.speculative_reason = None
+
+    async def _check_speculative(self, now: float) -> None:
+        if self.speculative_since is None:
+            return
+        self._charge(now)
+
+        if self.gpu_state.demand_at >= self.speculative_since:
+            # A job arrived: the start paid off and is no longer speculative
+            self.converted += 1
+            self._end_episode(now)
+            return
+        if self.gpu_state.active_count() == 0:
+            # Stopped by someone else (e.g. the idle Lambda)
+            self._end_episode(now)
+            return
+        if now - self.speculative_since < WARM_MAX_SPECULATIVE_SECONDS and self._budget_left(now) > 0:
+            return
+
+        backlog = self.get_backlog()
+        if backlog != 0:
+            # Work is queued (or the backlog is unknown): leave the GPU to the idle alarm
+            self._end_episode(now)
+            return
+        print(f"No job followed the speculative GPU start within {int(now - self.speculative_since)}s, stopping")
+        self.expired += 1
+        self._end_episode(now)
+        await self.gpu_state.stop_active_instances()
+
+    # ==================== Schedule ====================
+
+    def _busy_soon(self, now: float) -> bool:
+        return self.model.expected(now + WARM_LEAD_SECONDS) >= WARM_BUSY_JOBS_PER_HOUR
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(WARM_CHECK_INTERVAL)
+            now = time.time()
+            try:
+                if self.model.roll(now):
+                    await self.persist()
+                await self._check_speculative(now)
+                if WARM_SCHEDULE_ENABLED and self.speculative_since is None and self._busy_soon(now):
+                    self.warm('schedule')
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in GPU warm-up check: {e}")
+
+    # ==================== Introspection ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return warm-up state, counters and the usage model for debug endpoints."""
+        now = time.time()
+        return {
+            "enabled": WARM_ENABLED,
+            "speculative_since": self.speculative_since,
+            "speculative_reason": self.speculative_reason,
+            "budget_used_seconds": int(self.budget_used),
+            "budget_left_seconds": int(self._budget_left(now)),
+            "signals": self.signals,
+            "starts": self.starts,
+            "converted": self.converted,
+            "expired": self.expired,
+            "model_source": self.model_source,
+            "expected_jobs_next_hour": round(self.model.expected(now + WARM_LEAD_SECONDS), 2),
+            "busy_soon": self._busy_soon(now),
+            "model": self.model.to_dict()
+        }
@@ -0,0 +1,347 @@
+"""
+Shared AWS client factory.
+
+Canonical copy: backend/shared/aws_clients.py. Each service is deployed as
+a standalone directory, so backend/shared/sync.py copies this file into
+every service that uses it (orchestrator/aws/clients.py, aws_clients.py
+elsewhere). Edit it there and re-run the sync.
+
+Building a boto3 client is expensive (endpoint resolution, credential
+lookup, a fresh urllib3 connection pool), so all AWS calls in a service
+go through the cached factory below instead of calling boto3 directly.
+
+Sessions, clients and resources are cached per region and credential set.
+Clients are thread-safe and shared process-wide; resources are not, so they
+are cached per thread.
+
+Environment variables:
+    AWS_CLIENT_CACHE: Set to "0" to build a new client on every call
+                      (useful to measure the latency the cache saves)
+    AWS_MAX_POOL_CONNECTIONS: Max pooled HTTP connections per client
+    AWS_CONNECT_TIMEOUT: Connect timeout in seconds
+    AWS_READ_TIMEOUT: Read timeout in seconds
+    AWS_MAX_ATTEMPTS: Max attempts for botocore's standard retry mode
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+# Configuration
+CACHE_ENABLED = os.getenv('AWS_CLIENT_CACHE', '1') != '0'
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '50'))
+CONNECT_TIMEOUT = int(os.getenv('AWS_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = int(os.getenv('AWS_READ_TIMEOUT', '30'))
+MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', '3'))
+
+_lock = threading.Lock()
+_sessions: Dict[Tuple, boto3.session.Session] = {}
+_clients: Dict[Tuple, Any] = {}
+_thread_local = threading.local()
+
+# Counters exposed through get_stats()
+_stats = {
+    'client_builds': 0,
+    'client_cache_hits': 0,
+    'client_build_seconds': 0.0,
+}
+_latency: Dict[str, Dict[str, float]] = {}
+
+# Optional metrics observer, see set_metrics_observer()
+_observer = None
+
+
+def _default_region() -> str:
+    return os.getenv('AWS_REGION', os.getenv('AWS_DEFAULT_REGION', 'us-east-1'))
+
+
+def _credential_key(
+    aws_access_key_id: Optional[str],
+    aws_secret_access_key: Optional[str],
+    aws_session_token: Optional[str]
+) -> Tuple:
+    # The access key id is kept as is; the secret and session token are hashed
+    # so the raw values are never stored in the cache key
+    return (aws_access_key_id or '', hash(aws_secret_access_key or ''), hash(aws_session_token or ''))
+
+
+def _on_before_call(context, **kwargs) -> None:
+    # Must return None: a return value would short-circuit the API call
+    if _observer is not None:
+        context['metrics_start'] = time.perf_counter()
+
+
+def _on_after_call(context, model, parsed=None, **kwargs) -> None:
+    start = context.pop('metrics_start', None)
+    if start is None or _observer is None:
+        return
+    error = (parsed or {}).get('Error', {}).get('Code')
+    _observer.observe_aws_call(
+        model.service_model.service_name, model.name, error or 'ok', time.perf_counter() - start
+    )
+
+
+def _on_after_call_error(context, exception, **kwargs) -> None:
+    start = context.pop('metrics_start', None)
+    if start is None or _observer is None:
+        return
+    # Connection-level failure (no response); the operation name is in the event
+    event = kwargs.get('event_name', '')
+    _, _, operation = event.rpartition('.')
+    service = event.split('.')[1] if event.count('.') >= 2 else 'unknown'
+    _observer.observe_aws_call(service, operation or 'unknown', type(exception).__name__, time.perf_counter() - start)
+
+
+def _instrument(client) -> None:
+    """Register the metrics hooks on a client (no-ops until an observer is set)."""
+    events = client.meta.events
+    events.register('before-call', _on_before_call)
+    events.register('after-call', _on_after_call)
+    events.register('after-call-error', _on_after_call_error)
+
+
+def set_metrics_observer(observer) -> None:
+    """
+    Report AWS call and timed() latencies to an observer.
+
+    Every client and resource built by this module carries botocore event
+    hooks that do nothing until an observer is set.
+
+    Args:
+        observer: Object with observe_aws_call(service, operation, outcome, seconds)
+                  and observe_operation(operation, seconds), or None to stop reporting
+    """
+    global _observer
+    _observer = observer
+
+
+def _build_config(overrides: Dict[str, Any]) -> Config:
+    """Build the tuned botocore Config shared by all clients."""
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries={'max_attempts': MAX_ATTEMPTS, 'mode': 'standard'},
+        tcp_keepalive=True,
+        **overrides
+    )
+
+
+def get_session(
+    region: Optional[str] = None,
+    aws_access_key_id: Optional[str] = None,
+    aws_secret_access_key: Optional[str] = None,
+    aws_session_token: Optional[str] = None
+) -> boto3.session.Session:
+    """
+    Get a cached boto3 session for a region and credential set.
+
+    Args:
+        region: AWS region name (defaults to AWS_REGION / AWS_DEFAULT_REGION)
+        aws_access_key_id: Optional explicit access key
+        aws_secret_access_key: Optional explicit secret key
+        aws_session_token: Optional explicit session token
+
+    Returns:
+        boto3 Session
+    """
+    region = region or _default_region()
+    key = (region,) + _credential_key(aws_access_key_id, aws_secret_access_key, aws_session_token)
+
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = boto3.session.Session(
+                region_name=region,
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                aws_session_token=aws_session_token
+            )
+            _sessions[key] = session
+        return session
+
+
+def get_client(
+    service_name: str,
+    region: Optional[str] = None,
+    aws_access_key_id: Optional[str] = None,
+    aws_secret_access_key: Optional[str] = None,
+    aws_session_token: Optional[str] = None,
+    **config_overrides
+):
+    """
+    Get a cached low-level boto3 client.
+
+    Args:
+        service_name: AWS service name (e.g., 'sqs', 'dynamodb', 'ec2', 's3')
+        region: AWS region name (defaults to AWS_REGION / AWS_DEFAULT_REGION)
+        aws_access_key_id: Optional explicit access key
+        aws_secret_access_key: Optional explicit secret key
+        aws_session_token: Optional explicit session token
+        **config_overrides: Extra botocore Config options (e.g., signature_version='s3v4')
+
+    Returns:
+        boto3 client (shared across threads)
+    """
+    region = region or _default_region()
+    key = (service_name, region) \
+        + _credential_key(aws_access_key_id, aws_secret_access_key, aws_session_token) \
+        + tuple(sorted(config_overrides.items()))
+
+    if CACHE_ENABLED:
+        client = _clients.get(key)
+        if client is not None:
+            _stats['client_cache_hits'] += 1
+            return client
+
+    session = get_session(region, aws_access_key_id, aws_secret_access_key, aws_session_token)
+
+    # Client creation from a shared session is not thread-safe
+    with _lock:
+        if CACHE_ENABLED and key in _clients:
+            _stats['client_cache_hits'] += 1
+            return _clients[key]
+
+        start = time.perf_counter()
+        client = session.client(service_name, config=_build_config(config_overrides))
+        _instrument(client)
+        _stats['client_builds'] += 1
+        _stats['client_build_seconds'] += time.perf_counter() - start
+
+        if CACHE_ENABLED:
+            _clients[key] = client
+
+    return client
+
+
+def get_resource(
+    service_name: str,
+    region: Optional[str] = None,
+    aws_access_key_id: Optional[str] = None,
+    aws_secret_access_key: Optional[str] = None,
+    aws_session_token: Optional[str] = None
+):
+    """
+    Get a cached boto3 resource (e.g., the DynamoDB service resource).
+
+    Resources are not thread-safe, so each thread gets its own instance.
+
+    Args:
+        service_name: AWS service name (e.g., 'dynamodb')
+        region: AWS region name (defaults to AWS_REGION / AWS_DEFAULT_REGION)
+        aws_access_key_id: Optional explicit access key
+        aws_secret_access_key: Optional explicit secret key
+        aws_session_token: Optional explicit session token
+
+    Returns:
+        boto3 ServiceResource
+    """
+    region = region or _default_region()
+    key = (service_name, region) + _credential_key(aws_access_key_id, aws_secret_access_key, aws_session_token)
+
+    resources = getattr(_thread_local, 'resources', None)
+    if resources is None:
+        resources = _thread_local.resources = {}
+
+    if CACHE_ENABLED:
+        resource = resources.get(key)
+        if resource is not None:
+            _stats['client_cache_hits'] += 1
+            return resource
+
+    session = get_session(region, aws_access_key_id, aws_secret_access_key, aws_session_token)
+
+    with _lock:
+        start = time.perf_counter()
+        resource = session.resource(service_name, config=_build_config({}))
+        _instrument(resource.meta.client)
+        _stats['client_builds'] += 1
+        _stats['client_build_seconds'] += time.perf_counter() - start
+
+    if CACHE_ENABLED:
+        resources[key] = resource
+
+    return resource
+
+
+def get_table(table_name: str, region: Optional[str] = None):
+    """
+    Get a cached DynamoDB Table object.
+
+    Args:
+        table_name: Name of the DynamoDB table
+        region: AWS region name
+
+    Returns:
+        boto3 DynamoDB Table resource
+    """
+    return get_resource('dynamodb', region).Table(table_name)
+
+
+@contextmanager
+def timed(operation: str):
+    """
+    Record wall-clock latency of a block under an operation name.
+
+    Example:
+        with timed('submit_task'):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            entry = _latency.setdefault(operation, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += 1
+            entry['total_seconds'] += elapsed
+            entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+        if _observer is not None:
+            _observer.observe_operation(operation, elapsed)
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Return client cache counters and recorded operation latencies.
+
+    Returns:
+        Dictionary with cache settings, build/hit counts and per-operation
+        count, average and max latency in milliseconds
+    """
+    with _lock:
+        latency = {
+            name: {
+                'count': int(entry['count']),
+                'avg_ms': round(entry['total_seconds'] * 1000 / entry['count'], 3) if entry['count'] else 0.0,
+                'max_ms': round(entry['max_seconds'] * 1000, 3)
+            }
+            for name, entry in _latency.items()
+        }
+        builds = _stats['client_builds']
+        return {
+            'cache_enabled': CACHE_ENABLED,
+            'max_pool_connections': MAX_POOL_CONNECTIONS,
+            'cached_clients': len(_clients),
+            'client_builds': builds,
+            'client_cache_hits': _stats['client_cache_hits'],
+            'avg_client_build_ms': round(_stats['client_build_seconds'] * 1000 / builds, 3) if builds else 0.0,
+            'latency': latency
+        }
+
+
+def reset() -> None:
+    """Drop all cached sessions and clients (e.g., after credential rotation)."""
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
+        _latency.clear()
+        _stats['client_builds'] = 0
+        _stats['client_cache_hits'] = 0
+        _stats['client_build_seconds'] = 0.0
+    _thread_local.resources = {}
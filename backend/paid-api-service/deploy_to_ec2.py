@@ -149,6 +149,9 @@ def upload_code(public_ip):
         'api_service.py',
         'sqs_adapter.py',
         'face_swap.py',
+        'aws_clients.py',
+        'pipeline_stages.py',
+        'sqs_consumer.py',
         'requirements.txt',
         'paid-api.service',
         'sqs-adapter.service',
@@ -4,7 +4,6 @@ Face Swap Service using QWEN3-VL for face detection and SeeDream for face recons
 
 import os
 import sys
-import boto3
 import requests
 from PIL import Image, ImageDraw
 from io import BytesIO
@@ -18,6 +17,7 @@ from dashscope import MultiModalConversation
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.join(current_dir, 'image-to-image'))
 from seedream import SeeDreamClient, ImageSize
+from aws_clients import get_client
 
 
 # Default prompt for face swapping
@@ -255,11 +255,11 @@ def upload_image_to_s3(image, s3_bucket, cloudfront_domain, prefix="face_swap"):
     s3_key = f"{prefix}/{timestamp}_{unique_id}.png"
 
     # Upload to S3
-    s3_client = boto3.client(
+    s3_client = get_client(
         's3',
+        os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
         aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
-        aws_secret_access_key=os.getenv("AWS_ACCESS_SECRET"),
-        region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+        aws_secret_access_key=os.getenv("AWS_ACCESS_SECRET")
     )
 
     s3_client.put_object(
@@ -37,6 +37,9 @@ pip install fastapi uvicorn pydantic requests boto3 pillow dashscope
 echo "Service files should be in: $SERVICE_DIR"
 echo "  - api_service.py"
 echo "  - sqs_adapter.py"
+echo "  - pipeline_stages.py"
+echo "  - sqs_consumer.py"
+echo "  - task_claims.py"
 echo "  - face_swap.py"
 echo "  - image-to-image/seedream.py"
 echo ""
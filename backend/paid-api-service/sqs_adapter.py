@@ -6,12 +6,17 @@ This script runs alongside the paid-api-service and acts as a bridge between
 SQS CPU task queue and the local Paid API Service.
 
 Responsibilities:
-1. Poll CPU task SQS queue for new tasks (long polling)
-2. Update DynamoDB status to 'processing'
+1. Poll CPU task SQS queue for new tasks (long polling, up to 10 per call)
+2. Claim the task in DynamoDB: conditional pending -> 'processing' with this
+   worker's ID and a lease (skipped if cancelled, finished or claimed)
 3. Call local Paid API Service with task parameters
 4. Poll API for completion
 5. Update DynamoDB with final status and results
-6. Delete SQS message
+6. Delete SQS messages in batches (see sqs_consumer.BatchConsumer); while
+   a task runs, a heartbeat keeps its message invisible and renews the lease
+
+The work is mostly waiting on the DashScope / SeeDream APIs, so
+CONSUMER_CONCURRENCY tasks (default 8) run at the same time.
 
 Similar to comfyui-api-service/sqs_to_comfy_adapter.py
 """
@@ -24,25 +29,36 @@ import signal
 import requests
 from typing import Dict, Any, Optional
 
-import boto3
 from botocore.exceptions import ClientError
 
+from aws_clients import get_client, get_table
+from pipeline_stages import finish_stage
+from sqs_consumer import BatchConsumer
+import task_claims
+from task_claims import TaskCancelled, claim_task, renew_leases
+
 # Configuration from environment variables
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 CPU_QUEUE_URL = os.getenv('CPU_QUEUE_URL', '')
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'task_store')
 PAID_API_URL = os.getenv('PAID_API_URL', 'http://localhost:8000')
 POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '20'))  # Long polling wait time
+# Tasks processed at the same time
+CONSUMER_CONCURRENCY = int(os.getenv('CONSUMER_CONCURRENCY', '8'))
+VISIBILITY_TIMEOUT = 600  # 10 minutes to process (longer for CPU tasks)
 
 # Initialize AWS clients
-sqs_client = boto3.client('sqs', region_name=AWS_REGION)
-dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-table = dynamodb.Table(DYNAMODB_TABLE)
+sqs_client = get_client('sqs', AWS_REGION)
 
 # Global flag for graceful shutdown
 shutdown_flag = False
 
 
+def task_table():
+    """DynamoDB task table for the calling thread (resources are not thread-safe)."""
+    return get_table(DYNAMODB_TABLE, AWS_REGION)
+
+
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     global shutdown_flag
@@ -55,41 +71,23 @@ def update_task_status(
     status: str,
     result_url: Optional[str] = None,
     error_message: Optional[str] = None,
+    retryable: bool = False,
     api_job_id: Optional[str] = None
 ):
-    """Update task status in DynamoDB"""
-    try:
-        current_time = int(time.time())
-        update_expr = "SET #status = :status, updated_at = :updated_at"
-        expr_attr_names = {'#status': 'status'}
-        expr_attr_values = {
-            ':status': status,
-            ':updated_at': current_time
-        }
-
-        if result_url:
-            update_expr += ", result_url = :result_url"
-            expr_attr_values[':result_url'] = result_url
-
-        if error_message:
-            update_expr += ", error_message = :error_message"
-            expr_attr_values[':error_message'] = error_message
-
-        if api_job_id:
-            update_expr += ", api_job_id = :api_job_id"
-            expr_attr_values[':api_job_id'] = api_job_id
-
-        table.update_item(
-            Key={'task_id': task_id},
-            UpdateExpression=update_expr,
-            ExpressionAttributeNames=expr_attr_names,
-            ExpressionAttributeValues=expr_attr_values
-        )
-        print(f"✓ Updated task {task_id} status to: {status}")
+    """
+    Update task status in DynamoDB (see task_claims.update_task_status).
 
-    except Exception as e:
-        print(f"✗ Error updating task status in DynamoDB: {e}")
-        raise
+    Raises:
+        TaskCancelled: If the task was cancelled
+    """
+    task_claims.update_task_status(
+        task_table(),
+        task_id,
+        status,
+        error_message=error_message,
+        retryable=retryable,
+        attributes={'result_url': result_url, 'api_job_id': api_job_id}
+    )
 
 
 def poll_api_status(job_id: str, timeout: int = 600) -> Dict[str, Any]:
@@ -141,19 +139,28 @@ def poll_api_status(job_id: str, timeout: int = 600) -> Dict[str, Any]:
     raise Exception(f"Timeout waiting for API job {job_id} after {timeout} seconds")
 
 
-def process_task(message: Dict[str, Any]):
+def hand_off_stage(body: Dict[str, Any], status: str, result_url: Optional[str] = None):
+    """Queue (or skip) the pipeline stages waiting on this task; never raises."""
+    try:
+        finish_stage(task_table(), sqs_client, body, status, result_url)
+    except Exception as e:
+        print(f"✗ Error handing off pipeline stages of task {body.get('task_id')}: {e}")
+
+
+def process_task(message: Dict[str, Any]) -> bool:
     """
-    Process a single task from SQS.
+    Process a single task from SQS (runs on a consumer worker thread).
 
     This is the core business logic:
     1. Parse task from SQS message
-    2. Update status to 'processing'
+    2. Claim the task (status 'processing', worker ID, lease)
     3. Call Paid API Service
     4. Poll for completion
     5. Update final status
-    6. Delete SQS message
+
+    Returns:
+        True if the message is done and can be deleted, False to retry it
     """
-    receipt_handle = message['ReceiptHandle']
     body = json.loads(message['Body'])
 
     task_id = body.get('task_id')
@@ -168,8 +175,10 @@ def process_task(message: Dict[str, Any]):
     print(f"{'='*60}")
 
     try:
-        # Step 1: Update DynamoDB to PROCESSING
-        update_task_status(task_id, 'processing')
+        # Step 1: Claim the task (fails if already cancelled; skips duplicates)
+        claim = claim_task(task_table(), task_id, VISIBILITY_TIMEOUT)
+        if claim != 'claimed':
+            return claim == 'done'
 
         # Step 2: Submit job to local Paid API Service
         print(f"→ Submitting to Paid API: POST {PAID_API_URL}{api_path}")
@@ -201,6 +210,7 @@ def process_task(message: Dict[str, Any]):
                 'completed',
                 result_url=final_status.get('result_url')
             )
+            hand_off_stage(body, 'completed', final_status.get('result_url'))
             print(f"✓ Task {task_id} completed successfully")
             print(f"  Result: {final_status.get('result_url')}")
 
@@ -210,14 +220,17 @@ def process_task(message: Dict[str, Any]):
                 'failed',
                 error_message=final_status.get('error', 'Unknown error')
             )
+            hand_off_stage(body, 'failed')
             print(f"✗ Task {task_id} failed: {final_status.get('error')}")
 
-        # Step 5: Delete message from SQS (task completed)
-        sqs_client.delete_message(
-            QueueUrl=CPU_QUEUE_URL,
-            ReceiptHandle=receipt_handle
-        )
-        print(f"✓ Deleted message from SQS queue")
+        # Task finished: the consumer deletes the message
+        return True
+
+    except TaskCancelled:
+        # Cancelled before pickup, or while running (the result is discarded)
+        print(f"⊘ Task {task_id} was cancelled")
+        hand_off_stage(body, 'cancelled')
+        return True
 
     except Exception as e:
         # Task failed - update DynamoDB but DO NOT delete SQS message
@@ -226,21 +239,30 @@ def process_task(message: Dict[str, Any]):
         print(f"✗ Error processing task {task_id}: {error_msg}")
 
         try:
-            update_task_status(task_id, 'failed', error_message=error_msg)
+            update_task_status(task_id, 'failed', error_message=error_msg, retryable=True)
         except Exception as db_error:
             print(f"✗ Failed to update error status in DynamoDB: {db_error}")
 
         # Don't delete SQS message - let it retry or go to DLQ
-        print(f"⚠ SQS message will become visible again for retry")
+        return False
 
 
 def main_loop():
     """
     Main polling loop.
 
-    Continuously polls SQS for messages and processes them.
+    Continuously polls SQS for messages and runs them on the batch
+    consumer, receiving only as many as there are free task slots.
     Uses long polling (20 seconds) to reduce API calls and costs.
     """
+    consumer = BatchConsumer(
+        sqs_client,
+        process_task,
+        concurrency=CONSUMER_CONCURRENCY,
+        visibility_timeout=VISIBILITY_TIMEOUT,
+        on_heartbeat=lambda messages: renew_leases(task_table(), messages, VISIBILITY_TIMEOUT)
+    )
+
     print(f"\n{'='*60}")
     print(f"SQS to Paid API Service Adapter Started")
     print(f"{'='*60}")
@@ -249,6 +271,7 @@ def main_loop():
     print(f"DynamoDB Table: {DYNAMODB_TABLE}")
     print(f"Paid API URL: {PAID_API_URL}")
     print(f"Poll Interval: {POLL_INTERVAL} seconds (long polling)")
+    print(f"Concurrency: {consumer.concurrency} task(s)")
     print(f"{'='*60}\n")
 
     # Verify Paid API Service is accessible
@@ -267,26 +290,21 @@ def main_loop():
 
     while not shutdown_flag:
         try:
-            # Long poll SQS for messages
-            print(f"Polling CPU task queue (waiting up to {POLL_INTERVAL} seconds)...")
-            response = sqs_client.receive_message(
-                QueueUrl=CPU_QUEUE_URL,
-                MaxNumberOfMessages=1,
-                WaitTimeSeconds=POLL_INTERVAL,
-                AttributeNames=['All'],
-                MessageAttributeNames=['All'],
-                VisibilityTimeout=600  # 10 minutes to process (longer for CPU tasks)
-            )
+            # Receive only when a task slot is free
+            if not consumer.wait_for_slot():
+                continue
 
-            messages = response.get('Messages', [])
+            # Long poll SQS for messages
+            messages = consumer.receive(CPU_QUEUE_URL, POLL_INTERVAL)
 
             if messages:
                 consecutive_errors = 0  # Reset error counter
-                for message in messages:
-                    if shutdown_flag:
-                        print("Shutdown requested, stopping message processing")
-                        break
-                    process_task(message)
+                if shutdown_flag:
+                    # Not started: they become visible again after the timeout
+                    print("Shutdown requested, stopping message processing")
+                    break
+                print(f"Received {len(messages)} task(s)")
+                consumer.submit(messages, CPU_QUEUE_URL)
             else:
                 print("No messages received (queue empty)")
 
@@ -314,7 +332,9 @@ def main_loop():
 
             time.sleep(10)
 
-    print("\nAdapter shutting down gracefully...")
+    print("\nAdapter shutting down gracefully, waiting for running tasks...")
+    consumer.drain()
+    print(f"Consumer stats: {consumer.snapshot()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+"""
+Batched SQS Consumer
+
+Shared by both adapters. Canonical copy: backend/shared/sqs_consumer.py.
+Each service is deployed as a standalone directory, so
+backend/shared/sync.py copies this file next to
+comfyui-api-service/sqs_to_comfy_adapter.py and
+paid-api-service/sqs_adapter.py. Edit it there and re-run the sync.
+
+- receive() asks SQS for up to 10 messages per call, but never more than
+  there are free task slots, so no message sits invisible waiting for a
+  slot (other workers could run it).
+- submit() runs each message's handler on a pool of CONSUMER_CONCURRENCY
+  threads. The handler returns True when the message is done (completed,
+  failed for good or cancelled) and False to have it retried.
+- A flusher thread acknowledges finished messages with
+  delete_message_batch and returns the others with
+  change_message_visibility_batch (visible again after
+  CONSUMER_RETRY_DELAY seconds), at most FLUSH_INTERVAL seconds after
+  they finish and 10 entries per call.
+- A heartbeat thread extends the visibility of every running task's
+  message back to the full visibility timeout every HEARTBEAT_INTERVAL
+  seconds (change_message_visibility_batch), so a long render never
+  reappears in the queue while it runs; on_heartbeat lets the adapter
+  renew its task lease at the same time.
+- drain() waits for the running tasks and flushes on shutdown.
+
+Handlers run in worker threads: they must use get_table() per call
+(boto3 resources are not thread-safe), not a module-level Table.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Tasks run at the same time per adapter process
+CONSUMER_CONCURRENCY = int(os.getenv('CONSUMER_CONCURRENCY', '1'))
+# Seconds before a message returned for retry becomes visible again
+CONSUMER_RETRY_DELAY = int(os.getenv('CONSUMER_RETRY_DELAY', '30'))
+# Max seconds between a task finishing and its message being acknowledged
+FLUSH_INTERVAL = float(os.getenv('CONSUMER_FLUSH_INTERVAL', '1'))
+# Seconds between visibility extensions of running tasks' messages
+HEARTBEAT_INTERVAL = float(os.getenv('CONSUMER_HEARTBEAT_INTERVAL', '60'))
+
+# SQS limit for ReceiveMessage and the *Batch calls
+SQS_BATCH_SIZE = 10
+
+
+class BatchConsumer:
+    """Runs SQS messages concurrently and acknowledges them in batches."""
+
+    def __init__(
+        self,
+        sqs_client,
+        handler: Callable[[Dict[str, Any]], bool],
+        concurrency: int = CONSUMER_CONCURRENCY,
+        visibility_timeout: int = 300,
+        retry_delay: int = CONSUMER_RETRY_DELAY,
+        on_heartbeat: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ):
+        """
+        Args:
+            sqs_client: boto3 SQS client (thread-safe)
+            handler: Processes one message; True = delete it, False = retry it
+            concurrency: Max tasks running at once
+            visibility_timeout: Seconds a received message stays invisible
+                                (renewed by the heartbeat while it runs)
+            retry_delay: Visibility timeout set on messages returned for retry
+            on_heartbeat: Called with the running messages on every heartbeat
+        """
+        self.sqs_client = sqs_client
+        self.handler = handler
+        self.concurrency = max(concurrency, 1)
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.on_heartbeat = on_heartbeat
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='task')
+        self._cond = threading.Condition()
+        self._running = 0
+        # queue_url -> receipt handles to delete / to return
+        self._acks: Dict[str, List[str]] = {}
+        self._nacks: Dict[str, List[str]] = {}
+        # MessageId -> (queue_url, message) of running tasks
+        self._in_flight: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._stopped = False
+        self._flusher = threading.Thread(target=self._flush_loop, name='sqs-flush', daemon=True)
+        self._flusher.start()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='sqs-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+        self.received = 0
+        self.acked = 0
+        self.returned = 0
+        self.receive_calls = 0
+        self.batch_calls = 0
+        self.extended = 0
+
+    # ==================== Receive / Run ====================
+
+    def free_slots(self) -> int:
+        """Number of tasks that could start now."""
+        with self._cond:
+            return self.concurrency - self._running
+
+    def wait_for_slot(self, timeout: float = 1.0) -> bool:
+        """Block until a task slot is free (or timeout). Returns True if one is."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._running < self.concurrency, timeout)
+
+    def receive(self, queue_url: str, wait_time: int) -> List[Dict[str, Any]]:
+        """
+        Receive as many messages as there are free slots (up to 10).
+
+        Args:
+            queue_url: Queue to receive from
+            wait_time: Long-poll wait (seconds)
+
+        Returns:
+            The received messages (possibly empty)
+        """
+        max_messages = min(self.free_slots(), SQS_BATCH_SIZE)
+        if max_messages <= 0:
+            return []
+        response = self.sqs_client.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=max_messages,
+            WaitTimeSeconds=wait_time,
+            AttributeNames=['All'],
+            MessageAttributeNames=['All'],
+            VisibilityTimeout=self.visibility_timeout
+        )
+        self.receive_calls += 1
+        messages = response.get('Messages', [])
+        self.received += len(messages)
+        return messages
+
+    def submit(self, messages: List[Dict[str, Any]], queue_url: str) -> None:
+        """Start a task per message (callers receive at most free_slots() messages)."""
+        for message in messages:
+            with self._cond:
+                self._running += 1
+                self._in_flight[message['MessageId']] = (queue_url, message)
+            self._executor.submit(self._run, message, queue_url)
+
+    def _run(self, message: Dict[str, Any], queue_url: str) -> None:
+        try:
+            done = self.handler(message)
+        except Exception as e:
+            print(f"✗ Unhandled error processing message {message.get('MessageId')}: {e}")
+            done = False
+        with self._cond:
+            target = self._acks if done else self._nacks
+            target.setdefault(queue_url, []).append(message['ReceiptHandle'])
+            self._in_flight.pop(message['MessageId'], None)
+            self._running -= 1
+            self._cond.notify_all()
+
+    # ==================== Acknowledge ====================
+
+    def _take(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        with self._cond:
+            acks, nacks = self._acks, self._nacks
+            self._acks, self._nacks = {}, {}
+        return acks, nacks
+
+    def flush(self) -> None:
+        """Delete finished messages and return failed ones, 10 per call."""
+        acks, nacks = self._take()
+        for queue_url, handles in acks.items():
+            for i in range(0, len(handles), SQS_BATCH_SIZE):
+                chunk = handles[i:i + SQS_BATCH_SIZE]
+                self._call_batch(
+                    self.sqs_client.delete_message_batch,
+                    queue_url,
+                    [{'Id': str(n), 'ReceiptHandle': handle} for n, handle in enumerate(chunk)],
+                    'delete'
+                )
+                self.acked += len(chunk)
+        for queue_url, handles in nacks.items():
+            for i in range(0, len(handles), SQS_BATCH_SIZE):
+                chunk = handles[i:i + SQS_BATCH_SIZE]
+                self._call_batch(
+                    self.sqs_client.change_message_visibility_batch,
+                    queue_url,
+                    [
+                        {'Id': str(n), 'ReceiptHandle': handle, 'VisibilityTimeout': self.retry_delay}
+                        for n, handle in enumerate(chunk)
+                    ],
+                    'return'
+                )
+                self.returned += len(chunk)
+
+    def _call_batch(self, call, queue_url: str, entries: List[Dict[str, Any]], action: str) -> None:
+        """Make one *Batch call; failures are logged (the message reappears after its timeout)."""
+        self.batch_calls += 1
+        try:
+            response = call(QueueUrl=queue_url, Entries=entries)
+        except Exception as e:
+            print(f"✗ Failed to {action} {len(entries)} SQS message(s): {e}")
+            return
+        for failure in response.get('Failed', []):
+            print(f"✗ Failed to {action} SQS message: {failure.get('Message', failure.get('Code'))}")
+        if action == 'delete':
+            print(f"✓ Deleted {len(entries) - len(response.get('Failed', []))} message(s) from SQS queue")
+        elif action == 'return':
+            print(f"⚠ {len(entries)} message(s) will become visible again in {self.retry_delay}s for retry")
+
+    def _flush_loop(self) -> None:
+        while not self._stopped:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"✗ Error acknowledging SQS messages: {e}")
+
+    # ==================== Heartbeat ====================
+
+    def extend_visibility(self) -> None:
+        """Reset the visibility timeout of every running task's message, 10 per call."""
+        with self._cond:
+            running = list(self._in_flight.values())
+        by_queue: Dict[str, List[Dict[str, Any]]] = {}
+        for queue_url, message in running:
+            by_queue.setdefault(queue_url, []).append(message)
+        for queue_url, messages in by_queue.items():
+            for i in range(0, len(messages), SQS_BATCH_SIZE):
+                chunk = messages[i:i + SQS_BATCH_SIZE]
+                self._call_batch(
+                    self.sqs_client.change_message_visibility_batch,
+                    queue_url,
+                    [
+                        {'Id': str(n), 'ReceiptHandle': m['ReceiptHandle'], 'VisibilityTimeout': self.visibility_timeout}
+                        for n, m in enumerate(chunk)
+                    ],
+                    'extend'
+                )
+                self.extended += len(chunk)
+        if running and self.on_heartbeat:
+            self.on_heartbeat([message for _, message in running])
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stopped:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                self.extend_visibility()
+            except Exception as e:
+                print(f"✗ Error extending SQS message visibility: {e}")
+
+    def drain(self) -> None:
+        """Wait for running tasks, then acknowledge everything (shutdown)."""
+        self._executor.shutdown(wait=True)
+        self._stopped = True
+        self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return consumer counters (for logs)."""
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "received": self.received,
+            "acked": self.acked,
+            "returned": self.returned,
+            "receive_calls": self.receive_calls,
+            "batch_calls": self.batch_calls,
+            "extended": self.extended
+        }
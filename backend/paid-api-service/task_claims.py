@@ -0,0 +1,213 @@
+"""
+Task Claims and Leases
+
+Shared by both adapters. Canonical copy: backend/shared/task_claims.py.
+Each service is deployed as a standalone directory, so
+backend/shared/sync.py copies this file next to
+comfyui-api-service/sqs_to_comfy_adapter.py and
+paid-api-service/sqs_adapter.py. Edit it there and re-run the sync.
+
+SQS delivers a message at least once, so a task is claimed in DynamoDB
+before it runs:
+
+- claim_task() moves the task to 'processing' with this worker's ID
+  (WORKER_ID, default "<hostname>:<pid>") and a lease (lease_expires_at).
+  Another worker's live lease means the message is retried later; a
+  finished task means a duplicate delivery.
+- renew_leases() extends this worker's leases from the consumer heartbeat
+  (sqs_consumer.BatchConsumer on_heartbeat).
+- update_task_status() never overwrites a cancelled task, drops the lease
+  of finished tasks and marks retryable failures, which the redelivered
+  message may claim again.
+
+Every function takes the task Table as its first argument; call
+get_table() per call in worker threads (boto3 resources are not
+thread-safe).
+"""
+
+import json
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+# Lifetime of finished task records in days (0 = keep the creation TTL)
+TASK_TERMINAL_TTL_DAYS = int(os.getenv('TASK_TERMINAL_TTL_DAYS', '14'))
+
+# Identifies this adapter process in task claims (worker_id on the task record)
+WORKER_ID = os.getenv('WORKER_ID') or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TaskCancelled(Exception):
+    """The task was cancelled through the orchestrator (DELETE /api/v1/jobs/{id})."""
+
+
+def update_task_status(
+    table,
+    task_id: str,
+    status: str,
+    error_message: Optional[str] = None,
+    retryable: bool = False,
+    started_at: Optional[float] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Update task status in DynamoDB.
+
+    Never overwrites a cancelled task. Finished tasks drop their lease; a
+    failure marked retryable lets the redelivered message claim it again.
+
+    Args:
+        table: Task table
+        task_id: Task ID
+        status: New status
+        error_message: Error message (failed tasks)
+        retryable: Let the redelivered message claim the failed task again
+        started_at: Replaces the claim time (e.g. when rendering started)
+        attributes: Further attributes to set (falsy values are skipped)
+
+    Raises:
+        TaskCancelled: If the task was cancelled
+    """
+    try:
+        current_time = int(time.time())
+        update_expr = "SET #status = :status, updated_at = :updated_at"
+        expr_attr_names = {'#status': 'status'}
+        expr_attr_values = {
+            ':status': status,
+            ':updated_at': current_time,
+            ':cancelled': 'cancelled'
+        }
+
+        if started_at:
+            update_expr += ", started_at = :started_at"
+            expr_attr_values[':started_at'] = int(started_at)
+        elif status == 'processing':
+            # First pickup time, used for queue wait / execution statistics
+            update_expr += ", started_at = if_not_exists(started_at, :updated_at)"
+
+        if status in ('completed', 'failed') and TASK_TERMINAL_TTL_DAYS:
+            # Terminal records expire via DynamoDB TTL (archived to S3 before that)
+            update_expr += ", #ttl = :ttl"
+            expr_attr_names['#ttl'] = 'ttl'
+            expr_attr_values[':ttl'] = current_time + TASK_TERMINAL_TTL_DAYS * 86400
+
+        if retryable:
+            update_expr += ", retryable = :true"
+            expr_attr_values[':true'] = True
+
+        if error_message:
+            update_expr += ", error_message = :error_message"
+            expr_attr_values[':error_message'] = error_message
+
+        for name, value in (attributes or {}).items():
+            if value:
+                update_expr += f", {name} = :{name}"
+                expr_attr_values[f':{name}'] = value
+
+        if status in ('completed', 'failed'):
+            update_expr += " REMOVE lease_expires_at"
+
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression=update_expr,
+            ConditionExpression="#status <> :cancelled",
+            ExpressionAttributeNames=expr_attr_names,
+            ExpressionAttributeValues=expr_attr_values
+        )
+        print(f"✓ Updated task {task_id} status to: {status}")
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            raise TaskCancelled(task_id)
+        print(f"✗ Error updating task status in DynamoDB: {e}")
+        raise
+
+    except Exception as e:
+        print(f"✗ Error updating task status in DynamoDB: {e}")
+        raise
+
+
+def claim_task(table, task_id: str, lease_seconds: int) -> str:
+    """
+    Claim a task for this worker before running it (exactly-once start).
+
+    The conditional update moves the task to 'processing' with this
+    worker's ID and a lease only if it is pending (or not written yet: the
+    orchestrator writes the record and sends the message concurrently),
+    its previous worker's lease expired, or it failed with a retry pending.
+
+    Args:
+        table: Task table
+        task_id: Task ID
+        lease_seconds: Lease length (renewed by the consumer heartbeat)
+
+    Returns:
+        'claimed' to run the task, 'done' if it already finished (duplicate
+        delivery: delete the message) or 'busy' if another worker holds a
+        live lease (retry the message later)
+
+    Raises:
+        TaskCancelled: If the task was cancelled
+    """
+    now = int(time.time())
+    try:
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression=(
+                "SET #status = :processing, updated_at = :now, started_at = if_not_exists(started_at, :now), "
+                "worker_id = :worker, lease_expires_at = :lease REMOVE retryable"
+            ),
+            ConditionExpression=(
+                "attribute_not_exists(task_id) OR #status = :pending"
+                " OR (#status = :processing AND lease_expires_at < :now)"
+                " OR (#status = :failed AND retryable = :true)"
+            ),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':processing': 'processing',
+                ':pending': 'pending',
+                ':failed': 'failed',
+                ':true': True,
+                ':now': now,
+                ':worker': WORKER_ID,
+                ':lease': now + lease_seconds
+            }
+        )
+        print(f"✓ Claimed task {task_id} as {WORKER_ID}")
+        return 'claimed'
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+    item = table.get_item(Key={'task_id': task_id}, ConsistentRead=True).get('Item') or {}
+    status = item.get('status')
+    if status == 'cancelled':
+        raise TaskCancelled(task_id)
+    if status == 'processing':
+        print(f"⚠ Task {task_id} is being processed by {item.get('worker_id')}, retrying later")
+        return 'busy'
+    print(f"⊘ Task {task_id} is already {status}, skipping duplicate delivery")
+    return 'done'
+
+
+def renew_leases(table, messages: List[Dict[str, Any]], lease_seconds: int) -> None:
+    """Extend this worker's lease on the running tasks (consumer heartbeat)."""
+    expires_at = int(time.time()) + lease_seconds
+    for message in messages:
+        task_id = json.loads(message['Body']).get('task_id')
+        try:
+            table.update_item(
+                Key={'task_id': task_id},
+                UpdateExpression="SET lease_expires_at = :lease",
+                ConditionExpression="worker_id = :worker AND #status = :processing",
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':lease': expires_at, ':worker': WORKER_ID, ':processing': 'processing'}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                print(f"⚠ Task {task_id} is no longer leased by this worker")
+            else:
+                print(f"✗ Error renewing lease of task {task_id}: {e}")
@@ -0,0 +1,85 @@
+import json
+import pathlib
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+# Ensure the adapter and its vendored modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture()
+def adapter(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with mock_aws():
+        import importlib
+
+        import aws_clients
+
+        aws_clients.reset()
+        adapter = importlib.import_module("sqs_adapter")
+        monkeypatch.setattr("task_claims.WORKER_ID", "worker-a")
+        boto3.resource("dynamodb", region_name=adapter.AWS_REGION).create_table(
+            TableName=adapter.DYNAMODB_TABLE,
+            KeySchema=[{"AttributeName": "task_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "task_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        yield adapter
+        aws_clients.reset()
+
+
+def put(adapter, **item) -> None:
+    adapter.task_table().put_item(Item={"task_id": "t1", **item})
+
+
+def get(adapter) -> dict:
+    return adapter.task_table().get_item(Key={"task_id": "t1"})["Item"]
+
+
+class FakeResponse:
+    def __init__(self, body: dict) -> None:
+        self.body = body
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self.body
+
+
+def message(task_id: str) -> dict:
+    body = {"task_id": task_id, "task_type": "face-swap", "api_path": "/api/v1/face-swap/jobs", "request_body": {}}
+    return {"MessageId": task_id, "ReceiptHandle": task_id, "Body": json.dumps(body)}
+
+
+def test_task_runs_once_and_records_the_paid_api_result(adapter, monkeypatch: pytest.MonkeyPatch):
+    posts = []
+
+    def post(url, json=None, timeout=None):
+        posts.append(url)
+        return FakeResponse({"job_id": "api-1", "status": "pending"})
+
+    monkeypatch.setattr(adapter.requests, "post", post)
+    monkeypatch.setattr(adapter.requests, "get", lambda url, timeout=None: FakeResponse(
+        {"job_id": "api-1", "status": "completed", "result_url": "https://cdn/r.png"}
+    ))
+    put(adapter, status="pending")
+
+    assert adapter.process_task(message("t1")) is True
+
+    item = get(adapter)
+    assert item["status"] == "completed"
+    assert item["result_url"] == "https://cdn/r.png"
+    assert item["api_job_id"] == "api-1"
+    assert item["worker_id"] == "worker-a"
+    assert "lease_expires_at" not in item
+
+    # Duplicate delivery: acknowledged without calling the Paid API again
+    assert adapter.process_task(message("t1")) is True
+    assert len(posts) == 1
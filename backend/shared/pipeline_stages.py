@@ -0,0 +1,205 @@
+"""
+Pipeline Stage Hand-Off
+
+Shared by the orchestrator and both adapters. Canonical copy:
+backend/shared/pipeline_stages.py. Each service is deployed as a
+standalone directory, so backend/shared/sync.py copies this file next to
+the orchestrator and both adapters. Edit it there and re-run the sync.
+
+A pipeline (POST /api/v1/pipelines) is a DAG of ordinary tasks. Every stage
+has a task record from the start; a stage with dependencies waits in status
+'waiting' with everything needed to enqueue it:
+
+- stage_message: its SQS message body (JSON), with inputs still holding
+  "{{step.result_url}}" references
+- stage_queue_url: the CPU or GPU queue the stage runs on
+- waiting_on: number of unfinished dependencies
+- stage_outputs: result URLs of finished dependencies, by step ID
+- next_stages: task IDs of the stages that depend on it
+
+Every stage message carries {"pipeline": {"id", "step", "next_stages"}}.
+When a stage completes, the adapter that ran it calls finish_stage(), which
+records the result on each downstream stage and decrements its counter in
+one conditional update. The update that brings a stage to zero enqueues
+it, so every stage is enqueued exactly once, the moment its inputs exist.
+A failed or cancelled stage fails (or cancels) everything downstream.
+"""
+
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from botocore.exceptions import ClientError
+
+# Lifetime of finished task records in days (0 = keep the creation TTL)
+TASK_TERMINAL_TTL_DAYS = int(os.getenv('TASK_TERMINAL_TTL_DAYS', '14'))
+
+# A request value that is exactly "{{<step id>.result_url}}"
+REFERENCE = re.compile(r'^\{\{([A-Za-z0-9_-]+)\.result_url\}\}$')
+
+
+def find_references(value: Any) -> Set[str]:
+    """Return the step IDs referenced anywhere in a request body."""
+    if isinstance(value, str):
+        match = REFERENCE.match(value)
+        return {match.group(1)} if match else set()
+    if isinstance(value, dict):
+        return set().union(*(find_references(v) for v in value.values()))
+    if isinstance(value, list):
+        return set().union(*(find_references(v) for v in value))
+    return set()
+
+
+def resolve_references(value: Any, outputs: Dict[str, str]) -> Any:
+    """Replace every "{{step.result_url}}" reference with that step's result URL."""
+    if isinstance(value, str):
+        match = REFERENCE.match(value)
+        return outputs[match.group(1)] if match else value
+    if isinstance(value, dict):
+        return {k: resolve_references(v, outputs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(v, outputs) for v in value]
+    return value
+
+
+def _is_condition_failure(error: ClientError) -> bool:
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def _terminal_update(status: str, now: int, error_message: Optional[str] = None):
+    update_expr = "SET #status = :status, updated_at = :now"
+    names = {'#status': 'status'}
+    values = {':status': status, ':now': now, ':waiting': 'waiting'}
+    if error_message:
+        update_expr += ", error_message = :error_message"
+        values[':error_message'] = error_message
+    if TASK_TERMINAL_TTL_DAYS:
+        update_expr += ", #ttl = :ttl"
+        names['#ttl'] = 'ttl'
+        values[':ttl'] = now + TASK_TERMINAL_TTL_DAYS * 86400
+    return update_expr, names, values
+
+
+def skip_stages(table, task_ids: Iterable[str], status: str, reason: str) -> None:
+    """
+    Mark waiting stages (and everything downstream of them) failed or cancelled.
+
+    Args:
+        table: boto3 DynamoDB Table of the task store
+        task_ids: Task IDs of the stages to skip
+        status: 'failed' or 'cancelled'
+        reason: Error message recorded on each stage
+    """
+    for task_id in task_ids:
+        update_expr, names, values = _terminal_update(status, int(time.time()), reason)
+        try:
+            item = table.update_item(
+                Key={'task_id': task_id},
+                UpdateExpression=update_expr,
+                ConditionExpression="#status = :waiting",
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW'
+            )['Attributes']
+        except ClientError as e:
+            if _is_condition_failure(e):
+                continue  # Already enqueued, finished or skipped
+            raise
+        print(f"⊘ Pipeline stage {task_id} {status}: {reason}")
+        skip_stages(table, item.get('next_stages', []), status, reason)
+
+
+def release_stage(table, sqs_client, task_id: str, step: str, result_url: str) -> bool:
+    """
+    Record a finished dependency on a waiting stage; enqueue it if it was the last.
+
+    Args:
+        table: boto3 DynamoDB Table of the task store
+        sqs_client: boto3 SQS client
+        task_id: Task ID of the downstream stage
+        step: Step ID of the finished dependency
+        result_url: Result URL of the finished dependency
+
+    Returns:
+        True if this call enqueued the stage
+    """
+    now = int(time.time())
+    try:
+        # The attribute_not_exists guard makes a repeated hand-off a no-op
+        item = table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression="SET stage_outputs.#step = :url, updated_at = :now ADD waiting_on :minus_one",
+            ConditionExpression="#status = :waiting AND attribute_not_exists(stage_outputs.#step)",
+            ExpressionAttributeNames={'#status': 'status', '#step': step},
+            ExpressionAttributeValues={':url': result_url, ':now': now, ':minus_one': -1, ':waiting': 'waiting'},
+            ReturnValues='ALL_NEW'
+        )['Attributes']
+    except ClientError as e:
+        if _is_condition_failure(e):
+            print(f"⚠ Pipeline stage {task_id} is no longer waiting, not released")
+            return False
+        raise
+
+    if item['waiting_on'] > 0:
+        return False
+
+    try:
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression="SET #status = :pending, updated_at = :now",
+            ConditionExpression="#status = :waiting",
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':pending': 'pending', ':now': now, ':waiting': 'waiting'}
+        )
+    except ClientError as e:
+        if _is_condition_failure(e):
+            return False  # Cancelled meanwhile
+        raise
+
+    message = json.loads(item['stage_message'])
+    message['request_body'] = resolve_references(message['request_body'], item['stage_outputs'])
+    try:
+        sqs_client.send_message(QueueUrl=item['stage_queue_url'], MessageBody=json.dumps(message))
+    except ClientError as e:
+        reason = f"Failed to queue pipeline stage: {e}"
+        update_expr, names, values = _terminal_update('failed', int(time.time()), reason)
+        table.update_item(
+            Key={'task_id': task_id},
+            UpdateExpression=update_expr,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        skip_stages(table, item.get('next_stages', []), 'failed', reason)
+        raise
+
+    print(f"✓ Pipeline stage {task_id} enqueued")
+    return True
+
+
+def finish_stage(table, sqs_client, message_body: Dict[str, Any], status: str, result_url: Optional[str] = None) -> None:
+    """
+    Hand a finished task over to the pipeline stages that depend on it.
+
+    No-op for tasks that are not part of a pipeline.
+
+    Args:
+        table: boto3 DynamoDB Table of the task store
+        sqs_client: boto3 SQS client
+        message_body: Parsed SQS message of the finished task
+        status: 'completed', 'failed' or 'cancelled'
+        result_url: Result URL of a completed task
+    """
+    pipeline = message_body.get('pipeline') or {}
+    next_stages = pipeline.get('next_stages') or []
+    if not next_stages:
+        return
+
+    if status == 'completed' and result_url:
+        for task_id in next_stages:
+            release_stage(table, sqs_client, task_id, pipeline['step'], result_url)
+    else:
+        skipped = 'cancelled' if status == 'cancelled' else 'failed'
+        reason = f"Upstream step '{pipeline['step']}' {status}" + ('' if status != 'completed' else ' without a result')
+        skip_stages(table, next_stages, skipped, reason)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Shared Module Sync
+
+Each backend service is deployed as a standalone directory (its own
+Docker build context, or scp'd to the GPU / CPU instance), so modules used
+by more than one service are vendored into each of them. The files in
+backend/shared/ are the canonical copies; never edit a vendored copy.
+
+Usage:
+    python backend/shared/sync.py           # copy the shared modules into the services
+    python backend/shared/sync.py --check   # exit 1 if any copy differs
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+SHARED_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SHARED_DIR.parent
+
+# Shared module -> vendored copies (relative to backend/)
+COPIES: Dict[str, List[str]] = {
+    'aws_clients.py': [
+        'orchestrator/aws/clients.py',
+        'canvas_service/aws_clients.py',
+        'comfyui-api-service/aws_clients.py',
+        'paid-api-service/aws_clients.py',
+    ],
+    'pipeline_stages.py': [
+        'orchestrator/pipeline_stages.py',
+        'comfyui-api-service/pipeline_stages.py',
+        'paid-api-service/pipeline_stages.py',
+    ],
+    'sqs_consumer.py': [
+        'comfyui-api-service/sqs_consumer.py',
+        'paid-api-service/sqs_consumer.py',
+    ],
+    'task_claims.py': [
+        'comfyui-api-service/task_claims.py',
+        'paid-api-service/task_claims.py',
+    ],
+}
+
+
+def stale_copies() -> List[str]:
+    """
+    Find vendored copies that differ from their shared module.
+
+    Returns:
+        Paths (relative to backend/) of missing or outdated copies
+    """
+    stale = []
+    for name, copies in COPIES.items():
+        source = (SHARED_DIR / name).read_bytes()
+        for copy in copies:
+            path = BACKEND_DIR / copy
+            if not path.exists() or path.read_bytes() != source:
+                stale.append(copy)
+    return stale
+
+
+def sync() -> List[str]:
+    """
+    Overwrite every outdated copy with its shared module.
+
+    Returns:
+        Paths (relative to backend/) of the copies that were written
+    """
+    written = stale_copies()
+    for name, copies in COPIES.items():
+        for copy in copies:
+            if copy in written:
+                (BACKEND_DIR / copy).write_bytes((SHARED_DIR / name).read_bytes())
+    return written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='Only report copies that differ (exit 1 if any)')
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_copies()
+        for copy in stale:
+            print(f"Out of sync with backend/shared: {copy}")
+        return 1 if stale else 0
+
+    for copy in sync():
+        print(f"Updated {copy}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import json
+import pathlib
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+# Ensure shared modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pipeline_stages import find_references, finish_stage, resolve_references  # noqa: E402
+
+
+@pytest.fixture()
+def aws(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="task_store",
+            KeySchema=[{"AttributeName": "task_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "task_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        sqs = boto3.client("sqs", region_name="us-east-1")
+        queue_url = sqs.create_queue(QueueName="gpu_tasks_queue")["QueueUrl"]
+        yield table, sqs, queue_url
+
+
+def waiting_stage(table, queue_url: str, task_id: str, waiting_on: int, next_stages=()) -> None:
+    table.put_item(Item={
+        "task_id": task_id,
+        "status": "waiting",
+        "waiting_on": waiting_on,
+        "stage_outputs": {},
+        "next_stages": list(next_stages),
+        "stage_queue_url": queue_url,
+        "stage_message": json.dumps({
+            "task_id": task_id,
+            "request_body": {"image_url": "{{a.result_url}}", "image2_url": "{{b.result_url}}"}
+        })
+    })
+
+
+def finished(step: str, next_stages, status: str = "completed", result_url: str | None = None):
+    return {"pipeline": {"id": "p", "step": step, "next_stages": list(next_stages)}}, status, result_url
+
+
+def received(sqs, queue_url: str):
+    return sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages", [])
+
+
+def test_references():
+    body = {"image_url": "{{a.result_url}}", "nested": ["{{b.result_url}}", "x"], "prompt": "not {{a.result_url}}"}
+
+    assert find_references(body) == {"a", "b"}
+    assert resolve_references(body, {"a": "s3://r/a.png", "b": "s3://r/b.png"}) == {
+        "image_url": "s3://r/a.png", "nested": ["s3://r/b.png", "x"], "prompt": "not {{a.result_url}}"
+    }
+
+
+def test_stage_is_enqueued_once_after_its_last_dependency(aws):
+    table, sqs, queue_url = aws
+    waiting_stage(table, queue_url, "c", waiting_on=2)
+
+    finish_stage(table, sqs, *finished("a", ["c"], result_url="s3://r/a.png"))
+    assert received(sqs, queue_url) == []
+
+    # A redelivered hand-off of the same step is a no-op
+    finish_stage(table, sqs, *finished("a", ["c"], result_url="s3://r/a.png"))
+    finish_stage(table, sqs, *finished("b", ["c"], result_url="s3://r/b.png"))
+
+    messages = received(sqs, queue_url)
+    assert len(messages) == 1
+    assert json.loads(messages[0]["Body"])["request_body"] == {"image_url": "s3://r/a.png", "image2_url": "s3://r/b.png"}
+    assert table.get_item(Key={"task_id": "c"})["Item"]["status"] == "pending"
+
+
+def test_failed_stage_fails_everything_downstream(aws):
+    table, sqs, queue_url = aws
+    waiting_stage(table, queue_url, "c", waiting_on=1, next_stages=["d"])
+    waiting_stage(table, queue_url, "d", waiting_on=1)
+
+    finish_stage(table, sqs, *finished("a", ["c"], status="failed"))
+
+    for task_id in ("c", "d"):
+        item = table.get_item(Key={"task_id": task_id})["Item"]
+        assert item["status"] == "failed"
+        assert item["error_message"] == "Upstream step 'a' failed"
+    assert received(sqs, queue_url) == []
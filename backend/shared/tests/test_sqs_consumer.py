@@ -0,0 +1,112 @@
+import pathlib
+import sys
+import threading
+from typing import Any, Dict, List
+
+import pytest
+
+
+# Ensure shared modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from sqs_consumer import BatchConsumer  # noqa: E402
+
+
+class FakeSqs:
+    def __init__(self, messages: int = 0) -> None:
+        self.available = [self.message(n) for n in range(messages)]
+        self.receives: List[Dict[str, Any]] = []
+        self.deleted: List[str] = []
+        self.visibility: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def message(n: int) -> Dict[str, Any]:
+        return {"MessageId": f"m{n}", "ReceiptHandle": f"r{n}", "Body": "{}"}
+
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int, **kwargs: Any) -> Dict[str, Any]:  # noqa: N803
+        self.receives.append({"QueueUrl": QueueUrl, "MaxNumberOfMessages": MaxNumberOfMessages, **kwargs})
+        taken, self.available = self.available[:MaxNumberOfMessages], self.available[MaxNumberOfMessages:]
+        return {"Messages": taken}
+
+    def delete_message_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]]) -> Dict[str, Any]:  # noqa: N803
+        assert len(Entries) <= 10
+        self.deleted.extend(entry["ReceiptHandle"] for entry in Entries)
+        return {"Successful": Entries, "Failed": []}
+
+    def change_message_visibility_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]]) -> Dict[str, Any]:  # noqa: N803
+        assert len(Entries) <= 10
+        self.visibility.extend(Entries)
+        return {"Successful": Entries, "Failed": []}
+
+
+@pytest.fixture()
+def release():
+    # Handlers block on this event so tasks stay running until a test lets them go
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_receive_never_asks_for_more_than_free_slots(release):
+    sqs = FakeSqs(messages=20)
+    consumer = BatchConsumer(sqs, lambda message: release.wait(5), concurrency=3, visibility_timeout=120)
+
+    consumer.submit(consumer.receive("q", wait_time=0), "q")
+    assert sqs.receives[0]["MaxNumberOfMessages"] == 3
+    assert sqs.receives[0]["VisibilityTimeout"] == 120
+    assert consumer.free_slots() == 0
+    assert consumer.receive("q", wait_time=0) == []
+    assert len(sqs.receives) == 1
+
+    release.set()
+    consumer.drain()
+
+
+def test_finished_messages_are_deleted_and_failed_ones_returned():
+    sqs = FakeSqs(messages=12)
+    done = {f"m{n}": n % 3 != 0 for n in range(12)}
+    consumer = BatchConsumer(sqs, lambda message: done[message["MessageId"]], concurrency=12, retry_delay=45)
+
+    consumer.submit(consumer.receive("q", wait_time=0), "q")
+    consumer.submit(consumer.receive("q", wait_time=0), "q")
+    consumer.drain()
+
+    assert sorted(sqs.deleted) == sorted(f"r{n}" for n in range(12) if n % 3)
+    assert sorted(entry["ReceiptHandle"] for entry in sqs.visibility) == ["r0", "r3", "r6", "r9"]
+    assert {entry["VisibilityTimeout"] for entry in sqs.visibility} == {45}
+
+
+def test_handler_exception_returns_the_message():
+    def fail(message: Dict[str, Any]) -> bool:
+        raise RuntimeError("boom")
+
+    sqs = FakeSqs(messages=1)
+    consumer = BatchConsumer(sqs, fail, concurrency=1)
+    consumer.submit(consumer.receive("q", wait_time=0), "q")
+    consumer.drain()
+
+    assert sqs.deleted == []
+    assert [entry["ReceiptHandle"] for entry in sqs.visibility] == ["r0"]
+
+
+def test_heartbeat_extends_running_messages_only(release):
+    sqs = FakeSqs(messages=2)
+    heartbeats: List[List[str]] = []
+    consumer = BatchConsumer(
+        sqs,
+        lambda message: message["MessageId"] == "m0" or release.wait(5),
+        concurrency=2,
+        visibility_timeout=300,
+        on_heartbeat=lambda messages: heartbeats.append([m["MessageId"] for m in messages])
+    )
+    consumer.submit(consumer.receive("q", wait_time=0), "q")
+    assert consumer.wait_for_slot(timeout=5)  # m0 finished
+
+    consumer.extend_visibility()
+
+    assert sqs.visibility == [{"Id": "0", "ReceiptHandle": "r1", "VisibilityTimeout": 300}]
+    assert heartbeats == [["m1"]]
+
+    release.set()
+    consumer.drain()
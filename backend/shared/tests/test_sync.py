@@ -0,0 +1,19 @@
+import pathlib
+import sys
+
+
+# Ensure shared modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import sync  # noqa: E402
+
+
+def test_vendored_copies_match_shared_modules():
+    # Run `python backend/shared/sync.py` after editing a shared module
+    assert sync.stale_copies() == []
+
+
+def test_every_shared_module_is_vendored():
+    shared = {path.name for path in ROOT.glob("*.py") if path.name != "sync.py"}
+    assert shared == set(sync.COPIES)
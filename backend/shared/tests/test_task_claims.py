@@ -0,0 +1,119 @@
+import json
+import pathlib
+import sys
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+# Ensure shared modules are importable
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import task_claims  # noqa: E402
+
+
+@pytest.fixture()
+def table(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setattr(task_claims, "WORKER_ID", "worker-a")
+    with mock_aws():
+        yield boto3.resource("dynamodb", region_name="us-east-1").create_table(
+            TableName="task_store",
+            KeySchema=[{"AttributeName": "task_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "task_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+
+
+def put(table, **item) -> None:
+    table.put_item(Item={"task_id": "t1", **item})
+
+
+def get(table) -> dict:
+    return table.get_item(Key={"task_id": "t1"})["Item"]
+
+
+def test_claims_pending_task_with_lease(table):
+    put(table, status="pending")
+
+    assert task_claims.claim_task(table, "t1", 300) == "claimed"
+
+    item = get(table)
+    assert item["status"] == "processing"
+    assert item["worker_id"] == "worker-a"
+    assert item["lease_expires_at"] >= int(time.time()) + 299
+
+
+def test_claims_task_whose_record_is_not_written_yet(table):
+    assert task_claims.claim_task(table, "t1", 300) == "claimed"
+    assert get(table)["status"] == "processing"
+
+
+def test_live_lease_of_another_worker_is_busy(table):
+    put(table, status="processing", worker_id="worker-b", lease_expires_at=int(time.time()) + 60)
+
+    assert task_claims.claim_task(table, "t1", 300) == "busy"
+    assert get(table)["worker_id"] == "worker-b"
+
+
+def test_expired_lease_is_taken_over(table):
+    put(table, status="processing", worker_id="worker-b", lease_expires_at=int(time.time()) - 1)
+
+    assert task_claims.claim_task(table, "t1", 300) == "claimed"
+    assert get(table)["worker_id"] == "worker-a"
+
+
+def test_retryable_failure_is_claimed_again(table):
+    put(table, status="failed", retryable=True)
+
+    assert task_claims.claim_task(table, "t1", 300) == "claimed"
+    assert "retryable" not in get(table)
+
+
+def test_duplicate_delivery_of_finished_task_is_done(table):
+    put(table, status="completed")
+
+    assert task_claims.claim_task(table, "t1", 300) == "done"
+    assert get(table)["status"] == "completed"
+
+
+def test_cancelled_task_is_not_claimed(table):
+    put(table, status="cancelled")
+
+    with pytest.raises(task_claims.TaskCancelled):
+        task_claims.claim_task(table, "t1", 300)
+
+
+def test_heartbeat_renews_only_own_lease(table):
+    put(table, status="processing", worker_id="worker-a", lease_expires_at=1)
+    table.put_item(Item={"task_id": "t2", "status": "processing", "worker_id": "worker-b", "lease_expires_at": 1})
+    messages = [{"Body": json.dumps({"task_id": task_id})} for task_id in ("t1", "t2")]
+
+    task_claims.renew_leases(table, messages, 300)
+
+    assert get(table)["lease_expires_at"] >= int(time.time()) + 299
+    assert table.get_item(Key={"task_id": "t2"})["Item"]["lease_expires_at"] == 1
+
+
+def test_finished_task_drops_its_lease(table):
+    put(table, status="processing", worker_id="worker-a", lease_expires_at=1)
+
+    task_claims.update_task_status(table, "t1", "completed", attributes={"result_url": "https://cdn/r.png", "api_job_id": None})
+
+    item = get(table)
+    assert item["status"] == "completed"
+    assert item["result_url"] == "https://cdn/r.png"
+    assert "api_job_id" not in item
+    assert "lease_expires_at" not in item
+
+
+def test_cancelled_task_is_not_overwritten(table):
+    put(table, status="cancelled")
+
+    with pytest.raises(task_claims.TaskCancelled):
+        task_claims.update_task_status(table, "t1", "completed")
+    assert get(table)["status"] == "cancelled"
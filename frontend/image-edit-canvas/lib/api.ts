@@ -61,6 +61,8 @@ export interface JobResponse {
   status: JobStatus
   result_url?: string
   error?: string
+  estimated_start?: number  // epoch seconds, pending/processing jobs only
+  estimated_completion?: number
 }
 
 // ==================== Orchestrator API Functions ====================
@@ -124,58 +126,193 @@ export async function getJobStatus(jobId: string): Promise<JobResponse> {
   return res.json()
 }
 
+export interface JobStatusBatchResponse {
+  jobs: Record<string, Omit<JobResponse, 'job_id'>>
+  not_found: string[]
+}
+
 /**
- * Poll a job until it completes or fails
- * Polls every 1 second, returns when job is completed or failed
- *
- * Includes retry logic: if job not found (404), retries up to 3 times
- * before throwing an error. This handles eventual consistency issues.
- *
- * @param jobId - The job ID to poll
- * @param onUpdate - Optional callback called on each status update
- * @returns The final job response when completed or failed
+ * Get the status of up to 100 jobs in a single request
  */
-export async function pollJobStatus(
-  jobId: string,
+export async function getJobStatuses(jobIds: string[]): Promise<JobStatusBatchResponse> {
+  const res = await fetch(`${ORCH_BASE}/api/v1/jobs/status`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ job_ids: jobIds }),
+  })
+  if (!res.ok) {
+    const text = await res.text().catch(() => '')
+    throw new Error(`Get job statuses failed: ${res.status} ${text}`)
+  }
+  return res.json()
+}
+
+// ==================== Shared Job Watcher ====================
+// pollJobStatus subscribes jobs on one shared WebSocket to the orchestrator,
+// which pushes status changes as they happen. If the socket is unavailable
+// (or already watches 100 jobs) jobs fall back to one bulk status request
+// per tick, so the request rate stays at 1/s no matter how many jobs are
+// in flight.
+
+const POLL_INTERVAL_MS = 1000
+const MAX_STATUS_BATCH = 100
+// Not-found ticks tolerated per job (handles eventual consistency right after submit)
+const MAX_NOT_FOUND_TICKS = 6
+const WS_URL = `${ORCH_BASE.replace(/^http/, 'ws')}/api/v1/jobs/ws`
+
+interface JobWatcher {
   onUpdate?: (status: JobResponse) => void
-): Promise<JobResponse> {
-  let notFoundRetries = 0
-  const maxNotFoundRetries = 3
+  resolve: (status: JobResponse) => void
+  reject: (error: Error) => void
+  notFoundTicks: number
+}
 
-  while (true) {
-    try {
-      const status = await getJobStatus(jobId)
+const watchers = new Map<string, JobWatcher[]>()
+let pollTimer: ReturnType<typeof setTimeout> | null = null
 
-      // Reset retry counter on successful fetch
-      notFoundRetries = 0
+// Jobs currently watched over the socket (the rest are polled)
+const socketJobs = new Set<string>()
+let socket: WebSocket | null = null
+let socketUnavailable = false
 
-      onUpdate?.(status)
+function applyStatus(status: JobResponse) {
+  const jobWatchers = watchers.get(status.job_id) || []
+  for (const w of jobWatchers) {
+    w.notFoundTicks = 0
+    w.onUpdate?.(status)
+  }
 
-      if (status.status === 'completed' || status.status === 'failed') {
-        return status
-      }
+  if (status.status === 'completed' || status.status === 'failed') {
+    jobWatchers.forEach(w => w.resolve(status))
+    watchers.delete(status.job_id)
+    socketJobs.delete(status.job_id)
+  }
+}
 
-      // Wait 1 second before next poll
-      await new Promise(resolve => setTimeout(resolve, 1000))
-    } catch (error) {
-      // Handle "Job not found" (404) errors with retry logic
-      if (error instanceof Error && error.message.includes('404')) {
-        notFoundRetries++
-        console.warn(`Job ${jobId} not found (attempt ${notFoundRetries}/${maxNotFoundRetries}), retrying...`)
-
-        if (notFoundRetries >= maxNotFoundRetries) {
-          // After max retries, throw the error
-          throw new Error(`Job ${jobId} not found after ${maxNotFoundRetries} retries`)
+function rejectJob(jobId: string, error: Error) {
+  (watchers.get(jobId) || []).forEach(w => w.reject(error))
+  watchers.delete(jobId)
+  socketJobs.delete(jobId)
+}
+
+function sendSubscribe(jobIds: string[]) {
+  if (socket && socket.readyState === WebSocket.OPEN && jobIds.length > 0) {
+    socket.send(JSON.stringify({ action: 'subscribe', job_ids: jobIds }))
+  }
+}
+
+function openSocket() {
+  const ws = new WebSocket(WS_URL)
+  let opened = false
+  socket = ws
+
+  ws.onopen = () => {
+    opened = true
+    sendSubscribe(Array.from(socketJobs))
+  }
+
+  ws.onmessage = (event) => {
+    const update = JSON.parse(event.data)
+    if (!update.job_id || !watchers.has(update.job_id)) return
+    if (update.status === 'not_found') {
+      rejectJob(update.job_id, new Error(`Job ${update.job_id} not found after ${MAX_NOT_FOUND_TICKS} retries`))
+      return
+    }
+    applyStatus(update as JobResponse)
+  }
+
+  ws.onclose = () => {
+    socket = null
+    // Never connected (e.g. proxy without WebSocket support): stop trying
+    if (!opened) socketUnavailable = true
+    // Hand every socket job over to the bulk poller
+    socketJobs.clear()
+    schedulePollTick()
+  }
+}
+
+function watchOverSocket(jobId: string): boolean {
+  if (socketUnavailable || typeof WebSocket === 'undefined') return false
+  if (socketJobs.has(jobId)) return true
+  if (socketJobs.size >= MAX_STATUS_BATCH) return false
+
+  socketJobs.add(jobId)
+  if (!socket) openSocket()
+  else sendSubscribe([jobId])
+  return true
+}
+
+function polledJobIds(): string[] {
+  return Array.from(watchers.keys()).filter(jobId => !socketJobs.has(jobId))
+}
+
+function schedulePollTick() {
+  if (pollTimer === null && polledJobIds().length > 0) {
+    pollTimer = setTimeout(runPollTick, POLL_INTERVAL_MS)
+  }
+}
+
+async function runPollTick() {
+  const jobIds = polledJobIds()
+
+  for (let i = 0; i < jobIds.length; i += MAX_STATUS_BATCH) {
+    const chunk = jobIds.slice(i, i + MAX_STATUS_BATCH)
+    try {
+      const result = await getJobStatuses(chunk)
+
+      for (const jobId of chunk) {
+        const jobWatchers = watchers.get(jobId) || []
+        const entry = result.jobs[jobId]
+
+        if (!entry) {
+          for (const w of jobWatchers) w.notFoundTicks++
+          const expired = jobWatchers.filter(w => w.notFoundTicks >= MAX_NOT_FOUND_TICKS)
+          if (expired.length > 0) {
+            console.warn(`Job ${jobId} not found after ${MAX_NOT_FOUND_TICKS} polls`)
+            expired.forEach(w => w.reject(new Error(`Job ${jobId} not found after ${MAX_NOT_FOUND_TICKS} retries`)))
+            const remaining = jobWatchers.filter(w => !expired.includes(w))
+            if (remaining.length > 0) watchers.set(jobId, remaining)
+            else watchers.delete(jobId)
+          }
+          continue
         }
 
-        // Wait 2 seconds before retrying on 404
-        await new Promise(resolve => setTimeout(resolve, 2000))
-      } else {
-        // For other errors, throw immediately
-        throw error
+        applyStatus({ job_id: jobId, ...entry })
       }
+    } catch (error) {
+      // Network/server errors fail every job in this chunk, as before
+      const err = error instanceof Error ? error : new Error(String(error))
+      chunk.forEach(jobId => rejectJob(jobId, err))
     }
   }
+
+  pollTimer = null
+  schedulePollTick()
+}
+
+/**
+ * Watch a job until it completes or fails
+ *
+ * Status changes are pushed over a shared WebSocket to the orchestrator.
+ * Without a socket, all in-flight jobs are batched into a single
+ * POST /api/v1/jobs/status request per second. If the job is not found
+ * (eventual consistency right after submit), it is retried for a few
+ * ticks before throwing an error.
+ *
+ * @param jobId - The job ID to poll
+ * @param onUpdate - Optional callback called on each status update
+ * @returns The final job response when completed or failed
+ */
+export function pollJobStatus(
+  jobId: string,
+  onUpdate?: (status: JobResponse) => void
+): Promise<JobResponse> {
+  return new Promise<JobResponse>((resolve, reject) => {
+    const jobWatchers = watchers.get(jobId) || []
+    jobWatchers.push({ onUpdate, resolve, reject, notFoundTicks: 0 })
+    watchers.set(jobId, jobWatchers)
+    if (!watchOverSocket(jobId)) schedulePollTick()
+  })
 }
 
 // ==================== Face Mask & Face Swap (CPU Tasks) ====================